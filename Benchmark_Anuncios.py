@@ -0,0 +1,144 @@
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import shutil
+import tempfile
+import time
+
+from Benchmark_Comandos import DIRECTORIO, cargar_bot
+
+# Benchmark del programador de anuncios (`+anunciar`, `+anuncios`, `+cancelar`).
+# El programador recibe un reloj falso que solo avanza cuando se le pide (`RelojFalso`), así se puede hacer vencer de
+# golpe una hora de anuncios. Mide cuánto tarda en programar, cargar y enviar `--anuncios` anuncios con una sola
+# tarea, y cuánto se retrasa el bucle de eventos mientras los envía.
+# Las comprobaciones (expresiones cron, anuncios únicos y periódicos, cancelación y reinicios con cada política) están
+# en `tests/test_anuncios.py`, que usa el mismo reloj falso.
+#
+# Uso:
+#   python Benchmark_Anuncios.py
+#   python Benchmark_Anuncios.py --anuncios 50000
+
+class RelojFalso:
+    # Sustituye a `time.time` y a la espera del programador: el tiempo solo avanza con `avanzar`.
+    def __init__(self, inicio):
+        self.ahora = inicio
+
+    def __call__(self):
+        return self.ahora
+
+    async def esperar(self, evento, segundos):
+        await evento.wait()
+
+class Envios:
+    # Sustituye al envío a Discord: guarda qué anuncio se envió y en qué momento del reloj falso.
+    def __init__(self, reloj):
+        self.reloj = reloj
+        self.lista = []
+
+    async def enviar(self, anuncio):
+        self.lista.append((anuncio.id, self.reloj()))
+
+async def esperar_a(condicion, limite=30):
+    final = time.perf_counter() + limite
+    while not condicion() and time.perf_counter() < final:
+        await asyncio.sleep(0.001)
+    return condicion()
+
+async def procesar(programador, reloj):
+    # Espera a que el programador envíe todo lo que vence hasta la hora actual del reloj falso.
+    programador.despertar()
+    await esperar_a(lambda: not programador._monticulo or programador._monticulo[0][0] > reloj.ahora)
+    await esperar_a(lambda: not programador._envios)
+
+async def avanzar(programador, reloj, hasta):
+    # Avanza el reloj falso hasta `hasta` saltando de un anuncio programado al siguiente, como si el tiempo pasara.
+    await procesar(programador, reloj)
+    while reloj.ahora < hasta:
+        reloj.ahora = min(programador._monticulo[0][0], hasta) if programador._monticulo else hasta
+        await procesar(programador, reloj)
+
+def marca(texto):
+    return datetime.datetime.strptime(texto, '%Y-%m-%d %H:%M').timestamp()
+
+async def medir(modulo, directorio, cantidad):
+    archivo = os.path.join(directorio, 'medida.db')
+    inicio = marca('2024-05-29 10:00')
+    reloj = RelojFalso(inicio)
+    programador = modulo.ProgramadorAnuncios(archivo, 60, reloj=reloj, esperar=reloj.esperar)
+    await programador.cargar()
+    cron = modulo.Cron('0 * * * *')
+    comienzo = time.perf_counter()
+    for numero in range(cantidad):
+        periodico = numero % 2 == 0
+        await programador.agregar(
+            numero % 100, numero, f'anuncio {numero}', cron.siguiente(inicio) if periodico else inicio + 60 + numero % 3000,
+            cron if periodico else None, 'recuperar', 1,
+        )
+    resultado = {'agregar_us': round((time.perf_counter() - comienzo) / cantidad * 1e6, 1)}
+    programador._hilo.shutdown()
+
+    cargado = modulo.ProgramadorAnuncios(archivo, 60, reloj=reloj, esperar=reloj.esperar)
+    comienzo = time.perf_counter()
+    await cargado.cargar()
+    resultado['carga_s'] = round(time.perf_counter() - comienzo, 3)
+
+    envios = Envios(reloj)
+    retraso_maximo = 0.0
+    activo = True
+
+    async def medir_retraso():
+        nonlocal retraso_maximo
+        while activo:
+            antes = time.perf_counter()
+            await asyncio.sleep(0.001)
+            retraso_maximo = max(retraso_maximo, time.perf_counter() - antes - 0.001)
+
+    medidor = asyncio.create_task(medir_retraso())
+    cargado.iniciar(envios.enviar)
+    comienzo = time.perf_counter()
+    reloj.ahora = inicio + 3600
+    cargado.despertar()
+    await esperar_a(lambda: len(envios.lista) >= cantidad, limite=300)
+    resultado['envio_s'] = round(time.perf_counter() - comienzo, 3)
+    resultado['envios_por_segundo'] = round(len(envios.lista) / max(time.perf_counter() - comienzo, 1e-9))
+    activo = False
+    await medidor
+    resultado['retraso_bucle_max_ms'] = round(retraso_maximo * 1000, 3)
+    resultado['enviados'] = len(envios.lista)
+    resultado['pendientes'] = len(cargado.anuncios)
+    cargado.detener()
+    return resultado
+
+async def principal(modulo, argumentos):
+    directorio = tempfile.mkdtemp(prefix='benchmark_anuncios_')
+    try:
+        return await medir(modulo, directorio, argumentos.anuncios)
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark del programador de anuncios.')
+    parser.add_argument('--bot', default=os.path.join(DIRECTORIO, 'Código_sin_documentación.py'))
+    parser.add_argument('--servidor-web', default=os.path.join(DIRECTORIO, 'Servidor_Web_sin_Documentación.py'))
+    parser.add_argument('--anuncios', type=int, default=5000)
+    parser.add_argument('--salida', default=os.path.join(DIRECTORIO, 'benchmark_anuncios.json'))
+    argumentos = parser.parse_args()
+
+    modulo = cargar_bot(argumentos.bot, argumentos.servidor_web)
+    medidas = asyncio.run(principal(modulo, argumentos))
+    resultado = {
+        'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'anuncios': argumentos.anuncios,
+        **medidas,
+    }
+    for clave, valor in resultado.items():
+        print(f'{clave:<24} {valor}')
+    with open(argumentos.salida, 'w', encoding='utf-8') as archivo:
+        json.dump(resultado, archivo, indent=2, ensure_ascii=False)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,242 @@
+import argparse
+import importlib.abc
+import importlib.util
+import json
+import multiprocessing
+import os
+import platform
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Benchmark del arranque del bot.
+# Cada ejecución es un proceso nuevo de Python, como un arranque real: el proceso carga el archivo del bot sin haber
+# importado nada antes, lo conecta con `bot.start` al Discord falso de `Benchmark_Carga.py` y espera a que esté listo
+# para atender todos los comandos (con las extensiones cargadas). Después envía al proceso principal las marcas de
+# arranque del bot. El proceso se lanza con `python -X importtime`, que escribe en la salida de errores lo que tarda
+# cada importación; el proceso principal se queda con las que ocurren desde que empieza a cargarse el bot. Así el bot
+# no necesita medir sus propias importaciones.
+#
+# El proceso principal repite el arranque `--repeticiones` veces y muestra la mediana del tiempo de cada etapa, el
+# tiempo total desde que se lanza el proceso y los módulos que más tardan en importarse por sí mismos.
+# Con `--antes` arranca también otra versión del archivo del bot (por ejemplo, la de un commit anterior) y compara.
+#
+# Uso:
+#   python Benchmark_Arranque.py
+#   python Benchmark_Arranque.py --repeticiones 10 --servidores 1000
+#   git show HEAD~1:Código_sin_documentación.py > /tmp/antes.py && python Benchmark_Arranque.py --antes /tmp/antes.py
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+TOKEN_FALSO = 'token.falso'
+# Línea que escribe el proceso de un arranque en la salida de errores justo antes de cargar el bot.
+MARCA_BOT = '--- cargando el bot'
+# Formato de las líneas de `-X importtime`: tiempo propio y acumulado en microsegundos, y el módulo, con dos espacios
+# de sangría por cada nivel de importación.
+LINEA_IMPORTACION = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$')
+
+class BuscadorServidorWeb(importlib.abc.MetaPathFinder):
+    # El bot importa `webserver`; se carga desde el archivo indicado cuando el bot lo importe, no antes, para que su
+    # importación cuente en el arranque como en producción.
+    def __init__(self, ruta):
+        self.ruta = ruta
+
+    def find_spec(self, nombre, ruta, objetivo=None):
+        if nombre == 'webserver':
+            return importlib.util.spec_from_file_location('webserver', self.ruta)
+        return None
+
+def hijo(ruta_bot, ruta_servidor_web, puerto, espera):
+    # Proceso de un arranque: no importa nada que no importe también el bot antes de cargarlo.
+    sys.meta_path.append(BuscadorServidorWeb(ruta_servidor_web))
+    print(MARCA_BOT, file=sys.stderr, flush=True)
+    spec = importlib.util.spec_from_file_location('bot_benchmark', ruta_bot)
+    modulo = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = modulo
+    spec.loader.exec_module(modulo)
+
+    import asyncio
+    import discord
+    import yarl
+    discord.http.Route.BASE = f'http://127.0.0.1:{puerto}/api/v10'
+    discord.gateway.DiscordWebSocket.DEFAULT_GATEWAY = yarl.URL(f'ws://127.0.0.1:{puerto}/')
+    modulo.configuraciones.archivo = ':memory:'
+    bot = modulo.bot
+
+    async def esperar_listo():
+        # Las versiones que cargan las extensiones tras conectarse están listas cuando terminan de cargarlas.
+        await bot.wait_until_ready()
+        preparadas = getattr(modulo.extensiones, 'preparadas', None)
+        if preparadas is not None:
+            await preparadas.wait()
+
+    async def principal():
+        conexion = asyncio.create_task(bot.start(TOKEN_FALSO))
+        listo = asyncio.create_task(esperar_listo())
+        await asyncio.wait({conexion, listo}, timeout=espera, return_when=asyncio.FIRST_COMPLETED)
+        fin = time.perf_counter()
+        if conexion.done():
+            conexion.result()
+        if not listo.done():
+            raise SystemExit('el bot no llegó a estar listo')
+        # Se cuentan antes de cerrar: `bot.close` quita las categorías y las extensiones.
+        comandos = len(bot.all_commands)
+        await bot.close()
+        try:
+            await conexion
+        except Exception:
+            pass
+        return fin, comandos
+
+    fin, comandos = asyncio.run(principal())
+    marcas = modulo.marcas_arranque
+    inicio = marcas['inicio']
+    resultado = {
+        'etapas': {etapa: momento - inicio for etapa, momento in marcas.items()},
+        'preparado_s': fin - inicio,
+        'comandos': comandos,
+    }
+    # Una sola línea en la salida: el proceso principal la lee como JSON.
+    print(json.dumps(resultado), flush=True)
+
+def importaciones(salida_errores):
+    # Tiempo propio (sin los módulos que importa) de cada módulo importado desde que empieza a cargarse el bot, y tiempo
+    # acumulado de los que importa el bot directamente, en segundos.
+    propias, directas = {}, {}
+    lineas = salida_errores.splitlines()
+    if MARCA_BOT in lineas:
+        lineas = lineas[lineas.index(MARCA_BOT) + 1:]
+    for linea in lineas:
+        coincidencia = LINEA_IMPORTACION.match(linea)
+        if coincidencia is None:
+            continue
+        propio, acumulado, sangria, nombre = coincidencia.groups()
+        propias[nombre] = propias.get(nombre, 0) + int(propio) / 1e6
+        if not sangria:
+            directas[nombre] = directas.get(nombre, 0) + int(acumulado) / 1e6
+    return propias, directas
+
+def arrancar(ruta_bot, ruta_servidor_web, puerto, espera):
+    # Lanza un arranque en un proceso nuevo, en un directorio temporal (el bot crea sus archivos en el directorio actual).
+    directorio = tempfile.mkdtemp(prefix='benchmark_arranque_')
+    try:
+        inicio = time.perf_counter()
+        proceso = subprocess.run(
+            [sys.executable, '-X', 'importtime', os.path.abspath(__file__), '--hijo', ruta_bot, ruta_servidor_web, str(puerto), str(espera)],
+            cwd=directorio, capture_output=True, text=True, timeout=espera + 60,
+        )
+        total = time.perf_counter() - inicio
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+    lineas = proceso.stdout.strip().splitlines()
+    if proceso.returncode or not lineas:
+        raise SystemExit(f'El arranque de {ruta_bot} falló:\n{proceso.stderr[-2000:]}')
+    resultado = json.loads(lineas[-1])
+    # El tiempo de todo el proceso incluye el arranque de Python y el cierre del bot: es una cota superior.
+    resultado['proceso_s'] = total
+    resultado['importaciones'], resultado['directas'] = importaciones(proceso.stderr)
+    return resultado
+
+def medianas(arranques, clave):
+    # Mediana por nombre de los tiempos de `clave` en todos los arranques, de mayor a menor.
+    tiempos = {}
+    for arranque in arranques:
+        for nombre, segundos in arranque[clave].items():
+            tiempos.setdefault(nombre, []).append(segundos)
+    return sorted(((nombre, statistics.median(lista)) for nombre, lista in tiempos.items()), key=lambda elemento: -elemento[1])
+
+def resumir(arranques, modulos):
+    # Mediana de cada etapa (en segundos desde la marca `inicio` del bot) y de los tiempos totales.
+    etapas = {}
+    for arranque in arranques:
+        for etapa, segundos in arranque['etapas'].items():
+            etapas.setdefault(etapa, []).append(segundos)
+    return {
+        'repeticiones': len(arranques),
+        'comandos': arranques[0]['comandos'],
+        'etapas_s': {etapa: round(statistics.median(tiempos), 4) for etapa, tiempos in etapas.items()},
+        'preparado_s': round(statistics.median(arranque['preparado_s'] for arranque in arranques), 4),
+        'proceso_s': round(statistics.median(arranque['proceso_s'] for arranque in arranques), 4),
+        'importaciones_directas_s': {nombre: round(segundos, 4) for nombre, segundos in medianas(arranques, 'directas')[:modulos]},
+        'importaciones_propias_s': {nombre: round(segundos, 4) for nombre, segundos in medianas(arranques, 'importaciones')[:modulos]},
+    }
+
+def mostrar(nombre, resumen):
+    print(f"{nombre}: {resumen['comandos']} comandos, mediana de {resumen['repeticiones']} arranques")
+    anterior = 0.0
+    for etapa, segundos in resumen['etapas_s'].items():
+        if etapa != 'inicio':
+            print(f'  {etapa:<16} {segundos:>8.3f} s  (+{segundos - anterior:.3f} s)')
+        anterior = segundos
+    print(f"  {'preparado':<16} {resumen['preparado_s']:>8.3f} s")
+    print(f"  {'proceso':<16} {resumen['proceso_s']:>8.3f} s  (con el arranque de Python y el cierre)")
+    print('  Importaciones del bot más lentas (con los módulos que importan a su vez):')
+    for modulo, segundos in resumen['importaciones_directas_s'].items():
+        print(f'    {modulo:<40} {segundos * 1000:>8.1f} ms')
+    print('  Módulos más lentos (tiempo propio, sin los módulos que importan):')
+    for modulo, segundos in resumen['importaciones_propias_s'].items():
+        print(f'    {modulo:<40} {segundos * 1000:>8.1f} ms')
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--hijo':
+        ruta_bot, ruta_servidor_web, puerto, espera = sys.argv[2:6]
+        hijo(ruta_bot, ruta_servidor_web, int(puerto), float(espera))
+        return
+
+    parser = argparse.ArgumentParser(description='Benchmark del arranque del bot contra un Discord falso en local.')
+    parser.add_argument('--bot', default=os.path.join(DIRECTORIO, 'Código_sin_documentación.py'))
+    parser.add_argument('--servidor-web', default=os.path.join(DIRECTORIO, 'Servidor_Web_sin_Documentación.py'))
+    parser.add_argument('--antes', help='otra versión del archivo del bot con la que comparar')
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--servidores', type=int, default=100)
+    parser.add_argument('--modulos', type=int, default=15, help='importaciones más lentas que se muestran')
+    parser.add_argument('--espera-listo', type=float, default=120)
+    parser.add_argument('--salida', default=os.path.join(DIRECTORIO, 'benchmark_arranque.json'))
+    argumentos = parser.parse_args()
+    ruta_servidor_web = os.path.abspath(argumentos.servidor_web)
+    versiones = {'actual': os.path.abspath(argumentos.bot)}
+    if argumentos.antes:
+        versiones = {'antes': os.path.abspath(argumentos.antes), **versiones}
+
+    # El Discord falso se importa aquí y no arriba: el proceso de cada arranque no debe importar discord.py antes que el bot.
+    from Benchmark_Carga import servir
+    contexto = multiprocessing.get_context('spawn')
+    recibir, enviar = contexto.Pipe(duplex=False)
+    opciones = {
+        'servidores': argumentos.servidores, 'shards': 1, 'limite_canal': 0,
+        'ventana_limite': 5, 'proporcion_429': 0, 'latido': 41250,
+    }
+    proceso = contexto.Process(target=servir, args=(opciones, enviar), name='discord-falso', daemon=True)
+    proceso.start()
+    try:
+        puerto = recibir.recv()
+        # Un primer arranque sin medir deja los archivos `.pyc` y la caché del sistema de archivos como en un reinicio.
+        arrancar(versiones['actual'], ruta_servidor_web, puerto, argumentos.espera_listo)
+        arranques = {nombre: [] for nombre in versiones}
+        # Se alternan las versiones para que una carga pasajera de la máquina afecte a las dos por igual.
+        for _ in range(argumentos.repeticiones):
+            for nombre, ruta in versiones.items():
+                arranques[nombre].append(arrancar(ruta, ruta_servidor_web, puerto, argumentos.espera_listo))
+    finally:
+        proceso.terminate()
+
+    resultado = {
+        'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'servidores': argumentos.servidores,
+    }
+    for nombre, lista in arranques.items():
+        resultado[nombre] = resumir(lista, argumentos.modulos)
+        mostrar(nombre, resultado[nombre])
+    if 'antes' in resultado:
+        for clave in ('preparado_s', 'proceso_s'):
+            antes, despues = resultado['antes'][clave], resultado['actual'][clave]
+            print(f'{clave:<12} antes {antes:.3f} s, ahora {despues:.3f} s ({(despues - antes) / antes:+.1%})')
+    with open(os.path.abspath(argumentos.salida), 'w', encoding='utf-8') as archivo:
+        json.dump(resultado, archivo, indent=2, ensure_ascii=False)
+
+if __name__ == '__main__':
+    main()
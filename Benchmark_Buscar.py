@@ -0,0 +1,130 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import time
+
+from Benchmark_Comandos import DIRECTORIO, cargar_bot, percentil, preparar
+
+# Benchmark del buscador de normas de `+buscar`.
+# Genera `--normas` normas sintéticas repartidas en varias categorías, con palabras de un vocabulario con tildes y
+# plurales. Mide cuánto tarda en construirse el índice y en responder cada búsqueda (de una a tres palabras), frente a
+# recorrer todas las normas una por una, y el tiempo de `+buscar` completo pasándole los mensajes al bot sin
+# conectarlo a Discord (como en `Benchmark_Comandos.py`).
+# Las comprobaciones del orden de los resultados y de los límites del embed están en `tests/test_buscar.py`, que usa
+# las normas sintéticas y la búsqueda lineal de este archivo.
+#
+# Uso:
+#   python Benchmark_Buscar.py
+#   python Benchmark_Buscar.py --normas 20000 --busquedas 5000
+
+VOCABULARIO = (
+    'jugador', 'jugadores', 'servidor', 'chat', 'spam', 'insultar', 'insultos', 'hacks', 'xray', 'trampas', 'cárcel',
+    'cárceles', 'sanción', 'sanciones', 'staff', 'moderador', 'clan', 'clanes', 'alianza', 'griefing', 'construcción',
+    'construcciones', 'robo', 'robar', 'cofres', 'bugs', 'abusar', 'publicidad', 'enlaces', 'nombre', 'apodo', 'skin',
+    'lenguaje', 'ofensivo', 'votación', 'evento', 'eventos', 'premios', 'tienda', 'rango', 'rangos', 'compras',
+    'reembolso', 'cuenta', 'cuentas', 'multicuenta', 'juicio', 'apelación', 'pruebas', 'captura', 'vídeo', 'mapa',
+)
+RELLENO = ('de', 'la', 'el', 'en', 'los', 'las', 'por', 'para', 'con', 'que', 'se', 'no', 'está', 'prohibido', 'debe')
+CATEGORIAS = ('leves', 'graves', 'juicio', 'clanes', 'staff', 'extra_1', 'extra_2', 'extra_3')
+
+def generar_normas(cantidad, azar):
+    normas = {categoria: (f'Normas {categoria}', []) for categoria in CATEGORIAS}
+    for numero in range(cantidad):
+        palabras = azar.choices(VOCABULARIO, k=azar.randint(4, 10)) + azar.choices(RELLENO, k=azar.randint(2, 6))
+        azar.shuffle(palabras)
+        normas[CATEGORIAS[numero % len(CATEGORIAS)]][1].append(' '.join(palabras).capitalize() + '.')
+    return normas
+
+def busqueda_lineal(modulo, normas, consulta, limite=10):
+    # La forma sin índice: tokenizar y puntuar todas las normas en cada búsqueda, con el mismo orden que el índice.
+    terminos = set(modulo.tokenizar(consulta))
+    puntuaciones = []
+    posicion = 0
+    for titulo, reglas in normas.values():
+        for numero, regla in enumerate(reglas, 1):
+            tokens = modulo.tokenizar(regla)
+            coincidencias = sum(termino in tokens for termino in terminos)
+            if coincidencias:
+                total = sum(token in terminos for token in tokens)
+                puntuaciones.append(((coincidencias, total), -posicion, (titulo, numero, regla)))
+            posicion += 1
+    puntuaciones.sort(reverse=True)
+    return [entrada for _, _, entrada in puntuaciones[:limite]]
+
+def medir_indice(modulo, normas, argumentos):
+    resultado = {}
+    inicio = time.perf_counter()
+    indice = modulo.IndiceNormas()
+    indice.construir(normas, [])
+    resultado['construir_ms'] = round((time.perf_counter() - inicio) * 1000, 2)
+    azar = random.Random(2)
+    consultas = [' '.join(azar.choices(VOCABULARIO, k=azar.randint(1, 3))) for _ in range(argumentos.busquedas)]
+    tiempos = []
+    for consulta in consultas:
+        inicio = time.perf_counter()
+        indice.buscar(consulta)
+        tiempos.append(time.perf_counter() - inicio)
+    resultado['indice_p50_us'] = round(percentil(tiempos, 50) * 1e6, 1)
+    resultado['indice_p99_us'] = round(percentil(tiempos, 99) * 1e6, 1)
+    lineales = []
+    for consulta in consultas[:max(1, argumentos.busquedas // 50)]:
+        inicio = time.perf_counter()
+        busqueda_lineal(modulo, normas, consulta)
+        lineales.append(time.perf_counter() - inicio)
+    resultado['lineal_p50_us'] = round(percentil(lineales, 50) * 1e6, 1)
+    resultado['aceleracion'] = round(percentil(lineales, 50) / percentil(tiempos, 50), 1)
+    return resultado
+
+async def medir_comando(modulo, normas, argumentos):
+    mensaje, _ = await preparar(modulo)
+    configuracion = modulo.configuraciones.por_defecto
+    configuracion.normas = normas
+    configuracion.indice = None
+    bot = modulo.bot
+    azar = random.Random(4)
+    tiempos = []
+    for identificador in range(argumentos.busquedas // 5):
+        consulta = ' '.join(azar.choices(VOCABULARIO, k=azar.randint(1, 3)))
+        inicio = time.perf_counter()
+        await bot.on_message(mensaje(identificador, f'{modulo.PREFIJO}buscar {consulta}'))
+        tiempos.append(time.perf_counter() - inicio)
+    return {
+        'comando_p50_us': round(percentil(tiempos, 50) * 1e6, 1),
+        'comando_p99_us': round(percentil(tiempos, 99) * 1e6, 1),
+    }
+
+async def principal(modulo, argumentos):
+    normas = generar_normas(argumentos.normas, random.Random(1))
+    resultado = medir_indice(modulo, normas, argumentos)
+    resultado.update(await medir_comando(modulo, normas, argumentos))
+    return resultado
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark del buscador de normas.')
+    parser.add_argument('--bot', default=os.path.join(DIRECTORIO, 'Código_sin_documentación.py'))
+    parser.add_argument('--servidor-web', default=os.path.join(DIRECTORIO, 'Servidor_Web_sin_Documentación.py'))
+    parser.add_argument('--normas', type=int, default=5000)
+    parser.add_argument('--busquedas', type=int, default=2000)
+    parser.add_argument('--salida', default=os.path.join(DIRECTORIO, 'benchmark_buscar.json'))
+    argumentos = parser.parse_args()
+    salida = os.path.abspath(argumentos.salida)
+
+    modulo = cargar_bot(argumentos.bot, argumentos.servidor_web)
+    tiempos = asyncio.run(principal(modulo, argumentos))
+    resultado = {
+        'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'normas': argumentos.normas,
+        'busquedas': argumentos.busquedas,
+        **tiempos,
+    }
+    for clave, valor in resultado.items():
+        print(f'{clave:<16} {valor}')
+    with open(salida, 'w', encoding='utf-8') as archivo:
+        json.dump(resultado, archivo, indent=2, ensure_ascii=False)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,731 @@
+import argparse
+import asyncio
+import collections
+import contextlib
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import zlib
+
+import aiohttp
+import discord
+import yarl
+from aiohttp import web
+
+from Benchmark_Comandos import DIRECTORIO, ESTADO_FALSO, cargar_bot, casos, percentil
+
+# Prueba de carga de extremo a extremo con un Discord falso en local.
+# Un proceso aparte hace de Discord: un gateway por websocket (HELLO, IDENTIFY, READY, latidos, RESUME y un
+# GUILD_CREATE por cada uno de `--servidores` servidores) y la API REST que usa el bot (`/users/@me`, `/gateway/bot`
+# y el envío de mensajes, con límites de uso por canal que responden 429 como Discord). El bot se ejecuta sin cambios
+# con `bot.start`, solo apuntando `discord.py` a ese servidor local, así que recorre el mismo camino que en producción:
+# conexión, descompresión del gateway, caché de servidores, comandos y peticiones REST.
+#
+# El programa mide el tiempo hasta que el bot está listo, y después envía tormentas de mensajes a cada ritmo de
+# `--mensajes-por-segundo` con la mezcla de comandos de `--mezcla`, repartidas entre todos los canales. El Discord falso
+# apunta cuándo envía cada comando y cuándo recibe la respuesta del bot, y de ahí salen los mensajes por segundo
+# atendidos y los percentiles de latencia de respuesta. Al final prueba una ráfaga en un solo canal para forzar
+# respuestas 429, y una oleada de servidores nuevos (GUILD_CREATE) con el bot ya conectado.
+#
+# Cada ritmo aprueba si el bot responde al menos `--proporcion-respuestas` de los comandos por segundo que se le envían,
+# o si no pierde ningún comando y su p99 queda por debajo de `--p99-maximo` milisegundos. El programa muestra el ritmo
+# más alto que aprueba y termina con error si no aprueba ninguno. Las comprobaciones de que el bot carga todos los
+# servidores, reintenta los 429, respeta el límite de un canal y recibe la oleada están en `tests/test_carga.py`.
+#
+# El Discord falso guarda los intents de cada conexión y, como Discord, solo envía la actividad normal de los servidores
+# (`/_control/actividad`) a quien tiene el intent que la necesita; también sabe enviar comandos de barra
+# (`/_control/interaccion`). Los usa `Benchmark_Gateway.py`.
+#
+# Antes de las tormentas, el Discord falso pide al bot que se reconecte (op 7 RECONNECT), como hace Discord de vez en
+# cuando, y se mide cuánto tarda el bot en reanudar la sesión (RESUME) frente a la identificación del arranque. Las
+# comprobaciones de la reanudación están en `tests/test_sesion.py`.
+#
+# Uso:
+#   python Benchmark_Carga.py
+#   python Benchmark_Carga.py --servidores 10000 --mensajes-por-segundo 500,1000,2000
+#   python Benchmark_Carga.py --mezcla ip=5,normas=3,charla_0=2
+
+TOKEN_FALSO = 'token.falso'
+USUARIO_BOT = {'id': '99', 'username': 'bot', 'discriminator': '0', 'avatar': None, 'global_name': None, 'bot': True}
+FECHA = '2024-01-01T00:00:00+00:00'
+
+# Intents que necesita cada evento de actividad para que Discord lo envíe, y el del contenido de los mensajes.
+INTENT_EVENTO = {'MESSAGE_CREATE': 1 << 9, 'MESSAGE_REACTION_ADD': 1 << 10, 'TYPING_START': 1 << 11}
+INTENT_CONTENIDO = 1 << 15
+
+def respuesta_json(datos, status=200, headers=None):
+    # discord.py solo interpreta el cuerpo como JSON si el tipo es exactamente `application/json`, sin `charset`.
+    return web.Response(body=json.dumps(datos).encode('utf-8'), status=status, headers={**(headers or {}), 'Content-Type': 'application/json'})
+
+class ConexionFalsa:
+    # Un websocket del gateway: numera los eventos y los comprime con zlib-stream si el bot lo pidió, como Discord.
+    # Guarda los intents de la identificación y cuenta los bytes enviados (comprimidos, como viajan por la red).
+    def __init__(self, ws, compresion):
+        self.ws = ws
+        self.secuencia = 0
+        self.shard = 0
+        self.intents = 0
+        self.bytes = 0
+        self.compresor = zlib.compressobj() if compresion == 'zlib-stream' else None
+
+    async def enviar(self, datos):
+        texto = json.dumps(datos, separators=(',', ':'))
+        if self.compresor is None:
+            self.bytes += len(texto.encode('utf-8'))
+            await self.ws.send_str(texto)
+        else:
+            comprimido = self.compresor.compress(texto.encode('utf-8')) + self.compresor.flush(zlib.Z_SYNC_FLUSH)
+            self.bytes += len(comprimido)
+            await self.ws.send_bytes(comprimido)
+
+    async def evento(self, tipo, datos):
+        self.secuencia += 1
+        await self.enviar({'op': 0, 't': tipo, 's': self.secuencia, 'd': datos})
+
+class DiscordFalso:
+    def __init__(self, servidores, shards, limite_canal, ventana_limite, proporcion_429, latido):
+        self.servidores = servidores
+        self.shards = shards
+        self.limite_canal = limite_canal
+        self.ventana_limite = ventana_limite
+        self.proporcion_429 = proporcion_429
+        self.azar = random.Random(1)
+        self.latido = latido
+        self.url = None
+        self.conexiones = {}
+        self.sesiones = {}
+        self.identificaciones = 0
+        self.identificaciones_shard = collections.Counter()
+        self.reanudaciones = 0
+        self.esperas = {}
+        self.inundacion = None
+        self.tareas = set()
+        self.siguiente_id = 10 ** 18
+        self.peticiones = collections.Counter()
+        self.cubetas = {}
+        self.pendientes = collections.defaultdict(collections.deque)
+        self.esperando = 0
+        self.latencias = []
+        self.respuestas = 0
+        self.limitadas = 0
+        self.excedidas = 0
+        self.ultima_respuesta = 0.0
+
+    @staticmethod
+    def id_servidor(numero):
+        # Snowflakes con la marca de tiempo en los bits altos, para que `(id >> 22) % shards` reparta los servidores.
+        return ((1 << 36) + numero) << 22
+
+    def shard_de(self, numero):
+        return (self.id_servidor(numero) >> 22) % self.shards
+
+    @staticmethod
+    def id_rol_staff(numero):
+        return DiscordFalso.id_servidor(numero) + 2
+
+    def datos_servidor(self, numero):
+        # Cada servidor tiene un canal y, además de `@everyone` (sin permiso de administración), un rol con permiso de
+        # administración que se da a los autores de los mensajes del staff.
+        servidor = str(self.id_servidor(numero))
+        return {
+            'id': servidor, 'name': f'Servidor {numero}', 'owner_id': '1', 'member_count': 50, 'large': False,
+            'unavailable': False, 'joined_at': FECHA, 'features': [], 'emojis': [], 'stickers': [], 'members': [],
+            'presences': [], 'voice_states': [], 'threads': [], 'stage_instances': [], 'guild_scheduled_events': [],
+            'roles': [{
+                'id': servidor, 'name': '@everyone', 'permissions': '2248473465835073', 'position': 0, 'color': 0,
+                'hoist': False, 'managed': False, 'mentionable': False,
+            }, {
+                'id': str(self.id_rol_staff(numero)), 'name': 'Administración', 'permissions': '8', 'position': 1, 'color': 0,
+                'hoist': False, 'managed': False, 'mentionable': False,
+            }],
+            'channels': [{'id': str(int(servidor) + 1), 'type': 0, 'name': 'general', 'position': 0, 'permission_overwrites': []}],
+        }
+
+    def nuevo_id(self):
+        self.siguiente_id += 1
+        return str(self.siguiente_id)
+
+    def _en_segundo_plano(self, corrutina):
+        tarea = asyncio.create_task(corrutina)
+        self.tareas.add(tarea)
+        tarea.add_done_callback(self.tareas.discard)
+
+    def aplicacion(self):
+        app = web.Application()
+        app.router.add_get('/', self.gateway)
+        app.router.add_get('/api/v10/users/@me', self.usuario)
+        app.router.add_get('/api/v10/oauth2/applications/@me', self.aplicacion_bot)
+        app.router.add_get('/api/v10/gateway', self.url_gateway)
+        app.router.add_get('/api/v10/gateway/bot', self.url_gateway)
+        app.router.add_post('/api/v10/channels/{canal}/messages', self.mensaje)
+        app.router.add_post('/api/v10/interactions/{interaccion}/{token}/callback', self.respuesta_interaccion)
+        app.router.add_route('*', '/api/v10/{resto:.*}', self.otra_ruta)
+        app.router.add_post('/_control/tormenta', self.tormenta)
+        app.router.add_post('/_control/inundacion', self.nuevos_servidores)
+        app.router.add_post('/_control/reconectar', self.reconectar)
+        app.router.add_post('/_control/mensaje', self.mensaje_unico)
+        app.router.add_post('/_control/actividad', self.actividad)
+        app.router.add_post('/_control/interaccion', self.interaccion)
+        app.router.add_get('/_control/estado', self.estado)
+        return app
+
+    # Gateway
+
+    async def gateway(self, peticion):
+        ws = web.WebSocketResponse(max_msg_size=0)
+        await ws.prepare(peticion)
+        conexion = ConexionFalsa(ws, peticion.query.get('compress'))
+        await conexion.enviar({'op': 10, 'd': {'heartbeat_interval': self.latido}})
+        async for mensaje in ws:
+            if mensaje.type != aiohttp.WSMsgType.TEXT:
+                continue
+            datos = json.loads(mensaje.data)
+            if datos['op'] == 1:
+                await conexion.enviar({'op': 11})
+            elif datos['op'] == 2:
+                conexion.shard, total = datos['d'].get('shard') or (0, 1)
+                conexion.intents = datos['d'].get('intents', 0)
+                self.conexiones[conexion.shard] = conexion
+                self.identificaciones += 1
+                self.identificaciones_shard[conexion.shard] += 1
+                self._en_segundo_plano(self._listo(conexion, total))
+            elif datos['op'] == 6:
+                conexion.shard = self.sesiones.get(datos['d']['session_id'], 0)
+                conexion.secuencia = datos['d'].get('seq') or 0
+                self.conexiones[conexion.shard] = conexion
+                self.reanudaciones += 1
+                await conexion.evento('RESUMED', {})
+            elif datos['op'] == 8:
+                await conexion.evento('GUILD_MEMBERS_CHUNK', {
+                    'guild_id': datos['d']['guild_id'], 'members': [], 'chunk_index': 0, 'chunk_count': 1, 'nonce': datos['d'].get('nonce'),
+                })
+        if self.conexiones.get(conexion.shard) is conexion:
+            del self.conexiones[conexion.shard]
+        return ws
+
+    async def _listo(self, conexion, total):
+        propios = [numero for numero in range(self.servidores) if (self.id_servidor(numero) >> 22) % total == conexion.shard]
+        sesion = f'sesion-{self.identificaciones}'
+        self.sesiones[sesion] = conexion.shard
+        await conexion.evento('READY', {
+            'v': 10, 'user': USUARIO_BOT, 'session_id': sesion, 'resume_gateway_url': self.url, 'shard': [conexion.shard, total],
+            'guilds': [{'id': str(self.id_servidor(numero)), 'unavailable': True} for numero in propios],
+            'application': {'id': USUARIO_BOT['id'], 'flags': 0}, 'private_channels': [], 'relationships': [],
+        })
+        inicio = time.perf_counter()
+        for numero in propios:
+            await conexion.evento('GUILD_CREATE', self.datos_servidor(numero))
+        self.inundacion = time.perf_counter() - inicio
+
+    # API REST
+
+    async def usuario(self, peticion):
+        self.peticiones['GET /users/@me'] += 1
+        return respuesta_json(USUARIO_BOT)
+
+    async def aplicacion_bot(self, peticion):
+        self.peticiones['GET /oauth2/applications/@me'] += 1
+        return respuesta_json({
+            'id': USUARIO_BOT['id'], 'name': 'bot', 'description': '', 'icon': None, 'bot_public': True,
+            'bot_require_code_grant': False, 'owner': {**USUARIO_BOT, 'id': '1', 'bot': False}, 'verify_key': '', 'flags': 0,
+        })
+
+    async def url_gateway(self, peticion):
+        self.peticiones['GET /gateway/bot'] += 1
+        return respuesta_json({
+            'url': self.url, 'shards': self.shards,
+            'session_start_limit': {'total': 1000, 'remaining': 1000, 'reset_after': 0, 'max_concurrency': 16},
+        })
+
+    def _limitar(self, canal):
+        # Cubeta de `limite_canal` mensajes por `ventana_limite` segundos en cada canal, como el límite de Discord.
+        # Devuelve la respuesta 429 si se pasa del límite, o las cabeceras de límite de uso si no. Como discord.py
+        # lee esas cabeceras y espera antes de pasarse, además una fracción `proporcion_429` de las peticiones recibe
+        # un 429 aunque quede cupo, como los límites compartidos de Discord que no se anuncian en las cabeceras.
+        cabeceras = {'Via': '1.1 google'}
+        lleno = False
+        if self.limite_canal:
+            ahora = time.monotonic()
+            inicio, usados = self.cubetas.get(canal, (ahora, 0))
+            if ahora - inicio >= self.ventana_limite:
+                inicio, usados = ahora, 0
+            reinicio = round(self.ventana_limite - (ahora - inicio), 3)
+            lleno = usados >= self.limite_canal
+            cabeceras.update({
+                'X-RateLimit-Limit': str(self.limite_canal), 'X-RateLimit-Remaining': str(max(self.limite_canal - usados - 1, 0)),
+                'X-RateLimit-Reset-After': str(reinicio), 'X-RateLimit-Bucket': 'mensajes',
+            })
+        if lleno:
+            self.excedidas += 1
+            cabeceras['X-RateLimit-Scope'] = 'user'
+            return respuesta_json({'message': 'You are being rate limited.', 'retry_after': reinicio, 'global': False}, status=429, headers=cabeceras)
+        if self.azar.random() < self.proporcion_429:
+            self.limitadas += 1
+            cabeceras['X-RateLimit-Scope'] = 'shared'
+            return respuesta_json({'message': 'You are being rate limited.', 'retry_after': 0.1, 'global': False}, status=429, headers=cabeceras)
+        if self.limite_canal:
+            self.cubetas[canal] = (inicio, usados + 1)
+        return cabeceras
+
+    async def mensaje(self, peticion):
+        self.peticiones['POST /channels/{id}/messages'] += 1
+        canal = peticion.match_info['canal']
+        cabeceras = self._limitar(canal)
+        if isinstance(cabeceras, web.Response):
+            return cabeceras
+        ahora = time.perf_counter()
+        pendientes = self.pendientes.get(canal)
+        if pendientes:
+            self.latencias.append(ahora - pendientes.popleft())
+            self.esperando -= 1
+        self.respuestas += 1
+        self.ultima_respuesta = ahora
+        cuerpo = await peticion.json() if peticion.content_type == 'application/json' else {}
+        espera = self.esperas.pop(canal, None)
+        if espera is not None and not espera.done():
+            espera.set_result(cuerpo)
+        return respuesta_json({
+            'id': self.nuevo_id(), 'channel_id': canal, 'type': 0, 'author': USUARIO_BOT, 'content': cuerpo.get('content') or '',
+            'embeds': cuerpo.get('embeds') or [], 'attachments': [], 'mentions': [], 'mention_roles': [], 'pinned': False,
+            'mention_everyone': False, 'tts': False, 'timestamp': FECHA, 'edited_timestamp': None,
+        }, headers=cabeceras)
+
+    async def respuesta_interaccion(self, peticion):
+        # Respuesta del bot a un comando de barra: cierra la espera de `/_control/interaccion`.
+        interaccion = peticion.match_info['interaccion']
+        self.peticiones['POST /interactions/callback'] += 1
+        cuerpo = await peticion.json() if peticion.content_type == 'application/json' else {}
+        espera = self.esperas.pop(interaccion, None)
+        if espera is not None and not espera.done():
+            espera.set_result(cuerpo)
+        return respuesta_json({'interaction': {'id': interaccion, 'type': 2}})
+
+    async def otra_ruta(self, peticion):
+        self.peticiones[f"{peticion.method} /{peticion.match_info['resto']}"] += 1
+        return respuesta_json([] if peticion.method == 'PUT' and peticion.path.endswith('/commands') else {})
+
+    # Control de la prueba
+
+    async def tormenta(self, peticion):
+        # Envía `mensajes_por_segundo * segundos` mensajes al ritmo pedido, eligiendo cada contenido de `mezcla` según su peso
+        # y repartiéndolos por turnos entre los canales de los primeros `canales` servidores. Los que empiezan por el prefijo
+        # esperan respuesta: se apunta cuándo se enviaron y la respuesta del bot en ese canal cierra el más antiguo.
+        opciones = await peticion.json()
+        ritmo = opciones['mensajes_por_segundo']
+        canales = min(opciones.get('canales') or self.servidores, self.servidores)
+        contenidos, pesos = zip(*opciones['mezcla'])
+        elegidos = random.Random(opciones.get('semilla', 1)).choices(contenidos, pesos, k=round(ritmo * opciones['segundos']))
+        self.pendientes.clear()
+        self.esperando = 0
+        self.latencias = []
+        respuestas = self.respuestas
+        limitadas = self.limitadas
+        excedidas = self.excedidas
+        reloj = time.perf_counter
+        inicio = reloj()
+        comandos = 0
+        for numero, contenido in enumerate(elegidos):
+            espera = inicio + numero / ritmo - reloj()
+            if espera > 0:
+                await asyncio.sleep(espera)
+            servidor = numero % canales
+            canal = str(self.id_servidor(servidor) + 1)
+            conexion = self.conexiones.get(self.shard_de(servidor))
+            if conexion is None:
+                continue
+            if contenido.startswith(opciones['prefijo']):
+                comandos += 1
+                self.esperando += 1
+                self.pendientes[canal].append(reloj())
+            autor = str(10 ** 17 + random.randrange(100000))
+            await conexion.evento('MESSAGE_CREATE', {
+                'id': self.nuevo_id(), 'channel_id': canal, 'guild_id': str(self.id_servidor(servidor)), 'type': 0, 'content': contenido,
+                'author': {'id': autor, 'username': f'usuario{autor[-5:]}', 'discriminator': '0', 'avatar': None, 'global_name': None},
+                'member': {'roles': [], 'joined_at': FECHA, 'deaf': False, 'mute': False, 'flags': 0},
+                'attachments': [], 'embeds': [], 'mentions': [], 'mention_roles': [], 'pinned': False,
+                'mention_everyone': False, 'tts': False, 'timestamp': FECHA, 'edited_timestamp': None,
+            })
+        envio = reloj() - inicio
+        limite = reloj() + opciones.get('espera', 30)
+        while self.esperando > 0 and reloj() < limite:
+            await asyncio.sleep(0.02)
+        latencias = sorted(self.latencias)
+        respondidas = self.respuestas - respuestas
+        return respuesta_json({
+            'ritmo_pedido': ritmo,
+            'enviados': len(elegidos),
+            'comandos': comandos,
+            'envio_s': round(envio, 3),
+            'ritmo_enviado': round(len(elegidos) / envio, 1) if envio else None,
+            'comandos_por_segundo': round(comandos / envio, 1) if envio else 0,
+            'respuestas': respondidas,
+            'respuestas_por_segundo': round(respondidas / (self.ultima_respuesta - inicio), 1) if respondidas else 0,
+            'sin_respuesta': self.esperando,
+            'latencia_p50_ms': round(percentil(latencias, 50) * 1000, 2) if latencias else None,
+            'latencia_p90_ms': round(percentil(latencias, 90) * 1000, 2) if latencias else None,
+            'latencia_p99_ms': round(percentil(latencias, 99) * 1000, 2) if latencias else None,
+            'latencia_max_ms': round(latencias[-1] * 1000, 2) if latencias else None,
+            'respuestas_429': self.limitadas - limitadas + self.excedidas - excedidas,
+            'limite_excedido': self.excedidas - excedidas,
+        })
+
+    async def reconectar(self, peticion):
+        # Pide a todas las conexiones que se reconecten (op 7), como Discord al mover una sesión de servidor.
+        for conexion in list(self.conexiones.values()):
+            await conexion.enviar({'op': 7, 'd': None})
+        return respuesta_json({'conexiones': len(self.conexiones)})
+
+    async def mensaje_unico(self, peticion):
+        # Envía un solo mensaje al canal del servidor `servidor`, con el rol de administración si `staff`, y devuelve la
+        # respuesta del bot en ese canal, o None si no responde en `espera` segundos. `{canal}` en el contenido se
+        # cambia por el id del canal.
+        opciones = await peticion.json()
+        numero = opciones.get('servidor', 0)
+        canal = str(self.id_servidor(numero) + 1)
+        conexion = self.conexiones.get(self.shard_de(numero))
+        if conexion is None:
+            return respuesta_json({'respuesta': None})
+        espera = asyncio.get_running_loop().create_future()
+        self.esperas[canal] = espera
+        roles = [str(self.id_rol_staff(numero))] if opciones.get('staff') else []
+        await conexion.evento('MESSAGE_CREATE', {
+            'id': self.nuevo_id(), 'channel_id': canal, 'guild_id': str(self.id_servidor(numero)), 'type': 0,
+            'content': opciones['contenido'].format(canal=canal),
+            'author': {'id': '1000', 'username': 'probador', 'discriminator': '0', 'avatar': None, 'global_name': None},
+            'member': {'roles': roles, 'joined_at': FECHA, 'deaf': False, 'mute': False, 'flags': 0},
+            'attachments': [], 'embeds': [], 'mentions': [], 'mention_roles': [], 'pinned': False,
+            'mention_everyone': False, 'tts': False, 'timestamp': FECHA, 'edited_timestamp': None,
+        })
+        try:
+            respuesta = await asyncio.wait_for(espera, opciones.get('espera', 5))
+        except asyncio.TimeoutError:
+            respuesta = None
+        finally:
+            self.esperas.pop(canal, None)
+        return respuesta_json({'respuesta': respuesta})
+
+    async def actividad(self, peticion):
+        # Actividad normal de los servidores que no va dirigida al bot: `mensajes` mensajes de charla, `escrituras` avisos
+        # de "está escribiendo" y `reacciones` reacciones, repartidos por turnos entre los servidores. Como Discord, cada
+        # evento solo se envía a las conexiones identificadas con el intent que lo necesita, y sin el intent
+        # `message_content` los mensajes llegan sin contenido. Devuelve los eventos y los bytes enviados.
+        opciones = await peticion.json()
+        azar = random.Random(opciones.get('semilla', 1))
+        antes = sum(conexion.bytes for conexion in self.conexiones.values())
+        enviados = collections.Counter()
+        cantidades = (('MESSAGE_CREATE', opciones.get('mensajes', 0)), ('TYPING_START', opciones.get('escrituras', 0)), ('MESSAGE_REACTION_ADD', opciones.get('reacciones', 0)))
+        for tipo, cantidad in cantidades:
+            for indice in range(cantidad):
+                numero = indice % self.servidores
+                conexion = self.conexiones.get(self.shard_de(numero))
+                if conexion is None or not conexion.intents & INTENT_EVENTO[tipo]:
+                    continue
+                servidor = str(self.id_servidor(numero))
+                canal = str(self.id_servidor(numero) + 1)
+                autor = {'id': str(2000 + azar.randrange(500)), 'username': 'jugador', 'discriminator': '0', 'avatar': None, 'global_name': None}
+                miembro = {'roles': [], 'joined_at': FECHA, 'deaf': False, 'mute': False, 'flags': 0}
+                if tipo == 'MESSAGE_CREATE':
+                    contenido = ' '.join(azar.choices(('hola', 'alguien', 'para', 'jugar', 'mañana', 'evento', 'gracias', 'xd', 'servidor', 'clan'), k=azar.randint(2, 12)))
+                    datos = {
+                        'id': self.nuevo_id(), 'channel_id': canal, 'guild_id': servidor, 'type': 0,
+                        'content': contenido if conexion.intents & INTENT_CONTENIDO else '',
+                        'author': autor, 'member': miembro, 'attachments': [], 'embeds': [], 'mentions': [], 'mention_roles': [],
+                        'pinned': False, 'mention_everyone': False, 'tts': False, 'timestamp': FECHA, 'edited_timestamp': None,
+                    }
+                elif tipo == 'TYPING_START':
+                    datos = {'channel_id': canal, 'guild_id': servidor, 'user_id': autor['id'], 'timestamp': 1704067200, 'member': {**miembro, 'user': autor}}
+                else:
+                    datos = {
+                        'user_id': autor['id'], 'channel_id': canal, 'message_id': self.nuevo_id(), 'guild_id': servidor,
+                        'member': {**miembro, 'user': autor}, 'emoji': {'id': None, 'name': '👍'}, 'type': 0, 'burst': False,
+                    }
+                await conexion.evento(tipo, datos)
+                enviados[tipo] += 1
+        return respuesta_json({'eventos': dict(enviados), 'bytes': sum(conexion.bytes for conexion in self.conexiones.values()) - antes})
+
+    async def interaccion(self, peticion):
+        # Envía un comando de barra `nombre` desde el servidor `servidor` y devuelve el cuerpo de la respuesta del bot,
+        # o None si no responde en `espera` segundos.
+        opciones = await peticion.json()
+        numero = opciones.get('servidor', 0)
+        conexion = self.conexiones.get(self.shard_de(numero))
+        if conexion is None:
+            return respuesta_json({'respuesta': None})
+        servidor = str(self.id_servidor(numero))
+        canal = {'id': str(self.id_servidor(numero) + 1), 'type': 0, 'name': 'general', 'guild_id': servidor, 'position': 0, 'permission_overwrites': []}
+        # El id lleva la hora actual, como los de Discord: discord.py da por caducada una interacción de hace más de
+        # 15 minutos y entonces responde con un mensaje normal en el canal.
+        interaccion = str(((int(time.time() * 1000) - 1420070400000) << 22) + int(self.nuevo_id()) % (1 << 22))
+        espera = asyncio.get_running_loop().create_future()
+        self.esperas[interaccion] = espera
+        autor = {'id': '1000', 'username': 'probador', 'discriminator': '0', 'avatar': None, 'global_name': None}
+        await conexion.evento('INTERACTION_CREATE', {
+            'id': interaccion, 'type': 2, 'token': f'token-{interaccion}', 'version': 1, 'application_id': USUARIO_BOT['id'],
+            'data': {'id': self.nuevo_id(), 'name': opciones['nombre'], 'type': 1, 'options': []},
+            'guild_id': servidor, 'channel_id': canal['id'], 'channel': canal, 'locale': 'es-ES', 'guild_locale': 'es-ES',
+            'member': {'user': autor, 'roles': [], 'joined_at': FECHA, 'deaf': False, 'mute': False, 'flags': 0, 'permissions': '2248473465835073'},
+            'app_permissions': '2248473465835073', 'entitlements': [], 'attachment_size_limit': 8388608, 'context': 0,
+            'authorizing_integration_owners': {'0': servidor},
+        })
+        try:
+            respuesta = await asyncio.wait_for(espera, opciones.get('espera', 5))
+        except asyncio.TimeoutError:
+            respuesta = None
+        finally:
+            self.esperas.pop(interaccion, None)
+        return respuesta_json({'respuesta': respuesta})
+
+    async def nuevos_servidores(self, peticion):
+        # Une `cantidad` servidores nuevos de golpe, como cuando se añade el bot a muchos servidores o vuelve un corte de Discord.
+        cantidad = (await peticion.json())['cantidad']
+        primero = self.servidores
+        self.servidores += cantidad
+        inicio = time.perf_counter()
+        for numero in range(primero, self.servidores):
+            conexion = self.conexiones.get(self.shard_de(numero))
+            if conexion is not None:
+                await conexion.evento('GUILD_CREATE', self.datos_servidor(numero))
+        return respuesta_json({'servidores': self.servidores, 'envio_s': round(time.perf_counter() - inicio, 3)})
+
+    async def estado(self, peticion):
+        return respuesta_json({
+            'identificaciones': self.identificaciones,
+            'reanudaciones': self.reanudaciones,
+            'identificaciones_shard': {str(shard): cantidad for shard, cantidad in sorted(self.identificaciones_shard.items())},
+            'shards_conectados': sorted(self.conexiones),
+            'inundacion_s': None if self.inundacion is None else round(self.inundacion, 3),
+            'peticiones': dict(self.peticiones),
+        })
+
+def servir(opciones, tuberia):
+    # Proceso del Discord falso: publica el servidor en un puerto libre, envía el puerto al proceso del bot y sigue hasta que lo terminan.
+    async def principal():
+        falso = DiscordFalso(**opciones)
+        runner = web.AppRunner(falso.aplicacion(), access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, '127.0.0.1', 0).start()
+        puerto = runner.addresses[0][1]
+        falso.url = f'ws://127.0.0.1:{puerto}/'
+        tuberia.send(puerto)
+        await asyncio.Event().wait()
+
+    asyncio.run(principal())
+
+@contextlib.contextmanager
+def discord_falso(opciones):
+    # Arranca el Discord falso en un proceso aparte y devuelve su puerto; al salir, termina el proceso.
+    contexto = multiprocessing.get_context('spawn')
+    recibir, enviar = contexto.Pipe(duplex=False)
+    proceso = contexto.Process(target=servir, args=(opciones, enviar), name='discord-falso', daemon=True)
+    proceso.start()
+    try:
+        yield recibir.recv()
+    finally:
+        proceso.terminate()
+
+def rss_maxima():
+    # En Linux `ru_maxrss` está en KiB.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def preparar_bot(modulo, protecciones=False):
+    # Mismos ajustes que el benchmark de comandos: datos que no salen del directorio temporal, sin consultas a Minecraft
+    # y, salvo con `--protecciones`, sin agrupación ni límites de uso (cada comando debe tener su respuesta).
+    modulo.configuraciones.archivo = ':memory:'
+    modulo.red = modulo.MonitorRed({}, 60, 1, 1)
+    modulo.estado_servidor.ultimo = ESTADO_FALSO
+    modulo.estado_servidor._caduca = float('inf')
+    if not protecciones:
+        modulo.agrupador.ventana = 0
+        modulo.enfriamientos.clear()
+
+def elegir_mezcla(modulo, texto):
+    disponibles = casos(modulo.bot, modulo.PREFIJO)
+    if not texto:
+        return [[contenido, 1] for contenido in disponibles.values()]
+    mezcla = []
+    for parte in texto.split(','):
+        nombre, _, peso = parte.partition('=')
+        if nombre not in disponibles:
+            raise SystemExit(f"'{nombre}' no está entre los casos disponibles: {', '.join(disponibles)}")
+        mezcla.append([disponibles[nombre], float(peso or 1)])
+    return mezcla
+
+async def conectar(modulo, puerto, espera_listo):
+    # Conecta el bot al Discord falso y espera a que esté listo para atender todos los comandos: conectado y con las
+    # extensiones cargadas, que se cargan tras READY. Devuelve la tarea de la conexión, o None si el bot no llega a
+    # estar listo en `espera_listo` segundos.
+    bot = modulo.bot
+    discord.http.Route.BASE = f'http://127.0.0.1:{puerto}/api/v10'
+    discord.gateway.DiscordWebSocket.DEFAULT_GATEWAY = yarl.URL(f'ws://127.0.0.1:{puerto}/')
+
+    async def esperar_listo():
+        await bot.wait_until_ready()
+        await modulo.extensiones.preparadas.wait()
+
+    conexion = asyncio.create_task(bot.start(TOKEN_FALSO))
+    listo = asyncio.create_task(esperar_listo())
+    await asyncio.wait({conexion, listo}, timeout=espera_listo, return_when=asyncio.FIRST_COMPLETED)
+    if conexion.done():
+        conexion.result()
+    if not listo.done():
+        listo.cancel()
+        await bot.close()
+        return None
+    return conexion
+
+async def desconectar(bot, conexion):
+    await bot.close()
+    try:
+        await conexion
+    except Exception:
+        pass
+
+def aprueba(paso, proporcion, p99_maximo):
+    # Un ritmo aprueba si las respuestas siguen el ritmo de los comandos enviados, o si no se pierde ninguno y el p99
+    # queda dentro del límite.
+    if paso['comandos_por_segundo'] and paso['respuestas_por_segundo'] >= proporcion * paso['comandos_por_segundo']:
+        return True
+    return not paso['sin_respuesta'] and paso['latencia_p99_ms'] is not None and paso['latencia_p99_ms'] <= p99_maximo
+
+async def conducir(modulo, puerto, argumentos):
+    resultado = {}
+    control = f'http://127.0.0.1:{puerto}/_control'
+    preparar_bot(modulo, argumentos.protecciones)
+    bot = modulo.bot
+
+    inicio = time.perf_counter()
+    conexion = await conectar(modulo, puerto, argumentos.espera_listo)
+    if conexion is None:
+        raise SystemExit(f'El bot no llegó a estar listo en {argumentos.espera_listo} segundos.')
+    resultado['listo_s'] = round(time.perf_counter() - inicio, 3)
+    resultado['servidores_en_cache'] = len(bot.guilds)
+    resultado['rss_listo_mib'] = round(modulo.memoria_rss() / 1048576, 1)
+
+    mezcla = elegir_mezcla(modulo, argumentos.mezcla)
+    comun = {'mezcla': mezcla, 'prefijo': modulo.PREFIJO, 'espera': argumentos.espera_respuestas}
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=None)) as sesion:
+        async def pedir(ruta, datos=None):
+            async with (sesion.get(control + ruta) if datos is None else sesion.post(control + ruta, json=datos)) as respuesta:
+                return await respuesta.json()
+
+        # Reconexión pedida por Discord: el bot reanuda la sesión en vez de identificarse de nuevo.
+        reanudado = asyncio.ensure_future(bot.wait_for('resumed', timeout=argumentos.espera_listo))
+        inicio = time.perf_counter()
+        await pedir('/reconectar', {})
+        with contextlib.suppress(asyncio.TimeoutError):
+            await reanudado
+            resultado['reanudacion_s'] = round(time.perf_counter() - inicio, 3)
+        resultado['hasta_listo_s'] = {modo: round(segundos, 3) for modo, segundos in modulo.sesion_gateway.tiempos.items()}
+
+        resultado['tormentas'] = []
+        for ritmo in argumentos.mensajes_por_segundo:
+            paso = await pedir('/tormenta', {**comun, 'mensajes_por_segundo': ritmo, 'segundos': argumentos.segundos})
+            paso['rss_mib'] = round(modulo.memoria_rss() / 1048576, 1)
+            paso['aprobado'] = aprueba(paso, argumentos.proporcion_respuestas, argumentos.p99_maximo)
+            resultado['tormentas'].append(paso)
+        aprobados = [paso['ritmo_pedido'] for paso in resultado['tormentas'] if paso['aprobado']]
+        resultado['ritmo_maximo_aprobado'] = max(aprobados) if aprobados else None
+
+        if argumentos.limite_canal:
+            # Ráfaga en un solo canal: el triple del límite, de golpe. discord.py debe repartir los envíos en tres ventanas
+            # del límite según las cabeceras, sin que ninguno se pierda.
+            comandos = [[contenido, peso] for contenido, peso in mezcla if contenido.startswith(modulo.PREFIJO)]
+            rafaga = await pedir('/tormenta', {
+                **comun, 'mezcla': comandos, 'canales': 1, 'mensajes_por_segundo': 1000,
+                'segundos': argumentos.limite_canal * 3 / 1000, 'espera': argumentos.ventana_limite * 4 + 5,
+            })
+            resultado['rafaga_un_canal'] = rafaga
+
+        if argumentos.nuevos_servidores:
+            inicio = time.perf_counter()
+            await pedir('/inundacion', {'cantidad': argumentos.nuevos_servidores})
+            total = argumentos.servidores + argumentos.nuevos_servidores
+            limite = inicio + argumentos.espera_listo
+            while len(bot.guilds) < total and time.perf_counter() < limite:
+                await asyncio.sleep(0.01)
+            resultado['nuevos_servidores_s'] = round(time.perf_counter() - inicio, 3)
+
+        resultado['discord_falso'] = await pedir('/estado')
+    resultado['rss_maxima_mib'] = round(rss_maxima() / 1048576, 1)
+    resultado['errores_comandos'] = {f'{nombre}:{error}': cantidad for (nombre, error), cantidad in modulo.metricas.errores.items()}
+    await desconectar(bot, conexion)
+    return resultado
+
+def main():
+    parser = argparse.ArgumentParser(description='Prueba de carga del bot contra un Discord falso en local.')
+    parser.add_argument('--bot', default=os.path.join(DIRECTORIO, 'Código_sin_documentación.py'))
+    parser.add_argument('--servidor-web', default=os.path.join(DIRECTORIO, 'Servidor_Web_sin_Documentación.py'))
+    parser.add_argument('--servidores', type=int, default=2000)
+    parser.add_argument('--shards', type=int, default=1, help='shards que anuncia /gateway/bot (para bots con AutoShardedBot)')
+    parser.add_argument('--mensajes-por-segundo', type=lambda texto: [float(parte) for parte in texto.split(',')], default=[200, 500, 1000],
+                        help='ritmos de las tormentas de mensajes, separados por comas')
+    parser.add_argument('--segundos', type=float, default=5, help='duración de cada tormenta')
+    parser.add_argument('--mezcla', help='casos y pesos, como ip=5,normas=3,charla_0=2 (por defecto, todos por igual)')
+    parser.add_argument('--limite-canal', type=int, default=5, help='mensajes por canal antes de responder 429 (0 sin límite)')
+    parser.add_argument('--ventana-limite', type=float, default=5, help='segundos de la ventana del límite por canal')
+    parser.add_argument('--proporcion-429', type=float, default=0.01, help='fracción de envíos que reciben un 429 aunque quede cupo')
+    parser.add_argument('--nuevos-servidores', type=int, default=500, help='servidores que se unen de golpe al final')
+    parser.add_argument('--latido', type=int, default=41250, help='intervalo de latido del gateway en ms')
+    parser.add_argument('--protecciones', action='store_true', help='mantiene la agrupación de respuestas y los enfriamientos del bot')
+    parser.add_argument('--espera-listo', type=float, default=300)
+    parser.add_argument('--espera-respuestas', type=float, default=30)
+    parser.add_argument('--proporcion-respuestas', type=float, default=0.95,
+                        help='fracción de los comandos por segundo enviados que el bot debe responder para aprobar un ritmo')
+    parser.add_argument('--p99-maximo', type=float, default=250, help='p99 en ms con el que aprueba un ritmo sin perder comandos')
+    parser.add_argument('--salida', default=os.path.join(DIRECTORIO, 'benchmark_carga.json'))
+    argumentos = parser.parse_args()
+    ruta_bot = os.path.abspath(argumentos.bot)
+    ruta_servidor_web = os.path.abspath(argumentos.servidor_web)
+    salida = os.path.abspath(argumentos.salida)
+
+    opciones = {
+        'servidores': argumentos.servidores, 'shards': argumentos.shards, 'limite_canal': argumentos.limite_canal,
+        'ventana_limite': argumentos.ventana_limite, 'proporcion_429': argumentos.proporcion_429, 'latido': argumentos.latido,
+    }
+    directorio = tempfile.mkdtemp(prefix='benchmark_carga_')
+    try:
+        # El bot guarda sanciones, anuncios y volcados en el directorio actual: se ejecuta en uno temporal.
+        os.chdir(directorio)
+        modulo = cargar_bot(ruta_bot, ruta_servidor_web)
+        with discord_falso(opciones) as puerto:
+            resultado = asyncio.run(conducir(modulo, puerto, argumentos))
+    finally:
+        os.chdir(DIRECTORIO)
+        shutil.rmtree(directorio, ignore_errors=True)
+    resultado = {
+        'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'discord_py': discord.__version__,
+        'servidores': argumentos.servidores,
+        **resultado,
+    }
+    mostrar(resultado)
+    with open(salida, 'w', encoding='utf-8') as archivo:
+        json.dump(resultado, archivo, indent=2, ensure_ascii=False)
+    if resultado['ritmo_maximo_aprobado'] is None:
+        print(f'Ningún ritmo aprobado: el bot no respondió al {argumentos.proporcion_respuestas:.0%} de los comandos ni con p99 bajo {argumentos.p99_maximo} ms.')
+        sys.exit(1)
+    print(f"Ritmo más alto aprobado: {resultado['ritmo_maximo_aprobado']} mensajes/s.")
+
+def mostrar(resultado):
+    for clave in ('servidores', 'listo_s', 'servidores_en_cache', 'rss_listo_mib', 'hasta_listo_s', 'reanudacion_s', 'nuevos_servidores_s', 'rss_maxima_mib'):
+        if clave in resultado:
+            print(f'{clave:<24} {resultado[clave]}')
+    if resultado.get('tormentas'):
+        print(f"{'msg/s pedidos':>14} {'enviados/s':>11} {'com/s':>8} {'resp/s':>8} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'máx ms':>8} {'429':>5} {'RSS MiB':>8} {'aprobado':>8}")
+        for paso in resultado['tormentas'] + ([resultado['rafaga_un_canal']] if 'rafaga_un_canal' in resultado else []):
+            print(
+                f"{paso['ritmo_pedido']:>14} {paso['ritmo_enviado']:>11} {paso['comandos_por_segundo']:>8} {paso['respuestas_por_segundo']:>8} "
+                f"{paso['latencia_p50_ms']!s:>8} {paso['latencia_p90_ms']!s:>8} {paso['latencia_p99_ms']!s:>8} {paso['latencia_max_ms']!s:>8} "
+                f"{paso['respuestas_429']:>5} {paso.get('rss_mib', '')!s:>8} {('sí' if paso['aprobado'] else 'no') if 'aprobado' in paso else '':>8}"
+            )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,241 @@
+import argparse
+import asyncio
+import contextlib
+import glob
+import json
+import multiprocessing
+import os
+import platform
+import re
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import aiohttp
+
+from Benchmark_Carga import DiscordFalso, servir
+from Benchmark_Comandos import DIRECTORIO
+
+# Benchmark del modo cluster (`MODO_CLUSTER`) contra el Discord falso de `Benchmark_Carga.py`.
+# Copia el bot (con el mismo nombre de archivo, para que cargue la misma versión de las extensiones) y sus extensiones
+# a una carpeta temporal con el modo cluster activado, `--shards` shards repartidos en `--procesos` procesos y el
+# servidor web asíncrono en un puerto libre, y lo arranca como en producción: `python <archivo del bot>`, que llama
+# a `iniciar_cluster`. Al principio de la copia se añaden unas líneas que apuntan discord.py al Discord falso; como los
+# procesos del cluster se crean con `spawn` y vuelven a ejecutar el archivo, también se aplican en ellos.
+# En la copia se desactivan además la agrupación de respuestas y los límites de uso (todos los mensajes de prueba los
+# escribe el mismo usuario) y el monitor de la red (no hay servidores de Minecraft).
+# Mide el tiempo hasta que todo el cluster está listo (todos los shards conectados y `/healthz` con todos los
+# servidores) y, tras matar un proceso, el tiempo hasta que el supervisor lo vuelve a lanzar y sus shards se reconectan.
+# Las comprobaciones del modo cluster están en `tests/test_cluster.py`. Solo funciona en Linux.
+#
+# Uso:
+#   python Benchmark_Cluster.py
+#   python Benchmark_Cluster.py --shards 8 --procesos 4 --servidores 2000
+
+PRELUDIO = '''import discord as _discord_benchmark
+import yarl as _yarl_benchmark
+_discord_benchmark.http.Route.BASE = 'http://127.0.0.1:{puerto}/api/v10'
+_discord_benchmark.gateway.DiscordWebSocket.DEFAULT_GATEWAY = _yarl_benchmark.URL('ws://127.0.0.1:{puerto}/')
+'''
+
+def puerto_libre():
+    with socket.socket() as conexion:
+        conexion.bind(('127.0.0.1', 0))
+        return conexion.getsockname()[1]
+
+def preparar_copia(directorio, bot, servidor_web, shards, procesos, puerto_discord, puerto_web):
+    with open(bot, encoding='utf-8') as archivo:
+        texto = archivo.read()
+    constantes = {
+        'MODO_CLUSTER': True,
+        'TOTAL_SHARDS': shards,
+        'PROCESOS_CLUSTER': procesos,
+        'MODO_SERVIDOR_WEB': 'async',
+        'SERVIDORES_RED': {},
+        'VENTANA_AGRUPACION': 0,
+        'ENFRIAMIENTO_USUARIO': None,
+        'ENFRIAMIENTO_CANAL': None,
+    }
+    for nombre, valor in constantes.items():
+        texto, cambios = re.subn(rf'^{nombre} = .*$', f'{nombre} = {valor!r}', texto, count=1, flags=re.MULTILINE)
+        if not cambios:
+            raise SystemExit(f'No se encontró la constante {nombre} en {bot}')
+    nombre = os.path.basename(bot)
+    with open(os.path.join(directorio, nombre), 'w', encoding='utf-8') as archivo:
+        archivo.write(PRELUDIO.format(puerto=puerto_discord) + texto)
+    shutil.copytree(
+        os.path.join(os.path.dirname(bot), 'extensiones'), os.path.join(directorio, 'extensiones'),
+        ignore=shutil.ignore_patterns('__pycache__'),
+    )
+
+    with open(servidor_web, encoding='utf-8') as archivo:
+        web = archivo.read()
+    web, cambios = re.subn(r"host='0\.0\.0\.0', port=8080\)", f"host='127.0.0.1', port={puerto_web})", web)
+    if not cambios:
+        raise SystemExit(f'No se encontró el puerto de keep_alive_async en {servidor_web}')
+    with open(os.path.join(directorio, 'webserver.py'), 'w', encoding='utf-8') as archivo:
+        archivo.write(web)
+    return nombre
+
+def trabajadores(pid):
+    # Procesos hijos del proceso principal creados por `multiprocessing`, sin el que vigila sus recursos.
+    hijos = []
+    for ruta in glob.glob(f'/proc/{pid}/task/*/children'):
+        with open(ruta) as archivo:
+            hijos.extend(int(hijo) for hijo in archivo.read().split())
+    procesos = []
+    for hijo in hijos:
+        try:
+            with open(f'/proc/{hijo}/cmdline', 'rb') as archivo:
+                linea = archivo.read()
+        except OSError:
+            continue
+        if b'multiprocessing' in linea and b'resource_tracker' not in linea:
+            procesos.append(hijo)
+    return sorted(procesos)
+
+def shard_de(numero, shards):
+    return (DiscordFalso.id_servidor(numero) >> 22) % shards
+
+def grupos(shards, procesos):
+    # El mismo reparto que `repartir_shards`: bloques seguidos de shards, uno por proceso.
+    procesos = max(1, min(procesos, shards))
+    return [list(range(indice * shards // procesos, (indice + 1) * shards // procesos)) for indice in range(procesos)]
+
+class Cluster:
+    # Un cluster en marcha: el Discord falso y el proceso principal del bot, con las direcciones para consultarlos.
+    def __init__(self, director, directorio, puerto_discord, puerto_web, shards, servidores):
+        self.director = director
+        self.directorio = directorio
+        self.control = f'http://127.0.0.1:{puerto_discord}/_control'
+        self.salud = f'http://127.0.0.1:{puerto_web}/healthz'
+        self.shards = list(range(shards))
+        self.servidores = servidores
+
+    async def estado(self, sesion):
+        async with sesion.get(self.control + '/estado') as respuesta:
+            return await respuesta.json()
+
+    async def sano(self, sesion):
+        try:
+            async with sesion.get(self.salud) as respuesta:
+                datos = await respuesta.json()
+                return respuesta.status == 200 and datos['servidores'] == self.servidores
+        except (aiohttp.ClientError, ValueError):
+            return False
+
+    async def listo(self, sesion):
+        return (await self.estado(sesion))['shards_conectados'] == self.shards and await self.sano(sesion)
+
+    async def hasta(self, condicion, limite):
+        # Espera hasta que `condicion()` se cumpla, como mucho `limite` segundos. Devuelve False si no se cumple a tiempo
+        # o si el proceso principal termina.
+        final = time.perf_counter() + limite
+        while time.perf_counter() < final:
+            if self.director.poll() is not None:
+                return False
+            if await condicion():
+                return True
+            await asyncio.sleep(0.05)
+        return False
+
+    def registros(self):
+        # Las últimas líneas del registro de cada proceso, para saber por qué falló algo.
+        lineas = []
+        for ruta in sorted(glob.glob(os.path.join(self.directorio, 'bot*.log'))):
+            with open(ruta, encoding='utf-8', errors='replace') as archivo:
+                lineas.append(f'--- {os.path.basename(ruta)}\n' + ''.join(archivo.readlines()[-5:]))
+        return '\n'.join(lineas)
+
+@contextlib.contextmanager
+def arrancar(bot, servidor_web, shards, procesos, servidores):
+    contexto = multiprocessing.get_context('spawn')
+    recibir, enviar = contexto.Pipe(duplex=False)
+    opciones = {
+        'servidores': servidores, 'shards': shards, 'limite_canal': 0,
+        'ventana_limite': 5, 'proporcion_429': 0, 'latido': 41250,
+    }
+    discord_falso = contexto.Process(target=servir, args=(opciones, enviar), name='discord-falso', daemon=True)
+    discord_falso.start()
+    directorio = tempfile.mkdtemp(prefix='benchmark_cluster_')
+    director = None
+    try:
+        puerto_discord = recibir.recv()
+        puerto_web = puerto_libre()
+        nombre = preparar_copia(directorio, bot, servidor_web, shards, procesos, puerto_discord, puerto_web)
+        # Una sesión propia para poder terminar el proceso principal y todos sus procesos de una vez.
+        director = subprocess.Popen(
+            [sys.executable, nombre], cwd=directorio, start_new_session=True,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        yield Cluster(director, directorio, puerto_discord, puerto_web, shards, servidores)
+    finally:
+        if director is not None:
+            try:
+                os.killpg(director.pid, signal.SIGTERM)
+                director.wait(10)
+            except subprocess.TimeoutExpired:
+                os.killpg(director.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        discord_falso.terminate()
+        shutil.rmtree(directorio, ignore_errors=True)
+
+async def medir(cluster, espera_listo):
+    tiempos = {}
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30)) as sesion:
+        inicio = time.perf_counter()
+        if not await cluster.hasta(lambda: cluster.listo(sesion), espera_listo):
+            raise SystemExit('El cluster no llegó a estar listo.\n' + cluster.registros())
+        tiempos['listo_s'] = round(time.perf_counter() - inicio, 3)
+
+        # Se mata un proceso sin avisar, como un fallo de memoria o un error grave.
+        pid = trabajadores(cluster.director.pid)[0]
+        os.kill(pid, signal.SIGKILL)
+        inicio = time.perf_counter()
+
+        async def caido():
+            return (await cluster.estado(sesion))['shards_conectados'] != cluster.shards
+
+        async def recuperado():
+            return pid not in trabajadores(cluster.director.pid) and await cluster.listo(sesion)
+
+        if not await cluster.hasta(caido, 30) or not await cluster.hasta(recuperado, espera_listo):
+            raise SystemExit('El cluster no se recuperó tras matar un proceso.\n' + cluster.registros())
+        tiempos['recuperacion_s'] = round(time.perf_counter() - inicio, 3)
+    return tiempos
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark del modo cluster contra un Discord falso en local.')
+    parser.add_argument('--bot', default=os.path.join(DIRECTORIO, 'Código_sin_documentación.py'))
+    parser.add_argument('--servidor-web', default=os.path.join(DIRECTORIO, 'Servidor_Web_sin_Documentación.py'))
+    parser.add_argument('--shards', type=int, default=4)
+    parser.add_argument('--procesos', type=int, default=2)
+    parser.add_argument('--servidores', type=int, default=200)
+    parser.add_argument('--espera-listo', type=float, default=120)
+    parser.add_argument('--salida', default=os.path.join(DIRECTORIO, 'benchmark_cluster.json'))
+    argumentos = parser.parse_args()
+    salida = os.path.abspath(argumentos.salida)
+
+    with arrancar(os.path.abspath(argumentos.bot), os.path.abspath(argumentos.servidor_web), argumentos.shards, argumentos.procesos, argumentos.servidores) as cluster:
+        tiempos = asyncio.run(medir(cluster, argumentos.espera_listo))
+
+    resultado = {
+        'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'servidores': argumentos.servidores,
+        'shards': argumentos.shards,
+        'procesos': argumentos.procesos,
+        **tiempos,
+    }
+    for clave, valor in resultado.items():
+        print(f'{clave:<16} {valor}')
+    with open(salida, 'w', encoding='utf-8') as archivo:
+        json.dump(resultado, archivo, indent=2, ensure_ascii=False)
+
+if __name__ == '__main__':
+    main()
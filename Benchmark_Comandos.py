@@ -0,0 +1,325 @@
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+import types
+
+import discord
+
+# Benchmark del camino de ejecución de comandos.
+# Carga el archivo del bot sin conectarlo a Discord, le pasa mensajes sintéticos por `on_message`
+# (el mismo camino que recorre un mensaje real) y reemplaza la capa HTTP por una falsa en memoria
+# que guarda los envíos en una lista. Mide mensajes por segundo, latencias p50/p99 y memoria
+# asignada por mensaje, guarda el resultado en JSON y falla si empeora respecto a una base guardada.
+# Aparte mide la resolución del prefijo (`command_prefix`) con miles de servidores configurados.
+#
+# Uso:
+#   python Benchmark_Comandos.py --guardar-base      # mide y guarda la base
+#   python Benchmark_Comandos.py                     # mide y compara con la base
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+
+# Argumentos para los comandos que los necesitan.
+ARGUMENTOS = {
+    'buscar': 'spam hacks',
+    'top': 'tiempo',
+    'stats': 'Steve',
+}
+
+# Mensajes normales (sin comando) que también pasan por `on_message`.
+CHARLA = [
+    'hola a todos',
+    'alguien se conecta al servidor esta noche?',
+    'gg',
+]
+
+# Métricas comparadas con la base: nombre -> True si un valor mayor es mejor.
+# Por caso solo se comparan p50 y memoria: el p99 de un solo caso tiene demasiado ruido.
+METRICAS_TOTAL = {
+    'mensajes_por_segundo': True,
+    'p50_us': False,
+    'p99_us': False,
+    'bytes_por_mensaje': False,
+}
+METRICAS_CASO = {
+    'p50_us': False,
+    'bytes_por_mensaje': False,
+}
+METRICAS_PREFIJOS = {
+    'resoluciones_por_segundo': True,
+    'acierto_p50_ns': False,
+}
+
+# Uno de cada tantos servidores del benchmark de prefijos tiene un prefijo propio guardado en la base de datos.
+PROPORCION_PERSONALIZADOS = 10
+
+# Estado falso del servidor de Minecraft, para que `+ip` no haga consultas de red.
+ESTADO_FALSO = {'en_linea': True, 'version': 'Paper 1.17.1', 'jugadores': 12, 'maximo': 100, 'latencia': 20}
+
+USUARIO_BOT = {'id': '99', 'username': 'bot', 'discriminator': '0', 'avatar': None, 'bot': True}
+
+def cargar_bot(ruta_bot, ruta_servidor_web):
+    # El bot importa `webserver`; si no existe con ese nombre, se carga desde el archivo indicado.
+    if 'webserver' not in sys.modules:
+        try:
+            import webserver  # noqa: F401
+        except ImportError:
+            spec = importlib.util.spec_from_file_location('webserver', ruta_servidor_web)
+            modulo = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(modulo)
+            sys.modules['webserver'] = modulo
+    # El módulo se registra en `sys.modules` antes de ejecutarlo, como hace `import`: el bot se registra a su vez como
+    # `olympusbot` para que sus extensiones lo importen.
+    spec = importlib.util.spec_from_file_location('bot_benchmark', ruta_bot)
+    modulo = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = modulo
+    spec.loader.exec_module(modulo)
+    return modulo
+
+def datos_mensaje(identificador, contenido, autor):
+    return {
+        'id': str(identificador), 'channel_id': '10', 'guild_id': '5', 'type': 0, 'content': contenido,
+        'author': autor, 'attachments': [], 'embeds': [], 'mentions': [], 'mention_roles': [],
+        'pinned': False, 'mention_everyone': False, 'tts': False,
+        'timestamp': '2024-01-01T00:00:00+00:00', 'edited_timestamp': None,
+    }
+
+class HTTPFalso:
+    # Sustituye a `bot.http.request`: guarda cada petición y responde con un mensaje vacío.
+    def __init__(self):
+        self.enviados = []
+        self._respuesta = datos_mensaje(1, '', USUARIO_BOT)
+
+    async def request(self, route, **kwargs):
+        self.enviados.append((route.method, route.path))
+        return self._respuesta
+
+async def preparar(modulo):
+    bot = modulo.bot
+    # Base de datos de configuración en memoria, para no leer ni modificar la del bot.
+    modulo.configuraciones.archivo = ':memory:'
+    await bot._async_setup_hook()
+    await modulo.cargar_cogs()
+    # Las extensiones (información, normas, tienda...) el bot las carga al conectarse; aquí no se conecta.
+    await modulo.extensiones.cargar(bot)
+    estado = bot._connection
+    estado.user = discord.ClientUser(state=estado, data=USUARIO_BOT)
+    servidor = discord.Guild(data={'id': '5', 'name': 'benchmark', 'roles': [], 'emojis': [], 'stickers': [], 'features': [], 'member_count': 1}, state=estado)
+    estado._add_guild(servidor)
+    canal = discord.TextChannel(state=estado, guild=servidor, data={'id': '10', 'type': 0, 'name': 'general', 'position': 0, 'guild_id': '5', 'permission_overwrites': []})
+    servidor._add_channel(canal)
+
+    http = HTTPFalso()
+    # `_peticion_rest` es la petición original que envuelve la medición de métricas del bot.
+    modulo._peticion_rest = http.request
+    modulo.estado_servidor.ultimo = ESTADO_FALSO
+    modulo.estado_servidor._caduca = float('inf')
+    modulo.configuraciones.por_defecto.obtener_respuestas().invalidar('ip')
+    # Sin agrupación ni límites de uso: el benchmark envía muchas veces el mismo comando en el mismo canal.
+    modulo.agrupador.ventana = 0
+    modulo.enfriamientos.clear()
+
+    def mensaje(identificador, contenido):
+        autor = {'id': str(1000 + identificador % 50), 'username': 'usuario', 'discriminator': '0', 'avatar': None}
+        return discord.Message(state=estado, channel=canal, data=datos_mensaje(identificador, contenido, autor))
+
+    return mensaje, http
+
+def casos(bot, prefijo):
+    # Un caso por comando registrado (salvo los que tienen restricciones, como los del staff) y otro por cada mensaje de charla.
+    resultado = {}
+    for comando in sorted(bot.commands, key=lambda comando: comando.name):
+        if comando.checks:
+            continue
+        contenido = f'{prefijo}{comando.name}'
+        if comando.name in ARGUMENTOS:
+            contenido += ' ' + ARGUMENTOS[comando.name]
+        resultado[comando.name] = contenido
+    for indice, texto in enumerate(CHARLA):
+        resultado[f'charla_{indice}'] = texto
+    return resultado
+
+def percentil(valores, porcentaje):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * porcentaje / 100))]
+
+def resumen(tiempos, total, bytes_mensaje):
+    return {
+        'mensajes_por_segundo': round(len(tiempos) / total, 1),
+        'p50_us': round(percentil(tiempos, 50) * 1e6, 1),
+        'p99_us': round(percentil(tiempos, 99) * 1e6, 1),
+        'bytes_por_mensaje': round(bytes_mensaje),
+    }
+
+async def medir(modulo, iteraciones, calentamiento):
+    mensaje, http = await preparar(modulo)
+    on_message = modulo.bot.on_message
+    contenidos = casos(modulo.bot, modulo.PREFIJO)
+    identificador = 0
+
+    def siguiente(contenido):
+        nonlocal identificador
+        identificador += 1
+        return mensaje(identificador, contenido)
+
+    for _ in range(calentamiento):
+        for contenido in contenidos.values():
+            await on_message(siguiente(contenido))
+
+    # Tiempos: los mensajes se intercalan para que ningún caso se beneficie de ir siempre seguido.
+    tiempos = {nombre: [] for nombre in contenidos}
+    enviados_antes = len(http.enviados)
+    reloj = time.perf_counter
+    for _ in range(iteraciones):
+        for nombre, contenido in contenidos.items():
+            nuevo = siguiente(contenido)
+            inicio = reloj()
+            await on_message(nuevo)
+            tiempos[nombre].append(reloj() - inicio)
+    enviados = len(http.enviados) - enviados_antes
+
+    # Memoria: pasada aparte con tracemalloc, porque ralentiza mucho la ejecución.
+    # Se mide el pico de memoria asignada mientras se procesa cada mensaje.
+    memoria = {nombre: [] for nombre in contenidos}
+    tracemalloc.start()
+    for _ in range(max(1, iteraciones // 10)):
+        for nombre, contenido in contenidos.items():
+            nuevo = siguiente(contenido)
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            await on_message(nuevo)
+            memoria[nombre].append(tracemalloc.get_traced_memory()[1] - base)
+    tracemalloc.stop()
+
+    todos = [tiempo for lista in tiempos.values() for tiempo in lista]
+    return {
+        'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'discord_py': discord.__version__,
+        'iteraciones': iteraciones,
+        'envios_capturados': enviados,
+        'total': resumen(todos, sum(todos), statistics.mean(valor for lista in memoria.values() for valor in lista)),
+        'casos': {
+            nombre: resumen(tiempos[nombre], sum(tiempos[nombre]), statistics.mean(memoria[nombre]))
+            for nombre in contenidos
+        },
+    }
+
+async def medir_prefijos(modulo, servidores, iteraciones):
+    # Resuelve el prefijo con `bot.get_prefix`, el mismo camino que sigue cada mensaje, para `servidores` servidores distintos.
+    # La primera pasada lee cada servidor de SQLite (fallos de caché); las siguientes salen de la caché LRU (aciertos).
+    almacen = modulo.AlmacenConfiguracion(':memory:', servidores)
+    for servidor_id in range(0, servidores, PROPORCION_PERSONALIZADOS):
+        await almacen.actualizar(servidor_id, 'prefijo', '!')
+    modulo.configuraciones = almacen
+    mensajes = [types.SimpleNamespace(guild=types.SimpleNamespace(id=servidor_id)) for servidor_id in range(servidores)]
+    get_prefix = modulo.bot.get_prefix
+    reloj = time.perf_counter_ns
+
+    fallos = []
+    for mensaje in mensajes:
+        inicio = reloj()
+        await get_prefix(mensaje)
+        fallos.append(reloj() - inicio)
+
+    aciertos = []
+    inicio_total = time.perf_counter()
+    for _ in range(iteraciones):
+        for mensaje in mensajes:
+            inicio = reloj()
+            await get_prefix(mensaje)
+            aciertos.append(reloj() - inicio)
+    total = time.perf_counter() - inicio_total
+    incorrectos = 0
+    for mensaje in mensajes:
+        esperado = '!' if mensaje.guild.id % PROPORCION_PERSONALIZADOS == 0 else modulo.PREFIJO
+        incorrectos += await get_prefix(mensaje) != esperado
+    return {
+        'servidores': servidores,
+        'resoluciones_por_segundo': round(len(aciertos) / total, 1),
+        'acierto_p50_ns': percentil(aciertos, 50),
+        'acierto_p99_ns': percentil(aciertos, 99),
+        'fallo_p50_ns': percentil(fallos, 50),
+        'fallo_p99_ns': percentil(fallos, 99),
+        'consultas_sqlite': almacen.fallos,
+        'prefijos_incorrectos': incorrectos,
+    }
+
+def comparar(resultado, base, umbral):
+    # Devuelve la lista de métricas que empeoraron más que `umbral` (0.2 = 20 %).
+    regresiones = []
+    grupos = [('total', resultado['total'], base['total'], METRICAS_TOTAL)]
+    grupos += [(nombre, datos, base['casos'][nombre], METRICAS_CASO) for nombre, datos in resultado['casos'].items() if nombre in base['casos']]
+    if 'prefijos' in base and base['prefijos']['servidores'] == resultado['prefijos']['servidores']:
+        grupos.append(('prefijos', resultado['prefijos'], base['prefijos'], METRICAS_PREFIJOS))
+    for nombre, actual, anterior, metricas in grupos:
+        for metrica, mayor_es_mejor in metricas.items():
+            if not anterior.get(metrica):
+                continue
+            cambio = (actual[metrica] - anterior[metrica]) / anterior[metrica]
+            if (-cambio if mayor_es_mejor else cambio) > umbral:
+                regresiones.append(f'{nombre}.{metrica}: {anterior[metrica]} -> {actual[metrica]} ({cambio:+.0%})')
+    return regresiones
+
+def mostrar(resultado):
+    print(f"{'caso':<12} {'msg/s':>10} {'p50 µs':>9} {'p99 µs':>9} {'bytes':>8}")
+    for nombre, datos in [('total', resultado['total'])] + list(resultado['casos'].items()):
+        print(f"{nombre:<12} {datos['mensajes_por_segundo']:>10} {datos['p50_us']:>9} {datos['p99_us']:>9} {datos['bytes_por_mensaje']:>8}")
+    print(f"Envíos capturados por la capa HTTP falsa: {resultado['envios_capturados']}")
+    prefijos = resultado['prefijos']
+    print(
+        f"Prefijos con {prefijos['servidores']} servidores: {prefijos['resoluciones_por_segundo']} resoluciones/s, "
+        f"acierto p50 {prefijos['acierto_p50_ns']} ns / p99 {prefijos['acierto_p99_ns']} ns, "
+        f"fallo p50 {prefijos['fallo_p50_ns']} ns / p99 {prefijos['fallo_p99_ns']} ns, "
+        f"{prefijos['consultas_sqlite']} consultas a SQLite"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark del camino de ejecución de comandos del bot.')
+    parser.add_argument('--bot', default=os.path.join(DIRECTORIO, 'Código_sin_documentación.py'))
+    parser.add_argument('--servidor-web', default=os.path.join(DIRECTORIO, 'Servidor_Web_sin_Documentación.py'))
+    parser.add_argument('--iteraciones', type=int, default=500)
+    parser.add_argument('--calentamiento', type=int, default=50)
+    parser.add_argument('--servidores', type=int, default=10000, help='servidores para el benchmark de resolución del prefijo')
+    parser.add_argument('--salida', default=os.path.join(DIRECTORIO, 'benchmark.json'))
+    parser.add_argument('--base', default=os.path.join(DIRECTORIO, 'benchmark_base.json'))
+    parser.add_argument('--umbral', type=float, default=0.2, help='empeoramiento máximo permitido respecto a la base (0.2 = 20 %%)')
+    parser.add_argument('--guardar-base', action='store_true', help='guarda el resultado como nueva base')
+    argumentos = parser.parse_args()
+
+    modulo = cargar_bot(argumentos.bot, argumentos.servidor_web)
+    resultado = asyncio.run(medir(modulo, argumentos.iteraciones, argumentos.calentamiento))
+    resultado['prefijos'] = asyncio.run(medir_prefijos(modulo, argumentos.servidores, 20))
+    mostrar(resultado)
+    if resultado['prefijos']['prefijos_incorrectos']:
+        print(f"Error: {resultado['prefijos']['prefijos_incorrectos']} servidores resolvieron un prefijo incorrecto.")
+        sys.exit(1)
+    with open(argumentos.salida, 'w', encoding='utf-8') as archivo:
+        json.dump(resultado, archivo, indent=2, ensure_ascii=False)
+
+    if argumentos.guardar_base:
+        with open(argumentos.base, 'w', encoding='utf-8') as archivo:
+            json.dump(resultado, archivo, indent=2, ensure_ascii=False)
+        print(f'Base guardada en {argumentos.base}')
+        return
+    if not os.path.exists(argumentos.base):
+        print('No hay base guardada; ejecuta con --guardar-base para crearla.')
+        return
+    with open(argumentos.base, encoding='utf-8') as archivo:
+        base = json.load(archivo)
+    regresiones = comparar(resultado, base, argumentos.umbral)
+    if regresiones:
+        print(f'Regresiones de más del {argumentos.umbral:.0%} respecto a la base:')
+        for regresion in regresiones:
+            print(f'  {regresion}')
+        sys.exit(1)
+    print('Sin regresiones respecto a la base.')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import time
+
+from Benchmark_Comandos import DIRECTORIO, cargar_bot, percentil, preparar
+
+# Benchmark de la caché de respuestas (`CacheRespuestas` y `EmbedCacheado`).
+# Compara, para cada respuesta fija (`help`, `ip`, `comandos` y cada categoría de normas), construir el embed y
+# convertirlo en el diccionario que se envía a Discord en cada uso, como antes de la caché, con obtenerlo ya construido
+# y convertido. Después mide los comandos completos pasándole los mensajes al bot sin conectarlo a Discord (como en
+# `Benchmark_Comandos.py`), con la caché y construyendo el embed en cada uso.
+# Las comprobaciones de la caché están en `tests/test_embeds.py`.
+#
+# Uso:
+#   python Benchmark_Embeds.py
+#   python Benchmark_Embeds.py --iteraciones 20000
+
+def medir(funcion, iteraciones):
+    tiempos = []
+    for _ in range(iteraciones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return percentil(tiempos, 50)
+
+def medir_respuestas(modulo, iteraciones):
+    respuestas = modulo.configuraciones.por_defecto.obtener_respuestas()
+    resultado = {}
+    for nombre, constructor in respuestas._constructores.items():
+        construir = medir(lambda: constructor().to_dict(), iteraciones)
+        cacheado = medir(lambda: respuestas.obtener(nombre).to_dict(), iteraciones)
+        resultado[nombre] = {
+            'construir_us': round(construir * 1e6, 2),
+            'cache_us': round(cacheado * 1e6, 3),
+            'aceleracion': round(construir / cacheado, 1),
+        }
+    return resultado
+
+async def medir_comandos(modulo, iteraciones):
+    mensaje, _ = await preparar(modulo)
+    bot = modulo.bot
+    clase = modulo.CacheRespuestas
+    obtener = clase.obtener
+    nombres = ['help', 'ip', 'comandos', *modulo.configuraciones.por_defecto.normas]
+    resultado = {}
+    identificador = 0
+    for nombre in nombres:
+        tiempos = {}
+        # Sin caché: cada uso construye el embed de nuevo, como antes.
+        for modo, funcion in (('cache', obtener), ('construir', lambda cache, nombre: cache._construir(nombre))):
+            clase.obtener = funcion
+            medidos = []
+            try:
+                for _ in range(iteraciones):
+                    identificador += 1
+                    inicio = time.perf_counter()
+                    await bot.on_message(mensaje(identificador, f'{modulo.PREFIJO}{nombre}'))
+                    medidos.append(time.perf_counter() - inicio)
+            finally:
+                clase.obtener = obtener
+            tiempos[modo] = percentil(medidos, 50)
+        resultado[nombre] = {
+            'cache_us': round(tiempos['cache'] * 1e6, 1),
+            'construir_us': round(tiempos['construir'] * 1e6, 1),
+        }
+    return resultado
+
+async def principal(modulo, argumentos):
+    comandos = await medir_comandos(modulo, argumentos.iteraciones // 10)
+    respuestas = medir_respuestas(modulo, argumentos.iteraciones)
+    return {'respuestas': respuestas, 'comandos': comandos}
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de la caché de respuestas.')
+    parser.add_argument('--bot', default=os.path.join(DIRECTORIO, 'Código_sin_documentación.py'))
+    parser.add_argument('--servidor-web', default=os.path.join(DIRECTORIO, 'Servidor_Web_sin_Documentación.py'))
+    parser.add_argument('--iteraciones', type=int, default=5000)
+    parser.add_argument('--salida', default=os.path.join(DIRECTORIO, 'benchmark_embeds.json'))
+    argumentos = parser.parse_args()
+
+    modulo = cargar_bot(argumentos.bot, argumentos.servidor_web)
+    tiempos = asyncio.run(principal(modulo, argumentos))
+    print(f"{'respuesta':<12} {'construir µs':>13} {'caché µs':>10} {'veces':>7} {'+comando µs':>12} {'sin caché µs':>13}")
+    for nombre, medida in tiempos['respuestas'].items():
+        comando = tiempos['comandos'].get(nombre, {})
+        print(
+            f"{nombre:<12} {medida['construir_us']:>13} {medida['cache_us']:>10} {medida['aceleracion']:>7}"
+            f" {comando.get('cache_us', ''):>12} {comando.get('construir_us', ''):>13}"
+        )
+    resultado = {
+        'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'iteraciones': argumentos.iteraciones,
+        **tiempos,
+    }
+    with open(argumentos.salida, 'w', encoding='utf-8') as archivo:
+        json.dump(resultado, archivo, indent=2, ensure_ascii=False)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import tempfile
+import time
+import uuid
+
+from Benchmark_Comandos import DIRECTORIO, cargar_bot
+
+# Benchmark del índice de estadísticas de `+top` y `+stats`.
+# Genera un directorio `world/stats` con `--jugadores` archivos (uno por jugador, con el formato de Minecraft 1.17)
+# y un `usercache.json`, y mide cuánto tarda el índice del bot en la carga completa, en una actualización sin cambios
+# y en una con `--modificados` archivos cambiados, y una consulta de top-k frente a ordenar a todos los jugadores.
+# Las comprobaciones del índice contra un cálculo directo sobre los mismos datos están en `tests/test_estadisticas.py`.
+#
+# Uso:
+#   python Benchmark_Estadisticas.py
+#   python Benchmark_Estadisticas.py --jugadores 50000 --modificados 500
+
+def generar_jugador(azar):
+    return {
+        'stats': {
+            'minecraft:custom': {
+                'minecraft:play_time': azar.randint(0, 72000 * 500),
+                'minecraft:deaths': azar.randint(0, 300),
+                'minecraft:player_kills': azar.randint(0, 50) if azar.random() < 0.3 else 0,
+                'minecraft:mob_kills': azar.randint(0, 20000),
+                'minecraft:jump': azar.randint(0, 100000),
+                'minecraft:walk_one_cm': azar.randint(0, 10 ** 8),
+                'minecraft:sprint_one_cm': azar.randint(0, 10 ** 8),
+            },
+            'minecraft:mined': {
+                'minecraft:diamond_ore': azar.randint(0, 200),
+                'minecraft:deepslate_diamond_ore': azar.randint(0, 200),
+                'minecraft:stone': azar.randint(0, 50000),
+            },
+        },
+        'DataVersion': 2730,
+    }
+
+def escribir_jugador(directorio, identificador, datos, modificado):
+    ruta = os.path.join(directorio, identificador + '.json')
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        json.dump(datos, archivo)
+    # La resolución de la fecha de modificación depende del sistema de archivos; se fija a mano para que dos
+    # escrituras seguidas tengan siempre fechas distintas.
+    os.utime(ruta, ns=(modificado, modificado))
+
+def generar(directorio, jugadores, semilla):
+    azar = random.Random(semilla)
+    estadisticas = os.path.join(directorio, 'world', 'stats')
+    os.makedirs(estadisticas)
+    datos = {}
+    for numero in range(jugadores):
+        identificador = str(uuid.UUID(int=azar.getrandbits(128), version=4))
+        datos[identificador] = generar_jugador(azar)
+        escribir_jugador(estadisticas, identificador, datos[identificador], 10 ** 18)
+    # Como en Minecraft, el usercache solo conoce el nombre de parte de los jugadores.
+    usercache = [{'name': f'Jugador_{numero}', 'uuid': identificador} for numero, identificador in enumerate(datos) if numero % 2 == 0]
+    with open(os.path.join(directorio, 'usercache.json'), 'w', encoding='utf-8') as archivo:
+        json.dump(usercache, archivo)
+    return estadisticas, os.path.join(directorio, 'usercache.json'), datos, {entrada['uuid']: entrada['name'] for entrada in usercache}
+
+async def medir(modulo, argumentos):
+    tiempos = {}
+    directorio = tempfile.mkdtemp(prefix='benchmark_estadisticas_')
+    try:
+        estadisticas, usercache, datos, nombres = generar(directorio, argumentos.jugadores, argumentos.semilla)
+        indice = modulo.IndiceEstadisticas(estadisticas, usercache)
+
+        inicio = time.perf_counter()
+        await indice.actualizar()
+        tiempos['carga_completa_s'] = round(time.perf_counter() - inicio, 3)
+
+        inicio = time.perf_counter()
+        await indice.actualizar()
+        tiempos['actualizacion_sin_cambios_s'] = round(time.perf_counter() - inicio, 3)
+
+        azar = random.Random(argumentos.semilla + 1)
+        for identificador in azar.sample(list(datos), argumentos.modificados):
+            escribir_jugador(estadisticas, identificador, generar_jugador(azar), 2 * 10 ** 18)
+        inicio = time.perf_counter()
+        await indice.actualizar()
+        tiempos['actualizacion_incremental_s'] = round(time.perf_counter() - inicio, 3)
+
+        repeticiones = 20
+        inicio = time.perf_counter()
+        for _ in range(repeticiones):
+            indice.top('tiempo', argumentos.top)
+        tiempos['top_heap_ms'] = round((time.perf_counter() - inicio) / repeticiones * 1000, 3)
+        valores = indice.valores['tiempo']
+        inicio = time.perf_counter()
+        for _ in range(repeticiones):
+            sorted(range(len(valores)), key=valores.__getitem__, reverse=True)[:argumentos.top]
+        tiempos['top_ordenando_ms'] = round((time.perf_counter() - inicio) / repeticiones * 1000, 3)
+        nombre = next(iter(nombres.values()))
+        inicio = time.perf_counter()
+        for _ in range(repeticiones):
+            indice.jugador(nombre)
+        tiempos['stats_ms'] = round((time.perf_counter() - inicio) / repeticiones * 1000, 3)
+        tiempos['memoria_valores_kib'] = round(sum(columna.buffer_info()[1] * columna.itemsize for columna in indice.valores.values()) / 1024, 1)
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+    return tiempos
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark del índice de estadísticas.')
+    parser.add_argument('--bot', default=os.path.join(DIRECTORIO, 'Código_sin_documentación.py'))
+    parser.add_argument('--servidor-web', default=os.path.join(DIRECTORIO, 'Servidor_Web_sin_Documentación.py'))
+    parser.add_argument('--jugadores', type=int, default=20000)
+    parser.add_argument('--modificados', type=int, default=200, help='archivos que cambian entre actualizaciones')
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--semilla', type=int, default=1)
+    parser.add_argument('--salida', default=os.path.join(DIRECTORIO, 'benchmark_estadisticas.json'))
+    argumentos = parser.parse_args()
+
+    modulo = cargar_bot(argumentos.bot, argumentos.servidor_web)
+    tiempos = asyncio.run(medir(modulo, argumentos))
+    resultado = {
+        'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'jugadores': argumentos.jugadores,
+        'modificados': argumentos.modificados,
+        **tiempos,
+    }
+    for clave, valor in resultado.items():
+        print(f'{clave:<30} {valor}')
+    with open(argumentos.salida, 'w', encoding='utf-8') as archivo:
+        json.dump(resultado, archivo, indent=2, ensure_ascii=False)
+
+if __name__ == '__main__':
+    main()
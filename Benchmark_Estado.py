@@ -0,0 +1,105 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import time
+
+from Benchmark_Comandos import DIRECTORIO, cargar_bot, percentil, preparar
+from Benchmark_Red import ServidorFalso
+
+# Benchmark del estado del servidor de Minecraft que muestra `+ip`.
+# Levanta un servidor de Minecraft falso en local (el de `Benchmark_Red.py`, que tarda `--retraso` segundos en responder
+# al estado) y mide cuánto tardan `--llamadas` peticiones simultáneas a `EstadoServidor` con la caché vacía, una
+# petición con la caché vigente y `--llamadas` `+ip` a la vez pasando los mensajes al bot sin conectarlo a Discord,
+# frente a hacer una consulta por petición, como sin la caché.
+# Las comprobaciones (una sola consulta por ronda, cancelaciones, servidores caídos) están en `tests/test_estado.py`.
+#
+# Uso:
+#   python Benchmark_Estado.py
+#   python Benchmark_Estado.py --llamadas 1000 --retraso 0.2
+
+class ServidorContado(ServidorFalso):
+    # Servidor falso que cuenta todas las conexiones que recibe, no solo las abiertas a la vez.
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.conexiones = 0
+
+    async def _atender(self, lector, escritor):
+        self.conexiones += 1
+        await super()._atender(lector, escritor)
+
+async def simultaneas(estado, cantidad):
+    inicio = time.perf_counter()
+    resultados = await asyncio.gather(*(estado.obtener() for _ in range(cantidad)))
+    return resultados, time.perf_counter() - inicio
+
+async def medir(modulo, argumentos):
+    tiempos = {}
+    contador = {'abiertas': 0, 'maximo': 0}
+    falso = ServidorContado(modulo, 'falso', argumentos.retraso, contador)
+    await falso.iniciar()
+    llamadas = argumentos.llamadas
+    try:
+        # Caché vacía: todas las peticiones esperan a la misma consulta.
+        estado = modulo.EstadoServidor('127.0.0.1', falso.puerto, argumentos.retraso * 5)
+        _, segundos = await simultaneas(estado, llamadas)
+        tiempos['frio_ms'] = round(segundos * 1000, 1)
+        tiempos['frio_conexiones'] = falso.conexiones
+
+        # Caché vigente: ninguna conexión.
+        calientes = []
+        for _ in range(llamadas):
+            inicio = time.perf_counter()
+            await estado.obtener()
+            calientes.append(time.perf_counter() - inicio)
+        tiempos['caliente_p50_us'] = round(percentil(calientes, 50) * 1e6, 2)
+
+        # Sin caché: una consulta por petición.
+        contador['maximo'] = 0
+        antes = falso.conexiones
+        inicio = time.perf_counter()
+        await asyncio.gather(*(modulo._ping_servidor('127.0.0.1', falso.puerto) for _ in range(llamadas)))
+        tiempos['sin_cache_ms'] = round((time.perf_counter() - inicio) * 1000, 1)
+        tiempos['sin_cache_conexiones'] = falso.conexiones - antes
+        tiempos['sin_cache_conexiones_a_la_vez'] = contador['maximo']
+
+        # `+ip` completo: las peticiones a la vez comparten la consulta y todas reciben el embed con el estado.
+        mensaje, _ = await preparar(modulo)
+        configuracion = modulo.configuraciones.por_defecto
+        configuracion.ip = f'127.0.0.1:{falso.puerto}'
+        configuracion.obtener_respuestas().invalidar('ip')
+        antes = falso.conexiones
+        inicio = time.perf_counter()
+        await asyncio.gather(*(modulo.bot.on_message(mensaje(numero, f'{modulo.PREFIJO}ip')) for numero in range(llamadas)))
+        tiempos['ip_simultaneos_ms'] = round((time.perf_counter() - inicio) * 1000, 1)
+        tiempos['ip_simultaneos_conexiones'] = falso.conexiones - antes
+    finally:
+        falso.cerrar()
+    return tiempos
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark del estado del servidor de Minecraft.')
+    parser.add_argument('--bot', default=os.path.join(DIRECTORIO, 'Código_sin_documentación.py'))
+    parser.add_argument('--servidor-web', default=os.path.join(DIRECTORIO, 'Servidor_Web_sin_Documentación.py'))
+    parser.add_argument('--llamadas', type=int, default=200, help='peticiones simultáneas')
+    parser.add_argument('--retraso', type=float, default=0.1, help='segundos que tarda en responder el servidor falso')
+    parser.add_argument('--salida', default=os.path.join(DIRECTORIO, 'benchmark_estado.json'))
+    argumentos = parser.parse_args()
+
+    modulo = cargar_bot(argumentos.bot, argumentos.servidor_web)
+    tiempos = asyncio.run(medir(modulo, argumentos))
+    resultado = {
+        'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'llamadas': argumentos.llamadas,
+        'retraso_s': argumentos.retraso,
+        **tiempos,
+    }
+    for clave, valor in resultado.items():
+        print(f'{clave:<30} {valor}')
+    with open(argumentos.salida, 'w', encoding='utf-8') as archivo:
+        json.dump(resultado, archivo, indent=2, ensure_ascii=False)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import platform
+import re
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+# Benchmark del tráfico del gateway según `MODO_COMANDOS`.
+# Copia el bot y sus extensiones a una carpeta temporal una vez por modo (`'prefijo'` y `'barra'`) con `MEDIR_GATEWAY`
+# activado, y conecta cada copia, en un proceso nuevo, al Discord falso de `Benchmark_Carga.py`. Con el bot listo, el Discord falso
+# envía actividad normal de los servidores que no va dirigida al bot (`--mensajes` mensajes de charla, `--escrituras`
+# avisos de "está escribiendo" y `--reacciones` reacciones). Como Discord, solo envía cada evento a los bots que tienen
+# el intent que lo necesita. Se comparan, en cada modo, los bytes que envía el Discord falso (comprimidos, como viajan
+# por la red), los bytes y eventos que cuenta el bot (`bot_gateway_recibidos_bytes_total` y
+# `bot_gateway_eventos_total`) y el tiempo de CPU que gasta el bot en recibirlos.
+# Las comprobaciones (el bot recibe justo los eventos que se le envían, ninguno en modo `'barra'`, y sigue respondiendo
+# a sus comandos en los dos modos) están en `tests/test_gateway.py`.
+#
+# Uso:
+#   python Benchmark_Gateway.py
+#   python Benchmark_Gateway.py --servidores 1000 --mensajes 50000
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+MODOS = ('prefijo', 'barra')
+
+def preparar_copia(directorio, ruta_bot, modo):
+    with open(ruta_bot, encoding='utf-8') as archivo:
+        texto = archivo.read()
+    for nombre, valor in (('MODO_COMANDOS', modo), ('MEDIR_GATEWAY', True)):
+        texto, cambios = re.subn(rf'^{nombre} = .*$', f'{nombre} = {valor!r}', texto, count=1, flags=re.MULTILINE)
+        if not cambios:
+            raise SystemExit(f'No se encontró la constante {nombre} en {ruta_bot}')
+    # Una carpeta por modo, con el mismo nombre de archivo que el bot para que cargue la misma versión de las extensiones.
+    carpeta = os.path.join(directorio, modo)
+    shutil.copytree(
+        os.path.join(os.path.dirname(ruta_bot), 'extensiones'), os.path.join(carpeta, 'extensiones'),
+        ignore=shutil.ignore_patterns('__pycache__'),
+    )
+    ruta = os.path.join(carpeta, os.path.basename(ruta_bot))
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        archivo.write(texto)
+    return ruta
+
+def hijo(ruta_bot, ruta_servidor_web, puerto, opciones):
+    from Benchmark_Comandos import cargar_bot
+    import aiohttp
+    import discord
+    import yarl
+
+    modulo = cargar_bot(ruta_bot, ruta_servidor_web)
+    discord.http.Route.BASE = f'http://127.0.0.1:{puerto}/api/v10'
+    discord.gateway.DiscordWebSocket.DEFAULT_GATEWAY = yarl.URL(f'ws://127.0.0.1:{puerto}/')
+    modulo.configuraciones.archivo = ':memory:'
+    modulo.red = modulo.MonitorRed({}, 60, 1, 1)
+    modulo.agrupador.ventana = 0
+    modulo.enfriamientos.clear()
+    bot = modulo.bot
+    metricas = modulo.metricas
+    control = f'http://127.0.0.1:{puerto}/_control'
+
+    def cpu():
+        uso = resource.getrusage(resource.RUSAGE_SELF)
+        return uso.ru_utime + uso.ru_stime
+
+    async def principal():
+        conexion = asyncio.create_task(bot.start('token.falso'))
+        try:
+            # Listo para atender todos los comandos: conectado y con las extensiones cargadas, que se cargan tras READY.
+            await asyncio.wait_for(bot.wait_until_ready(), opciones['espera_listo'])
+            await asyncio.wait_for(modulo.extensiones.preparadas.wait(), opciones['espera_listo'])
+            resultado = {
+                'modo': modulo.MODO_COMANDOS,
+                'intents': bot.intents.value,
+                'arranque_bytes': metricas.bytes_gateway,
+                'arranque_eventos': sum(metricas.eventos_gateway.values()),
+            }
+            bytes_antes = metricas.bytes_gateway
+            eventos_antes = dict(metricas.eventos_gateway)
+            cpu_antes = cpu()
+            async with aiohttp.ClientSession() as sesion:
+                async with sesion.post(control + '/actividad', json=opciones['actividad']) as respuesta:
+                    enviado = await respuesta.json()
+                # El bot recibe los eventos a la vez que el Discord falso los envía; se espera a que cuente todos.
+                esperados = sum(enviado['eventos'].values())
+                final = time.perf_counter() + 30
+                while time.perf_counter() < final:
+                    recibidos = {tipo: cantidad - eventos_antes.get(tipo, 0) for tipo, cantidad in metricas.eventos_gateway.items()}
+                    if sum(recibidos.get(tipo, 0) for tipo in enviado['eventos']) >= esperados:
+                        break
+                    await asyncio.sleep(0.01)
+                resultado['actividad_cpu_s'] = round(cpu() - cpu_antes, 3)
+                resultado['actividad_enviados'] = enviado['eventos']
+                resultado['actividad_bytes_red'] = enviado['bytes']
+                resultado['actividad_bytes'] = metricas.bytes_gateway - bytes_antes
+                resultado['actividad_recibidos'] = {tipo: cantidad for tipo, cantidad in recibidos.items() if cantidad}
+
+                # Para las pruebas: la respuesta a `+normas` en modo prefijo o a `/normas` en modo barra.
+                if opciones.get('comando'):
+                    if modulo.MODO_COMANDOS == 'prefijo':
+                        datos, ruta = {'contenido': f'{modulo.PREFIJO}normas', 'servidor': 1}, '/mensaje'
+                    else:
+                        datos, ruta = {'nombre': 'normas', 'servidor': 1}, '/interaccion'
+                    async with sesion.post(control + ruta, json=datos) as respuesta:
+                        cuerpo = (await respuesta.json())['respuesta'] or {}
+                    resultado['comando'] = cuerpo.get('content') or (cuerpo.get('data') or {}).get('content') or ''
+            resultado['rss_mib'] = round(modulo.memoria_rss() / 1048576, 1)
+            return resultado
+        finally:
+            await bot.close()
+            try:
+                await conexion
+            except Exception:
+                pass
+
+    resultado = asyncio.run(principal())
+    # Una sola línea en la salida: el proceso principal la lee como JSON.
+    print(json.dumps(resultado), flush=True)
+
+def ejecutar(ruta_bot, ruta_servidor_web, puerto, opciones):
+    proceso = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--hijo', ruta_bot, ruta_servidor_web, str(puerto), json.dumps(opciones)],
+        cwd=os.path.dirname(ruta_bot), capture_output=True, text=True, timeout=opciones['espera_listo'] + 120,
+        env={**os.environ, 'PYTHONPATH': DIRECTORIO},
+    )
+    lineas = proceso.stdout.strip().splitlines()
+    if proceso.returncode or not lineas:
+        raise SystemExit(f'La ejecución de {ruta_bot} falló:\n{proceso.stderr[-3000:]}')
+    return json.loads(lineas[-1])
+
+def comparar(ruta_bot, ruta_servidor_web, servidores, opciones):
+    # Ejecuta el bot en cada modo contra un mismo Discord falso y devuelve lo medido en cada uno.
+    from Benchmark_Carga import servir
+    contexto = multiprocessing.get_context('spawn')
+    recibir, enviar = contexto.Pipe(duplex=False)
+    ajustes = {
+        'servidores': servidores, 'shards': 1, 'limite_canal': 0,
+        'ventana_limite': 5, 'proporcion_429': 0, 'latido': 41250,
+    }
+    proceso = contexto.Process(target=servir, args=(ajustes, enviar), name='discord-falso', daemon=True)
+    proceso.start()
+    directorio = tempfile.mkdtemp(prefix='benchmark_gateway_')
+    try:
+        puerto = recibir.recv()
+        return {modo: ejecutar(preparar_copia(directorio, ruta_bot, modo), ruta_servidor_web, puerto, opciones) for modo in MODOS}
+    finally:
+        proceso.terminate()
+        shutil.rmtree(directorio, ignore_errors=True)
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--hijo':
+        ruta_bot, ruta_servidor_web, puerto, opciones = sys.argv[2:6]
+        hijo(ruta_bot, ruta_servidor_web, int(puerto), json.loads(opciones))
+        return
+
+    parser = argparse.ArgumentParser(description='Tráfico del gateway en modo prefijo y en modo barra contra un Discord falso en local.')
+    parser.add_argument('--bot', default=os.path.join(DIRECTORIO, 'Código_sin_documentación.py'))
+    parser.add_argument('--servidor-web', default=os.path.join(DIRECTORIO, 'Servidor_Web_sin_Documentación.py'))
+    parser.add_argument('--servidores', type=int, default=200)
+    parser.add_argument('--mensajes', type=int, default=10000)
+    parser.add_argument('--escrituras', type=int, default=4000)
+    parser.add_argument('--reacciones', type=int, default=2000)
+    parser.add_argument('--espera-listo', type=float, default=120)
+    parser.add_argument('--salida', default=os.path.join(DIRECTORIO, 'benchmark_gateway.json'))
+    argumentos = parser.parse_args()
+    opciones = {
+        'espera_listo': argumentos.espera_listo,
+        'actividad': {'mensajes': argumentos.mensajes, 'escrituras': argumentos.escrituras, 'reacciones': argumentos.reacciones},
+    }
+
+    modos = comparar(os.path.abspath(argumentos.bot), os.path.abspath(argumentos.servidor_web), argumentos.servidores, opciones)
+
+    print(f"{'modo':<10} {'intents':>8} {'arranque KiB':>13} {'actividad KiB (red)':>20} {'descomprimido KiB':>18} {'eventos':>8} {'CPU s':>7} {'RSS MiB':>8}")
+    for modo, datos in modos.items():
+        print(
+            f"{modo:<10} {datos['intents']:>8} {datos['arranque_bytes'] / 1024:>13.1f} {datos['actividad_bytes_red'] / 1024:>20.1f}"
+            f" {datos['actividad_bytes'] / 1024:>18.1f} {sum(datos['actividad_recibidos'].values()):>8} {datos['actividad_cpu_s']:>7} {datos['rss_mib']:>8}"
+        )
+    resultado = {
+        'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'servidores': argumentos.servidores,
+        **opciones['actividad'],
+        'modos': modos,
+    }
+    with open(os.path.abspath(argumentos.salida), 'w', encoding='utf-8') as archivo:
+        json.dump(resultado, archivo, indent=2, ensure_ascii=False)
+
+if __name__ == '__main__':
+    main()
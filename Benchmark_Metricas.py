@@ -0,0 +1,137 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import time
+
+from Benchmark_Comandos import DIRECTORIO, cargar_bot, casos, percentil, preparar
+
+# Benchmark del coste de las métricas de Prometheus (`Metricas` e `Histograma`).
+# Pasa los comandos al bot sin conectarlo a Discord (como en `Benchmark_Comandos.py`) con las métricas activadas y
+# desactivadas, alternando los dos modos en cada ronda para que el ruido les afecte por igual. Sin métricas, el
+# histograma de cada comando no se actualiza y las peticiones a Discord no pasan por `_peticion_rest_medida`.
+# También mide por separado cada operación: observar una duración, contar un error, envolver una petición REST y
+# generar la página de `/metrics`.
+# Las comprobaciones del contenido y el formato de `/metrics` están en `tests/test_metricas.py`.
+#
+# Uso:
+#   python Benchmark_Metricas.py
+#   python Benchmark_Metricas.py --iteraciones 2000
+
+def medir(funcion, iteraciones):
+    tiempos = []
+    for _ in range(iteraciones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return percentil(tiempos, 50)
+
+async def medir_comandos(modulo, iteraciones):
+    mensaje, http = await preparar(modulo)
+    bot = modulo.bot
+    metricas = modulo.metricas
+    contenidos = casos(bot, modulo.PREFIJO)
+    medida = bot.http.request
+    observar = metricas.observar_comando
+
+    def activar(activadas):
+        # Sin métricas: ni histograma por comando ni medición de las peticiones REST.
+        bot.http.request = medida if activadas else http.request
+        metricas.observar_comando = observar if activadas else lambda nombre, segundos: None
+
+    tiempos = {nombre: {'con': [], 'sin': []} for nombre in contenidos}
+    identificador = 0
+    # Una primera ronda de cada modo sin medir, para calentar las cachés.
+    for ronda in range(iteraciones + 1):
+        for modo in ('con', 'sin') if ronda % 2 else ('sin', 'con'):
+            activar(modo == 'con')
+            for nombre, contenido in contenidos.items():
+                identificador += 1
+                nuevo = mensaje(identificador, contenido)
+                inicio = time.perf_counter()
+                await bot.on_message(nuevo)
+                if ronda:
+                    tiempos[nombre][modo].append(time.perf_counter() - inicio)
+    activar(True)
+
+    resultado = {}
+    for nombre, medidos in tiempos.items():
+        con, sin = percentil(medidos['con'], 50), percentil(medidos['sin'], 50)
+        resultado[nombre] = {'con_us': round(con * 1e6, 1), 'sin_us': round(sin * 1e6, 1), 'coste_us': round((con - sin) * 1e6, 1)}
+    todos = {modo: [tiempo for medidos in tiempos.values() for tiempo in medidos[modo]] for modo in ('con', 'sin')}
+    con, sin = percentil(todos['con'], 50), percentil(todos['sin'], 50)
+    resultado['total'] = {
+        'con_us': round(con * 1e6, 1), 'sin_us': round(sin * 1e6, 1), 'coste_us': round((con - sin) * 1e6, 1),
+        'coste_porcentaje': round((con - sin) / sin * 100, 1),
+    }
+    return resultado
+
+async def medir_operaciones(modulo, iteraciones, comandos):
+    metricas = modulo.Metricas(modulo.bot)
+    resultado = {
+        'observar_comando_ns': round(medir(lambda: metricas.observar_comando('normas', 0.012), iteraciones) * 1e9),
+        'contar_error_ns': round(medir(lambda: metricas.contar_error('normas', 'CommandOnCooldown'), iteraciones) * 1e9),
+    }
+
+    # La envoltura de las peticiones REST frente a llamar directamente a la petición que envuelve.
+    async def peticion(*args, **kwargs):
+        return None
+
+    original = modulo._peticion_rest
+    modulo._peticion_rest = peticion
+    try:
+        ruta = modulo.discord.http.Route('GET', '/gateway')
+        for nombre, funcion in (('rest_directa_ns', peticion), ('rest_medida_ns', modulo._peticion_rest_medida)):
+            tiempos = []
+            for _ in range(iteraciones):
+                inicio = time.perf_counter()
+                await funcion(ruta)
+                tiempos.append(time.perf_counter() - inicio)
+            resultado[nombre] = round(percentil(tiempos, 50) * 1e9)
+    finally:
+        modulo._peticion_rest = original
+
+    # `/metrics` con `comandos` comandos distintos, cada uno con su histograma y un error.
+    for numero in range(comandos):
+        metricas.observar_comando(f'comando_{numero}', 0.001 * (numero % 50))
+        metricas.contar_error(f'comando_{numero}', 'CommandInvokeError')
+    texto = metricas.exponer()
+    resultado['exponer_us'] = round(medir(metricas.exponer, max(1, iteraciones // 100)) * 1e6, 1)
+    resultado['exponer_bytes'] = len(texto.encode('utf-8'))
+    resultado['exponer_lineas'] = texto.count('\n') + 1
+    return resultado
+
+async def principal(modulo, argumentos):
+    comandos = await medir_comandos(modulo, argumentos.iteraciones)
+    operaciones = await medir_operaciones(modulo, argumentos.iteraciones * 100, argumentos.comandos)
+    return {'comandos': comandos, 'operaciones': operaciones}
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark del coste de las métricas.')
+    parser.add_argument('--bot', default=os.path.join(DIRECTORIO, 'Código_sin_documentación.py'))
+    parser.add_argument('--servidor-web', default=os.path.join(DIRECTORIO, 'Servidor_Web_sin_Documentación.py'))
+    parser.add_argument('--iteraciones', type=int, default=500)
+    parser.add_argument('--comandos', type=int, default=100, help='comandos distintos al medir /metrics')
+    parser.add_argument('--salida', default=os.path.join(DIRECTORIO, 'benchmark_metricas.json'))
+    argumentos = parser.parse_args()
+
+    modulo = cargar_bot(argumentos.bot, argumentos.servidor_web)
+    tiempos = asyncio.run(principal(modulo, argumentos))
+    print(f"{'caso':<12} {'con métricas µs':>16} {'sin métricas µs':>16} {'coste µs':>9}")
+    for nombre, medida in tiempos['comandos'].items():
+        print(f"{nombre:<12} {medida['con_us']:>16} {medida['sin_us']:>16} {medida['coste_us']:>9}")
+    for clave, valor in tiempos['operaciones'].items():
+        print(f'{clave:<22} {valor}')
+    resultado = {
+        'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'iteraciones': argumentos.iteraciones,
+        'comandos_exponer': argumentos.comandos,
+        **tiempos,
+    }
+    with open(argumentos.salida, 'w', encoding='utf-8') as archivo:
+        json.dump(resultado, archivo, indent=2, ensure_ascii=False)
+
+if __name__ == '__main__':
+    main()
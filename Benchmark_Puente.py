@@ -0,0 +1,207 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from Benchmark_Comandos import DIRECTORIO, cargar_bot
+
+# Benchmark del puente de chat de Minecraft a Discord.
+# Reproduce un log grabado (`--log`, o uno generado con el formato de Paper si no se indica) escribiéndolo a ráfagas
+# en un `latest.log` temporal, con una rotación (el archivo se renombra y se crea otro) y un truncado a mitad, como
+# hace el servidor al reiniciarse. El puente lo sigue con el mismo código que el bot y entrega los mensajes a un
+# webhook falso que limita los envíos por segundo como Discord. Mide mensajes enviados frente a líneas, latencia
+# desde que se escribe la línea hasta que se envía, tamaño máximo de la cola y memoria. Las comprobaciones (que llegan
+# todas las líneas, en orden, sin pasar de 2000 caracteres por mensaje) están en `tests/test_puente.py`, que usa la
+# misma reproducción con un log más corto.
+#
+# Uso:
+#   python Benchmark_Puente.py                          # con un log generado de 20000 líneas
+#   python Benchmark_Puente.py --log ruta/latest.log    # con un log grabado de un servidor real
+
+JUGADORES = ['Steve', 'Alex', 'Notch', 'jeb_', 'Dinnerbone', 'Olympus_Fan', 'xX_Pro_Xx', 'Creeper123']
+FRASES = ['hola', 'alguien para ir al nether?', 'gg', 'vendo diamantes en el spawn', 'donde esta la tienda?', 'lag...', 'jaja']
+MUERTES = ['was slain by Zombie', 'fell from a high place', 'drowned', 'tried to swim in lava', 'was shot by Skeleton', 'blew up']
+RUIDO = [
+    '[Server thread/INFO]: Saving chunks for level \'ServerLevel[world]\'/minecraft:overworld',
+    '[User Authenticator #1/INFO]: UUID of player {jugador} is 069a79f4-44e9-4726-a5be-fca90e38aaf5',
+    '[Server thread/WARN]: Can\'t keep up! Is the server overloaded? Running 2043ms or 40 ticks behind',
+    '[Server thread/INFO]: {jugador}[/127.0.0.1:51234] logged in with entity id 184 at ([world]0.5, 64.0, 0.5)',
+    '[Server thread/INFO]: {jugador} lost connection: Disconnected',
+]
+
+# Límite de Discord para mensajes de webhook en un mismo canal, para estimar cuánto tardaría cada forma de enviar.
+MENSAJES_POR_MINUTO_DISCORD = 30
+
+def generar_log(lineas, semilla=1):
+    azar = random.Random(semilla)
+    resultado = []
+    for numero in range(lineas):
+        hora = time.strftime('%H:%M:%S', time.gmtime(numero))
+        jugador = azar.choice(JUGADORES)
+        tipo = azar.random()
+        if tipo < 0.5:
+            texto = '[Async Chat Thread - #0/INFO]: <' + jugador + '> ' + azar.choice(FRASES)
+        elif tipo < 0.55:
+            texto = f'[Server thread/INFO]: {jugador} joined the game'
+        elif tipo < 0.6:
+            texto = f'[Server thread/INFO]: {jugador} left the game'
+        elif tipo < 0.65:
+            texto = f'[Server thread/INFO]: {jugador} {azar.choice(MUERTES)}'
+        else:
+            texto = azar.choice(RUIDO).format(jugador=jugador)
+        resultado.append(f'[{hora}] {texto}')
+    return resultado
+
+class WebhookFalso:
+    # Sustituye a `Webhook.send`: guarda cada mensaje y no deja enviar más de `por_segundo` mensajes por segundo.
+    def __init__(self, por_segundo):
+        self.espacio = 1 / por_segundo
+        self.mensajes = []
+        self.entregas = []
+        self._siguiente = 0
+
+    async def send(self, texto):
+        loop = asyncio.get_running_loop()
+        espera = self._siguiente - loop.time()
+        if espera > 0:
+            await asyncio.sleep(espera)
+        self._siguiente = loop.time() + self.espacio
+        self.mensajes.append(texto)
+        ahora = time.perf_counter()
+        self.entregas.extend((linea, ahora) for linea in texto.split('\n'))
+
+async def reproducir(modulo, lineas, argumentos):
+    # Devuelve lo que hace falta para medir y comprobar la reproducción: las líneas que debían llegar, el webhook falso
+    # con lo que recibió, el seguidor del log, el tamaño máximo de la cola, la latencia de cada línea y la memoria.
+    esperados = [texto for texto in map(modulo.interpretar_linea_log, lineas) if texto is not None]
+    directorio = tempfile.mkdtemp(prefix='benchmark_puente_')
+    ruta = os.path.join(directorio, 'latest.log')
+    open(ruta, 'wb').close()
+
+    seguidor = modulo.SeguidorLog(ruta, argumentos.intervalo)
+    puente = modulo.PuenteChat(seguidor, argumentos.ventana, argumentos.cola)
+    webhook = WebhookFalso(argumentos.envios_por_segundo)
+    escritas = []
+    cola_maxima = 0
+
+    async def vigilar_cola():
+        nonlocal cola_maxima
+        while True:
+            cola_maxima = max(cola_maxima, puente.cola.qsize())
+            await asyncio.sleep(0.005)
+
+    async def escribir(parte):
+        # Escribe la parte a ráfagas y apunta cuándo se escribió cada línea que debe llegar a Discord.
+        for inicio in range(0, len(parte), argumentos.rafaga):
+            bloque = parte[inicio:inicio + argumentos.rafaga]
+            with open(ruta, 'a', encoding='utf-8') as archivo:
+                archivo.write(''.join(linea + '\n' for linea in bloque))
+            ahora = time.perf_counter()
+            escritas.extend(ahora for linea in bloque if modulo.interpretar_linea_log(linea) is not None)
+            await asyncio.sleep(argumentos.pausa)
+
+    async def esperar_entregas(limite=60):
+        final = time.perf_counter() + limite
+        while len(webhook.entregas) < len(escritas) and time.perf_counter() < final:
+            await asyncio.sleep(0.01)
+
+    tracemalloc.start()
+    vigilante = asyncio.create_task(vigilar_cola())
+    puente.iniciar(webhook.send)
+    await asyncio.sleep(argumentos.intervalo * 2)
+    inicio = time.perf_counter()
+    tercio = len(lineas) // 3
+
+    await escribir(lineas[:tercio])
+    await esperar_entregas()
+    # Rotación: el servidor renombra el log y empieza uno nuevo.
+    os.rename(ruta, os.path.join(directorio, '2024-01-01-1.log'))
+    await escribir(lineas[tercio:2 * tercio])
+    await esperar_entregas()
+    # Truncado: el log se vacía en el mismo archivo.
+    open(ruta, 'wb').close()
+    await asyncio.sleep(argumentos.intervalo * 3)
+    await escribir(lineas[2 * tercio:])
+    await esperar_entregas()
+
+    total = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    puente.detener()
+    vigilante.cancel()
+    await asyncio.sleep(0)
+
+    return {
+        'esperados': esperados,
+        'webhook': webhook,
+        'seguidor': seguidor,
+        'cola_maxima': cola_maxima,
+        'latencias': sorted((entrega - escrita) * 1000 for (_, entrega), escrita in zip(webhook.entregas, escritas)),
+        'segundos': total,
+        'memoria_pico': pico,
+    }
+
+def resumir(lineas, reproduccion):
+    esperados, latencias = reproduccion['esperados'], reproduccion['latencias']
+    mensajes = len(reproduccion['webhook'].mensajes)
+    return {
+        'lineas_log': len(lineas),
+        'lineas_chat': len(esperados),
+        'mensajes': mensajes,
+        'lineas_por_mensaje': round(len(reproduccion['webhook'].entregas) / max(mensajes, 1), 1),
+        'segundos': round(reproduccion['segundos'], 3),
+        'latencia_p50_ms': round(statistics.median(latencias), 1) if latencias else None,
+        'latencia_p99_ms': round(latencias[int(len(latencias) * 0.99) - 1], 1) if latencias else None,
+        'cola_maxima': reproduccion['cola_maxima'],
+        'memoria_pico_kib': round(reproduccion['memoria_pico'] / 1024, 1),
+        'minutos_discord_linea_a_linea': round(len(esperados) / MENSAJES_POR_MINUTO_DISCORD, 1),
+        'minutos_discord_por_lotes': round(mensajes / MENSAJES_POR_MINUTO_DISCORD, 1),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark del puente de chat de Minecraft a Discord.')
+    parser.add_argument('--bot', default=os.path.join(DIRECTORIO, 'Código_sin_documentación.py'))
+    parser.add_argument('--servidor-web', default=os.path.join(DIRECTORIO, 'Servidor_Web_sin_Documentación.py'))
+    parser.add_argument('--log', help='log grabado de un servidor de Minecraft (si no, se genera uno)')
+    parser.add_argument('--lineas', type=int, default=20000, help='líneas del log generado')
+    parser.add_argument('--rafaga', type=int, default=500, help='líneas escritas de una vez')
+    parser.add_argument('--pausa', type=float, default=0.05, help='segundos entre ráfagas')
+    parser.add_argument('--intervalo', type=float, default=0.05, help='segundos entre lecturas del log')
+    parser.add_argument('--ventana', type=float, default=None, help='segundos que se agrupan las líneas (por defecto VENTANA_CHAT)')
+    parser.add_argument('--cola', type=int, default=None, help='tamaño máximo de la cola (por defecto MAXIMO_COLA_CHAT)')
+    parser.add_argument('--envios-por-segundo', type=float, default=20, help='mensajes por segundo que acepta el webhook falso')
+    parser.add_argument('--salida', default=os.path.join(DIRECTORIO, 'benchmark_puente.json'))
+    argumentos = parser.parse_args()
+
+    modulo = cargar_bot(argumentos.bot, argumentos.servidor_web)
+    if argumentos.ventana is None:
+        argumentos.ventana = modulo.VENTANA_CHAT
+    if argumentos.cola is None:
+        argumentos.cola = modulo.MAXIMO_COLA_CHAT
+    if argumentos.log:
+        with open(argumentos.log, encoding='utf-8', errors='replace') as archivo:
+            lineas = archivo.read().splitlines()
+    else:
+        lineas = generar_log(argumentos.lineas)
+
+    resultado = {
+        'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'log': argumentos.log or f'generado ({argumentos.lineas} líneas)',
+        'ventana_s': argumentos.ventana,
+        'envios_por_segundo': argumentos.envios_por_segundo,
+        **resumir(lineas, asyncio.run(reproducir(modulo, lineas, argumentos))),
+    }
+    for clave, valor in resultado.items():
+        print(f'{clave:<32} {valor}')
+    with open(argumentos.salida, 'w', encoding='utf-8') as archivo:
+        json.dump(resultado, archivo, indent=2, ensure_ascii=False)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import struct
+import time
+
+from Benchmark_Comandos import DIRECTORIO, cargar_bot
+
+# Servidor RCON falso y benchmark del cliente RCON del bot.
+# El servidor falso habla el mismo protocolo que el de Minecraft: inicio de sesión con contraseña, paquetes con
+# identificador, respuestas largas partidas en fragmentos de 4096 bytes (aunque corten un carácter por la mitad) y
+# un "Unknown request" para los paquetes de tipo desconocido. Como en Minecraft, los comandos de todas las conexiones
+# se ejecutan de uno en uno (en el hilo principal del servidor), cada conexión responde en orden, y cada respuesta
+# tarda además `--latencia` segundos en llegar, como si el servidor estuviera en otra máquina.
+# Las comprobaciones del cliente contra este servidor están en `tests/test_rcon.py`.
+#
+# Uso:
+#   python Benchmark_Rcon.py                  # mide la whitelist de 500 jugadores
+#   python Benchmark_Rcon.py --servidor       # solo inicia el servidor falso, para probar el bot a mano
+#                                             # (RCON_HOST = '127.0.0.1', RCON_CONTRASENA = 'prueba')
+
+CONTRASENA = 'prueba'
+
+# Respuestas largas: varios fragmentos, caracteres de varios bytes partidos entre fragmentos y respuestas que miden
+# justo un múltiplo de 4096 bytes, cuyo último fragmento no se distingue de uno intermedio.
+RESPUESTAS_LARGAS = {
+    'largo': 'x' * 10000,
+    'acentos': '§aJugador: áéíóú ñ\n' * 1000,
+    'exacto': 'x' * 4096,
+    'exacto_multibyte': '§' * 2048,
+    'doble_multibyte': 'é' * 4096,
+}
+
+class ServidorRconFalso:
+    def __init__(self, contrasena, proceso, latencia):
+        self.contrasena = contrasena
+        self.proceso = proceso
+        self.latencia = latencia
+        self.whitelist = set()
+        self.baneados = set()
+        self.comandos = 0
+        self.conexiones = set()
+        self._hilo_principal = asyncio.Lock()
+
+    async def iniciar(self, host='127.0.0.1', puerto=0):
+        self._servidor = await asyncio.start_server(self._atender, host, puerto)
+        return self._servidor.sockets[0].getsockname()[1]
+
+    async def detener(self):
+        self._servidor.close()
+        self.cortar()
+        # Da tiempo a que terminen las tareas que atienden cada conexión antes de cerrar el bucle de eventos.
+        await asyncio.sleep(0.1)
+
+    def cortar(self):
+        # Cierra todas las conexiones abiertas, como si el servidor de Minecraft se reiniciara.
+        for escritor in list(self.conexiones):
+            escritor.close()
+
+    async def _atender(self, lector, escritor):
+        self.conexiones.add(escritor)
+        autenticado = False
+        # Las respuestas salen en orden por una cola con el momento en que debe llegar cada una.
+        cola = asyncio.Queue()
+        salida = asyncio.create_task(self._enviar(escritor, cola))
+        bucle = asyncio.get_running_loop()
+        try:
+            while True:
+                longitud, = struct.unpack('<i', await lector.readexactly(4))
+                datos = await lector.readexactly(longitud)
+                identificador, tipo = struct.unpack('<ii', datos[:8])
+                texto = datos[8:-2].decode('utf-8')
+                if tipo == 3:
+                    autenticado = texto == self.contrasena
+                    escritor.write(paquete(identificador if autenticado else -1, 2, ''))
+                elif not autenticado:
+                    escritor.write(paquete(-1, 2, ''))
+                elif tipo != 2:
+                    # Minecraft responde así a cualquier paquete que no es un comando; el bot lo usa como centinela.
+                    cola.put_nowait((bucle.time() + self.latencia, paquete(identificador, 0, f'Unknown request {tipo:x}')))
+                else:
+                    async with self._hilo_principal:
+                        if self.proceso:
+                            await asyncio.sleep(self.proceso)
+                        respuesta = self._ejecutar(texto)
+                    if respuesta is None:
+                        continue
+                    cuerpo = respuesta.encode('utf-8')
+                    fragmentos = [cuerpo[inicio:inicio + 4096] for inicio in range(0, len(cuerpo), 4096)] or [b'']
+                    datos_respuesta = b''.join(paquete(identificador, 0, fragmento) for fragmento in fragmentos)
+                    cola.put_nowait((bucle.time() + self.latencia, datos_respuesta))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            salida.cancel()
+            self.conexiones.discard(escritor)
+            escritor.close()
+
+    @staticmethod
+    async def _enviar(escritor, cola):
+        bucle = asyncio.get_running_loop()
+        while True:
+            momento, datos = await cola.get()
+            if momento > bucle.time():
+                await asyncio.sleep(momento - bucle.time())
+            if not escritor.is_closing():
+                escritor.write(datos)
+
+    def _ejecutar(self, comando):
+        self.comandos += 1
+        partes = comando.split()
+        if partes[:2] == ['whitelist', 'add']:
+            self.whitelist.add(partes[2])
+            return f'Added {partes[2]} to the whitelist'
+        if partes[:2] == ['whitelist', 'remove']:
+            self.whitelist.discard(partes[2])
+            return f'Removed {partes[2]} from the whitelist'
+        if partes[:1] == ['ban']:
+            self.baneados.add(partes[1])
+            return f"Banned {partes[1]}: {' '.join(partes[2:]) or 'Banned by an operator.'}"
+        if partes == ['list']:
+            return '§6There are 0 of a max of 20 players online:'
+        if comando in RESPUESTAS_LARGAS:
+            return RESPUESTAS_LARGAS[comando]
+        if partes == ['colgar']:
+            return None
+        return f'§cUnknown or incomplete command: {comando}'
+
+def paquete(identificador, tipo, texto):
+    # `texto` puede ser ya un fragmento en bytes de una respuesta larga.
+    if isinstance(texto, str):
+        texto = texto.encode('utf-8')
+    cuerpo = struct.pack('<ii', identificador, tipo) + texto + b'\x00\x00'
+    return struct.pack('<i', len(cuerpo)) + cuerpo
+
+async def medir(modulo, servidor, puerto, jugadores, conexiones):
+    # Whitelist de `jugadores` jugadores de tres formas: un comando tras otro (como un cliente RCON síncrono),
+    # con pipelining en una sola conexión y con pipelining repartido en el pool.
+    resultado = {}
+    formas = [
+        ('secuencial', 1, False),
+        ('pipelining', 1, True),
+        (f'pool_{conexiones}', conexiones, True),
+    ]
+    for nombre, tamano, en_paralelo in formas:
+        servidor.whitelist.clear()
+        pool = modulo.PoolRcon('127.0.0.1', puerto, CONTRASENA, tamano, 30)
+        await pool.ejecutar('list')
+        comandos = [f'whitelist add jugador_{numero}' for numero in range(jugadores)]
+        inicio = time.perf_counter()
+        if en_paralelo:
+            respuestas = await pool.ejecutar_varios(comandos)
+        else:
+            respuestas = [await pool.ejecutar(comando) for comando in comandos]
+        total = time.perf_counter() - inicio
+        pool.cerrar()
+        errores = sum(isinstance(respuesta, Exception) for respuesta in respuestas)
+        resultado[nombre] = {
+            'segundos': round(total, 3),
+            'comandos_por_segundo': round(jugadores / total, 1),
+            'errores': errores,
+            'en_whitelist': len(servidor.whitelist),
+        }
+    return resultado
+
+async def principal(argumentos):
+    servidor = ServidorRconFalso(CONTRASENA, argumentos.proceso, argumentos.latencia)
+    puerto = await servidor.iniciar(puerto=argumentos.puerto)
+    if argumentos.servidor:
+        print(f'Servidor RCON falso en 127.0.0.1:{puerto} (contraseña: {CONTRASENA})')
+        await asyncio.Event().wait()
+    modulo = cargar_bot(argumentos.bot, argumentos.servidor_web)
+    resultado = {
+        'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'jugadores': argumentos.jugadores,
+        'latencia_ms': argumentos.latencia * 1000,
+        'proceso_ms': argumentos.proceso * 1000,
+        'formas': await medir(modulo, servidor, puerto, argumentos.jugadores, modulo.RCON_CONEXIONES),
+    }
+    await servidor.detener()
+    return resultado
+
+def main():
+    parser = argparse.ArgumentParser(description='Servidor RCON falso y benchmark del cliente RCON del bot.')
+    parser.add_argument('--bot', default=os.path.join(DIRECTORIO, 'Código_sin_documentación.py'))
+    parser.add_argument('--servidor-web', default=os.path.join(DIRECTORIO, 'Servidor_Web_sin_Documentación.py'))
+    parser.add_argument('--jugadores', type=int, default=500)
+    parser.add_argument('--latencia', type=float, default=0.02, help='segundos que tarda cada respuesta en llegar')
+    parser.add_argument('--proceso', type=float, default=0.0002, help='segundos que tarda el servidor en ejecutar cada comando')
+    parser.add_argument('--puerto', type=int, default=0, help='puerto del servidor falso (0 = uno libre)')
+    parser.add_argument('--servidor', action='store_true', help='solo inicia el servidor falso')
+    parser.add_argument('--salida', default=os.path.join(DIRECTORIO, 'benchmark_rcon.json'))
+    argumentos = parser.parse_args()
+    if argumentos.servidor and not argumentos.puerto:
+        argumentos.puerto = 25575
+
+    resultado = asyncio.run(principal(argumentos))
+    print(f"{'forma':<12} {'segundos':>9} {'cmd/s':>10} {'errores':>8} {'whitelist':>10}")
+    for nombre, datos in resultado['formas'].items():
+        print(f"{nombre:<12} {datos['segundos']:>9} {datos['comandos_por_segundo']:>10} {datos['errores']:>8} {datos['en_whitelist']:>10}")
+    with open(argumentos.salida, 'w', encoding='utf-8') as archivo:
+        json.dump(resultado, archivo, indent=2, ensure_ascii=False)
+
+if __name__ == '__main__':
+    main()
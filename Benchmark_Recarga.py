@@ -0,0 +1,175 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import types
+
+from Benchmark_Comandos import DIRECTORIO, cargar_bot, preparar
+
+# Benchmark de la recarga en caliente de `+recargar`.
+# Crea en una carpeta temporal `--extensiones` extensiones de comandos, carga el bot sin conectarlo a Discord y recarga
+# `--recargas` veces, cambiando el código de todas las extensiones antes de cada una. Mide la duración de cada recarga
+# y el retraso máximo del bucle de eventos mientras tanto.
+# Las extensiones están en una carpeta temporal con otro nombre de paquete (`extensiones_recarga`), para que no se
+# mezclen con las de la carpeta del bot. En esa carpeta se copian también las extensiones que trae el bot (información,
+# normas, tienda), porque sin ellas no hay `+leves`.
+# Las comprobaciones (código y normas nuevos, comandos en curso, recargas canceladas y deshechas, archivos nuevos y
+# borrados, y la respuesta de `+recargar`) están en `tests/test_recarga.py`, que usa la misma carpeta.
+#
+# Uso:
+#   python Benchmark_Recarga.py
+#   python Benchmark_Recarga.py --extensiones 50 --recargas 50
+
+# Nombre de la carpeta (y del paquete) de las extensiones del benchmark.
+PAQUETE = 'extensiones_recarga'
+
+EXTENSION = '''
+import threading
+
+import control_recarga
+{cabecera}
+control_recarga.hilos.append(threading.current_thread())
+from discord.ext import commands
+
+class Extension{numero}(commands.Cog):
+    @commands.command(name='cmd_{numero}')
+    async def cmd(self, ctx):
+        await ctx.send('cmd_{numero} v{version}')
+
+    @commands.command(name='lento_{numero}')
+    async def lento(self, ctx):
+        await control_recarga.puerta.wait()
+        await ctx.send('lento_{numero} v{version}')
+
+async def setup(bot):
+    {setup}
+    await bot.add_cog(Extension{numero}())
+'''
+
+class ContextoFalso:
+    # Lo mínimo que necesita `+recargar` para responder, sin pasar por los permisos del staff.
+    prefix = '+'
+
+    def __init__(self):
+        self.embeds = []
+
+    async def send(self, embed):
+        self.embeds.append(embed)
+
+class CarpetaExtensiones:
+    # Carpeta `PAQUETE` dentro de `directorio`, con una copia de las extensiones que trae el bot. `control` es el
+    # módulo `control_recarga` que importan las extensiones (hay que registrarlo en `sys.modules`): `puerta` retiene
+    # los comandos `lento_*` y `hilos` apunta el hilo en el que se ejecuta cada vez el código de una extensión.
+    def __init__(self, directorio):
+        self.directorio = directorio
+        self.ruta = os.path.join(directorio, PAQUETE)
+        self.marca = time.time()
+        os.makedirs(self.ruta)
+        for archivo in os.listdir(os.path.join(DIRECTORIO, 'extensiones')):
+            if archivo.endswith('.py'):
+                shutil.copy(os.path.join(DIRECTORIO, 'extensiones', archivo), os.path.join(self.ruta, archivo))
+        # Un paquete del mismo nombre importado antes (de otra carpeta) no debe reutilizarse.
+        for nombre in [nombre for nombre in sys.modules if nombre == PAQUETE or nombre.startswith(PAQUETE + '.')]:
+            del sys.modules[nombre]
+        self.control = types.ModuleType('control_recarga')
+        self.control.puerta = asyncio.Event()
+        self.control.hilos = []
+
+    def escribir(self, ruta, texto):
+        with open(ruta, 'w', encoding='utf-8') as archivo:
+            archivo.write(texto)
+        # Python reutiliza el bytecode guardado si la fecha y el tamaño del archivo coinciden.
+        self.marca += 2
+        os.utime(ruta, (self.marca, self.marca))
+
+    def extension(self, numero, version, setup='pass', cabecera=''):
+        self.escribir(
+            os.path.join(self.ruta, f'ext_{numero}.py'),
+            EXTENSION.format(numero=numero, version=version, setup=setup, cabecera=cabecera),
+        )
+
+    def gestor(self, modulo):
+        # Una ruta completa: el gestor la usa tal cual en lugar de buscarla junto al archivo del bot.
+        return modulo.GestorExtensiones(self.ruta, modulo.DOCUMENTADO)
+
+async def medir(modulo, carpeta, argumentos):
+    tiempos = {}
+    for numero in range(argumentos.extensiones):
+        carpeta.extension(numero, 1)
+    await preparar(modulo)
+    bot = modulo.bot
+
+    # Mientras se recarga, otra tarea mide cuánto tarda en volver a ejecutarse (el tiempo que la recarga ocupa el
+    # bucle sin soltarlo).
+    retraso_maximo = 0.0
+    activo = True
+
+    async def vigilar():
+        nonlocal retraso_maximo
+        while activo:
+            antes = time.perf_counter()
+            await asyncio.sleep(0)
+            retraso_maximo = max(retraso_maximo, time.perf_counter() - antes)
+
+    vigilante = asyncio.ensure_future(vigilar())
+    duraciones = []
+    for version in range(2, argumentos.recargas + 2):
+        for numero in range(argumentos.extensiones):
+            carpeta.extension(numero, version)
+        await modulo.extensiones.recargar(bot)
+        duraciones.append(modulo.extensiones.duracion)
+        # Deja correr a la tarea que vigila entre una recarga y la siguiente.
+        await asyncio.sleep(0.001)
+    activo = False
+    await vigilante
+    duraciones.sort()
+    tiempos['recarga_p50_ms'] = round(duraciones[len(duraciones) // 2] * 1000, 3)
+    tiempos['recarga_max_ms'] = round(duraciones[-1] * 1000, 3)
+    tiempos['retraso_bucle_max_ms'] = round(retraso_maximo * 1000, 3)
+    tiempos['recargas'] = modulo.extensiones.recargas
+    tiempos['recargas_con_errores'] = modulo.extensiones.fallidas
+    return tiempos
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de la recarga en caliente.')
+    parser.add_argument('--bot', default=os.path.join(DIRECTORIO, 'Código_sin_documentación.py'))
+    parser.add_argument('--servidor-web', default=os.path.join(DIRECTORIO, 'Servidor_Web_sin_Documentación.py'))
+    parser.add_argument('--extensiones', type=int, default=20)
+    parser.add_argument('--recargas', type=int, default=20)
+    parser.add_argument('--salida', default=os.path.join(DIRECTORIO, 'benchmark_recarga.json'))
+    argumentos = parser.parse_args()
+
+    # Las normas se leen de una ruta relativa; se trabaja en una carpeta temporal.
+    ruta_bot = os.path.abspath(argumentos.bot)
+    ruta_servidor_web = os.path.abspath(argumentos.servidor_web)
+    salida = os.path.abspath(argumentos.salida)
+    directorio = tempfile.mkdtemp(prefix='benchmark_recarga_')
+    original = os.getcwd()
+    try:
+        carpeta = CarpetaExtensiones(directorio)
+        sys.modules['control_recarga'] = carpeta.control
+        os.chdir(directorio)
+        modulo = cargar_bot(ruta_bot, ruta_servidor_web)
+        modulo.extensiones = carpeta.gestor(modulo)
+        tiempos = asyncio.run(medir(modulo, carpeta, argumentos))
+    finally:
+        os.chdir(original)
+        shutil.rmtree(directorio, ignore_errors=True)
+    resultado = {
+        'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'extensiones': argumentos.extensiones,
+        **tiempos,
+    }
+    for clave, valor in resultado.items():
+        print(f'{clave:<22} {valor}')
+    with open(salida, 'w', encoding='utf-8') as archivo:
+        json.dump(resultado, archivo, indent=2, ensure_ascii=False)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+
+import aiohttp
+
+from Benchmark_Comandos import DIRECTORIO, cargar_bot
+
+# Benchmark del monitor de la red y de la ruta `/status`.
+# Levanta `--servidores` servidores de Minecraft falsos en local (responden al protocolo de estado como un servidor real,
+# tras `--retraso` segundos), más uno que no acepta conexiones y otro que acepta pero nunca responde, y los consulta con
+# el mismo `MonitorRed` que usa el bot, con `--simultaneas` conexiones a la vez y de una en una. Después inicia el
+# servidor web asíncrono con `/status` y mide cuántas peticiones por segundo atiende con y sin ETag.
+# Las comprobaciones (límite de conexiones, servidores caídos, historial circular, JSON, página HTML y respuestas
+# 304 Not Modified) están en `tests/test_red.py`.
+#
+# Uso:
+#   python Benchmark_Red.py
+#   python Benchmark_Red.py --servidores 200 --simultaneas 16
+
+class ServidorFalso:
+    # Servidor de Minecraft falso: responde al estado con `jugadores` conectados y cuenta las conexiones abiertas a la vez.
+    def __init__(self, modulo, nombre, retraso, contador, responder=True):
+        self.modulo = modulo
+        self.nombre = nombre
+        self.retraso = retraso
+        self.contador = contador
+        self.responder = responder
+        self.jugadores = 0
+        self.servidor = None
+        self.puerto = None
+
+    async def iniciar(self):
+        self.servidor = await asyncio.start_server(self._atender, '127.0.0.1', 0)
+        self.puerto = self.servidor.sockets[0].getsockname()[1]
+
+    def cerrar(self):
+        self.servidor.close()
+
+    async def _atender(self, lector, escritor):
+        modulo = self.modulo
+        self.contador['abiertas'] += 1
+        self.contador['maximo'] = max(self.contador['maximo'], self.contador['abiertas'])
+        try:
+            await modulo._leer_paquete(lector)
+            await modulo._leer_paquete(lector)
+            if not self.responder:
+                await asyncio.sleep(3600)
+            await asyncio.sleep(self.retraso)
+            estado = json.dumps({
+                'version': {'name': f'Paper 1.17.1 ({self.nombre})', 'protocol': 756},
+                'players': {'online': self.jugadores, 'max': 100},
+                'description': {'text': self.nombre},
+            }).encode('utf-8')
+            escritor.write(modulo._paquete(0x00, modulo._varint(len(estado)) + estado))
+            await escritor.drain()
+            _, datos = await modulo._leer_paquete(lector)
+            escritor.write(modulo._paquete(0x01, datos))
+            await escritor.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self.contador['abiertas'] -= 1
+            escritor.close()
+
+class BotFalso:
+    # Lo mínimo que `keep_alive_async` necesita del bot para `/healthz`.
+    latency = 0.05
+    guilds = ()
+
+    def is_ready(self):
+        return True
+
+    def is_closed(self):
+        return False
+
+async def puerto_cerrado():
+    servidor = await asyncio.start_server(lambda lector, escritor: None, '127.0.0.1', 0)
+    puerto = servidor.sockets[0].getsockname()[1]
+    servidor.close()
+    await servidor.wait_closed()
+    return puerto
+
+async def peticiones_por_segundo(sesion, url, cabeceras, duracion=1.0):
+    cantidad = 0
+    final = time.perf_counter() + duracion
+    while time.perf_counter() < final:
+        async with sesion.get(url, headers=cabeceras) as respuesta:
+            await respuesta.read()
+        cantidad += 1
+    return round(cantidad / duracion)
+
+async def levantar(modulo, cantidad, retraso, contador):
+    # Los servidores falsos, más uno caído y otro colgado; devuelve también las direcciones para `MonitorRed`.
+    falsos = [ServidorFalso(modulo, f'falso-{numero}', retraso, contador) for numero in range(cantidad)]
+    colgado = ServidorFalso(modulo, 'colgado', 0, contador, responder=False)
+    for falso in falsos + [colgado]:
+        await falso.iniciar()
+    servidores = {falso.nombre: f'127.0.0.1:{falso.puerto}' for falso in falsos}
+    servidores['caido'] = f'127.0.0.1:{await puerto_cerrado()}'
+    servidores['colgado'] = f'127.0.0.1:{colgado.puerto}'
+    return falsos + [colgado], servidores
+
+async def medir(modulo, webserver, argumentos):
+    tiempos = {}
+    contador = {'abiertas': 0, 'maximo': 0}
+    falsos, servidores = await levantar(modulo, argumentos.servidores, argumentos.retraso, contador)
+    runner = None
+    try:
+        # Consultas concurrentes con límite frente a una a una.
+        red = modulo.MonitorRed(servidores, 60, argumentos.simultaneas, 5, timeout=argumentos.timeout)
+        await red.ronda()
+        tiempos['ronda_s'] = round(red.duracion_ronda, 3)
+        tiempos['conexiones_maximas'] = contador['maximo']
+        secuencial = modulo.MonitorRed({falso.nombre: servidores[falso.nombre] for falso in falsos[:-1]}, 60, 1, 5)
+        await secuencial.ronda()
+        tiempos['ronda_secuencial_s'] = round(secuencial.duracion_ronda, 3)
+
+        # `/status` en el servidor web asíncrono.
+        runner = await webserver.keep_alive_async(BotFalso(), red=red, host='127.0.0.1', port=0)
+        puerto = runner.addresses[0][1]
+        url = f'http://127.0.0.1:{puerto}/status?formato=json'
+        async with aiohttp.ClientSession() as sesion:
+            async with sesion.get(url) as respuesta:
+                tiempos['json_kib'] = round(len(await respuesta.read()) / 1024, 1)
+                etiqueta = respuesta.headers.get('ETag')
+            tiempos['peticiones_200_por_segundo'] = await peticiones_por_segundo(sesion, url, {})
+            tiempos['peticiones_304_por_segundo'] = await peticiones_por_segundo(sesion, url, {'If-None-Match': etiqueta})
+        tiempos['rondas'] = red.rondas
+        tiempos['consultas'] = red.consultas
+    finally:
+        if runner is not None:
+            await runner.cleanup()
+        for falso in falsos:
+            falso.cerrar()
+    return tiempos
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark del monitor de la red y de /status.')
+    parser.add_argument('--bot', default=os.path.join(DIRECTORIO, 'Código_sin_documentación.py'))
+    parser.add_argument('--servidor-web', default=os.path.join(DIRECTORIO, 'Servidor_Web_sin_Documentación.py'))
+    parser.add_argument('--servidores', type=int, default=40, help='servidores de Minecraft falsos')
+    parser.add_argument('--simultaneas', type=int, default=8, help='conexiones a la vez como máximo')
+    parser.add_argument('--retraso', type=float, default=0.05, help='segundos que tarda en responder cada servidor falso')
+    parser.add_argument('--timeout', type=float, default=1.0, help='segundos de espera al servidor que no responde')
+    parser.add_argument('--salida', default=os.path.join(DIRECTORIO, 'benchmark_red.json'))
+    argumentos = parser.parse_args()
+
+    modulo = cargar_bot(argumentos.bot, argumentos.servidor_web)
+    tiempos = asyncio.run(medir(modulo, sys.modules['webserver'], argumentos))
+    resultado = {
+        'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'servidores': argumentos.servidores,
+        'simultaneas': argumentos.simultaneas,
+        **tiempos,
+    }
+    for clave, valor in resultado.items():
+        print(f'{clave:<28} {valor}')
+    with open(argumentos.salida, 'w', encoding='utf-8') as archivo:
+        json.dump(resultado, archivo, indent=2, ensure_ascii=False)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import shutil
+import tempfile
+import time
+
+from Benchmark_Comandos import DIRECTORIO, cargar_bot, preparar
+
+# Benchmark del registro y de las trazas de comandos.
+# - Registro: inicia el mismo registro que el bot en una carpeta temporal, bloquea el hilo que escribe (como si el
+#   disco se quedara parado) y mide cuánto tarda cada uno de `--eventos` eventos registrados desde el bucle de eventos.
+# - Coste de las trazas: pasa mensajes al bot sin conectarlo a Discord (como en `Benchmark_Comandos.py`) y mide los
+#   mensajes por segundo sin trazas, con el muestreo por defecto y trazándolos todos.
+# Las comprobaciones (que ninguna llamada espera al disco, el JSON y la rotación del archivo, los tramos de cada traza
+# y las esperas y respuestas 429 por los límites de frecuencia) están en `tests/test_registro.py`.
+#
+# Uso:
+#   python Benchmark_Registro.py
+#   python Benchmark_Registro.py --eventos 100000 --mensajes 20000
+
+class Recolector(logging.Handler):
+    # Guarda las trazas que llegan al registro del bot.
+    def __init__(self):
+        super().__init__()
+        self.trazas = []
+
+    def emit(self, evento):
+        traza = getattr(evento, 'traza', None)
+        if traza is not None:
+            self.trazas.append(traza)
+
+def registrar_con_disco_parado(modulo, ruta, eventos, tamano):
+    # Registra `eventos` eventos con el hilo que escribe parado y devuelve lo que tardó cada llamada, de menor a mayor.
+    # Al volver, el registro está cerrado y todos los eventos escritos en `ruta` y sus copias.
+    modulo.TAMANO_REGISTRO = tamano
+    oyente = modulo.iniciar_registro(ruta)
+    raiz = logging.getLogger()
+    cola = raiz.handlers[-1]
+    # Sin la consola, que mostraría todos los eventos del benchmark.
+    oyente.handlers[1].setLevel(logging.CRITICAL)
+    try:
+        # Con el hilo que escribe parado, las llamadas solo ponen el evento en la cola.
+        salida = oyente.handlers[0]
+        salida.acquire()
+        try:
+            duraciones = []
+            for numero in range(eventos):
+                antes = time.perf_counter()
+                modulo.bitacora.info(f'Evento {numero}')
+                duraciones.append(time.perf_counter() - antes)
+        finally:
+            salida.release()
+    finally:
+        oyente.stop()
+        raiz.removeHandler(cola)
+    duraciones.sort()
+    return duraciones
+
+async def medir(modulo, directorio, argumentos):
+    tiempos = {}
+    duraciones = registrar_con_disco_parado(modulo, os.path.join(directorio, 'bot.log'), argumentos.eventos, argumentos.tamano)
+    tiempos['registro_p50_us'] = round(duraciones[len(duraciones) // 2] * 1e6, 3)
+    tiempos['registro_p99_us'] = round(duraciones[len(duraciones) * 99 // 100] * 1e6, 3)
+    # El máximo incluye las pausas del recolector de basura de Python, que no dependen del disco.
+    tiempos['registro_max_us'] = round(duraciones[-1] * 1e6, 3)
+
+    mensaje, _ = await preparar(modulo)
+    # Las trazas van a un manejador que solo las guarda, para medir lo que cuesta crearlas y no escribirlas.
+    recolector = Recolector()
+    modulo.bitacora.addHandler(recolector)
+    modulo.bitacora.setLevel(logging.INFO)
+    on_message = modulo.bot.on_message
+    try:
+        # Coste en mensajes por segundo según el muestreo, tras una pasada de calentamiento.
+        modulo.MUESTREO_TRAZAS = 0
+        identificador = 0
+        for _ in range(argumentos.mensajes):
+            identificador += 1
+            await on_message(mensaje(identificador, '+ip'))
+        for nombre, muestreo in (('sin_trazas', 0), ('muestreo_defecto', argumentos.muestreo), ('todas', 1)):
+            modulo.MUESTREO_TRAZAS = muestreo
+            inicio = time.perf_counter()
+            for _ in range(argumentos.mensajes):
+                identificador += 1
+                await on_message(mensaje(identificador, '+ip'))
+            tiempos[f'mensajes_por_segundo_{nombre}'] = round(argumentos.mensajes / (time.perf_counter() - inicio))
+    finally:
+        modulo.bitacora.removeHandler(recolector)
+    return tiempos
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark del registro y de las trazas.')
+    parser.add_argument('--bot', default=os.path.join(DIRECTORIO, 'Código_sin_documentación.py'))
+    parser.add_argument('--servidor-web', default=os.path.join(DIRECTORIO, 'Servidor_Web_sin_Documentación.py'))
+    parser.add_argument('--eventos', type=int, default=50000, help='eventos registrados con el disco parado')
+    parser.add_argument('--tamano', type=int, default=200000, help='bytes de cada archivo antes de rotar')
+    parser.add_argument('--mensajes', type=int, default=10000, help='mensajes de cada medida de coste')
+    parser.add_argument('--muestreo', type=float, default=0.01)
+    parser.add_argument('--salida', default=os.path.join(DIRECTORIO, 'benchmark_registro.json'))
+    argumentos = parser.parse_args()
+
+    modulo = cargar_bot(argumentos.bot, argumentos.servidor_web)
+    directorio = tempfile.mkdtemp(prefix='benchmark_registro_')
+    try:
+        tiempos = asyncio.run(medir(modulo, directorio, argumentos))
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+    resultado = {
+        'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'eventos': argumentos.eventos,
+        **tiempos,
+    }
+    for clave, valor in resultado.items():
+        print(f'{clave:<38} {valor}')
+    with open(argumentos.salida, 'w', encoding='utf-8') as archivo:
+        json.dump(resultado, archivo, indent=2, ensure_ascii=False)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import tempfile
+import time
+
+from Benchmark_Comandos import DIRECTORIO, cargar_bot
+
+# Benchmark del registro de sanciones de `+sancionar`, `+historial` e `+infracciones`.
+# Genera un registro con `--sanciones` sanciones (varios años de un servidor con mucho movimiento) y parte de
+# ellas anuladas, y mide la carga al arrancar, las consultas y la compactación. Mientras se registran
+# `--escrituras` sanciones seguidas, mide cuánto llega a retrasarse el bucle de eventos.
+# Las comprobaciones (que el registro cargado de nuevo desde el archivo coincide con el de memoria antes y después de
+# compactar, y los comandos) están en `tests/test_sanciones.py`.
+#
+# Uso:
+#   python Benchmark_Sanciones.py
+#   python Benchmark_Sanciones.py --sanciones 1000000
+
+CATEGORIAS = {'leves': 10, 'graves': 7, 'juicio': 5, 'clanes': 6, 'staff': 6}
+
+def generar(ruta, cantidad, jugadores, semilla):
+    azar = random.Random(semilla)
+    inicio = int(time.time()) - 3 * 365 * 86400
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        for identificador in range(1, cantidad + 1):
+            categoria = azar.choice(list(CATEGORIAS))
+            archivo.write(json.dumps({
+                'id': identificador, 'fecha': inicio + identificador * 60, 'jugador': f'Jugador_{azar.randrange(jugadores)}',
+                'categoria': categoria, 'numero': min(int(azar.expovariate(0.5)) + 1, CATEGORIAS[categoria]),
+                'motivo': 'motivo de prueba', 'staff': 1,
+            }) + '\n')
+            if azar.random() < 0.05:
+                archivo.write(json.dumps({'anular': azar.randint(1, identificador), 'fecha': inicio, 'staff': 1}) + '\n')
+
+def ms(segundos):
+    return round(segundos * 1000, 3)
+
+async def medir(modulo, argumentos):
+    tiempos = {}
+    directorio = tempfile.mkdtemp(prefix='benchmark_sanciones_')
+    try:
+        ruta = os.path.join(directorio, 'sanciones.jsonl')
+        generar(ruta, argumentos.sanciones, argumentos.jugadores, argumentos.semilla)
+        tiempos['archivo_mib'] = round(os.path.getsize(ruta) / 1048576, 1)
+        registro = modulo.RegistroSanciones(ruta)
+        inicio = time.perf_counter()
+        await registro.cargar()
+        tiempos['carga_s'] = round(time.perf_counter() - inicio, 3)
+        tiempos['sanciones_vigentes'] = len(registro.sanciones)
+
+        repeticiones = 1000
+        jugadores = [f'jugador_{numero}' for numero in range(repeticiones)]
+        inicio = time.perf_counter()
+        for jugador in jugadores:
+            registro.historial(jugador)
+        tiempos['historial_ms'] = ms((time.perf_counter() - inicio) / repeticiones)
+        inicio = time.perf_counter()
+        for _ in range(repeticiones):
+            registro.mas_incumplidas(10)
+        tiempos['infracciones_ms'] = ms((time.perf_counter() - inicio) / repeticiones)
+        # Sin índices, cada consulta tendría que recorrer todo el registro.
+        inicio = time.perf_counter()
+        [sancion for sancion in registro.sanciones.values() if sancion.jugador.lower() == 'jugador_1']
+        tiempos['historial_sin_indice_ms'] = ms(time.perf_counter() - inicio)
+
+        # Retraso del bucle de eventos mientras se registran y anulan sanciones.
+        retraso_maximo = 0.0
+        activo = True
+
+        async def medir_retraso():
+            nonlocal retraso_maximo
+            while activo:
+                antes = time.perf_counter()
+                await asyncio.sleep(0.001)
+                retraso_maximo = max(retraso_maximo, time.perf_counter() - antes - 0.001)
+
+        medidor = asyncio.create_task(medir_retraso())
+        inicio = time.perf_counter()
+        # Una tras otra, como llegan los comandos del staff; cada escritura espera a estar en el archivo.
+        nuevas = []
+        for numero in range(argumentos.escrituras):
+            nuevas.append(await registro.registrar(f'Jugador_{numero % 50}', 'graves', 2, 'escritura del benchmark', 2))
+        tiempos['escrituras_por_segundo'] = round(argumentos.escrituras / (time.perf_counter() - inicio))
+        for sancion in nuevas[::10]:
+            await registro.anular(sancion.id, 2)
+        activo = False
+        await medidor
+        tiempos['retraso_bucle_max_ms'] = ms(retraso_maximo)
+
+        antes = os.path.getsize(ruta)
+        inicio = time.perf_counter()
+        await registro.compactar()
+        tiempos['compactacion_s'] = round(time.perf_counter() - inicio, 3)
+        tiempos['compactacion_ahorro_kib'] = round((antes - os.path.getsize(ruta)) / 1024, 1)
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+    return tiempos
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark del registro de sanciones.')
+    parser.add_argument('--bot', default=os.path.join(DIRECTORIO, 'Código_sin_documentación.py'))
+    parser.add_argument('--servidor-web', default=os.path.join(DIRECTORIO, 'Servidor_Web_sin_Documentación.py'))
+    parser.add_argument('--sanciones', type=int, default=300000)
+    parser.add_argument('--jugadores', type=int, default=20000)
+    parser.add_argument('--escrituras', type=int, default=2000, help='sanciones registradas durante la medida del bucle')
+    parser.add_argument('--semilla', type=int, default=1)
+    parser.add_argument('--salida', default=os.path.join(DIRECTORIO, 'benchmark_sanciones.json'))
+    argumentos = parser.parse_args()
+
+    modulo = cargar_bot(argumentos.bot, argumentos.servidor_web)
+    tiempos = asyncio.run(medir(modulo, argumentos))
+    resultado = {
+        'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'sanciones': argumentos.sanciones,
+        **tiempos,
+    }
+    for clave, valor in resultado.items():
+        print(f'{clave:<26} {valor}')
+    with open(argumentos.salida, 'w', encoding='utf-8') as archivo:
+        json.dump(resultado, archivo, indent=2, ensure_ascii=False)
+
+if __name__ == '__main__':
+    main()
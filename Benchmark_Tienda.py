@@ -0,0 +1,156 @@
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import json
+import os
+import platform
+import time
+
+from aiohttp import web
+
+from Benchmark_Comandos import DIRECTORIO, cargar_bot
+
+# Benchmark del catálogo de la tienda de `+tienda`.
+# Levanta en local una API de Tebex falsa (responde como la API Headless, con ETag, Last-Modified y 304 Not Modified)
+# con `--categorias` categorías de `--paquetes` paquetes, y la consulta con el mismo `CatalogoTienda` que usa el bot.
+# El reloj del catálogo es falso, para avanzar el tiempo sin esperar. Mide cuánto tarda en responder sin catálogo
+# guardado, con el catálogo fresco (de memoria) y con el catálogo desfasado mientras `--simultaneas` peticiones a la vez
+# lanzan la consulta en segundo plano a una tienda que tarda `--retraso` segundos.
+# Las comprobaciones (la caché, las consultas condicionales, el cortocircuito, los embeds, `+tienda` y el cierre del
+# bot) están en `tests/test_tienda.py`.
+#
+# Uso:
+#   python Benchmark_Tienda.py
+#   python Benchmark_Tienda.py --categorias 40 --paquetes 30 --retraso 1
+
+class TebexFalso:
+    # API de Tebex falsa: `version` cambia el catálogo, `retraso` retrasa cada respuesta y `consultas` cuenta las recibidas.
+    def __init__(self, categorias, paquetes):
+        self.categorias = categorias
+        self.paquetes = paquetes
+        self.version = 1
+        self.retraso = 0.0
+        self.consultas = 0
+        self.no_modificados = 0
+
+    def catalogo(self):
+        return {'data': [
+            {
+                'id': categoria,
+                'name': f'Categoría {categoria}',
+                'packages': [
+                    {
+                        'id': categoria * 1000 + paquete,
+                        'name': f'Rango {categoria}-{paquete}' if categoria or paquete else 'VIP',
+                        'total_price': 4.99 + paquete + self.version,
+                        'currency': 'EUR',
+                        'description': f'<p>Ventajas del rango <b>{categoria}-{paquete}</b> &amp; kit diario.</p>',
+                    }
+                    for paquete in range(self.paquetes)
+                ],
+            }
+            for categoria in range(self.categorias)
+        ] + [{'id': -1, 'name': 'Vacía', 'packages': []}]}
+
+    async def atender(self, peticion):
+        self.consultas += 1
+        await asyncio.sleep(self.retraso)
+        cuerpo = json.dumps(self.catalogo()).encode('utf-8')
+        etiqueta = '"' + hashlib.sha1(cuerpo).hexdigest() + '"'
+        if peticion.headers.get('If-None-Match') == etiqueta:
+            self.no_modificados += 1
+            return web.Response(status=304, headers={'ETag': etiqueta})
+        return web.Response(body=cuerpo, content_type='application/json', headers={
+            'ETag': etiqueta, 'Last-Modified': 'Sat, 17 Oct 2026 12:00:00 GMT',
+        })
+
+def longitud_embed(embed):
+    datos = embed.to_dict()
+    return (
+        len(datos.get('title', '')) + len(datos.get('description', '')) + len(datos.get('footer', {}).get('text', ''))
+        + sum(len(campo['name']) + len(campo['value']) for campo in datos.get('fields', []))
+    )
+
+@contextlib.asynccontextmanager
+async def servir(tebex):
+    # Publica la API de Tebex falsa en un puerto libre y devuelve el puerto.
+    aplicacion = web.Application()
+    aplicacion.router.add_get('/api/accounts/{token}/categories', tebex.atender)
+    runner = web.AppRunner(aplicacion, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, '127.0.0.1', 0).start()
+    try:
+        yield runner.addresses[0][1]
+    finally:
+        await runner.cleanup()
+
+def url_catalogo(puerto, token):
+    return f'http://127.0.0.1:{puerto}/api/accounts/{token}/categories?includePackages=1'
+
+async def medir(modulo, argumentos):
+    tiempos = {}
+    tebex = TebexFalso(argumentos.categorias, argumentos.paquetes)
+    ahora = [1000.0]
+    frescura = 300
+    tienda = 'https://tienda.example'
+    async with servir(tebex) as puerto:
+        catalogo = modulo.CatalogoTienda(url_catalogo(puerto, 'prueba'), frescura, argumentos.timeout, 3, 60, reloj=lambda: ahora[0])
+        try:
+            # Sin catálogo guardado: la petición no espera a la tienda y la consulta sigue en segundo plano.
+            tebex.retraso = argumentos.retraso
+            inicio = time.perf_counter()
+            await catalogo.obtener()
+            tiempos['respuesta_sin_catalogo_ms'] = round((time.perf_counter() - inicio) * 1000, 3)
+            await catalogo._consulta
+            tiempos['primera_consulta_ms'] = round((time.perf_counter() - inicio) * 1000, 3)
+
+            # Catálogo fresco: se sirve de memoria sin consultar a la tienda.
+            repeticiones = 10000
+            inicio = time.perf_counter()
+            for _ in range(repeticiones):
+                await catalogo.obtener()
+                catalogo.embed(tienda)
+            tiempos['respuesta_fresca_us'] = round((time.perf_counter() - inicio) / repeticiones * 1e6, 3)
+
+            # Catálogo desfasado: respuesta al momento y una sola consulta condicional en segundo plano.
+            ahora[0] += frescura + 1
+            inicio = time.perf_counter()
+            await asyncio.gather(*(catalogo.obtener() for _ in range(argumentos.simultaneas)))
+            tiempos['respuesta_desfasada_ms'] = round((time.perf_counter() - inicio) * 1000, 3)
+            await catalogo._consulta
+            tiempos['embed_catalogo_caracteres'] = longitud_embed(catalogo.embed(tienda))
+            tiempos['consultas'] = catalogo.consultas
+            tiempos['no_modificados'] = catalogo.no_modificados
+        finally:
+            await catalogo.cerrar()
+    return tiempos
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark del catálogo de la tienda.')
+    parser.add_argument('--bot', default=os.path.join(DIRECTORIO, 'Código_sin_documentación.py'))
+    parser.add_argument('--servidor-web', default=os.path.join(DIRECTORIO, 'Servidor_Web_sin_Documentación.py'))
+    parser.add_argument('--categorias', type=int, default=30)
+    parser.add_argument('--paquetes', type=int, default=20, help='paquetes por categoría')
+    parser.add_argument('--retraso', type=float, default=0.2, help='segundos que tarda en responder la tienda falsa')
+    parser.add_argument('--timeout', type=float, default=0.5, help='segundos de espera a la tienda antes de dar la consulta por fallida')
+    parser.add_argument('--simultaneas', type=int, default=500, help='peticiones a la vez con el catálogo desfasado')
+    parser.add_argument('--salida', default=os.path.join(DIRECTORIO, 'benchmark_tienda.json'))
+    argumentos = parser.parse_args()
+
+    modulo = cargar_bot(argumentos.bot, argumentos.servidor_web)
+    tiempos = asyncio.run(medir(modulo, argumentos))
+    resultado = {
+        'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'categorias': argumentos.categorias,
+        'paquetes': argumentos.paquetes,
+        **tiempos,
+    }
+    for clave, valor in resultado.items():
+        print(f'{clave:<26} {valor}')
+    with open(argumentos.salida, 'w', encoding='utf-8') as archivo:
+        json.dump(resultado, archivo, indent=2, ensure_ascii=False)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,224 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import re
+import resource
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+# Benchmark de los dos modos del servidor web (`MODO_SERVIDOR_WEB`).
+# Carga el bot sin conectarlo a Discord, en un proceso nuevo por modo, y levanta el servidor web en local: en modo
+# `'flask'`, el servidor Flask en su hilo aparte (`keep_alive`); en modo `'async'`, el servidor aiohttp en el bucle de
+# eventos del bot (`keep_alive_async`). Mientras, el bucle mide su propio retraso cada 5 ms, como lo notaría el bot.
+# Desde este proceso se hacen `--conexiones` peticiones a la vez a `/` y a `/metrics` durante `--segundos` segundos.
+# Se compara, en cada modo, la memoria (RSS) que añade el servidor, los hilos, las peticiones por segundo, la latencia
+# de las respuestas, el retraso del bucle de eventos y el tiempo de CPU.
+# Las comprobaciones (las dos responden lo mismo y el modo `'async'` no carga Flask ni abre hilos) están en
+# `tests/test_web.py`.
+#
+# Uso:
+#   python Benchmark_Web.py
+#   python Benchmark_Web.py --conexiones 64 --segundos 10
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+MODOS = ('flask', 'async')
+RUTAS = ('/', '/metrics')
+
+def puerto_libre():
+    with socket.socket() as conexion:
+        conexion.bind(('127.0.0.1', 0))
+        return conexion.getsockname()[1]
+
+def preparar_copia(directorio, ruta_servidor_web, puerto):
+    # `run` escucha siempre en 0.0.0.0:8080; la copia escucha en un puerto libre de 127.0.0.1.
+    with open(ruta_servidor_web, encoding='utf-8') as archivo:
+        texto = archivo.read()
+    texto, cambios = re.subn(r"app\.run\(host='0\.0\.0\.0', port=8080\)", f"app.run(host='127.0.0.1', port={puerto})", texto)
+    if cambios != 1:
+        raise SystemExit(f'No se encontró app.run en {ruta_servidor_web}')
+    ruta = os.path.join(directorio, 'webserver.py')
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        archivo.write(texto)
+    return ruta
+
+def hijo(ruta_bot, ruta_servidor_web, modo, puerto):
+    from Benchmark_Comandos import cargar_bot
+
+    # Flask escribe su aviso de arranque en la salida estándar, que es por donde se envían los resultados.
+    salida = sys.stdout
+    sys.stdout = sys.stderr
+    modulo = cargar_bot(ruta_bot, ruta_servidor_web)
+    webserver = sys.modules['webserver']
+    metricas = modulo.metricas
+    # Unas cuantas métricas para que `/metrics` no salga vacío.
+    for numero in range(200):
+        metricas.observar_comando(f'comando_{numero % 20}', 0.001 * (numero % 7))
+
+    def cpu():
+        uso = resource.getrusage(resource.RUSAGE_SELF)
+        return uso.ru_utime + uso.ru_stime
+
+    async def principal():
+        loop = asyncio.get_running_loop()
+        resultado = {'modo': modo, 'rss_base_mib': round(modulo.memoria_rss() / 1048576, 1), 'hilos_base': threading.active_count()}
+        runner = None
+        if modo == 'flask':
+            webserver.keep_alive(metricas)
+        else:
+            runner = await webserver.keep_alive_async(modulo.bot, metricas, host='127.0.0.1', port=puerto)
+        final = time.perf_counter() + 30
+        while True:
+            try:
+                _, escritor = await asyncio.open_connection('127.0.0.1', puerto)
+                escritor.close()
+                break
+            except OSError:
+                if time.perf_counter() > final:
+                    raise
+                await asyncio.sleep(0.05)
+        resultado['rss_listo_mib'] = round(modulo.memoria_rss() / 1048576, 1)
+        resultado['hilos_listo'] = threading.active_count()
+        resultado['flask_cargado'] = 'flask' in sys.modules
+
+        # El proceso principal hace las peticiones y escribe una línea al terminar.
+        retrasos = []
+        fin = asyncio.ensure_future(loop.run_in_executor(None, sys.stdin.readline))
+        print(json.dumps({'listo': True}), file=salida, flush=True)
+        cpu_antes = cpu()
+        while not fin.done():
+            inicio = loop.time()
+            await asyncio.sleep(0.005)
+            retrasos.append(max(0.0, loop.time() - inicio - 0.005))
+        resultado['cpu_s'] = round(cpu() - cpu_antes, 3)
+        retrasos.sort()
+        resultado['retraso_p50_ms'] = round(retrasos[len(retrasos) // 2] * 1000, 2)
+        resultado['retraso_p99_ms'] = round(retrasos[min(len(retrasos) - 1, len(retrasos) * 99 // 100)] * 1000, 2)
+        resultado['retraso_max_ms'] = round(retrasos[-1] * 1000, 2)
+        resultado['rss_final_mib'] = round(modulo.memoria_rss() / 1048576, 1)
+        if runner is not None:
+            await runner.cleanup()
+        return resultado
+
+    resultado = asyncio.run(principal())
+    print(json.dumps(resultado), file=salida, flush=True)
+    # El hilo de Flask no termina nunca: se sale sin esperarlo.
+    os._exit(0)
+
+async def cargar(puerto, conexiones, segundos):
+    import aiohttp
+    from Benchmark_Comandos import percentil
+
+    latencias = {ruta: [] for ruta in RUTAS}
+    estados = {}
+    cuerpos = {}
+    final = time.perf_counter() + segundos
+
+    async def cliente(numero, sesion):
+        ruta = RUTAS[numero % len(RUTAS)]
+        while time.perf_counter() < final:
+            inicio = time.perf_counter()
+            async with sesion.get(f'http://127.0.0.1:{puerto}{ruta}') as respuesta:
+                cuerpo = await respuesta.read()
+            latencias[ruta].append(time.perf_counter() - inicio)
+            estados[respuesta.status] = estados.get(respuesta.status, 0) + 1
+            cuerpos.setdefault(ruta, cuerpo)
+
+    inicio = time.perf_counter()
+    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=conexiones)) as sesion:
+        await asyncio.gather(*(cliente(numero, sesion) for numero in range(conexiones)))
+    duracion = time.perf_counter() - inicio
+    resultado = {
+        'peticiones': sum(len(tiempos) for tiempos in latencias.values()),
+        'estados': {str(codigo): cantidad for codigo, cantidad in estados.items()},
+        'inicio': cuerpos.get('/', b'').decode('utf-8', 'replace'),
+        'metricas_bytes': len(cuerpos.get('/metrics', b'')),
+    }
+    resultado['peticiones_s'] = round(resultado['peticiones'] / duracion, 1)
+    for ruta, tiempos in latencias.items():
+        nombre = ruta.strip('/') or 'inicio'
+        resultado[f'{nombre}_p50_ms'] = round(percentil(tiempos, 50) * 1000, 2) if tiempos else None
+        resultado[f'{nombre}_p99_ms'] = round(percentil(tiempos, 99) * 1000, 2) if tiempos else None
+    return resultado
+
+def ejecutar(directorio, ruta_bot, ruta_servidor_web, modo, argumentos):
+    puerto = puerto_libre()
+    carpeta = os.path.join(directorio, modo)
+    os.makedirs(carpeta)
+    ruta_copia = preparar_copia(carpeta, ruta_servidor_web, puerto)
+    with open(os.path.join(carpeta, 'errores.log'), 'w+', encoding='utf-8') as errores:
+        proceso = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), '--hijo', ruta_bot, ruta_copia, modo, str(puerto)],
+            cwd=carpeta, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=errores, text=True,
+            env={**os.environ, 'PYTHONPATH': DIRECTORIO},
+        )
+        try:
+            linea = proceso.stdout.readline()
+            if not linea:
+                proceso.wait(30)
+                errores.seek(0)
+                raise SystemExit(f'El servidor en modo {modo} no arrancó:\n{errores.read()[-3000:]}')
+            carga = asyncio.run(cargar(puerto, argumentos.conexiones, argumentos.segundos))
+            proceso.stdin.write('fin\n')
+            proceso.stdin.flush()
+            linea = proceso.stdout.readline()
+            proceso.wait(30)
+            if not linea:
+                errores.seek(0)
+                raise SystemExit(f'El servidor en modo {modo} falló:\n{errores.read()[-3000:]}')
+        finally:
+            if proceso.poll() is None:
+                proceso.kill()
+                proceso.wait()
+    return {**json.loads(linea), **carga}
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--hijo':
+        ruta_bot, ruta_servidor_web, modo, puerto = sys.argv[2:6]
+        hijo(ruta_bot, ruta_servidor_web, modo, int(puerto))
+        return
+
+    parser = argparse.ArgumentParser(description='Memoria y latencia del servidor web en modo Flask y en modo async.')
+    parser.add_argument('--bot', default=os.path.join(DIRECTORIO, 'Código_sin_documentación.py'))
+    parser.add_argument('--servidor-web', default=os.path.join(DIRECTORIO, 'Servidor_Web_sin_Documentación.py'))
+    parser.add_argument('--conexiones', type=int, default=32, help='peticiones a la vez')
+    parser.add_argument('--segundos', type=float, default=5)
+    parser.add_argument('--salida', default=os.path.join(DIRECTORIO, 'benchmark_web.json'))
+    argumentos = parser.parse_args()
+    ruta_bot = os.path.abspath(argumentos.bot)
+    ruta_servidor_web = os.path.abspath(argumentos.servidor_web)
+
+    directorio = tempfile.mkdtemp(prefix='benchmark_web_')
+    try:
+        modos = {modo: ejecutar(directorio, ruta_bot, ruta_servidor_web, modo, argumentos) for modo in MODOS}
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+    print(
+        f"{'modo':<6} {'RSS servidor MiB':>17} {'RSS final MiB':>14} {'hilos':>6} {'pet/s':>8} {'/ p50 ms':>9} {'/ p99 ms':>9}"
+        f" {'/metrics p99 ms':>16} {'retraso p99 ms':>15} {'retraso máx ms':>15} {'CPU s':>6}"
+    )
+    for modo, datos in modos.items():
+        print(
+            f"{modo:<6} {datos['rss_listo_mib'] - datos['rss_base_mib']:>17.1f} {datos['rss_final_mib']:>14} {datos['hilos_listo']:>6}"
+            f" {datos['peticiones_s']:>8} {datos['inicio_p50_ms']:>9} {datos['inicio_p99_ms']:>9} {datos['metrics_p99_ms']:>16}"
+            f" {datos['retraso_p99_ms']:>15} {datos['retraso_max_ms']:>15} {datos['cpu_s']:>6}"
+        )
+    resultado = {
+        'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'conexiones': argumentos.conexiones,
+        'segundos': argumentos.segundos,
+        'modos': modos,
+    }
+    with open(os.path.abspath(argumentos.salida), 'w', encoding='utf-8') as archivo:
+        json.dump(resultado, archivo, indent=2, ensure_ascii=False)
+
+if __name__ == '__main__':
+    main()
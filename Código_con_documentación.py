@@ -1,34 +1,371 @@
+# Perfil de arranque
+# `time` se importa antes que el resto para anotar el momento exacto en que empieza el programa.
+# `marcas_arranque` guarda, en orden, el momento en que termina cada etapa del arranque:
+# importaciones, preparación del módulo, inicio de sesión, carga de comandos, conexión al gateway y bot listo.
+# Al estar listo, se muestra en la consola cuánto tardó cada etapa (ver `informe_arranque`).
+# Para ver el tiempo de importación de cada módulo por separado, ejecuta el bot con `python -X importtime`.
+import time  # Importa `time` para medir intervalos de tiempo con un reloj que nunca retrocede (`time.monotonic`).
+
+marcas_arranque = {'inicio': time.perf_counter()}
+
 import discord  # Importa la biblioteca de discord.py para interactuar con la API de Discord.
 from discord.ext import commands, tasks  # Importa módulos adicionales para manejar comandos y tareas en bucle con discord.py.
-from webserver import keep_alive  # Importa una función personalizada `keep_alive` para mantener el bot en línea.
+from webserver import keep_alive, keep_alive_async  # Importa las funciones personalizadas `keep_alive` y `keep_alive_async` para mantener el bot en línea.
 import datetime  # Importa la biblioteca `datetime` para manejar y manipular fechas y horas.
 import asyncio  # Importa asyncio para funciones asíncronas, esenciales para operaciones no bloqueantes.
-from urllib import parse, request  # Importa módulos para trabajar con URLs y hacer solicitudes HTTP.
 import re  # Importa el módulo de expresiones regulares `re` para analizar patrones de texto.
+import heapq  # Importa `heapq` para obtener los mejores resultados de una búsqueda sin ordenar todos los candidatos.
+import unicodedata  # Importa `unicodedata` para quitar las tildes del texto al buscar normas.
+import json  # Importa `json` para leer la respuesta de estado que envía el servidor de Minecraft.
+import struct  # Importa `struct` para empaquetar números en el formato binario del protocolo de Minecraft.
+import bisect  # Importa `bisect` para encontrar rápidamente en qué intervalo de un histograma cae cada medición.
+import logging  # Importa `logging` para detectar los avisos de límite de frecuencia que registra discord.py.
+import os  # Importa `os` para crear la carpeta de volcados y borrar los volcados antiguos.
+import sys  # Importa `sys` para obtener la pila de llamadas del hilo del bot (`sys._current_frames`).
+import threading  # Importa `threading` para vigilar el bucle de eventos desde un hilo independiente.
+import traceback  # Importa `traceback` para convertir la pila de llamadas en texto legible.
+import weakref  # Importa `weakref` para asociar tareas con comandos sin impedir que las tareas terminadas se liberen de memoria.
+import math  # Importa `math` para comprobar si la latencia del bot es un número válido (`math.isfinite`).
+import multiprocessing  # Importa `multiprocessing` para repartir el bot en varios procesos en el modo cluster.
+import aiohttp  # Importa aiohttp (instalado junto con discord.py) para consultar a Discord cuántos shards se recomiendan.
+import functools  # Importa `functools` para crear decoradores que conservan el nombre y los parámetros de la función original.
+import sqlite3  # Importa `sqlite3` para guardar la configuración de cada servidor de Discord en una base de datos local.
+import collections  # Importa `collections` para usar `OrderedDict` como caché LRU de configuraciones.
+import concurrent.futures  # Importa `concurrent.futures` para hacer las consultas a SQLite en un hilo aparte, sin bloquear el bot.
+import array  # Importa `array` para guardar las estadísticas de los jugadores en arrays compactos de enteros.
+import html  # Importa `html` para convertir las entidades HTML (`&amp;`...) de las descripciones de la tienda en texto.
+import importlib.util  # Importa `importlib.util` para comprobar las extensiones de comandos antes de recargarlas.
+import logging.handlers  # Importa los manejadores de `logging` para escribir el registro desde un hilo aparte y rotar el archivo.
+import queue  # Importa `queue` para la cola que comparten el bot y el hilo que escribe el registro.
+import contextvars  # Importa `contextvars` para que cada comando vea solo su propia traza.
+import random  # Importa `random` para elegir qué comandos se trazan.
+import inspect  # Importa `inspect` para comprobar que la función `setup` de una extensión es asíncrona.
+
+# Fin de la etapa de importaciones.
+marcas_arranque['importaciones'] = time.perf_counter()
+
+# Token del bot. Reemplaza "BOT_TOKEN" con el token real del bot de Discord.
+TOKEN = "BOT_TOKEN"
+# Prefijo por defecto de los comandos. Cada servidor de Discord puede cambiarlo con `+config prefijo`.
+PREFIJO = '+'
+
+# Datos del servidor de Minecraft
+# `SERVIDOR_MINECRAFT` y `PUERTO_MINECRAFT` indican a qué servidor se conecta el bot para consultar su estado con `+ip`.
+# `TTL_ESTADO_SERVIDOR` es el tiempo, en segundos, durante el cual se reutiliza el último estado consultado
+# antes de volver a preguntar al servidor.
+# `URL_TIENDA` es el enlace que muestra `+tienda`.
+# Estos valores (y el prefijo y las normas) son los de por defecto: cada servidor de Discord puede cambiarlos con `+config`.
+SERVIDOR_MINECRAFT = 'play.olympusland.xyz'
+PUERTO_MINECRAFT = 25565
+TTL_ESTADO_SERVIDOR = 30
+URL_TIENDA = 'https://olympusland.tebex.io'
+
+# Configuración por servidor de Discord
+# `ARCHIVO_CONFIGURACION` es la base de datos SQLite donde se guarda lo que cada servidor cambia con `+config`.
+# `CAPACIDAD_CACHE_CONFIGURACION` es cuántas configuraciones se guardan en memoria; con eso el prefijo de cada
+# mensaje se resuelve sin leer el disco. Los servidores que no cambiaron nada comparten un único objeto, así que
+# cada entrada de la caché ocupa muy poco.
+ARCHIVO_CONFIGURACION = 'configuracion.db'
+CAPACIDAD_CACHE_CONFIGURACION = 10000
+
+# Estado (presencia) del bot
+# `PLANTILLAS_ESTADO` son los textos que el bot muestra como "Jugando a ..."; se van alternando cada `ROTACION_ESTADO` segundos.
+# En cada plantilla se puede usar `{servidores}` (servidores de Discord donde está el bot),
+# `{jugadores}` (jugadores conectados al servidor de Minecraft), `{ip}` (dirección del servidor de Minecraft)
+# y `{prefijo}` (prefijo por defecto de los comandos).
+# `ESPERA_ESTADO` son los segundos que se espera antes de actualizar el estado tras entrar o salir de un servidor,
+# para agrupar varios cambios seguidos en una sola actualización.
+PLANTILLAS_ESTADO = [
+    'En {servidores} servidores. Prefijo {prefijo}',
+    '{jugadores} jugadores en {ip}',
+]
+ROTACION_ESTADO = 60
+ESPERA_ESTADO = 5
+
+# Servidor web para mantener el bot activo
+# - 'flask': servidor Flask en un hilo aparte (modo original, ver `keep_alive`).
+# - 'async': servidor aiohttp en el mismo bucle de eventos que el bot, sin hilo extra ni Flask,
+#            con las rutas `/livez` y `/healthz` que informan del estado real del bot (ver `keep_alive_async`).
+MODO_SERVIDOR_WEB = 'flask'
+
+# Tipo de comandos
+# - 'prefijo': comandos que empiezan por `+` (modo original). Necesita el intent `message_content`.
+# - 'barra': comandos de barra (`/ip`, `/normas`...). Como Discord envía las interacciones directamente al bot,
+#            no hace falta leer los mensajes: el bot solo pide el intent `guilds` y deja de recibir cada mensaje
+#            de cada servidor, lo que reduce mucho el tráfico del gateway y el trabajo de procesarlo.
+# - 'ambos': comandos de barra y también con prefijo `+`, como respaldo (vuelve a necesitar `message_content`).
+# - `SINCRONIZAR_COMANDOS`: si es True, al arrancar se registran los comandos de barra en Discord.
+# - `MEDIR_GATEWAY`: si es True, se cuentan los bytes y eventos recibidos del gateway y se publican en `/metrics`,
+#                    para comparar el tráfico de los distintos modos. Tiene un pequeño coste, por eso viene desactivado.
+MODO_COMANDOS = 'prefijo'
+SINCRONIZAR_COMANDOS = True
+MEDIR_GATEWAY = False
+
+# Modo cluster (sharding en varios procesos)
+# Discord reparte los servidores de un bot grande entre varias conexiones llamadas "shards".
+# - `MODO_CLUSTER`: si es True, el bot se ejecuta con `AutoShardedBot` en varios procesos, cada uno con un grupo de shards.
+# - `TOTAL_SHARDS`: número total de shards; si es None, se usa el número que recomienda Discord.
+# - `PROCESOS_CLUSTER`: número de procesos entre los que se reparten los shards (por defecto, uno por núcleo).
+MODO_CLUSTER = False
+TOTAL_SHARDS = None
+PROCESOS_CLUSTER = os.cpu_count() or 1
+
+# Agrupación de comandos repetidos y límites de uso
+# Cuando muchos usuarios escriben el mismo comando a la vez en un canal (por ejemplo, `+ip` durante un directo),
+# el bot responde solo una vez y el resto de peticiones se agrupan.
+# - `VENTANA_AGRUPACION`: segundos durante los que se agrupan las peticiones repetidas tras la primera (0 desactiva la agrupación).
+# - `MENCIONAR_AGRUPADOS`: si es True, al cerrar la ventana se envía un único mensaje mencionando a quienes se agruparon.
+# - `ENFRIAMIENTO_USUARIO` y `ENFRIAMIENTO_CANAL`: (usos, segundos) permitidos por usuario y por canal en los comandos que se agrupan; None desactiva el límite.
+VENTANA_AGRUPACION = 3
+MENCIONAR_AGRUPADOS = True
+ENFRIAMIENTO_USUARIO = (3, 10)
+ENFRIAMIENTO_CANAL = (10, 10)
+
+# Perfil de memoria
+# - 'normal': la configuración por defecto de discord.py.
+# - 'bajo': el bot no guarda lo que ningún comando usa: sin caché de mensajes (`max_messages=None`),
+#           sin caché de miembros (`MemberCacheFlags.none()`), sin descargar la lista de miembros de cada servidor
+#           al arrancar (`chunk_guilds_at_startup=False`) y solo con los intents imprescindibles.
+#           En bots que están en cientos de servidores, la diferencia de memoria es notable.
+# - `HORAS_INFORME_MEMORIA`: cada cuántas horas se muestra en la consola un informe del uso de memoria
+#                            (también se muestra uno al arrancar), para comparar los perfiles.
+PERFIL_MEMORIA = 'normal'
+HORAS_INFORME_MEMORIA = 6
+
+# Nombre del rol de Discord que pueden usar los comandos exclusivos del staff.
+# Los administradores del servidor de Discord también pueden usarlos aunque no tengan este rol.
+ROL_STAFF = 'Staff'
+
+# Consola del servidor de Minecraft por RCON
+# RCON es el protocolo con el que Minecraft permite ejecutar comandos de consola a distancia. Se activa en el
+# `server.properties` del servidor con `enable-rcon=true`, `rcon.port` y `rcon.password`.
+# - `RCON_HOST` y `RCON_PUERTO`: dirección del RCON (por defecto, el mismo servidor que muestra `+ip`).
+# - `RCON_CONTRASENA`: el `rcon.password` del servidor. Si está vacía, los comandos de consola responden que RCON no está configurado.
+# - `RCON_CONEXIONES`: conexiones que se mantienen abiertas a la vez.
+# - `RCON_TIMEOUT`: segundos que se espera a conectar o a la respuesta de cada comando antes de darlo por fallido.
+RCON_HOST = SERVIDOR_MINECRAFT
+RCON_PUERTO = 25575
+RCON_CONTRASENA = ''
+RCON_CONEXIONES = 2
+RCON_TIMEOUT = 5
+
+# Puente del chat de Minecraft a Discord
+# El bot sigue el log del servidor de Minecraft y envía a un canal de Discord, por un webhook, los mensajes del chat,
+# las entradas y salidas de jugadores y las muertes. Solo funciona si el bot corre en la misma máquina que el servidor.
+# - `PUENTE_CHAT_ACTIVO`: si es True, el puente se inicia junto con el bot.
+# - `ARCHIVO_LOG_MINECRAFT`: ruta del `latest.log` del servidor de Minecraft.
+# - `WEBHOOK_CHAT`: URL del webhook del canal (Editar canal > Integraciones > Webhooks).
+# - `INTERVALO_LOG`: segundos entre cada vez que se mira si el log tiene líneas nuevas.
+# - `VENTANA_CHAT`: segundos durante los que se juntan las líneas en un solo mensaje. Discord solo acepta unos
+#   30 mensajes por minuto en un canal, así que enviar cada línea por separado se queda atrás en cuanto hay movimiento.
+# - `MAXIMO_COLA_CHAT`: líneas que pueden esperar a enviarse. Si la cola se llena, se deja de leer el log hasta que
+#   haya sitio, así una avalancha de líneas espera en el archivo y no en la memoria del bot.
+PUENTE_CHAT_ACTIVO = False
+ARCHIVO_LOG_MINECRAFT = 'logs/latest.log'
+WEBHOOK_CHAT = ''
+INTERVALO_LOG = 0.5
+VENTANA_CHAT = 1.0
+MAXIMO_COLA_CHAT = 1000
+
+# Estadísticas de los jugadores (`+top` y `+stats`)
+# Minecraft guarda las estadísticas de cada jugador en `world/stats/<uuid>.json`, y el nombre de los jugadores
+# que entraron hace poco en `usercache.json`. Como el archivo de estadísticas, el bot tiene que ejecutarse en la
+# misma máquina que el servidor de Minecraft (o tener acceso a esos archivos).
+# - `DIRECTORIO_ESTADISTICAS`: ruta de la carpeta `stats` del mundo.
+# - `ARCHIVO_USERCACHE`: ruta del `usercache.json` del servidor.
+# - `INTERVALO_ESTADISTICAS`: segundos entre cada actualización del índice (Minecraft guarda las estadísticas
+#   cada pocos minutos, al guardar el mundo, así que actualizar más a menudo no aporta nada).
+DIRECTORIO_ESTADISTICAS = 'world/stats'
+ARCHIVO_USERCACHE = 'usercache.json'
+INTERVALO_ESTADISTICAS = 300
+
+# Registro de sanciones (`+sancionar`, `+historial`, `+infracciones`)
+# - `ARCHIVO_SANCIONES`: archivo donde se guardan las sanciones, una por línea en JSON. Solo se añaden líneas al final:
+#   anular una sanción añade una línea que la anula, en vez de reescribir el archivo.
+# - `HORAS_COMPACTACION_SANCIONES`: cada cuántas horas se reescribe el archivo sin las sanciones anuladas.
+#   Con `MODO_CLUSTER`, usa estos comandos desde un solo servidor de Discord: cada proceso tiene su propia copia del
+#   registro en memoria.
+ARCHIVO_SANCIONES = 'sanciones.jsonl'
+HORAS_COMPACTACION_SANCIONES = 24
+
+# Anuncios programados (`+anunciar`, `+anuncios`, `+cancelar`)
+# - `ARCHIVO_ANUNCIOS`: base de datos SQLite donde se guardan los anuncios, para que sobrevivan a un reinicio.
+# - `TOLERANCIA_ANUNCIOS`: segundos de retraso a partir de los cuales un anuncio se considera perdido (por ejemplo,
+#   porque el bot estaba apagado a esa hora). Los anuncios perdidos se envían una vez al volver (política `recuperar`,
+#   la de por defecto) o se saltan (política `saltar`, con `--saltar` en `+anunciar`).
+# - `MAXIMO_ANUNCIOS_SERVIDOR`: anuncios programados que puede tener a la vez cada servidor de Discord.
+ARCHIVO_ANUNCIOS = 'anuncios.db'
+TOLERANCIA_ANUNCIOS = 60
+MAXIMO_ANUNCIOS_SERVIDOR = 200
+
+# Página de estado de la red (`/status` en el servidor web)
+# - `SERVIDORES_RED`: servidores de Minecraft de la red (nombre -> dirección, con `:puerto` si no es el de por defecto).
+# - `INTERVALO_RED`: segundos entre cada consulta a todos los servidores.
+# - `CONSULTAS_RED_SIMULTANEAS`: conexiones abiertas a la vez como máximo durante una consulta.
+# - `HISTORIAL_RED`: consultas que se guardan por servidor para la disponibilidad y la gráfica de latencia
+#   (1440 consultas cada 60 segundos son 24 horas).
+SERVIDORES_RED = {'Principal': SERVIDOR_MINECRAFT}
+INTERVALO_RED = 60
+CONSULTAS_RED_SIMULTANEAS = 8
+HISTORIAL_RED = 1440
+
+# Catálogo de la tienda (`+tienda`)
+# - `TOKENS_TEBEX`: token público de la API Headless de Tebex de cada tienda (URL de la tienda -> token). Se ve en el panel
+#   de Tebex, en Integrations > Headless API. Las tiendas sin token, o con el token vacío, solo muestran el enlace.
+# - `API_TEBEX`: dirección de la API con las categorías y sus paquetes.
+# - `FRESCURA_TIENDA`: segundos durante los que el catálogo se sirve sin volver a preguntar a Tebex.
+# - `TIMEOUT_TIENDA`: segundos de espera a Tebex antes de dar la consulta por fallida.
+# - `FALLOS_CORTE_TIENDA` y `ENFRIAMIENTO_CORTE_TIENDA`: tras esos fallos seguidos, se deja de consultar a Tebex durante
+#   esos segundos y se sirve el último catálogo descargado.
+TOKENS_TEBEX = {URL_TIENDA: ''}
+API_TEBEX = 'https://headless.tebex.io/api/accounts/{token}/categories?includePackages=1'
+FRESCURA_TIENDA = 300
+TIMEOUT_TIENDA = 5
+FALLOS_CORTE_TIENDA = 3
+ENFRIAMIENTO_CORTE_TIENDA = 60
+
+# Vigilante del bucle de eventos
+# - `VIGILANTE_ACTIVO`: si es True, el vigilante se inicia junto con el bot (también se puede activar con `+vigilante on`).
+# - `UMBRAL_BLOQUEO`: segundos que tiene que estar bloqueado el bucle de eventos para registrar un bloqueo.
+# - `DIRECTORIO_VOLCADOS`: carpeta donde se guarda un archivo con la pila de llamadas de cada bloqueo.
+# - `MAXIMO_VOLCADOS`: número de archivos de volcado que se conservan; los más antiguos se borran.
+VIGILANTE_ACTIVO = True
+UMBRAL_BLOQUEO = 0.25
+DIRECTORIO_VOLCADOS = 'volcados'
+MAXIMO_VOLCADOS = 20
+
+# Recarga en caliente (`+recargar`)
+# - `DIRECTORIO_EXTENSIONES`: carpeta con extensiones de comandos (archivos `.py` con una función `setup(bot)`, como
+#   cualquier extensión de discord.py), junto a este archivo. Trae los comandos de información, normas y tienda, y se
+#   pueden añadir más. Se cargan al conectarse a Discord y `+recargar` las vuelve a cargar sin desconectar el bot.
+# - `ARCHIVO_NORMAS`: archivo JSON opcional con el texto de las normas (`{"leves": ["...", "..."], ...}`), que reemplaza
+#   al de `NORMAS` en las categorías que incluya. `+recargar` también lo vuelve a leer.
+DIRECTORIO_EXTENSIONES = 'extensiones'
+ARCHIVO_NORMAS = 'normas.json'
+
+# Registro (log) y trazas
+# - `ARCHIVO_REGISTRO`: archivo donde se guarda el registro en JSON, una línea por evento. Con `MODO_CLUSTER`, cada
+#   proceso usa el suyo (`bot-0.log`, `bot-1.log`...).
+# - `TAMANO_REGISTRO` y `COPIAS_REGISTRO`: al llegar a ese tamaño en bytes, el archivo se renombra (`bot.log.1`...)
+#   y se empieza otro; se conservan esas copias como máximo.
+# - `MUESTREO_TRAZAS`: proporción de comandos (de 0 a 1) de los que se guarda una traza con el tiempo de cada etapa.
+ARCHIVO_REGISTRO = 'bot.log'
+TAMANO_REGISTRO = 10 * 1024 * 1024
+COPIAS_REGISTRO = 5
+MUESTREO_TRAZAS = 0.01
 
 # Configuración de permisos del bot (intents)
 # Discord permite a los bots utilizar "intenciones" o "intents" para definir a qué eventos y datos pueden acceder.
 # Estos intents controlan los permisos del bot de manera específica, mejorando la seguridad y privacidad en Discord.
 
-# Primero, se crea un objeto de intents llamado `intents`, utilizando `discord.Intents.default()`.
-# `discord.Intents.default()` devuelve un conjunto básico de permisos predefinidos que el bot puede utilizar.
-intents = discord.Intents.default()  
+# En el modo 'barra' se parte de `discord.Intents.none()` (ningún intent) y solo se activa `guilds`,
+# necesario para saber en qué servidores está el bot.
+if MODO_COMANDOS == 'barra':
+    intents = discord.Intents.none()
+    intents.guilds = True
+# En el perfil de memoria 'bajo' solo se piden los eventos de servidores y de mensajes (de servidores y mensajes directos),
+# junto con su contenido. Así Discord no envía reacciones, estados de voz, emojis, invitaciones, etc., que el bot no usa.
+elif PERFIL_MEMORIA == 'bajo':
+    intents = discord.Intents(guilds=True, guild_messages=True, dm_messages=True, message_content=True)
+else:
+    # Primero, se crea un objeto de intents llamado `intents`, utilizando `discord.Intents.default()`.
+    # `discord.Intents.default()` devuelve un conjunto básico de permisos predefinidos que el bot puede utilizar.
+    intents = discord.Intents.default()  
 
-# A continuación, se activa el permiso específico `message_content` en el objeto `intents`.
-# `message_content` es un permiso que permite al bot acceder al texto de los mensajes en los canales de texto.
-# Este permiso es fundamental para que el bot pueda leer y responder a comandos de los usuarios.
-# Sin este permiso, el bot no puede ver el contenido del mensaje y, por lo tanto, no puede responder a los comandos.
-intents.message_content = True  
+    # A continuación, se activa el permiso específico `message_content` en el objeto `intents`.
+    # `message_content` es un permiso que permite al bot acceder al texto de los mensajes en los canales de texto.
+    # Este permiso es fundamental para que el bot pueda leer y responder a comandos de los usuarios.
+    # Sin este permiso, el bot no puede ver el contenido del mensaje y, por lo tanto, no puede responder a los comandos.
+    intents.message_content = True  
 
 # Creación del bot
 # Se inicializa el bot utilizando la clase `commands.Bot` de discord.py, configurando el prefijo de comando,
 # desactivando el comando de ayuda predeterminado y asignando los intents configurados.
 
-# - `command_prefix="+":` Define el prefijo que los usuarios deben utilizar para los comandos del bot, en este caso `+`.
-#    Esto significa que cualquier comando debe comenzar con `+`.
+# - `command_prefix=obtener_prefijo`: Define el prefijo que los usuarios deben utilizar para los comandos del bot.
+#    En lugar de un texto fijo se pasa una función, porque cada servidor de Discord puede tener su propio prefijo (`+` por defecto).
 # - `help_command=None`: Desactiva el comando de ayuda predeterminado de `discord.py`, permitiendo definir un comando de ayuda personalizado.
 # - `intents=intents`: Pasa el objeto `intents` con los permisos configurados, necesario para que el bot funcione correctamente con los permisos establecidos.
-bot = commands.Bot(command_prefix="+", help_command=None, intents=intents)
+# En el perfil de memoria 'bajo' se pasan además las opciones de caché descritas en `PERFIL_MEMORIA`.
+# `**opciones_cache` pasa cada elemento del diccionario como un argumento con nombre (vacío en el perfil 'normal').
+if PERFIL_MEMORIA == 'bajo':
+    opciones_cache = {
+        'max_messages': None,
+        'member_cache_flags': discord.MemberCacheFlags.none(),
+        'chunk_guilds_at_startup': False,
+    }
+else:
+    opciones_cache = {}
+
+# Función que discord.py llama con cada mensaje para saber qué prefijo usar.
+# Si la configuración del servidor ya está en la caché se devuelve el prefijo directamente, sin esperar a nada.
+# Si no, se devuelve una corrutina que la lee de la base de datos; discord.py acepta las dos cosas y espera a la corrutina.
+# En los mensajes directos (sin servidor) se usa el prefijo por defecto.
+def obtener_prefijo(bot, message):
+    if message.guild is None:
+        return PREFIJO
+    configuracion = configuraciones.en_cache(message.guild.id)
+    if configuracion is not None:
+        return configuracion.prefijo
+    return _prefijo_desde_disco(message.guild.id)
+
+async def _prefijo_desde_disco(servidor_id):
+    return (await configuraciones.obtener(servidor_id)).prefijo
+
+# En el modo cluster se usa `commands.AutoShardedBot`, que es igual que `commands.Bot` pero puede manejar varios shards a la vez.
+ClaseBot = commands.AutoShardedBot if MODO_CLUSTER else commands.Bot
+# `enable_debug_events=MEDIR_GATEWAY` activa los eventos de bajo nivel del gateway, que solo se usan para medir su tráfico.
+# `http_trace=traza_http` le pasa a la sesión HTTP de discord.py una `aiohttp.TraceConfig`, con la que más abajo se miden
+# las esperas y las respuestas 429 por los límites de frecuencia.
+traza_http = aiohttp.TraceConfig()
+bot = ClaseBot(command_prefix=obtener_prefijo, help_command=None, intents=intents, enable_debug_events=MEDIR_GATEWAY, http_trace=traza_http, **opciones_cache)
+# Decorador con el que se registran los comandos dentro de las categorías (cogs): `commands.command` crea comandos
+# de prefijo y `commands.hybrid_command` crea comandos "híbridos", que funcionan a la vez como comandos de barra y de prefijo.
+registrar_comando = commands.command if MODO_COMANDOS == 'prefijo' else commands.hybrid_command
+# Estado compartido del cluster. Solo tiene valor dentro de los procesos del cluster (ver `_trabajador`).
+cluster = None
+
+
+# Preparación del bot antes de conectarse
+# `setup_hook` se ejecuta una sola vez, después de iniciar sesión y antes de conectarse al gateway de Discord,
+# ya dentro del bucle de eventos del bot. Es el lugar adecuado para iniciar el servidor web asíncrono,
+# que así puede responder a las comprobaciones incluso mientras el bot todavía se está conectando.
+@bot.event
+async def setup_hook():
+    # `setdefault` solo guarda la marca la primera vez; así las reconexiones no cambian las medidas del arranque.
+    marcas_arranque.setdefault('inicio_sesion', time.perf_counter())
+    # En el modo cluster el servidor web lo inicia el proceso principal, no cada proceso del bot.
+    if MODO_SERVIDOR_WEB == 'async' and cluster is None:
+        await keep_alive_async(bot, metricas, red)
+    # Inicia el vigilante del bucle de eventos, si está activado en la configuración.
+    if VIGILANTE_ACTIVO:
+        vigilante_bucle.iniciar()
+    # Inicia el monitor de los servidores de la red para `/status`. En el modo cluster lo inicia el proceso principal,
+    # que es el que tiene el servidor web; `red.tarea` evita iniciarlo dos veces si el bot vuelve a iniciar sesión.
+    if cluster is None and red.tarea is None:
+        red.iniciar()
+    # Descarga en segundo plano el catálogo de cada tienda con token, para que el primer `+tienda` de cualquier servidor
+    # ya lo tenga. Mientras llega, `+tienda` responde con el enlace a la tienda.
+    for tienda in TOKENS_TEBEX:
+        catalogo = catalogo_de(tienda)
+        if catalogo is not None:
+            catalogo.revalidar()
+    # Inicia el puente del chat de Minecraft, si está activado. Con varios procesos (clústeres) solo lo inicia el
+    # primero, para que cada línea se envíe una sola vez. Las menciones se desactivan: nadie puede hacer @everyone
+    # escribiendo en el chat del juego.
+    if PUENTE_CHAT_ACTIVO and (cluster is None or cluster.indice == 0):
+        webhook = discord.Webhook.from_url(WEBHOOK_CHAT, client=bot)
+        puente_chat.iniciar(functools.partial(webhook.send, username='Minecraft', allowed_mentions=discord.AllowedMentions.none()))
+    # Carga el registro de sanciones antes de añadir los comandos que lo usan.
+    await sanciones.cargar()
+    # Carga los anuncios programados. En el modo cluster, cada proceso solo carga los de los servidores de Discord de
+    # sus shards (Discord asigna cada servidor al shard `(id >> 22) % número de shards`), así cada anuncio se envía una vez.
+    await anuncios.cargar(lambda servidor_id: cluster is None or (servidor_id >> 22) % bot.shard_count in bot.shard_ids)
+    # Añade al bot las categorías de comandos que están en este archivo. Las extensiones se cargan en `on_ready`.
+    await cargar_cogs()
+    marcas_arranque.setdefault('comandos', time.perf_counter())
+    # Justo después de `setup_hook`, discord.py se conecta al gateway: empieza a contar el tiempo hasta estar listo.
+    sesion_gateway.conectando()
 
 
 # Evento de inicialización del bot
@@ -43,406 +380,4116 @@ bot = commands.Bot(command_prefix="+", help_command=None, intents=intents)
 # Este evento se activa una sola vez, cuando el bot se ha conectado y ha cargado toda la información necesaria.
 @bot.event
 async def on_ready():
-    # La función imprime el mensaje "El bot está listo" en la consola para indicar al programador que el bot se ha conectado correctamente.
+    # La función registra el mensaje "El bot está listo" (se ve en la consola y queda en `ARCHIVO_REGISTRO`) para indicar al programador que el bot se ha conectado correctamente.
     # Este mensaje de confirmación ayuda a verificar que la conexión ha sido exitosa.
-    print('El bot está listo')
+    bitacora.info('El bot está listo')
+    # Registra cuánto tardó el bot en estar listo desde que empezó a conectarse al gateway (identificándose).
+    sesion_gateway.listo('identificacion')
+    # La primera vez que el bot está listo se cargan las extensiones de comandos (información, normas, tienda y las
+    # que se añadan) y se registran los comandos de barra; después se cierra el perfil de arranque y se muestra el informe.
+    if 'listo' not in marcas_arranque:
+        marcas_arranque['listo'] = time.perf_counter()
+        await cargar_extensiones()
+        informe_arranque()
+    # En el modo cluster, se informa al proceso principal de que este proceso ya está listo.
+    if cluster is not None:
+        cluster.publicar(bot)
+    # Inicia la tarea en bucle que mantiene actualizado el estado del bot.
+    # `on_ready` puede ejecutarse más de una vez (por ejemplo, tras una reconexión), por eso
+    # se comprueba con `is_running()` que la tarea no esté ya en marcha antes de iniciarla.
+    if not change_status.is_running():
+        change_status.start()
+    # Inicia el informe periódico de memoria; su primera ejecución es el informe de arranque.
+    if not informe_memoria.is_running():
+        informe_memoria.start()
+    # Inicia la actualización periódica del índice de estadísticas, si existe la carpeta de estadísticas.
+    if os.path.isdir(DIRECTORIO_ESTADISTICAS) and not actualizar_estadisticas.is_running():
+        actualizar_estadisticas.start()
+    # Inicia la compactación periódica del registro de sanciones.
+    if not compactar_sanciones.is_running():
+        compactar_sanciones.start()
+    # Inicia el programador de anuncios una sola vez, cuando ya se conocen los canales de los servidores.
+    if anuncios.tarea is None:
+        anuncios.iniciar(enviar_anuncio)
 
+# Eventos de entrada y salida de servidores
+# `on_guild_join` y `on_guild_remove` se activan cuando el bot entra o sale de un servidor de Discord.
+# Como el número de servidores aparece en el estado del bot, se pide una actualización del estado.
+@bot.event
+async def on_guild_join(guild):
+    presencia.solicitar()
 
-# Tarea en bucle para cambiar el estado del bot
-# `@tasks.loop` es un decorador que permite crear una tarea en bucle que se ejecuta repetidamente con un intervalo especificado.
-# En este caso, se establece un intervalo de 10 segundos, lo que significa que la función siguiente se ejecutará cada 10 segundos.
+@bot.event
+async def on_guild_remove(guild):
+    presencia.solicitar()
+
+
+# Límite de frecuencia con "cubeta de tokens"
+# Discord limita cuántas veces puede un bot cambiar su estado en un periodo de tiempo.
+# La cubeta empieza llena con `capacidad` tokens y se va rellenando poco a poco (`capacidad` tokens cada `periodo` segundos).
+# Cada cambio de estado gasta un token; si la cubeta está vacía, hay que esperar a que se rellene.
+class CubetaTokens:
+    def __init__(self, capacidad, periodo):
+        self.capacidad = capacidad
+        self.por_segundo = capacidad / periodo
+        self.tokens = capacidad
+        self._ultima_recarga = time.monotonic()
+
+    # Añade los tokens generados desde la última recarga, sin superar la capacidad de la cubeta.
+    def _recargar(self):
+        ahora = time.monotonic()
+        self.tokens = min(self.capacidad, self.tokens + (ahora - self._ultima_recarga) * self.por_segundo)
+        self._ultima_recarga = ahora
+
+    # Intenta gastar un token. Devuelve True si había uno disponible y False si hay que esperar.
+    def consumir(self):
+        self._recargar()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    # Devuelve un token gastado que al final no se usó, sin superar la capacidad de la cubeta.
+    def devolver(self):
+        self.tokens = min(self.capacidad, self.tokens + 1)
+
+    # Segundos que faltan para que haya un token disponible (0 si ya lo hay).
+    def espera(self):
+        self._recargar()
+        return max(0.0, (1 - self.tokens) / self.por_segundo)
+
+
+# Programador del estado del bot
+# Antes, el bot enviaba el mismo estado a Discord cada 10 segundos aunque no hubiera cambiado nada.
+# `ProgramadorPresencia` solo envía el estado cuando el texto cambia, agrupa los cambios seguidos,
+# respeta el límite de Discord con una cubeta de tokens y alterna entre varias plantillas de texto.
+# Los contadores `enviadas` y `suprimidas` permiten comprobar cuántas actualizaciones se han ahorrado.
+class ProgramadorPresencia:
+    def __init__(self, plantillas, rotacion, espera, cubeta):
+        self.plantillas = plantillas
+        self.rotacion = rotacion
+        self.espera = espera
+        self.cubeta = cubeta
+        # Actualizaciones enviadas a Discord y actualizaciones evitadas porque el texto no cambió.
+        self.enviadas = 0
+        self.suprimidas = 0
+        # Último texto enviado, para comparar con el nuevo antes de enviarlo.
+        self._ultimo_texto = None
+        # Tarea de actualización pendiente tras una solicitud (ver `solicitar`).
+        self._pendiente = None
+        # El candado (`Lock`) evita que dos actualizaciones se ejecuten a la vez y envíen el mismo estado dos veces.
+        self._candado = asyncio.Lock()
+
+    # Genera el texto del estado a partir de la plantilla que toca en este momento.
+    # La plantilla se elige según el tiempo transcurrido: cada `rotacion` segundos se pasa a la siguiente.
+    def renderizar(self):
+        plantilla = self.plantillas[int(time.monotonic() // self.rotacion) % len(self.plantillas)]
+        estado = estado_servidor.ultimo or {}
+        return plantilla.format(
+            # En el modo cluster se muestra el total de servidores de todos los procesos.
+            servidores=cluster.total_servidores() if cluster is not None else len(bot.guilds),
+            jugadores=estado.get('jugadores', 0),
+            ip=SERVIDOR_MINECRAFT,
+            prefijo=PREFIJO,
+        )
+
+    # Pide una actualización del estado dentro de `espera` segundos.
+    # Si ya hay una actualización pendiente, no se crea otra: todas las solicitudes se agrupan en una.
+    def solicitar(self):
+        if self._pendiente is None or self._pendiente.done():
+            self._pendiente = asyncio.ensure_future(self._actualizar_tras_espera())
+
+    async def _actualizar_tras_espera(self):
+        await asyncio.sleep(self.espera)
+        await self.actualizar()
+
+    # Calcula el texto del estado y lo envía a Discord solo si cambió desde el último envío.
+    async def actualizar(self):
+        async with self._candado:
+            # Si alguna plantilla muestra los jugadores conectados, se consulta el estado del servidor de Minecraft
+            # (normalmente sale de la caché de `estado_servidor`, sin conectarse al servidor).
+            if any('{jugadores}' in plantilla for plantilla in self.plantillas):
+                await estado_servidor.obtener()
+            texto = self.renderizar()
+            if texto == self._ultimo_texto:
+                self.suprimidas += 1
+                return
+            # Si no quedan tokens, se espera a que la cubeta se rellene y se vuelve a calcular el texto,
+            # ya que puede haber cambiado durante la espera.
+            while not self.cubeta.consumir():
+                await asyncio.sleep(self.cubeta.espera())
+                texto = self.renderizar()
+            # Si tras la espera el texto vuelve a ser el que ya se muestra (por ejemplo, un servidor entró y otro salió),
+            # no se envía nada y se devuelve el token, que queda para el siguiente cambio real.
+            if texto == self._ultimo_texto:
+                self.cubeta.devolver()
+                self.suprimidas += 1
+                return
+            # `bot.change_presence` cambia el estado visible del bot en Discord ("Jugando a ...").
+            await bot.change_presence(activity=discord.Game(name=texto))
+            self._ultimo_texto = texto
+            self.enviadas += 1
+
+# Se crea el programador del estado. La cubeta permite 5 cambios de estado por minuto.
+presencia = ProgramadorPresencia(PLANTILLAS_ESTADO, ROTACION_ESTADO, ESPERA_ESTADO, CubetaTokens(5, 60))
 
+
+# Tarea en bucle para revisar el estado del bot
+# `@tasks.loop` es un decorador que permite crear una tarea en bucle que se ejecuta repetidamente con un intervalo especificado.
+# Cada 10 segundos se revisa el estado, pero solo se envía a Discord si el texto cambió (ver `ProgramadorPresencia`).
+# La tarea se inicia en `on_ready`.
 @tasks.loop(seconds=10)
 async def change_status():
-    # La función `change_status` se define como asincrónica (usando `async def`), permitiendo que el bot realice esta
-    # tarea en paralelo con otras tareas, sin bloquear el procesamiento de otros eventos.
+    # En el modo cluster, se publica primero el número de servidores de este proceso para el total compartido.
+    if cluster is not None:
+        cluster.publicar(bot)
+    await presencia.actualizar()
 
-    # `await` indica que el bot debe esperar hasta que `change_presence` complete su ejecución antes de continuar.
-    # Esto permite que otras tareas se ejecuten mientras el bot espera, evitando bloqueos en el funcionamiento del bot.
 
-    # `bot.change_presence` es un método que cambia el estado visible del bot en Discord.
-    # Aquí, el bot muestra un mensaje en su estado de "jugando", indicando en cuántos servidores está y su prefijo de comando.
-    # `len(bot.guilds)` obtiene el número de servidores en los que el bot está presente.
-    await bot.change_presence(activity=discord.Game(name="En " + str(len(bot.guilds)) + " servidores. Prefijo +"))
+# Informe de memoria
+# `memoria_rss` devuelve la memoria residente (RSS) del proceso en bytes: la memoria que realmente ocupa en la RAM.
+# En Linux se lee de `/proc/self/statm`, cuyo segundo número es el RSS en páginas de memoria.
+# En otros sistemas ese archivo no existe y se devuelve None.
+def memoria_rss():
+    try:
+        with open('/proc/self/statm') as archivo:
+            return int(archivo.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return None
 
+# Muestra en la consola el RSS, los bloques de memoria reservados por Python (`sys.getallocatedblocks`)
+# y cuántos servidores, miembros y mensajes guarda el bot en caché.
+# Se ejecuta al arrancar y después cada `HORAS_INFORME_MEMORIA` horas (`current_loop` cuenta las ejecuciones).
+@tasks.loop(hours=HORAS_INFORME_MEMORIA)
+async def informe_memoria():
+    rss = memoria_rss()
+    bitacora.info(
+        f'Memoria (perfil {PERFIL_MEMORIA}, {informe_memoria.current_loop * HORAS_INFORME_MEMORIA} h): '
+        f"RSS {f'{rss / 1048576:.1f} MiB' if rss is not None else 'desconocido'}, "
+        f'{sys.getallocatedblocks()} bloques de Python, '
+        f'{len(bot.guilds)} servidores, '
+        f'{sum(len(servidor.members) for servidor in bot.guilds)} miembros y '
+        f'{len(bot.cached_messages)} mensajes en caché'
+    )
 
-# Comando de ayuda que muestra un mensaje incrustado (embed) con la lista de comandos del bot.
-# `@bot.command` es un decorador que convierte la función siguiente en un comando accesible para los usuarios.
-# Al usar `@bot.command(name='help')`, se define un comando `+help` que los usuarios pueden escribir para ver la lista de comandos.
+# Métricas del bot
+# Para saber cómo se comporta el bot se registran: cuántas veces se usa cada comando y cuánto tarda en responder,
+# los errores de cada comando, cuánto tardan las peticiones a la API de Discord, cuántas veces Discord
+# nos limita la frecuencia (respuestas 429), la latencia del gateway y el número de servidores.
+# Las métricas se publican en la ruta `/metrics` del servidor web, en el formato de texto de Prometheus.
 
-@bot.command(name='help')
-async def help(ctx):
-    # La función `help` es asincrónica, lo que permite al bot manejar esta tarea sin bloquear otras operaciones.
-    # La función recibe un parámetro `ctx`, que representa el contexto en el que se llamó al comando y permite acceder
-    # al canal donde se debe enviar la respuesta.
+# Límites (en segundos) de los intervalos de los histogramas de latencia.
+LIMITES_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
 
-    # Crea un mensaje "embed" o incrustado, que es un mensaje estilizado con título, descripción, campos y otros detalles.
-    embed = discord.Embed(
-        title='Comandos',  # Título del embed
-        description='Aquí están los comandos que puedes utilizar para mejorar tu experiencia en Discord y en el servidor de Minecraft.',
-        color=discord.Color.purple()  # Color del borde del embed, en este caso morado
-    )
-    # emebed.add_field (name = 'comando', value = 'descripción', inline = False)
-    # Usa `add_field` para añadir cada comando con su respectiva descripción en el embed.
-    # El parámetro `name` especifica el nombre del campo (comando), y `value` especifica la descripción.
-    # `inline=False` hace que cada campo se muestre en una línea separada.
-    embed.add_field(name='`+ip`', value='Muestra la IP del servidor de Minecraft.', inline=False)
-    embed.add_field(name='`+normas`', value='Clasificación de normas del servidor de Minecraft: graves, leves, juicio y staff.', inline=False)
-    embed.add_field(name='`+leves`', value='Muestra las normas leves.', inline=False)
-    embed.add_field(name='`+graves`', value='Muestra las normas graves.', inline=False)
-    embed.add_field(name='`+juicio`', value='Muestra las normas aplicables en el juicio.', inline=False)
-    embed.add_field(name='`+staff`', value='Muestra las normas del staff de Minecraft.', inline=False)
-    embed.add_field(name='`+clanes`', value='Muestra las reglas para los clanes.', inline=False)
-    embed.add_field(name='`+comandos`', value='Lista de comandos que puedes usar en el servidor.', inline=False)
-    embed.add_field(name='`+tienda`', value='Página de donaciones y rangos.', inline=False)
-    embed.add_field(name='Emergencia', value='Para reportar un bug o problema de OlympusBot, contacta a la creadora Paulidex.', inline=False)
-    
-    # `embed.set_footer` permite incluir una sección en la parte inferior del mensaje incrustado.
-    # Este pie de página puede contener texto que permanezca fijo y visible independientemente de los campos añadidos en el embed.
-    # En este caso, el pie de página proporciona información de contacto, indicando cómo comunicarse para contrataciones.
-    embed.set_footer(text='Para contrataciones, contactar a Paulidex#9510.')
-
-    # `ctx.send` es un método que envía un mensaje al canal en el que se llamó al comando.
-    # `ctx` es el contexto del comando que contiene información sobre cómo y dónde se utilizó, incluyendo el canal y el usuario que ejecutó el comando.
-    # `await` se utiliza para esperar a que se complete el envío del mensaje antes de continuar con otras operaciones.
-
-    # Aquí, `embed=embed` indica que se enviará el mensaje en formato embed, utilizando el mensaje incrustado
-    # que fue definido previamente con el título, descripción, comandos y pie de página.
-    await ctx.send(embed=embed)
-
-# Comando para verificar si el bot está funcionando
-# `@bot.command()` es un decorador que convierte la función siguiente en un comando de bot.
-# Aquí se define un comando sin nombre específico, lo que significa que su nombre será el mismo que el de la función: `a`.
-# Los usuarios pueden escribir `+a` para ejecutar este comando y comprobar si el bot está activo.
-
-@bot.command()
-async def a(ctx):
-    # La función `a` es asincrónica, permitiendo que el bot responda a este comando sin bloquear otras operaciones.
-    # El parámetro `ctx` (contexto) contiene información sobre el lugar donde se llamó al comando,
-    # incluyendo el canal en el que debe enviarse la respuesta.
-
-    # `ctx.send` es el método que envía un mensaje en el canal desde el que se llamó el comando.
-    # Aquí se envía el mensaje "El bot está funcionando correctamente" como confirmación de que el bot está activo.
-    # `await` se utiliza para esperar a que se complete el envío del mensaje antes de continuar con otras operaciones.
-    await ctx.send('El bot está funcionando correctamente')  # Envía el mensaje de confirmación como prueba.
-
-
-# Comando para enviar un enlace a la tienda de donaciones
-# `@bot.command()` es un decorador que convierte la función siguiente en un comando del bot.
-# Aquí se define un comando sin nombre específico, por lo que el nombre del comando será el mismo que el de la función: `tienda`.
-# Los usuarios pueden escribir `+tienda` para ejecutar este comando y recibir el enlace de la tienda de donaciones.
-
-@bot.command()
-async def tienda(ctx):
-    # La función `tienda` es asincrónica, lo que permite que el bot responda a este comando sin bloquear otras operaciones.
-    # El parámetro `ctx` (contexto) proporciona información sobre el lugar donde se llamó al comando,
-    # incluyendo el canal en el que debe enviarse la respuesta.
-
-    # `ctx.send` es el método que envía un mensaje en el canal desde el cual se llamó el comando.
-    # Aquí, el mensaje enviado incluye el enlace a la tienda de donaciones con un mensaje amigable.
-    # `await` se utiliza para esperar a que se complete el envío del mensaje antes de continuar con otras operaciones.
-    await ctx.send('Visita nuestra tienda para ver nuestros rangos y realizar donaciones ^.^ `https://olympusland.tebex.io`')
-
-
-# Comando para mostrar la IP del servidor de Minecraft
-# `@bot.command()` es un decorador que convierte la función siguiente en un comando del bot.
-# Como no se especifica un nombre, el comando usará el nombre de la función: `ip`.
-# Los usuarios pueden escribir `+ip` para ejecutar este comando y recibir la IP del servidor de Minecraft.
-
-# Comando que muestra la IP del servidor de Minecraft
-# `@bot.command()` convierte la función siguiente en un comando del bot accesible para los usuarios.
-# Al no especificar un nombre en el decorador, el comando se ejecutará escribiendo `+ip`, permitiendo que los usuarios vean la IP del servidor.
-
-@bot.command()
-async def ip(ctx):
-    # Define `ip` como una función asincrónica para que el bot pueda manejar este comando sin interferir con otras tareas.
-    # El parámetro `ctx` (contexto) proporciona información sobre dónde y cómo se ejecutó el comando,
-    # permitiendo que el bot envíe la respuesta en el mismo canal.
-
-    # `embed = discord.Embed(...)` crea un mensaje embebido o "embed" para presentar la información de manera estilizada.
-    # Un embed es un mensaje visualmente estructurado que permite incluir un título, descripción, color, y más,
-    # ofreciendo un formato organizado y atractivo para los usuarios.
-
-    # En este embed:
-    # - `title='Servidor Minecraft Java'` establece el título del embed, que se mostrará en la parte superior y en un tamaño de texto más grande.
-    # - `description='...'` define el contenido principal, que incluye la IP del servidor y las versiones compatibles.
-    # - `color=discord.Color.purple()` establece un color morado para el borde del embed, lo que lo hace visualmente destacado.
-    embed = discord.Embed(
-        title='Servidor Minecraft Java',  # Título del embed
-        description='Versión 1.16.5 - 1.17.1: play.olympusland.xyz',  # Descripción con la IP y versiones del servidor
-        color=discord.Color.purple()  # Color del borde del embed
-    )
+# Histograma de tiempos
+# En lugar de guardar cada medición, se cuenta cuántas caen en cada intervalo (`cubetas`), más la suma y el total.
+# Registrar una medición solo cuesta una búsqueda binaria (`bisect`) y tres sumas, sin bloqueos:
+# todo se ejecuta en el bucle de eventos del bot, así que no hace falta sincronizar nada.
+# `__slots__` evita que cada histograma necesite un diccionario interno, ahorrando memoria.
+class Histograma:
+    __slots__ = ('limites', 'cubetas', 'suma', 'cuenta')
 
-    # Añade un pie de página al embed para proporcionar contexto adicional.
-    # `set_footer` coloca un texto en la parte inferior del embed. En este caso, el pie de página sugiere al usuario
-    # que escriba `+help` para ver otros comandos del bot.
-    embed.set_footer(text='Para ver más comandos, escribe +help')
-
-    # Envía el mensaje embed en el canal donde el usuario ejecutó el comando.
-    # `ctx.send(embed=embed)` utiliza el contexto (`ctx`) para enviar el embed, mostrando la IP y versiones del servidor de forma organizada.
-    # `await` se utiliza para esperar a que se complete el envío del mensaje antes de continuar con otras operaciones.
-    await ctx.send(embed=embed)
-
-
-# Comando que muestra cómo acceder a las normas del servidor
-# `@bot.command()` es un decorador que convierte la función siguiente en un comando del bot.
-# Como no se especifica un nombre, el comando usará el nombre de la función: `normas`.
-# Los usuarios pueden escribir `+normas` para ejecutar este comando y recibir información sobre cómo ver las normas del servidor.
-
-@bot.command()
-async def normas(ctx):
-    # La función `normas` es asincrónica, lo cual permite que el bot responda a este comando sin bloquear otras operaciones.
-    # El parámetro `ctx` (contexto) proporciona información sobre dónde se llamó el comando,
-    # permitiendo que el bot envíe la respuesta en el mismo canal.
-
-    # `ctx.send` es el método que envía un mensaje en el canal donde se activó el comando.
-    # Aquí, el mensaje informa que las normas están clasificadas y sugiere comandos para ver cada tipo de norma.
-    # `await` se utiliza para esperar a que se complete el envío del mensaje antes de continuar con otras operaciones.
-    await ctx.send('Las normas están clasificadas en graves, leves, staff y juicio. Para verlas, escribe `+graves` `+leves` `+staff` `+juicio` `+clanes`')
-
-
-# Comando que muestra las normas leves del servidor
-# `@bot.command(name='leves')` convierte la función siguiente en un comando del bot accesible para los usuarios.
-# Con `name='leves'`, el comando se ejecuta escribiendo `+leves`, permitiendo que los usuarios vean las normas leves.
-
-@bot.command(name='leves')
-async def leves(ctx):
-    # Define `leves` como una función asincrónica para permitir que el bot maneje este comando sin interferir con otras tareas.
-    # El parámetro `ctx` (contexto) proporciona información sobre dónde y cómo se ejecutó el comando,
-    # permitiendo al bot enviar la respuesta en el mismo canal.
-
-    # `embed = discord.Embed(...)` crea un mensaje embebido o "embed" para presentar la información de manera estilizada.
-    # Un embed es un mensaje visualmente estructurado que permite incluir un título, descripción, color, y más,
-    # ofreciendo un formato organizado y atractivo para los usuarios.
-
-    # En este embed:
-    # - `title='Normas Leves'` establece el título del embed, que se mostrará en la parte superior y en un tamaño de texto más grande.
-    # - `description='...'` define el contenido principal, que enumera las normas leves del servidor.
-    # - `color=discord.Color.purple()` establece un color morado para el borde del embed, lo que lo hace visualmente destacado.
-    embed = discord.Embed(
-        title='Normas Leves',  # Título del embed
-        description='1) Los bugs están permitidos, pero antes debes consultar su uso con alguien del staff. \n'
-                    '2) No insultar a otros jugadores si no es de su agrado. \n'
-                    '3) Evita hacer flood (ejemplo: holaaaaaa), spam o texto innecesario que sature el chat. \n'
-                    '4) No se permite tener más de dos relojes de Redstone; generadores de lag y cargadores de chunks están prohibidos. \n'
-                    '5) Las mascotas son propiedad privada; está prohibido matarlas intencionalmente, aunque no estén en una zona protegida. \n'
-                    '6) Los lobos no pueden ser utilizados como armas para PVP. \n'
-                    '7) En caso de problemas aislados, el staff puede realizar reuniones para encontrar una solución justa. \n'
-                    '8) No salirse de un juicio.',  # Normas leves listadas en la descripción
-        color=discord.Color.purple()  # Borde morado
-    )
+    def __init__(self, limites=LIMITES_LATENCIA):
+        self.limites = limites
+        # Una cubeta por límite, más una última para los valores mayores que el límite más alto.
+        self.cubetas = [0] * (len(limites) + 1)
+        self.suma = 0.0
+        self.cuenta = 0
 
-    # Añade un pie de página al embed para proporcionar contexto adicional.
-    # `set_footer` coloca un texto en la parte inferior del embed. Aquí se sugiere al usuario que escriba `+help` para ver más comandos
-    # y se le informa que las normas son acumulativas.
-    embed.set_footer(text='Las normas se acumulan y los castigos pueden variar según la persona. Para más comandos, escribe +help')
-
-    # Envía el mensaje embed en el canal donde el usuario ejecutó el comando.
-    # `ctx.send(embed=embed)` utiliza el contexto (`ctx`) para enviar el embed, que presenta las normas de forma organizada.
-    # `await` se utiliza para esperar a que se complete el envío del mensaje antes de continuar con otras operaciones.
-    await ctx.send(embed=embed)
-
-# Comando que muestra las normas graves del servidor
-# `@bot.command(name='graves')` convierte la función siguiente en un comando del bot accesible para los usuarios.
-# Con `name='graves'`, el comando se ejecuta escribiendo `+graves`, permitiendo que los usuarios vean las normas graves.
-
-@bot.command(name='graves')
-async def graves(ctx):
-    # Define `graves` como una función asincrónica para permitir que el bot maneje este comando sin interferir con otras tareas.
-    # El parámetro `ctx` (contexto) proporciona información sobre dónde y cómo se ejecutó el comando,
-    # permitiendo que el bot envíe la respuesta en el mismo canal.
-
-    # `embed = discord.Embed(...)` crea un mensaje embebido o "embed" para presentar la información de manera estilizada.
-    # El embed contiene un título, una descripción con las normas graves y un color de borde.
-    embed = discord.Embed(
-        title='Normas Graves',  # Título del embed
-        description='1) El uso de multicuentas está prohibido. Si deseas cambiar de cuenta, notifica al staff para transferir tus ítems y propiedades. \n'
-                    '2) Hacks están prohibidos y serán sancionados con ip-ban. \n'
-                    '3) Destrucción de construcciones protegidas y robo de ítems en zonas de otros jugadores están prohibidos. \n'
-                    '4) Cualquier tipo de asesinato como tpakill y spawn kill está prohibido. \n'
-                    '5) Prohibido aprovechar bugs, como duplicación o glitches de movilidad. \n'
-                    '6) Prohibido el uso de hacks como xray o autoclick. \n'
-                    '7) No se permite distribuir enlaces externos sin aprobación del staff. \n'
-                    '8) Hablar con respeto al staff y evitar faltas de respeto. \n'
-                    '9) Intentos de evadir sentencias aumentarán la pena; ayudar a otro jugador a evadir es sancionable. \n'
-                    '10) Mentirle al staff está prohibido. \n'
-                    '11) Prohibido hacerse pasar por el staff. \n'
-                    '12) No usar otros casos para justificar acciones. \n'
-                    '13) Mensajes y construcciones ofensivas están prohibidas. \n'
-                    '14) Prohibido escapar de la cárcel. \n'
-                    '15) No ayudar a un preso a salir de la cárcel. \n'
-                    '16) No explorar, minar o talar en el mundo normal; utiliza /warp recursos.',  # Normas graves listadas en la descripción
-        color=discord.Color.purple()  # Color morado para el borde del embed
-    )
+    # Registra una medición: `bisect_left` devuelve el índice del primer límite mayor o igual que el valor.
+    def observar(self, valor):
+        self.cubetas[bisect.bisect_left(self.limites, valor)] += 1
+        self.suma += valor
+        self.cuenta += 1
 
-    # Añade un pie de página al embed para proporcionar contexto adicional.
-    # `set_footer` coloca un texto en la parte inferior del embed. Aquí se sugiere al usuario escribir `+help` para ver más comandos
-    # y se le informa que las normas son acumulativas.
-    embed.set_footer(text='Las normas se acumulan y los castigos pueden variar según la persona. Para más comandos, escribe +help')
-
-    # Envía el mensaje embed en el canal donde el usuario ejecutó el comando.
-    # `ctx.send(embed=embed)` utiliza el contexto (`ctx`) para enviar el embed, que presenta las normas de forma organizada.
-    # `await` se utiliza para esperar a que se complete el envío del mensaje antes de continuar con otras operaciones.
-    await ctx.send(embed=embed)
-
-# Comando que muestra las normas de juicio
-# `@bot.command(name='juicio')` convierte la función siguiente en un comando del bot accesible para los usuarios.
-# Con `name='juicio'`, el comando se ejecuta escribiendo `+juicio`, permitiendo que los usuarios vean las normas aplicables en el juicio.
-
-@bot.command(name='juicio')
-async def juicio(ctx):
-    # Define `juicio` como una función asincrónica para permitir que el bot maneje este comando sin interferir con otras tareas.
-    # El parámetro `ctx` (contexto) proporciona información sobre dónde y cómo se ejecutó el comando,
-    # permitiendo que el bot envíe la respuesta en el mismo canal.
-
-    # `embed = discord.Embed(...)` crea un mensaje embebido o "embed" para presentar la información de manera estilizada.
-    # El embed contiene un título, una descripción con las normas de juicio y un color de borde.
-    embed = discord.Embed(
-        title='Normas del Juicio',  # Título del embed
-        description='1) No interrumpir el juicio. \n'
-                    '2) Presentar pruebas. \n'
-                    '3) No hacer perder el tiempo al staff que actúe como juez. \n'
-                    '4) Leer las normas antes de solicitar un juicio. \n'
-                    '5) Solo se permite la presencia de testigos y partes involucradas en el juicio. \n'
-                    '6) Solo Owners, Admins y Mods pueden actuar como jueces. \n'
-                    '7) Ambas partes (acusados y acusadores) deben estar presentes.',  # Normas del juicio listadas en la descripción
-        color=discord.Color.purple()  # Color morado para el borde del embed
-    )
+    # Genera las líneas del histograma en formato Prometheus.
+    # Prometheus espera cubetas acumuladas: cada `le` ("menor o igual") cuenta también las mediciones de las cubetas anteriores.
+    def exponer(self, nombre, etiquetas=''):
+        prefijo = etiquetas + ',' if etiquetas else ''
+        sufijo = '{' + etiquetas + '}' if etiquetas else ''
+        lineas = []
+        acumulado = 0
+        for limite, cantidad in zip(self.limites, self.cubetas):
+            acumulado += cantidad
+            lineas.append(f'{nombre}_bucket{{{prefijo}le="{limite}"}} {acumulado}')
+        lineas.append(f'{nombre}_bucket{{{prefijo}le="+Inf"}} {self.cuenta}')
+        lineas.append(f'{nombre}_sum{sufijo} {self.suma}')
+        lineas.append(f'{nombre}_count{sufijo} {self.cuenta}')
+        return lineas
 
-    # Añade un pie de página al embed para proporcionar contexto adicional.
-    # `set_footer` coloca un texto en la parte inferior del embed. Aquí se sugiere al usuario escribir `+help` para ver más comandos
-    # y se le informa que las normas son acumulativas.
-    embed.set_footer(text='Las normas se acumulan y los castigos pueden variar según la persona. Para más comandos, escribe +help')
-
-    # Envía el mensaje embed en el canal donde el usuario ejecutó el comando.
-    # `ctx.send(embed=embed)` utiliza el contexto (`ctx`) para enviar el embed, que presenta las normas de forma organizada.
-    # `await` se utiliza para esperar a que se complete el envío del mensaje antes de continuar con otras operaciones.
-    await ctx.send(embed=embed)
-
-
-# Comando que muestra las normas de los clanes
-# `@bot.command(name='clanes')` convierte la función siguiente en un comando del bot accesible para los usuarios.
-# Con `name='clanes'`, el comando se ejecuta escribiendo `+clanes`, permitiendo que los usuarios vean las normas aplicables a los clanes.
-
-@bot.command(name='clanes')
-async def clanes(ctx):
-    # Define `clanes` como una función asincrónica para permitir que el bot maneje este comando sin interferir con otras tareas.
-    # El parámetro `ctx` (contexto) proporciona información sobre dónde y cómo se ejecutó el comando,
-    # permitiendo que el bot envíe la respuesta en el mismo canal.
-
-    # `embed = discord.Embed(...)` crea un mensaje embebido o "embed" para presentar la información de manera estilizada.
-    # El embed contiene un título, una descripción con las normas de clanes y un color de borde.
-    embed = discord.Embed(
-        title='Normas de los Clanes',  # Título del embed
-        description='1) Todo tipo de PVP es válido si ambos jugadores pertenecen a un clan. \n'
-                    '2) Se permite el grifeo, pero solo a bases de clanes.',  # Normas de clanes en la descripción
-        color=discord.Color.purple()  # Color morado para el borde del embed
-    )
+# Registro de todas las métricas del bot.
+class Metricas:
+    def __init__(self, bot):
+        self.bot = bot
+        # Histograma de duración por nombre de comando (su `cuenta` es también el número de usos del comando).
+        self.comandos = {}
+        # Errores por (comando, tipo de error).
+        self.errores = {}
+        # Duración de las peticiones a la API REST de Discord, incluidas las esperas por límite de frecuencia.
+        self.latencia_rest = Histograma()
+        # Número de respuestas 429 recibidas de Discord.
+        self.limites_rest = 0
+        # Tráfico recibido del gateway (solo se mide si `MEDIR_GATEWAY` es True).
+        self.eventos_gateway = {}
+        self.bytes_gateway = 0
+
+    # Registra la duración de una ejecución de un comando, creando su histograma la primera vez.
+    def observar_comando(self, nombre, segundos):
+        histograma = self.comandos.get(nombre)
+        if histograma is None:
+            histograma = self.comandos[nombre] = Histograma()
+        histograma.observar(segundos)
+
+    # Suma un error del tipo indicado al comando.
+    def contar_error(self, nombre, error):
+        clave = (nombre, error)
+        self.errores[clave] = self.errores.get(clave, 0) + 1
+
+    # Genera el texto completo que se publica en `/metrics`.
+    # Cada métrica va precedida de `# HELP` (descripción) y `# TYPE` (tipo: counter, gauge o histogram).
+    # En el modo Flask esta función se llama desde otro hilo; por eso se copian los diccionarios con `list(...)`
+    # antes de recorrerlos, para no fallar si el bot añade un comando nuevo mientras tanto.
+    def exponer(self):
+        lineas = [
+            '# HELP bot_comandos_total Comandos ejecutados.',
+            '# TYPE bot_comandos_total counter',
+        ]
+        comandos = list(self.comandos.items())
+        for nombre, histograma in comandos:
+            lineas.append(f'bot_comandos_total{{comando="{nombre}"}} {histograma.cuenta}')
+        lineas += [
+            '# HELP bot_comando_duracion_segundos Tiempo desde que llega el mensaje hasta que se envía la respuesta.',
+            '# TYPE bot_comando_duracion_segundos histogram',
+        ]
+        for nombre, histograma in comandos:
+            lineas += histograma.exponer('bot_comando_duracion_segundos', f'comando="{nombre}"')
+        lineas += [
+            '# HELP bot_comando_errores_total Errores al ejecutar comandos.',
+            '# TYPE bot_comando_errores_total counter',
+        ]
+        for (nombre, error), cantidad in list(self.errores.items()):
+            lineas.append(f'bot_comando_errores_total{{comando="{nombre}",error="{error}"}} {cantidad}')
+        lineas += [
+            '# HELP bot_rest_duracion_segundos Duración de las peticiones a la API REST de Discord.',
+            '# TYPE bot_rest_duracion_segundos histogram',
+        ]
+        lineas += self.latencia_rest.exponer('bot_rest_duracion_segundos')
+        lineas += [
+            '# HELP bot_rest_limites_total Respuestas 429 (límite de frecuencia) recibidas de Discord.',
+            '# TYPE bot_rest_limites_total counter',
+            f'bot_rest_limites_total {self.limites_rest}',
+            '# HELP bot_gateway_latencia_segundos Latencia del websocket del gateway.',
+            '# TYPE bot_gateway_latencia_segundos gauge',
+            f'bot_gateway_latencia_segundos {self.bot.latency}',
+            '# HELP bot_servidores Servidores de Discord en los que está el bot.',
+            '# TYPE bot_servidores gauge',
+            f'bot_servidores {len(self.bot.guilds)}',
+            '# HELP bot_memoria_rss_bytes Memoria residente (RSS) del proceso.',
+            '# TYPE bot_memoria_rss_bytes gauge',
+            f'bot_memoria_rss_bytes {memoria_rss() or 0}',
+            '# HELP bot_presencia_enviadas_total Actualizaciones de estado enviadas a Discord.',
+            '# TYPE bot_presencia_enviadas_total counter',
+            f'bot_presencia_enviadas_total {presencia.enviadas}',
+            '# HELP bot_presencia_suprimidas_total Actualizaciones de estado evitadas porque el texto no cambió.',
+            '# TYPE bot_presencia_suprimidas_total counter',
+            f'bot_presencia_suprimidas_total {presencia.suprimidas}',
+            '# HELP bot_envios_ahorrados_total Respuestas no enviadas por agrupar comandos repetidos en el mismo canal.',
+            '# TYPE bot_envios_ahorrados_total counter',
+            f'bot_envios_ahorrados_total {agrupador.ahorrados}',
+            '# HELP bot_configuracion_cache_aciertos_total Configuraciones de servidor resueltas desde la caché en memoria.',
+            '# TYPE bot_configuracion_cache_aciertos_total counter',
+            f'bot_configuracion_cache_aciertos_total {configuraciones.aciertos}',
+            '# HELP bot_configuracion_cache_fallos_total Configuraciones de servidor que hubo que leer de la base de datos.',
+            '# TYPE bot_configuracion_cache_fallos_total counter',
+            f'bot_configuracion_cache_fallos_total {configuraciones.fallos}',
+            '# HELP bot_rcon_comandos_total Comandos enviados al servidor de Minecraft por RCON.',
+            '# TYPE bot_rcon_comandos_total counter',
+            f'bot_rcon_comandos_total {rcon.comandos}',
+            '# HELP bot_rcon_errores_total Comandos RCON que fallaron (sin conexión, tiempo agotado o conexión perdida).',
+            '# TYPE bot_rcon_errores_total counter',
+            f'bot_rcon_errores_total {rcon.errores}',
+            '# HELP bot_rcon_reconexiones_total Conexiones RCON abiertas de nuevo tras perderse.',
+            '# TYPE bot_rcon_reconexiones_total counter',
+            f'bot_rcon_reconexiones_total {rcon.reconexiones}',
+            '# HELP bot_puente_lineas_total Líneas del chat de Minecraft enviadas a Discord.',
+            '# TYPE bot_puente_lineas_total counter',
+            f'bot_puente_lineas_total {puente_chat.lineas}',
+            '# HELP bot_puente_mensajes_total Mensajes de webhook enviados por el puente de chat.',
+            '# TYPE bot_puente_mensajes_total counter',
+            f'bot_puente_mensajes_total {puente_chat.mensajes}',
+            '# HELP bot_puente_descartadas_total Líneas del chat de Minecraft que no se pudieron enviar.',
+            '# TYPE bot_puente_descartadas_total counter',
+            f'bot_puente_descartadas_total {puente_chat.descartadas}',
+            '# HELP bot_puente_cola Líneas del chat de Minecraft esperando a enviarse.',
+            '# TYPE bot_puente_cola gauge',
+            f'bot_puente_cola {puente_chat.cola.qsize()}',
+            '# HELP bot_estadisticas_jugadores Jugadores en el índice de estadísticas.',
+            '# TYPE bot_estadisticas_jugadores gauge',
+            f'bot_estadisticas_jugadores {len(indice_estadisticas.modificados)}',
+            '# HELP bot_estadisticas_lecturas_total Archivos de estadísticas leídos desde el arranque.',
+            '# TYPE bot_estadisticas_lecturas_total counter',
+            f'bot_estadisticas_lecturas_total {indice_estadisticas.lecturas}',
+            '# HELP bot_estadisticas_actualizacion_segundos Duración de la última actualización del índice de estadísticas.',
+            '# TYPE bot_estadisticas_actualizacion_segundos gauge',
+            f'bot_estadisticas_actualizacion_segundos {indice_estadisticas.duracion:.6f}',
+            '# HELP bot_sanciones Sanciones vigentes en el registro.',
+            '# TYPE bot_sanciones gauge',
+            f'bot_sanciones {len(sanciones.sanciones)}',
+            '# HELP bot_sanciones_lineas_muertas Líneas del registro de sanciones que se quitarán al compactarlo.',
+            '# TYPE bot_sanciones_lineas_muertas gauge',
+            f'bot_sanciones_lineas_muertas {sanciones.lineas_muertas}',
+            '# HELP bot_sanciones_compactaciones_total Compactaciones del registro de sanciones.',
+            '# TYPE bot_sanciones_compactaciones_total counter',
+            f'bot_sanciones_compactaciones_total {sanciones.compactaciones}',
+            '# HELP bot_anuncios Anuncios programados.',
+            '# TYPE bot_anuncios gauge',
+            f'bot_anuncios {len(anuncios.anuncios)}',
+            '# HELP bot_anuncios_enviados_total Anuncios enviados.',
+            '# TYPE bot_anuncios_enviados_total counter',
+            f'bot_anuncios_enviados_total {anuncios.enviados}',
+            '# HELP bot_anuncios_saltados_total Anuncios no enviados por haberse perdido su hora (política saltar).',
+            '# TYPE bot_anuncios_saltados_total counter',
+            f'bot_anuncios_saltados_total {anuncios.saltados}',
+            '# HELP bot_anuncios_errores_total Anuncios que fallaron al enviarse.',
+            '# TYPE bot_anuncios_errores_total counter',
+            f'bot_anuncios_errores_total {anuncios.errores}',
+            '# HELP bot_red_consultas_total Consultas a los servidores de la red.',
+            '# TYPE bot_red_consultas_total counter',
+            f'bot_red_consultas_total {red.consultas}',
+            '# HELP bot_red_fallos_total Consultas a los servidores de la red sin respuesta.',
+            '# TYPE bot_red_fallos_total counter',
+            f'bot_red_fallos_total {red.fallos}',
+            '# HELP bot_red_ronda_segundos Duración de la última ronda de consultas a la red.',
+            '# TYPE bot_red_ronda_segundos gauge',
+            f'bot_red_ronda_segundos {red.duracion_ronda}',
+            '# HELP bot_red_en_linea Si cada servidor de la red respondió en la última consulta.',
+            '# TYPE bot_red_en_linea gauge',
+        ]
+        # Un valor por servidor de la red: 1 si respondió en la última consulta y 0 si no.
+        for nombre, estado in red.ultimos.items():
+            lineas.append(f'bot_red_en_linea{{servidor="{nombre}"}} {int(estado["en_linea"])}')
+        # Consultas al catálogo de la tienda, sumadas de todas las tiendas con token.
+        lineas += [
+            '# HELP bot_tienda_consultas_total Consultas a la API de Tebex para el catálogo de la tienda.',
+            '# TYPE bot_tienda_consultas_total counter',
+            f'bot_tienda_consultas_total {sum(catalogo.consultas for catalogo in catalogos_tienda.values())}',
+            '# HELP bot_tienda_no_modificado_total Consultas a Tebex respondidas con 304 Not Modified.',
+            '# TYPE bot_tienda_no_modificado_total counter',
+            f'bot_tienda_no_modificado_total {sum(catalogo.no_modificados for catalogo in catalogos_tienda.values())}',
+            '# HELP bot_tienda_errores_total Consultas a Tebex fallidas o sin respuesta a tiempo.',
+            '# TYPE bot_tienda_errores_total counter',
+            f'bot_tienda_errores_total {sum(catalogo.errores for catalogo in catalogos_tienda.values())}',
+            '# HELP bot_tienda_cortes_total Veces que se dejó de consultar a Tebex tras varios fallos seguidos.',
+            '# TYPE bot_tienda_cortes_total counter',
+            f'bot_tienda_cortes_total {sum(catalogo.cortes for catalogo in catalogos_tienda.values())}',
+        ]
+        # Recargas con `+recargar` y duración de la última.
+        lineas += [
+            '# HELP bot_recargas_total Recargas de extensiones y normas con +recargar.',
+            '# TYPE bot_recargas_total counter',
+            f'bot_recargas_total{{resultado="correcta"}} {extensiones.recargas}',
+            f'bot_recargas_total{{resultado="con_errores"}} {extensiones.fallidas}',
+        ]
+        if extensiones.duracion is not None:
+            lineas += [
+                '# HELP bot_recarga_segundos Duración de la última recarga con +recargar.',
+                '# TYPE bot_recarga_segundos gauge',
+                f'bot_recarga_segundos {extensiones.duracion}',
+            ]
+        # Momento (desde el inicio del programa) en que terminó cada etapa del arranque.
+        lineas += [
+            '# HELP bot_arranque_segundos Segundos desde el inicio del programa hasta cada etapa del arranque.',
+            '# TYPE bot_arranque_segundos gauge',
+        ]
+        inicio = marcas_arranque['inicio']
+        for etapa, momento in list(marcas_arranque.items())[1:]:
+            lineas.append(f'bot_arranque_segundos{{etapa="{etapa}"}} {momento - inicio}')
+        # Tiempo de la última conexión al gateway hasta estar listo, según cómo se conectó: identificándose
+        # (`identificacion`) o reanudando la sesión tras un corte (`reanudacion`). Ver `SesionGateway`.
+        if sesion_gateway.tiempos:
+            lineas += [
+                '# HELP bot_tiempo_hasta_listo_segundos Tiempo de la última conexión al gateway hasta que el bot está listo.',
+                '# TYPE bot_tiempo_hasta_listo_segundos gauge',
+            ]
+            for modo, segundos in sesion_gateway.tiempos.items():
+                lineas.append(f'bot_tiempo_hasta_listo_segundos{{modo="{modo}"}} {segundos}')
+        if MEDIR_GATEWAY:
+            lineas += [
+                '# HELP bot_gateway_recibidos_bytes_total Bytes recibidos del gateway (ya descomprimidos).',
+                '# TYPE bot_gateway_recibidos_bytes_total counter',
+                f'bot_gateway_recibidos_bytes_total {self.bytes_gateway}',
+                '# HELP bot_gateway_eventos_total Eventos recibidos del gateway.',
+                '# TYPE bot_gateway_eventos_total counter',
+            ]
+            for tipo, cantidad in list(self.eventos_gateway.items()):
+                lineas.append(f'bot_gateway_eventos_total{{evento="{tipo}"}} {cantidad}')
+        return '\n'.join(lineas) + '\n'
+
+# Registro sin bloquear el bucle de eventos
+# Escribir en un archivo o en la consola bloquea mientras el sistema operativo lo hace, y el bot se queda parado.
+# Con `iniciar_registro`, cada llamada a `logging` (del bot, de discord.py o de cualquier librería) solo mete el evento
+# en una cola (`QueueHandler`), y un hilo aparte (`QueueListener`) lo saca y lo escribe en el archivo en JSON y en la
+# consola en texto. El archivo rota con `RotatingFileHandler`.
+bitacora = logging.getLogger('olympusbot')
+
+# Convierte cada evento en una línea JSON con la fecha, el nivel, su origen, el mensaje y, si la tiene, la traza.
+class FormatoJSON(logging.Formatter):
+    def format(self, evento):
+        datos = {
+            'fecha': datetime.datetime.fromtimestamp(evento.created, datetime.timezone.utc).isoformat(timespec='milliseconds'),
+            'nivel': evento.levelname,
+            'origen': evento.name,
+            'mensaje': evento.getMessage(),
+        }
+        traza = getattr(evento, 'traza', None)
+        if traza is not None:
+            datos['traza'] = traza
+        return json.dumps(datos, ensure_ascii=False)
+
+# Las trazas solo van al archivo; en la consola serían demasiadas líneas.
+def _sin_trazas(evento):
+    return not hasattr(evento, 'traza')
+
+# Prepara el registro del proceso y devuelve el hilo que escribe, para pararlo (`stop`) al terminar y que se
+# escriban los eventos que queden en la cola. Se llama al arrancar, no al importar el archivo, para que los
+# benchmarks que lo importan no escriban ningún registro.
+def iniciar_registro(archivo):
+    cola = queue.SimpleQueue()
+    salida = logging.handlers.RotatingFileHandler(archivo, maxBytes=TAMANO_REGISTRO, backupCount=COPIAS_REGISTRO, encoding='utf-8', delay=True)
+    salida.setFormatter(FormatoJSON())
+    consola = logging.StreamHandler()
+    consola.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+    consola.addFilter(_sin_trazas)
+    raiz = logging.getLogger()
+    raiz.setLevel(logging.INFO)
+    raiz.addHandler(logging.handlers.QueueHandler(cola))
+    oyente = logging.handlers.QueueListener(cola, salida, consola, respect_handler_level=True)
+    oyente.start()
+    return oyente
+
+# Trazas de comandos
+# De una parte de los comandos (`MUESTREO_TRAZAS`) se anota cuánto tarda cada etapa, en tramos:
+# - `recepcion`: desde que Discord creó el mensaje hasta que llega al bot (según los relojes de Discord y del equipo).
+# - `analisis`: resolver el prefijo y buscar el comando (`get_context`).
+# - `comprobaciones`: permisos, límites de uso y conversión de los argumentos, hasta justo antes del comando.
+# - `comando`: la ejecución del comando, que incluye los tramos `rest` (cada petición a la API de Discord) y
+#   `espera_limite` (tiempo esperando a que el límite de frecuencia permita enviar), y el evento `limite_429`.
+# El identificador de la traza es el del mensaje (o el de la interacción), así que se puede buscar en el registro.
+# La traza en curso se guarda en una `ContextVar`: cada mensaje se procesa en su propia tarea y ve solo la suya.
+# Sin traza, el coste es elegir al azar si se muestrea y leer la variable en cada petición REST.
+class Traza:
+    __slots__ = ('id', 'inicio', 'marca', 'tramos')
+
+    def __init__(self, identificador, inicio):
+        self.id = identificador
+        self.inicio = inicio
+        self.marca = inicio
+        self.tramos = []
+
+    def tramo(self, nombre, inicio, fin=None, **datos):
+        if fin is None:
+            fin = time.perf_counter()
+        self.tramos.append({'tramo': nombre, 'inicio_ms': round((inicio - self.inicio) * 1000, 3), 'duracion_ms': round((fin - inicio) * 1000, 3), **datos})
+
+    # Envía la traza al registro (a la cola; el hilo del registro la escribe después).
+    def emitir(self, comando):
+        bitacora.info('traza', extra={'traza': {
+            'id': str(self.id),
+            'comando': comando,
+            'total_ms': round((time.perf_counter() - self.inicio) * 1000, 3),
+            'tramos': self.tramos,
+        }})
+
+traza_actual = contextvars.ContextVar('traza_actual', default=None)
+
+# Decide si se guarda la traza de un comando.
+def muestrear():
+    return MUESTREO_TRAZAS > 0 and random.random() < MUESTREO_TRAZAS
+
+# Se crean las métricas del bot.
+metricas = Metricas(bot)
+
+# Límites de frecuencia de la API REST
+# discord.py gestiona por su cuenta los límites de frecuencia: antes de cada petición espera a que el límite de su
+# ruta permita enviarla, y si Discord responde con un 429 espera y reintenta. Para medirlo no se toca nada interno de
+# discord.py: el bot se creó con `http_trace=traza_http`, una `aiohttp.TraceConfig` que aiohttp avisa al enviar
+# cada petición (`on_request_start`) y al recibir su respuesta (`on_request_end`). Los avisos llegan desde la tarea
+# que hizo la petición, así que en ellos se ve la traza del comando.
+# `espera_rest` guarda, mientras dura una petición de un comando con traza, el momento desde el que se está
+# esperando: el inicio de la petición y, tras un 429, el momento en que llegó. Al enviarse la petición, ese tiempo
+# es lo que discord.py esperó por el límite.
+espera_rest = contextvars.ContextVar('espera_rest', default=None)
+
+async def _peticion_http_enviada(sesion, contexto, datos):
+    espera = espera_rest.get()
+    # Una lista vacía (o `None`) significa que no hay nada que anotar: petición sin traza o espera ya anotada.
+    if espera:
+        inicio = espera.pop()
+        # Solo se anotan las esperas de más de 1 ms; por debajo es el tiempo normal de preparar la petición.
+        if time.perf_counter() - inicio > 0.001:
+            traza_actual.get().tramo('espera_limite', inicio)
+
+async def _peticion_http_respondida(sesion, contexto, datos):
+    if datos.response.status != 429:
+        return
+    # Se cuentan todas las respuestas 429, también las del límite global.
+    metricas.limites_rest += 1
+    espera = espera_rest.get()
+    if espera is not None:
+        ahora = time.perf_counter()
+        cabeceras = datos.response.headers
+        # `Retry-After` son los segundos que hay que esperar antes de reintentar, y `X-RateLimit-Scope` dice qué
+        # límite se superó (`user`, `global` o `shared`).
+        reintento = cabeceras.get('Retry-After')
+        traza_actual.get().tramo(
+            'limite_429', ahora, ahora,
+            reintento_s=float(reintento) if reintento else None, alcance=cabeceras.get('X-RateLimit-Scope'),
+        )
+        # discord.py esperará y reintentará; esa espera se anota al enviarse el reintento.
+        espera.append(ahora)
+
+traza_http.on_request_start.append(_peticion_http_enviada)
+traza_http.on_request_end.append(_peticion_http_respondida)
+
+# Medición de las peticiones a la API REST de Discord
+# Todas las peticiones de discord.py pasan por `bot.http.request`. Se guarda la función original
+# y se reemplaza por una que mide cuánto tarda cada petición antes de devolver su resultado.
+_peticion_rest = bot.http.request
+
+async def _peticion_rest_medida(*args, **kwargs):
+    inicio = time.perf_counter()
+    traza = traza_actual.get()
+    # Con traza, la petición empieza esperando desde su inicio. `set` devuelve una marca para dejar
+    # `espera_rest` como estaba al terminar.
+    marca = None if traza is None else espera_rest.set([inicio])
+    try:
+        return await _peticion_rest(*args, **kwargs)
+    finally:
+        # `finally` registra la duración incluso si la petición falla.
+        fin = time.perf_counter()
+        metricas.latencia_rest.observar(fin - inicio)
+        if traza is not None:
+            espera_rest.reset(marca)
+            ruta = args[0]
+            traza.tramo('rest', inicio, fin, ruta=f'{ruta.method} {ruta.path}')
+
+bot.http.request = _peticion_rest_medida
+
+# Medición del tráfico del gateway
+# Con `enable_debug_events`, discord.py emite `on_socket_raw_receive` con cada mensaje recibido del gateway
+# (ya descomprimido) y `on_socket_event_type` con el tipo de cada evento (por ejemplo `MESSAGE_CREATE`).
+if MEDIR_GATEWAY:
+    @bot.event
+    async def on_socket_raw_receive(mensaje):
+        metricas.bytes_gateway += len(mensaje)
+
+    @bot.event
+    async def on_socket_event_type(tipo):
+        metricas.eventos_gateway[tipo] = metricas.eventos_gateway.get(tipo, 0) + 1
+
+# Tiempo hasta estar listo
+# Cuando se corta la conexión con el gateway (un corte de red, o Discord que pide reconectar), discord.py vuelve a
+# conectarse solo y, si puede, "reanuda" la sesión (RESUME): Discord solo reenvía los eventos que se perdieron durante
+# el corte, y el bot conserva su caché de servidores, canales y roles. Si la sesión ya no es válida, se identifica de
+# nuevo (IDENTIFY) y Discord vuelve a enviarle los datos de todos sus servidores, que es mucho más lento en bots grandes.
+# `SesionGateway` mide, en cada conexión, cuánto tarda el bot en volver a estar listo y cómo lo hizo:
+# - `identificacion`: desde que empieza a conectarse (al arrancar, o tras un corte) hasta `on_ready`;
+# - `reanudacion`: desde el corte hasta `on_resumed`.
+# `tiempos` guarda la última medida de cada modo; se publica en `/metrics` (`bot_tiempo_hasta_listo_segundos`).
+# La reanudación solo es posible dentro del mismo proceso: al reiniciar el bot, la caché se pierde y siempre se identifica.
+class SesionGateway:
+    def __init__(self):
+        # Momento en que empezó la conexión en curso, o None si el bot está conectado y listo.
+        self.inicio = None
+        self.tiempos = {}
+
+    # Empieza a contar. Si ya se estaba contando (por ejemplo, varios cortes seguidos antes de volver a estar listo),
+    # se conserva el primer momento, así la medida incluye todos los intentos.
+    def conectando(self):
+        if self.inicio is None:
+            self.inicio = time.perf_counter()
+
+    # Termina de contar y muestra el resultado en la consola. Si no se estaba contando (un `on_ready` sin corte
+    # previo), no hace nada.
+    def listo(self, modo):
+        if self.inicio is None:
+            return
+        self.tiempos[modo] = time.perf_counter() - self.inicio
+        self.inicio = None
+        bitacora.info(f'Listo en {self.tiempos[modo]:.2f} s ({modo})')
+
+sesion_gateway = SesionGateway()
+
+# `on_disconnect` se ejecuta cada vez que se corta la conexión con el gateway, antes de que discord.py vuelva a conectarse.
+@bot.event
+async def on_disconnect():
+    sesion_gateway.conectando()
+
+# `on_resumed` se ejecuta cuando Discord acepta la reanudación de la sesión: el bot vuelve a estar listo con toda su
+# caché, sin que se ejecute `on_ready`.
+@bot.event
+async def on_resumed():
+    sesion_gateway.listo('reanudacion')
+
+# `on_connect` se ejecuta al recibir `READY`, es decir, cada vez que el bot se identifica.
+# La primera vez marca el fin de la etapa de conexión al gateway del perfil de arranque.
+@bot.event
+async def on_connect():
+    marcas_arranque.setdefault('gateway', time.perf_counter())
+
+# Procesamiento de mensajes
+# Por defecto, discord.py procesa cada mensaje con `bot.process_commands`. Aquí se hace lo mismo paso a paso
+# para guardar en el contexto (`ctx.inicio`) el momento exacto en que llegó el mensaje,
+# y así medir el tiempo total: desde que se interpreta el comando hasta que termina de enviarse la respuesta.
+@bot.event
+async def on_message(message):
+    inicio = time.perf_counter()
+    # Los mensajes de otros bots se ignoran, igual que hace `process_commands`.
+    if message.author.bot:
+        return
+    traza = None
+    if muestrear():
+        traza = Traza(message.id, inicio)
+        # `created_at` es el momento en que Discord creó el mensaje, según su reloj.
+        traza.tramo('recepcion', inicio - (discord.utils.utcnow() - message.created_at).total_seconds(), inicio)
+        traza_actual.set(traza)
+    ctx = await bot.get_context(message)
+    ctx.inicio = inicio
+    if traza is None:
+        await bot.invoke(ctx)
+        return
+    traza.tramo('analisis', inicio)
+    traza.marca = time.perf_counter()
+    try:
+        await bot.invoke(ctx)
+    finally:
+        # Los mensajes que no son comandos no dejan traza.
+        if ctx.command is not None:
+            traza.emitir(ctx.command.qualified_name)
 
-    # Añade un pie de página al embed para proporcionar contexto adicional.
-    # `set_footer` coloca un texto en la parte inferior del embed. Aquí se sugiere al usuario escribir `+help` para ver más comandos
-    # y se le informa que las normas son acumulativas.
-    embed.set_footer(text='Las normas se acumulan y los castigos pueden variar según la persona. Para más comandos, escribe +help')
-
-    # Envía el mensaje embed en el canal donde el usuario ejecutó el comando.
-    # `ctx.send(embed=embed)` utiliza el contexto (`ctx`) para enviar el embed, que presenta las normas de forma organizada.
-    # `await` se utiliza para esperar a que se complete el envío del mensaje antes de continuar con otras operaciones.
-    await ctx.send(embed=embed)
-
-# Comando que muestra las normas del staff
-# `@bot.command(name='staff')` convierte la función siguiente en un comando del bot accesible para los usuarios.
-# Con `name='staff'`, el comando se ejecuta escribiendo `+staff`, permitiendo que los usuarios vean las normas aplicables al staff.
-
-@bot.command(name='staff')
-async def staff(ctx):
-    # Define `staff` como una función asincrónica para permitir que el bot maneje este comando sin interferir con otras tareas.
-    # El parámetro `ctx` (contexto) proporciona información sobre dónde y cómo se ejecutó el comando,
-    # permitiendo que el bot envíe la respuesta en el mismo canal.
-
-    # `embed = discord.Embed(...)` crea un mensaje embebido o "embed" para presentar la información de manera estilizada.
-    # El embed contiene un título, una descripción con las normas del staff y un color de borde.
-    embed = discord.Embed(
-        title='Normas del Staff',  # Título del embed
-        description='1) Las quejas sobre baneos se atienden por Discord. \n'
-                    '2) Objetos exclusivos del staff no deben caer en manos de jugadores; ambos involucrados serán sancionados si esto sucede. \n'
-                    '3) Responder a las dudas de los jugadores. \n'
-                    '4) Saludar a los nuevos jugadores. \n'
-                    '5) No abusar del poder. \n'
-                    '6) Solo Owners, Admins y Mods pueden sancionar. \n'
-                    '7) Tratar a todos los jugadores por igual. \n'
-                    '8) No dar ítems del creativo a jugadores; solo por survival. \n'
-                    '9) Ser neutral en juicios. \n'
-                    '10) La inactividad injustificada puede resultar en expulsión del staff. \n'
-                    '11) No revelar novedades en desarrollo a jugadores.',  # Normas del staff listadas en la descripción
-        color=discord.Color.purple()  # Color morado para el borde del embed
+# `@bot.before_invoke` registra una función que se ejecuta justo antes de cada comando.
+# Aquí se anota qué comando está ejecutando la tarea actual, para que el vigilante del bucle
+# pueda indicar qué comando causó un bloqueo.
+@bot.before_invoke
+async def antes_de_comando(ctx):
+    # Los comandos de barra no pasan por `on_message`, así que su tiempo empieza a contarse aquí.
+    if ctx.interaction is not None:
+        ctx.inicio = time.perf_counter()
+        # Los comandos de barra empiezan su traza aquí, con el identificador de la interacción.
+        if muestrear():
+            traza_actual.set(Traza(ctx.interaction.id, ctx.inicio))
+    traza = traza_actual.get()
+    if traza is not None:
+        traza.tramo('comprobaciones', traza.marca)
+        traza.marca = time.perf_counter()
+    vigilante_bucle.comandos[asyncio.current_task()] = ctx.command.qualified_name
+
+# `@bot.after_invoke` registra una función que se ejecuta después de cada comando, aunque el comando falle.
+# Aquí se registra la duración del comando en su histograma y se borra la anotación del vigilante.
+@bot.after_invoke
+async def despues_de_comando(ctx):
+    metricas.observar_comando(ctx.command.qualified_name, time.perf_counter() - getattr(ctx, 'inicio', time.perf_counter()))
+    vigilante_bucle.comandos.pop(asyncio.current_task(), None)
+    traza = traza_actual.get()
+    if traza is not None:
+        traza.tramo('comando', traza.marca)
+        # Las trazas de los mensajes se envían al terminar `on_message`; las de los comandos de barra, aquí.
+        if ctx.interaction is not None:
+            traza.emitir(ctx.command.qualified_name)
+
+# `on_command_error` se activa cuando un comando falla (por ejemplo, si no se cumple una comprobación).
+# Se cuenta el error y después se llama al manejador original de discord.py, que lo muestra en la consola.
+@bot.event
+async def on_command_error(ctx, error):
+    if ctx.command is not None:
+        metricas.contar_error(ctx.command.qualified_name, type(error).__name__)
+    await commands.Bot.on_command_error(bot, ctx, error)
+
+# Límites de uso por usuario y por canal
+# `commands.CooldownMapping` es la herramienta de discord.py para limitar usos: guarda un contador por usuario o por canal.
+# Se crea un mapa por cada límite configurado (los que son None se omiten).
+# Solo se aplican a los comandos que se agrupan (ver `AgrupadorRespuestas`): son las respuestas fijas que se pueden
+# pedir muchas veces seguidas. Los comandos del staff (`+sancionar`, `+anunciar`...) y los que dependen del texto
+# escrito no gastan usos ni se bloquean.
+enfriamientos = [
+    commands.CooldownMapping.from_cooldown(*limite, tipo)
+    for limite, tipo in (
+        (ENFRIAMIENTO_USUARIO, commands.BucketType.user),
+        (ENFRIAMIENTO_CANAL, commands.BucketType.channel),
     )
+    if limite is not None
+]
+
+# Agrupación de comandos repetidos
+# La primera petición de un comando en un canal se responde al momento y abre una "ventana" de `ventana` segundos.
+# Las peticiones del mismo comando en el mismo canal que llegan durante la ventana no se responden:
+# solo se anota quién las hizo. Al cerrar la ventana, si `mencionar` es True, se envía un único mensaje
+# mencionando a todos ellos. Así, 30 `+ip` seguidos cuestan 2 envíos en lugar de 30.
+# `ahorrados` cuenta los envíos evitados y se publica en `/metrics`.
+# Antes de responder, se comprueban los límites de uso de `enfriamientos`.
+class AgrupadorRespuestas:
+    def __init__(self, ventana, mencionar, enfriamientos):
+        self.ventana = ventana
+        self.mencionar = mencionar
+        self.enfriamientos = enfriamientos
+        self.ahorrados = 0
+        # Ventanas abiertas: (id del canal, nombre del comando) -> lista de autores agrupados.
+        self._grupos = {}
+        # Referencias a las tareas que cierran las ventanas, para que Python no las elimine antes de terminar.
+        self._tareas = set()
+        # Avisos de límite enviados: (tipo de límite, usuario o canal) -> momento hasta el que no se vuelve a avisar.
+        self._avisos = {}
+
+    # Decorador que se coloca debajo de `@registrar_comando` en los comandos que se pueden agrupar.
+    # `functools.wraps` copia el nombre y los parámetros del comando original, que discord.py necesita para registrarlo.
+    # Las peticiones de comandos de barra (`ctx.interaction`) no se agrupan, porque Discord exige responder a cada una.
+    # Los comandos son métodos de una categoría (cog), así que reciben primero la categoría (`cog`) y después el contexto.
+    # Las peticiones que se agrupan con otra anterior no gastan usos de los límites, porque no generan ningún envío.
+    def agrupar(self, funcion):
+        @functools.wraps(funcion)
+        async def envoltura(cog, ctx, *args, **kwargs):
+            agrupar = self.ventana and ctx.interaction is None
+            clave = (ctx.channel.id, ctx.command.qualified_name)
+            if agrupar and clave in self._grupos:
+                self._grupos[clave].append(ctx.author)
+                return
+            # Si se ha superado algún límite de uso, no se responde al comando.
+            if not await self._permitir(ctx):
+                return
+            if not agrupar:
+                return await funcion(cog, ctx, *args, **kwargs)
+            self._grupos[clave] = []
+            tarea = asyncio.create_task(self._cerrar(clave, ctx.channel, ctx.prefix))
+            self._tareas.add(tarea)
+            tarea.add_done_callback(self._tareas.discard)
+            return await funcion(cog, ctx, *args, **kwargs)
+        return envoltura
+
+    # Gasta un uso de cada límite y devuelve False si alguno se ha superado.
+    # `update_rate_limit` devuelve los segundos que faltan para poder usar el comando otra vez, o None si se puede usar.
+    # El bloqueo se cuenta en `/metrics` como un error `CommandOnCooldown`, el nombre que le da discord.py.
+    # Los comandos de barra reciben siempre un aviso que solo ve el usuario (`ephemeral`), porque Discord exige
+    # responder a cada uno. En los de prefijo se avisa una sola vez por usuario (o canal) hasta que pasa el límite,
+    # para no responder a cada mensaje repetido con otro envío; el aviso se borra solo al terminar (`delete_after`).
+    async def _permitir(self, ctx):
+        for mapa in self.enfriamientos:
+            restante = mapa.update_rate_limit(ctx.message)
+            if not restante:
+                continue
+            metricas.contar_error(ctx.command.qualified_name, 'CommandOnCooldown')
+            # `math.ceil` redondea hacia arriba, para no pedir que se espere "0 segundos".
+            texto = f'Espera {math.ceil(restante)} segundos antes de volver a usar este comando.'
+            if ctx.interaction is not None:
+                await ctx.send(texto, ephemeral=True)
+                return False
+            ahora = time.monotonic()
+            # `mapa.type(ctx.message)` da el usuario o el canal al que se aplica este límite.
+            aviso = (mapa.type, mapa.type(ctx.message))
+            if self._avisos.get(aviso, 0) <= ahora:
+                # Para que no crezca sin fin, de vez en cuando se quitan los avisos que ya han caducado.
+                if len(self._avisos) >= 1000:
+                    self._avisos = {clave: hasta for clave, hasta in self._avisos.items() if hasta > ahora}
+                self._avisos[aviso] = ahora + restante
+                await ctx.send(texto, delete_after=restante)
+            return False
+        return True
+
+    # Espera a que pase la ventana, la cierra y, si hubo peticiones agrupadas, menciona a sus autores en un solo mensaje.
+    # `dict.fromkeys` quita las menciones repetidas conservando el orden.
+    # `prefijo` es el prefijo con el que se escribió el comando, que puede ser distinto en cada servidor.
+    async def _cerrar(self, clave, canal, prefijo):
+        await asyncio.sleep(self.ventana)
+        grupo = self._grupos.pop(clave)
+        if not grupo:
+            return
+        self.ahorrados += len(grupo)
+        if self.mencionar:
+            self.ahorrados -= 1
+            menciones = ' '.join(dict.fromkeys(autor.mention for autor in grupo))
+            try:
+                await canal.send(f'{menciones} la respuesta a `{prefijo}{clave[1]}` está justo arriba.')
+            except discord.HTTPException:
+                pass
+
+agrupador = AgrupadorRespuestas(VENTANA_AGRUPACION, MENCIONAR_AGRUPADOS, enfriamientos)
+
+
+# Vigilante del bucle de eventos
+# Si un comando hace algo lento sin `await` (por ejemplo, leer un archivo grande o un cálculo pesado),
+# bloquea el bucle de eventos y el bot deja de responder a todo lo demás mientras tanto.
+# El vigilante funciona en dos partes:
+# - Una tarea dentro del bucle ("latido") que se despierta cada `intervalo` segundos y anota la hora.
+#   Si se despierta tarde, la diferencia es el retraso del bucle.
+# - Un hilo independiente que comprueba el último latido. Si lleva más de `umbral` segundos sin latir,
+#   el bucle está bloqueado: el hilo copia la pila de llamadas del bot en ese momento, toma muestras de la pila
+#   cada 5 ms mientras dura el bloqueo (un pequeño perfilador) y lo guarda todo en un archivo de volcado.
+# Como el hilo no depende del bucle, puede observarlo justo cuando está bloqueado.
+class VigilanteBucle:
+    def __init__(self, umbral, directorio, maximo_volcados, intervalo=0.05, muestras=200):
+        self.umbral = umbral
+        self.directorio = directorio
+        self.maximo_volcados = maximo_volcados
+        self.intervalo = intervalo
+        # Número máximo de muestras de la pila que se toman durante un mismo bloqueo.
+        self.muestras = muestras
+        # Si es False, solo se guarda la pila inicial de cada bloqueo, sin tomar muestras.
+        self.perfilar = True
+        self.activo = False
+        # Último retraso medido y retraso máximo desde que se inició el bot, en segundos.
+        self.retraso = 0.0
+        self.retraso_maximo = 0.0
+        # Bloqueos por comando: {nombre: (veces, duración máxima, duración total)}.
+        self.bloqueos = {}
+        # `bloqueos` lo escribe el hilo vigilante y lo lee el comando `+vigilante` desde el bucle: el cerrojo evita
+        # que se lea a medias mientras cambia.
+        self._cerrojo = threading.Lock()
+        # Comando que está ejecutando cada tarea (se rellena en `antes_de_comando`).
+        # `WeakKeyDictionary` borra la entrada automáticamente cuando la tarea termina.
+        self.comandos = weakref.WeakKeyDictionary()
+        self._latido = 0.0
+        self._hilo = None  # Hilo vigilante, mientras está en marcha
+
+    # Inicia el latido y el hilo vigilante. Debe llamarse desde dentro del bucle de eventos del bot.
+    def iniciar(self):
+        if self.activo:
+            return
+        self.activo = True
+        self._bucle = asyncio.get_running_loop()
+        # Identificador del hilo del bucle, para encontrar su pila de llamadas desde el hilo vigilante.
+        self._hilo_bucle = threading.get_ident()
+        self._latido = time.monotonic()
+        # `threading.Event` permite avisar al hilo vigilante de que debe terminar.
+        self._parar = threading.Event()
+        self._tarea = asyncio.create_task(self._latir())
+        # `daemon=True` hace que el hilo no impida cerrar el programa.
+        self._hilo = threading.Thread(target=self._vigilar, name='vigilante-bucle', daemon=True)
+        self._hilo.start()
+
+    # Detiene el latido y el hilo vigilante.
+    def detener(self):
+        if not self.activo:
+            return
+        self.activo = False
+        self._tarea.cancel()
+        self._parar.set()
+        # Se espera a que el hilo termine (como mucho un `intervalo`): si no, un `iniciar` justo después crearía un
+        # `_parar` nuevo y el hilo antiguo, que lo consulta en cada vuelta, seguiría vigilando junto al nuevo.
+        self._hilo.join()
+        self._hilo = None
+
+    # Latido: duerme `intervalo` segundos, anota la hora y calcula cuánto tarde se despertó.
+    async def _latir(self):
+        while True:
+            inicio = time.monotonic()
+            await asyncio.sleep(self.intervalo)
+            self._latido = time.monotonic()
+            self.retraso = max(0.0, self._latido - inicio - self.intervalo)
+            self.retraso_maximo = max(self.retraso_maximo, self.retraso)
+
+    # Bucle del hilo vigilante: cada `intervalo` segundos comprueba si el último latido es demasiado antiguo.
+    def _vigilar(self):
+        while not self._parar.wait(self.intervalo):
+            if time.monotonic() - self._latido > self.umbral:
+                self._capturar(self._latido)
+
+    # Registra un bloqueo en curso: qué comando lo causa, su pila de llamadas y un perfil por muestreo.
+    def _capturar(self, latido):
+        # La tarea que se está ejecutando en el bucle bloqueado; si no es un comando, se anota como 'otro',
+        # y si el bloqueo ocurre fuera de cualquier tarea, como 'callback'.
+        tarea = asyncio.current_task(self._bucle)
+        nombre = self.comandos.get(tarea, 'otro') if tarea is not None else 'callback'
+        marco = sys._current_frames().get(self._hilo_bucle)
+        pila = ''.join(traceback.format_stack(marco)) if marco is not None else ''
+        # Mientras no llegue un nuevo latido, el bucle sigue bloqueado: se toman muestras de la pila cada 5 ms
+        # y se cuenta cuántas veces aparece cada pila. Las pilas más repetidas son donde se pierde el tiempo.
+        perfil = {}
+        tomadas = 0
+        while self._latido == latido and not self._parar.is_set():
+            if self.perfilar and tomadas < self.muestras:
+                marco = sys._current_frames().get(self._hilo_bucle)
+                if marco is not None:
+                    clave = ';'.join(f'{cuadro.name} ({os.path.basename(cuadro.filename)}:{cuadro.lineno})' for cuadro in traceback.extract_stack(marco))
+                    perfil[clave] = perfil.get(clave, 0) + 1
+                    tomadas += 1
+            time.sleep(0.005)
+        # Duración del bloqueo: tiempo entre el último latido y el siguiente, descontando el intervalo normal.
+        duracion = max(0.0, (self._latido if self._latido != latido else time.monotonic()) - latido - self.intervalo)
+        with self._cerrojo:
+            veces, maximo, total = self.bloqueos.get(nombre, (0, 0.0, 0.0))
+            self.bloqueos[nombre] = (veces + 1, max(maximo, duracion), total + duracion)
+        self._volcar(nombre, duracion, pila, perfil)
+
+    # Guarda el bloqueo en un archivo de volcado y borra los volcados más antiguos si hay demasiados.
+    # Se ejecuta en el hilo vigilante, así que escribir el archivo nunca bloquea al bot.
+    def _volcar(self, nombre, duracion, pila, perfil):
+        os.makedirs(self.directorio, exist_ok=True)
+        archivo = os.path.join(self.directorio, datetime.datetime.now().strftime('bloqueo-%Y%m%d-%H%M%S-%f.txt'))
+        with open(archivo, 'w', encoding='utf-8') as salida:
+            salida.write(f'Comando: {nombre}\nDuración: {duracion * 1000:.0f} ms\n\n{pila}')
+            if perfil:
+                salida.write('\nPerfil (pilas muestreadas cada 5 ms):\n')
+                for clave, cantidad in sorted(perfil.items(), key=lambda elemento: -elemento[1]):
+                    salida.write(f'{clave} {cantidad}\n')
+        # Los nombres de archivo empiezan por la fecha y hora, así que al ordenarlos los más antiguos quedan primero.
+        volcados = sorted(volcado for volcado in os.listdir(self.directorio) if volcado.startswith('bloqueo-'))
+        for sobrante in volcados[:-self.maximo_volcados]:
+            os.remove(os.path.join(self.directorio, sobrante))
+
+    # Devuelve los comandos que más han bloqueado el bucle, ordenados por su bloqueo más largo.
+    def peores(self, cantidad=5):
+        # Se copia `bloqueos` con el cerrojo tomado y se ordena la copia, sin hacer esperar al hilo vigilante.
+        with self._cerrojo:
+            copia = list(self.bloqueos.items())
+        return heapq.nlargest(cantidad, copia, key=lambda elemento: elemento[1][1])
+
+# Se crea el vigilante; se inicia en `setup_hook` o con el comando `+vigilante on`.
+vigilante_bucle = VigilanteBucle(UMBRAL_BLOQUEO, DIRECTORIO_VOLCADOS, MAXIMO_VOLCADOS)
+
+
+# Textos fijos del bot
+# Los pies de página se repiten en varios embeds, así que se guardan una sola vez en constantes.
+# `PIE_NORMAS` acompaña a todos los embeds de normas y `PIE_AYUDA` al resto de embeds informativos.
+# `{prefijo}` se sustituye por el prefijo del servidor de Discord al construir cada embed.
+PIE_NORMAS = 'Las normas se acumulan y los castigos pueden variar según la persona. Para más comandos, escribe {prefijo}help'
+PIE_AYUDA = 'Para ver más comandos, escribe {prefijo}help'
+# Caracteres de la búsqueda que se muestran en el título de los resultados de `+buscar`. Con el texto que la rodea
+# ('Resultados para "..."' y los puntos suspensivos) queda por debajo del límite de 256 caracteres de Discord.
+LARGO_CONSULTA = 200
+# Caracteres que Discord admite en la descripción de un embed. Las normas de una categoría se muestran en la descripción
+# de su embed, así que no pueden ocupar más (ver `texto_normas`).
+LARGO_DESCRIPCION = 4096
+
+# Catálogo de normas del servidor
+# `NORMAS` es un diccionario donde cada clave es el nombre del comando (`leves`, `graves`, ...) y cada valor
+# es una tupla con el título del embed y la lista de normas de esa categoría.
+# Las normas se guardan sin numerar: el número se calcula al construir el embed según su posición en la lista,
+# por lo que para añadir, quitar o reordenar una norma solo hay que editar la lista correspondiente.
+NORMAS = {
+    'leves': ('Normas Leves', [
+        'Los bugs están permitidos, pero antes debes consultar su uso con alguien del staff.',
+        'No insultar a otros jugadores si no es de su agrado.',
+        'Evita hacer flood (ejemplo: holaaaaaa), spam o texto innecesario que sature el chat.',
+        'No se permite tener más de dos relojes de Redstone; generadores de lag y cargadores de chunks están prohibidos.',
+        'Las mascotas son propiedad privada; está prohibido matarlas intencionalmente, aunque no estén en una zona protegida.',
+        'Los lobos no pueden ser utilizados como armas para PVP.',
+        'En caso de problemas aislados, el staff puede realizar reuniones para encontrar una solución justa.',
+        'No salirse de un juicio.',
+    ]),
+    'graves': ('Normas Graves', [
+        'El uso de multicuentas está prohibido. Si deseas cambiar de cuenta, notifica al staff para transferir tus ítems y propiedades.',
+        'Hacks están prohibidos y serán sancionados con ip-ban.',
+        'Destrucción de construcciones protegidas y robo de ítems en zonas de otros jugadores están prohibidos.',
+        'Cualquier tipo de asesinato como tpakill y spawn kill está prohibido.',
+        'Prohibido aprovechar bugs, como duplicación o glitches de movilidad.',
+        'Prohibido el uso de hacks como xray o autoclick.',
+        'No se permite distribuir enlaces externos sin aprobación del staff.',
+        'Hablar con respeto al staff y evitar faltas de respeto.',
+        'Intentos de evadir sentencias aumentarán la pena; ayudar a otro jugador a evadir es sancionable.',
+        'Mentirle al staff está prohibido.',
+        'Prohibido hacerse pasar por el staff.',
+        'No usar otros casos para justificar acciones.',
+        'Mensajes y construcciones ofensivas están prohibidas.',
+        'Prohibido escapar de la cárcel.',
+        'No ayudar a un preso a salir de la cárcel.',
+        'No explorar, minar o talar en el mundo normal; utiliza /warp recursos.',
+    ]),
+    'juicio': ('Normas del Juicio', [
+        'No interrumpir el juicio.',
+        'Presentar pruebas.',
+        'No hacer perder el tiempo al staff que actúe como juez.',
+        'Leer las normas antes de solicitar un juicio.',
+        'Solo se permite la presencia de testigos y partes involucradas en el juicio.',
+        'Solo Owners, Admins y Mods pueden actuar como jueces.',
+        'Ambas partes (acusados y acusadores) deben estar presentes.',
+    ]),
+    'clanes': ('Normas de los Clanes', [
+        'Todo tipo de PVP es válido si ambos jugadores pertenecen a un clan.',
+        'Se permite el grifeo, pero solo a bases de clanes.',
+    ]),
+    'staff': ('Normas del Staff', [
+        'Las quejas sobre baneos se atienden por Discord.',
+        'Objetos exclusivos del staff no deben caer en manos de jugadores; ambos involucrados serán sancionados si esto sucede.',
+        'Responder a las dudas de los jugadores.',
+        'Saludar a los nuevos jugadores.',
+        'No abusar del poder.',
+        'Solo Owners, Admins y Mods pueden sancionar.',
+        'Tratar a todos los jugadores por igual.',
+        'No dar ítems del creativo a jugadores; solo por survival.',
+        'Ser neutral en juicios.',
+        'La inactividad injustificada puede resultar en expulsión del staff.',
+        'No revelar novedades en desarrollo a jugadores.',
+    ]),
+}
+
+# Copia de las normas escritas en el código: `ARCHIVO_NORMAS` se aplica siempre sobre ellas, así que al quitar una
+# categoría del archivo (o borrarlo) vuelven las del código.
+NORMAS_CODIGO = dict(NORMAS)
+
+# Texto de la descripción del embed de una categoría de normas: las normas numeradas, una por línea ("1) ... \n2) ...").
+# `enumerate(reglas, 1)` recorre las normas empezando a contar desde 1 para obtener su número. Lo usan la extensión de
+# normas para construir el embed y las comprobaciones de `leer_normas` y `+config normas`, que miden este mismo texto.
+def texto_normas(reglas):
+    return ' \n'.join(f'{numero}) {regla}' for numero, regla in enumerate(reglas, 1))
+
+# Lee `ARCHIVO_NORMAS` y devuelve las normas completas (las del código con las del archivo encima).
+# Lanza `ValueError` si el archivo no es válido, para no aplicar a medias unas normas mal escritas.
+def leer_normas(archivo):
+    normas = dict(NORMAS_CODIGO)
+    if not os.path.exists(archivo):
+        return normas
+    with open(archivo, encoding='utf-8') as entrada:
+        datos = json.load(entrada)
+    if not isinstance(datos, dict):
+        raise ValueError(f'{archivo} debe contener un objeto con una lista de normas por categoría.')
+    for categoria, reglas in datos.items():
+        if categoria not in NORMAS_CODIGO:
+            raise ValueError(f"Categoría desconocida en {archivo}: {categoria}. Usa una de: {', '.join(NORMAS_CODIGO)}")
+        if not isinstance(reglas, list) or not reglas or not all(isinstance(regla, str) and regla.strip() for regla in reglas):
+            raise ValueError(f'Las normas {categoria} de {archivo} deben ser una lista de textos no vacíos.')
+        reglas = [regla.strip() for regla in reglas]
+        # Se mide el texto tal y como se mostrará, con la numeración, contra el límite de la descripción de un embed.
+        if len(texto_normas(reglas)) > LARGO_DESCRIPCION:
+            raise ValueError(f'Las normas {categoria} de {archivo} son demasiado largas para un mensaje.')
+        normas[categoria] = (NORMAS_CODIGO[categoria][0], reglas)
+    return normas
+
+# Lista de comandos del servidor de Minecraft que se muestran con `+comandos`.
+# Cada elemento es una línea del embed; `NOTA_COMANDOS` se añade al final, separada por una línea en blanco.
+COMANDOS_SERVIDOR = [
+    '/tpa (ir a otro jugador)',
+    '/tpaccept (aceptar tpa)',
+    '/tpahere (traer a otro jugador)',
+    '/back (volver al sitio anterior)',
+    '/sit (sentarse)',
+    '/afk (ausentarse)',
+    '/sethome (marcar un home)',
+    '/home "nombre" (ir a un home marcado)',
+    '/delhome "nombre" (borrar un home)',
+    '/ps add "nombre" (agregar persona a tu piedra de protección)',
+    '/ps remove "nombre" (quitar persona de tu piedra)',
+    '/tienda (ver tienda)',
+    '/piedras (información sobre piedra de protección)',
+    '/trabajos (para conseguir dinero)',
+    '/jobs join "nombre" (unirse a un trabajo)',
+    '/jobs remove "nombre" (salir de un trabajo)',
+    '/ec (acceder a ender chest)',
+    '/pay "cantidad" "nickname" (pagar a otro jugador)',
+    '/money (ver tu dinero)',
+    '/baltop (ver las personas más ricas en Olympus)',
+    '/ah (subasta)',
+    '/ah sell "precio" (vender ítem en mano en el ah)',
+    '/tienda (comprar piedras, torretas, etc.)',
+    '/warp recursos (para recolección de materiales, no recomendado construir aquí)',
+    '/warp matadero (conseguir comida)',
+    '/warp boda (iglesia)',
+]
+NOTA_COMANDOS = 'Puedes crear ascensores colocando un bloque de cuarzo con uno de redstone debajo.'
+
+
+# Embed con serialización en caché
+# Cada vez que se envía un embed, discord.py llama a `to_dict()` para convertirlo al formato JSON que espera Discord.
+# `EmbedCacheado` hereda de `discord.Embed` y guarda el resultado de la primera llamada a `to_dict()` en `_serializado`,
+# de modo que los siguientes envíos reutilizan el mismo diccionario sin volver a recorrer todos los campos.
+# Importante: un `EmbedCacheado` no debe modificarse después de construirse; para cambiar su contenido
+# hay que invalidarlo en la caché de respuestas y construir uno nuevo.
+class EmbedCacheado(discord.Embed):
+    def to_dict(self):
+        try:
+            # Si el embed ya se serializó antes, se devuelve directamente el diccionario guardado.
+            return self._serializado
+        except AttributeError:
+            # Primera llamada: se serializa con la implementación original y se guarda el resultado.
+            self._serializado = super().to_dict()
+            return self._serializado
+
+
+# Caché de respuestas estáticas
+# El contenido de `+help`, `+ip`, `+comandos` y de los comandos de normas nunca cambia entre llamadas,
+# así que no tiene sentido crear un embed nuevo cada vez que alguien escribe el comando.
+# `CacheRespuestas` guarda una función constructora por cada respuesta y el embed ya construido y serializado,
+# que se reutiliza en todas las llamadas hasta que se invalida explícitamente.
+class CacheRespuestas:
+    def __init__(self):
+        # `_constructores` relaciona el nombre de cada respuesta con la función que crea su embed.
+        self._constructores = {}
+        # `_embeds` guarda los embeds ya construidos, listos para enviarse.
+        self._embeds = {}
+
+    # Registra (o reemplaza) la función constructora de una respuesta.
+    # Si ya había un embed construido con ese nombre, se descarta para que el próximo uso lo construya de nuevo.
+    def registrar(self, nombre, constructor):
+        self._constructores[nombre] = constructor
+        self._embeds.pop(nombre, None)
+
+    # Devuelve el embed de una respuesta, construyéndolo solo si todavía no está en la caché.
+    def obtener(self, nombre):
+        embed = self._embeds.get(nombre)
+        if embed is None:
+            embed = self._construir(nombre)
+        return embed
+
+    # Descarta el embed de una respuesta (o de todas si no se indica nombre) cuando su contenido cambia.
+    # El embed se volverá a construir la próxima vez que se pida con `obtener`.
+    def invalidar(self, nombre=None):
+        if nombre is None:
+            self._embeds.clear()
+        else:
+            self._embeds.pop(nombre, None)
+
+    # Vuelve a construir y serializar todas las respuestas registradas de una sola vez.
+    # Se llama al arrancar el bot para que ningún comando tenga que construir su embed durante una llamada.
+    def reconstruir(self):
+        self._embeds.clear()
+        for nombre in self._constructores:
+            self._construir(nombre)
+
+    # Construye el embed de una respuesta, fuerza su serialización con `to_dict()` y lo guarda en la caché.
+    def _construir(self, nombre):
+        embed = self._constructores[nombre]()
+        embed.to_dict()
+        self._embeds[nombre] = embed
+        return embed
+
+
+# Consulta del estado del servidor de Minecraft (Server List Ping)
+# Minecraft permite preguntar a un servidor su estado (versión, jugadores conectados, etc.) sin entrar al juego,
+# usando el mismo protocolo que utiliza la lista de servidores del juego. Se implementa directamente con asyncio
+# para que la consulta no bloquee al bot mientras espera la respuesta del servidor.
+
+# El protocolo de Minecraft codifica los números enteros como "VarInt": 7 bits de datos por byte,
+# y el bit más alto indica si el número continúa en el siguiente byte.
+# `_varint` convierte un número en su VarInt; `valor &= 0xFFFFFFFF` permite codificar números negativos (como -1).
+def _varint(valor):
+    valor &= 0xFFFFFFFF
+    datos = bytearray()
+    while True:
+        byte = valor & 0x7F
+        valor >>= 7
+        if valor:
+            datos.append(byte | 0x80)
+        else:
+            datos.append(byte)
+            return bytes(datos)
+
+# Lee un VarInt byte a byte desde la conexión con el servidor.
+# Un VarInt nunca ocupa más de 5 bytes; si es más largo, la respuesta no es válida.
+async def _leer_varint(lector):
+    valor = 0
+    for desplazamiento in range(0, 35, 7):
+        byte = (await lector.readexactly(1))[0]
+        valor |= (byte & 0x7F) << desplazamiento
+        if not byte & 0x80:
+            return valor
+    raise ValueError('VarInt demasiado largo')
+
+# Igual que `_leer_varint`, pero leyendo desde unos bytes ya recibidos.
+# Devuelve el valor y la posición donde termina el VarInt.
+def _decodificar_varint(datos, posicion=0):
+    valor = 0
+    for desplazamiento in range(0, 35, 7):
+        byte = datos[posicion]
+        posicion += 1
+        valor |= (byte & 0x7F) << desplazamiento
+        if not byte & 0x80:
+            return valor, posicion
+    raise ValueError('VarInt demasiado largo')
+
+# Arma un paquete del protocolo: longitud total, identificador del paquete y datos.
+def _paquete(identificador, datos=b''):
+    cuerpo = _varint(identificador) + datos
+    return _varint(len(cuerpo)) + cuerpo
+
+# Lee un paquete completo del servidor y devuelve su identificador y sus datos.
+async def _leer_paquete(lector):
+    longitud = await _leer_varint(lector)
+    identificador = await _leer_varint(lector)
+    return identificador, await lector.readexactly(longitud - len(_varint(identificador)))
+
+# Realiza la consulta de estado completa:
+# 1. Envía el "handshake" indicando la dirección, el puerto y que se quiere consultar el estado (1).
+# 2. Envía la petición de estado y recibe un JSON con la versión y los jugadores.
+# 3. Envía un "ping" y mide cuánto tarda el servidor en responder con el "pong" (latencia).
+async def _ping_servidor(host, puerto):
+    lector, escritor = await asyncio.open_connection(host, puerto)
+    try:
+        direccion = host.encode('utf-8')
+        escritor.write(_paquete(0x00, _varint(-1) + _varint(len(direccion)) + direccion + struct.pack('>H', puerto) + _varint(1)))
+        escritor.write(_paquete(0x00))
+        await escritor.drain()
+        identificador, datos = await _leer_paquete(lector)
+        if identificador != 0x00:
+            raise ValueError('Respuesta de estado inesperada')
+        # La respuesta es una cadena JSON precedida por su longitud en formato VarInt.
+        longitud, inicio_json = _decodificar_varint(datos)
+        estado = json.loads(datos[inicio_json:inicio_json + longitud].decode('utf-8'))
+        loop = asyncio.get_running_loop()
+        inicio = loop.time()
+        escritor.write(_paquete(0x01, struct.pack('>q', int(inicio * 1000))))
+        await escritor.drain()
+        await _leer_paquete(lector)
+        latencia = round((loop.time() - inicio) * 1000)
+    finally:
+        # La conexión se cierra siempre, aunque ocurra un error a mitad de la consulta.
+        escritor.close()
+    return {
+        'en_linea': True,
+        'version': estado['version']['name'],
+        'jugadores': estado['players']['online'],
+        'maximo': estado['players']['max'],
+        'latencia': latencia,
+    }
+
+# Estado del servidor con caché
+# Si muchos jugadores escriben `+ip` a la vez, no tiene sentido consultar al servidor una vez por cada mensaje.
+# `EstadoServidor` guarda el último estado durante `ttl` segundos y, si llegan varias peticiones mientras
+# se está consultando, todas esperan a la misma consulta en lugar de abrir una conexión cada una.
+class EstadoServidor:
+    def __init__(self, host, puerto, ttl, timeout=5, al_actualizar=None):
+        self.host = host
+        self.puerto = puerto
+        self.ttl = ttl
+        # Segundos máximos que se espera la respuesta del servidor antes de considerarlo fuera de línea.
+        self.timeout = timeout
+        # Función opcional que se llama con el nuevo estado cada vez que se actualiza.
+        self.al_actualizar = al_actualizar
+        # Último estado conocido (None si todavía no se ha consultado nunca).
+        self.ultimo = None
+        # Número de consultas realizadas al servidor, útil para comprobar que la caché funciona.
+        self.consultas = 0
+        self._caduca = 0.0
+        # Tarea de la consulta en curso, compartida por todas las peticiones que llegan mientras tanto.
+        self._consulta = None
 
-    # Añade un pie de página al embed para proporcionar contexto adicional.
-    # `set_footer` coloca un texto en la parte inferior del embed. Aquí se sugiere al usuario escribir `+help` para ver más comandos
-    # y se le informa que las normas son acumulativas.
-    embed.set_footer(text='Las normas se acumulan y los castigos pueden variar según la persona. Para más comandos, escribe +help')
-
-    # Envía el mensaje embed en el canal donde el usuario ejecutó el comando.
-    # `ctx.send(embed=embed)` utiliza el contexto (`ctx`) para enviar el embed, que presenta las normas de forma organizada.
-    # `await` se utiliza para esperar a que se complete el envío del mensaje antes de continuar con otras operaciones.
-    await ctx.send(embed=embed)
-
-# Comando que muestra los comandos utilizables en el servidor
-# `@bot.command(name='comandos')` convierte la función siguiente en un comando del bot accesible para los usuarios.
-# Con `name='comandos'`, el comando se ejecuta escribiendo `+comandos`, permitiendo que los usuarios vean una lista de comandos disponibles en el servidor.
-
-@bot.command(name='comandos')
-async def comandos(ctx):
-    # Define `comandos` como una función asincrónica para permitir que el bot maneje este comando sin interferir con otras tareas.
-    # El parámetro `ctx` (contexto) proporciona información sobre dónde y cómo se ejecutó el comando,
-    # permitiendo que el bot envíe la respuesta en el mismo canal.
-
-    # `embed = discord.Embed(...)` crea un mensaje embebido o "embed" para presentar la información de manera estilizada.
-    # El embed contiene un título, una descripción con la lista de comandos del servidor y un color de borde.
-    embed = discord.Embed(
-        title='Comandos que puedes usar en el servidor',  # Título del embed
-        description='/tpa (ir a otro jugador) \n'
-                    '/tpaccept (aceptar tpa) \n'
-                    '/tpahere (traer a otro jugador) \n'
-                    '/back (volver al sitio anterior) \n'
-                    '/sit (sentarse) \n'
-                    '/afk (ausentarse) \n'
-                    '/sethome (marcar un home) \n'
-                    '/home "nombre" (ir a un home marcado) \n'
-                    '/delhome "nombre" (borrar un home) \n'
-                    '/ps add "nombre" (agregar persona a tu piedra de protección) \n'
-                    '/ps remove "nombre" (quitar persona de tu piedra) \n'
-                    '/tienda (ver tienda) \n'
-                    '/piedras (información sobre piedra de protección) \n'
-                    '/trabajos (para conseguir dinero) \n'
-                    '/jobs join "nombre" (unirse a un trabajo) \n'
-                    '/jobs remove "nombre" (salir de un trabajo) \n'
-                    '/ec (acceder a ender chest) \n'
-                    '/pay "cantidad" "nickname" (pagar a otro jugador) \n'
-                    '/money (ver tu dinero) \n'
-                    '/baltop (ver las personas más ricas en Olympus) \n'
-                    '/ah (subasta) \n'
-                    '/ah sell "precio" (vender ítem en mano en el ah) \n'
-                    '/tienda (comprar piedras, torretas, etc.) \n'
-                    '/warp recursos (para recolección de materiales, no recomendado construir aquí) \n'
-                    '/warp matadero (conseguir comida) \n'
-                    '/warp boda (iglesia) \n\n'
-                    'Puedes crear ascensores colocando un bloque de cuarzo con uno de redstone debajo.',  # Comandos del servidor listados en la descripción
-        color=discord.Color.purple()  # Color morado para el borde del embed
+    # Devuelve el estado del servidor, consultándolo solo si el guardado ya caducó.
+    # `asyncio.shield` evita que, si se cancela uno de los comandos que esperan, se cancele la consulta compartida.
+    async def obtener(self):
+        if self.ultimo is not None and asyncio.get_running_loop().time() < self._caduca:
+            return self.ultimo
+        if self._consulta is None:
+            self._consulta = asyncio.ensure_future(self._actualizar())
+        return await asyncio.shield(self._consulta)
+
+    # Consulta el servidor y guarda el resultado. Cualquier error de conexión o respuesta inválida
+    # se trata como "fuera de línea", para que `+ip` siempre pueda responder.
+    async def _actualizar(self):
+        try:
+            self.consultas += 1
+            try:
+                estado = await asyncio.wait_for(_ping_servidor(self.host, self.puerto), self.timeout)
+            except (OSError, asyncio.TimeoutError, EOFError, ValueError, KeyError, TypeError):
+                estado = {'en_linea': False}
+            self.ultimo = estado
+            self._caduca = asyncio.get_running_loop().time() + self.ttl
+            if self.al_actualizar is not None:
+                self.al_actualizar(estado)
+            return estado
+        finally:
+            self._consulta = None
+
+# Estado de cada servidor de Minecraft, por dirección. Los servidores de Discord que comparten IP comparten también
+# su estado, así que el servidor de Minecraft se consulta una sola vez cada `TTL_ESTADO_SERVIDOR` segundos aunque
+# lo usen muchos. La IP puede llevar el puerto (`host:puerto`); si no, se usa `PUERTO_MINECRAFT`.
+# Cada vez que un estado cambia, se invalida el embed de `+ip` de las configuraciones que usan esa IP
+# para que el siguiente `+ip` lo construya con los datos nuevos.
+estados_servidor = {}
+
+def estado_de(ip):
+    estado = estados_servidor.get(ip)
+    if estado is None:
+        host, _, puerto = ip.partition(':')
+        estado = estados_servidor[ip] = EstadoServidor(
+            host, int(puerto or PUERTO_MINECRAFT), TTL_ESTADO_SERVIDOR,
+            al_actualizar=lambda _, ip=ip: configuraciones.invalidar_ip(ip)
+        )
+    return estado
+
+# Estado del servidor de Minecraft por defecto (el que también se muestra en la presencia del bot).
+estado_servidor = estado_de(SERVIDOR_MINECRAFT)
+
+# Monitor de la red de servidores
+# La red tiene varios servidores de Minecraft (`SERVIDORES_RED`: nombre -> dirección). `MonitorRed` los consulta todos
+# cada `INTERVALO_RED` segundos y publica el resultado para la ruta `/status` del servidor web.
+
+# Historial de un servidor: las últimas `capacidad` consultas guardadas en un búfer circular. Cada consulta ocupa
+# dos enteros en dos `array` de tamaño fijo (latencia en ms, o -1 si no respondió, y jugadores conectados),
+# así que el historial de un día ocupa unos pocos KiB por servidor y nunca crece. Al llegar al final se vuelve
+# al principio y se sobrescribe la consulta más antigua.
+class HistorialServidor:
+    # Sin diccionario por objeto (ver `Sancion`): solo estos atributos.
+    __slots__ = ('latencias', 'jugadores', 'posicion', 'muestras', 'en_linea', 'suma_latencias')
+
+    def __init__(self, capacidad):
+        # `array.array('i', [-1]) * capacidad` crea de una vez un array de `capacidad` enteros, todos a -1. A
+        # diferencia de una lista, cada valor ocupa 4 bytes seguidos en memoria en vez de un objeto de Python.
+        self.latencias = array.array('i', [-1]) * capacidad  # Latencia de cada consulta en ms (-1: sin respuesta)
+        self.jugadores = array.array('i', [0]) * capacidad  # Jugadores conectados en cada consulta
+        self.posicion = 0  # Posición en la que se escribirá la próxima consulta
+        self.muestras = 0  # Consultas guardadas (como mucho, `capacidad`)
+        self.en_linea = 0  # Cuántas de esas consultas tuvieron respuesta
+        self.suma_latencias = 0  # Suma de sus latencias, para la media
+
+    # Añade una consulta. Las consultas con respuesta y la suma de sus latencias se mantienen al día al añadir
+    # y al sobrescribir, así la disponibilidad y la latencia media no necesitan recorrer el historial.
+    def agregar(self, latencia, jugadores):
+        # La consulta que se va a sobrescribir deja de contar (si el historial todavía no está lleno, vale -1 y no
+        # cuenta para nada).
+        anterior = self.latencias[self.posicion]
+        if anterior >= 0:
+            self.en_linea -= 1
+            self.suma_latencias -= anterior
+        # La consulta nueva empieza a contar si el servidor respondió.
+        if latencia >= 0:
+            self.en_linea += 1
+            self.suma_latencias += latencia
+        self.latencias[self.posicion] = latencia  # Sobrescribe la consulta más antigua
+        self.jugadores[self.posicion] = jugadores
+        # `%` (resto de la división) hace que al pasar de la última posición se vuelva a la 0.
+        self.posicion = (self.posicion + 1) % len(self.latencias)
+        self.muestras = min(self.muestras + 1, len(self.latencias))  # Deja de crecer al llenarse
+
+    # Fracción de las consultas del historial en las que el servidor respondió (None si todavía no hay ninguna).
+    def disponibilidad(self):
+        return self.en_linea / self.muestras if self.muestras else None  # Por ejemplo, 0.98 es un 98 %
+
+    # Latencia media en ms de las consultas con respuesta, redondeada (None si el servidor nunca respondió).
+    def latencia_media(self):
+        return round(self.suma_latencias / self.en_linea) if self.en_linea else None
+
+    # Devuelve uno de los dos arrays del historial como lista, de la consulta más antigua a la más reciente.
+    def serie(self, valores):
+        # Historial sin llenar: las consultas están en orden desde la posición 0.
+        if self.muestras < len(valores):
+            return valores[:self.muestras].tolist()
+        # Historial lleno: la más antigua está en `posicion`. Se juntan el tramo desde ahí hasta el final y el tramo
+        # desde el principio hasta `posicion`.
+        return valores[self.posicion:].tolist() + valores[:self.posicion].tolist()
+
+# Consulta todos los servidores de la red a la vez, pero con como mucho `simultaneas` conexiones abiertas al mismo tiempo
+# (un semáforo), y cada consulta tiene un límite de `timeout` segundos. Tras cada ronda de consultas guarda en
+# `publicado` un diccionario nuevo con el estado y el historial de cada servidor; el servidor web solo lee ese atributo,
+# así que también funciona desde el hilo del servidor Flask. `consultar` y `reloj` se pueden sustituir en las pruebas.
+class MonitorRed:
+    # `servidores` es `SERVIDORES_RED` (nombre -> IP), `intervalo` los segundos entre rondas y `capacidad` cuántas
+    # consultas se guardan en el historial de cada servidor.
+    def __init__(self, servidores, intervalo, simultaneas, capacidad, timeout=5, consultar=_ping_servidor, reloj=time.time):
+        self.direcciones = {}  # Nombre -> (host, puerto)
+        for nombre, ip in servidores.items():
+            # `partition(':')` separa `mc.ejemplo.com:25566` en host y puerto; sin `:`, el puerto queda vacío.
+            host, _, puerto = ip.partition(':')
+            self.direcciones[nombre] = (host, int(puerto or PUERTO_MINECRAFT))
+        self.intervalo = intervalo  # Segundos entre el inicio de una ronda y el de la siguiente
+        self.simultaneas = simultaneas  # Consultas abiertas a la vez, como mucho
+        self.timeout = timeout  # Segundos que se espera a cada servidor
+        self.consultar = consultar  # Función que consulta un servidor (`_ping_servidor`)
+        self.reloj = reloj  # Función que da la hora actual
+        self.historiales = {nombre: HistorialServidor(capacidad) for nombre in servidores}  # Un historial por servidor
+        # Último resultado de cada servidor; hasta la primera ronda se consideran todos caídos.
+        self.ultimos = {nombre: {'en_linea': False} for nombre in servidores}
+        self.publicado = None  # Lo que muestra `/status`; None hasta que termina la primera ronda
+        # Contadores que se publican en `/metrics`.
+        self.rondas = 0
+        self.consultas = 0
+        self.fallos = 0
+        self.duracion_ronda = 0.0  # Segundos que tardó la última ronda
+        self.tarea = None  # Tarea de `_bucle`, mientras está en marcha
+        # El semáforo se crea en la primera ronda, ya dentro del bucle de eventos del bot.
+        self._semaforo = None
+
+    # Inicia las consultas periódicas en segundo plano.
+    def iniciar(self):
+        self.tarea = asyncio.create_task(self._bucle())
+
+    # Detiene las consultas (al cerrar el bot, por ejemplo).
+    def detener(self):
+        if self.tarea is not None:
+            self.tarea.cancel()  # La tarea termina en su siguiente `await`
+            self.tarea = None
+
+    # Bucle de consultas: una ronda cada `intervalo` segundos, contados desde el inicio de la ronda anterior para que
+    # el tiempo de las consultas no retrase las siguientes. Si una ronda tarda más que el intervalo, la siguiente
+    # empieza en cuanto termina, sin intentar recuperar las rondas perdidas.
+    async def _bucle(self):
+        # `loop.time()` es un reloj que solo avanza (no cambia si se ajusta la hora del sistema).
+        loop = asyncio.get_running_loop()
+        siguiente = loop.time()  # Hora de inicio de la próxima ronda
+        while True:
+            await self.ronda()
+            siguiente += self.intervalo
+            # La ronda tardó más que el intervalo: la siguiente empieza ya.
+            if siguiente < loop.time():
+                siguiente = loop.time()
+            await asyncio.sleep(siguiente - loop.time())  # Espera lo que falte hasta la próxima ronda
+
+    # Consulta un servidor esperando su turno en el semáforo. Cualquier error de red o respuesta inválida cuenta como caído.
+    async def _consultar(self, nombre):
+        host, puerto = self.direcciones[nombre]
+        # `async with self._semaforo` espera si ya hay `simultaneas` consultas abiertas, y deja el sitio libre al salir.
+        async with self._semaforo:
+            self.consultas += 1
+            try:
+                # `wait_for` cancela la consulta si tarda más de `timeout` segundos.
+                return await asyncio.wait_for(self.consultar(host, puerto), self.timeout)
+            except (OSError, asyncio.TimeoutError, EOFError, ValueError, KeyError, TypeError):
+                self.fallos += 1
+                return {'en_linea': False}  # Sin respuesta válida: el servidor cuenta como caído
+
+    # Consulta todos los servidores, guarda el resultado en sus historiales y publica el nuevo estado.
+    async def ronda(self):
+        if self._semaforo is None:
+            # `asyncio.Semaphore(n)` deja pasar a `n` tareas a la vez; las demás esperan a que una salga.
+            self._semaforo = asyncio.Semaphore(self.simultaneas)
+        loop = asyncio.get_running_loop()
+        inicio = loop.time()  # Para medir cuánto tarda la ronda
+        nombres = list(self.direcciones)
+        # `asyncio.gather` lanza todas las consultas a la vez y espera a que terminen todas. Devuelve los resultados
+        # en el mismo orden que `nombres`, aunque cada servidor responda cuando pueda.
+        resultados = await asyncio.gather(*map(self._consultar, nombres))
+        for nombre, estado in zip(nombres, resultados):
+            self.ultimos[nombre] = estado
+            if estado['en_linea']:
+                self.historiales[nombre].agregar(estado['latencia'], estado['jugadores'])
+            else:
+                self.historiales[nombre].agregar(-1, 0)  # Caído: sin latencia ni jugadores
+        self.rondas += 1
+        self.duracion_ronda = loop.time() - inicio
+        # Se sustituye el diccionario entero en vez de modificar el anterior: quien esté leyendo el antiguo desde otro
+        # hilo (el servidor Flask) lo termina de leer sin ver cambios a medias.
+        self.publicado = self._instantanea()
+
+    # Estado publicado en `/status`: el último resultado de cada servidor, su disponibilidad y latencia media en el historial,
+    # y el historial completo (latencias con `null` en las consultas sin respuesta, para poder dibujar la gráfica).
+    def _instantanea(self):
+        servidores = []  # Un diccionario por servidor, en el orden de `SERVIDORES_RED`
+        for nombre, (host, puerto) in self.direcciones.items():
+            estado = self.ultimos[nombre]  # Resultado de la última consulta
+            historial = self.historiales[nombre]
+            disponibilidad = historial.disponibilidad()
+            # `estado.get(...)` devuelve None en los servidores caídos, que no tienen versión ni jugadores.
+            servidores.append({
+                'nombre': nombre,
+                # El puerto solo se muestra si no es el de siempre.
+                'direccion': host if puerto == PUERTO_MINECRAFT else f'{host}:{puerto}',
+                'en_linea': estado['en_linea'],  # True o False
+                'version': estado.get('version'),  # Versión de Minecraft, por ejemplo "Paper 1.20.4"
+                'jugadores': estado.get('jugadores'),  # Jugadores conectados ahora
+                'maximo': estado.get('maximo'),  # Plazas del servidor
+                'latencia_ms': estado.get('latencia'),  # Lo que tardó en responder la última consulta
+                'disponibilidad': None if disponibilidad is None else round(disponibilidad, 4),  # Cuatro decimales bastan
+                'latencia_media_ms': historial.latencia_media(),  # Media de todo el historial
+                'historial': {
+                    # -1 (sin respuesta) pasa a ser None, que en JSON se escribe `null`.
+                    'latencia_ms': [None if latencia < 0 else latencia for latencia in historial.serie(historial.latencias)],
+                    'jugadores': historial.serie(historial.jugadores),  # Jugadores de cada consulta
+                },
+            })
+        return {
+            'actualizado': int(self.reloj()),  # Cuándo terminó la ronda, en segundos desde 1970
+            'intervalo_s': self.intervalo,  # Para saber cada cuánto se actualiza
+            # `True` cuenta como 1 al sumar: es el número de servidores en línea.
+            'en_linea': sum(servidor['en_linea'] for servidor in servidores),
+            'servidores': servidores,  # El detalle de cada servidor
+        }
+
+# Monitor de la red que usa el bot. Se inicia en `setup_hook` (o en el proceso principal en el modo cluster).
+red = MonitorRed(SERVIDORES_RED, INTERVALO_RED, CONSULTAS_RED_SIMULTANEAS, HISTORIAL_RED)
+
+# Catálogo de la tienda de Tebex
+# `+tienda` muestra los rangos y precios de la tienda, que se leen de la API Headless de Tebex
+# (`API_TEBEX` con el token público de la tienda en `TOKENS_TEBEX`).
+
+# Las descripciones de los paquetes de Tebex vienen en HTML; para Discord se quitan las etiquetas.
+ETIQUETA_HTML = re.compile(r'<[^>]+>')
+
+# Convierte la respuesta de la API (`{"data": [categoría con sus "packages"]}`) en una lista de
+# (nombre de la categoría, paquetes), con solo los datos que muestra el bot. Las categorías sin paquetes se omiten.
+def interpretar_catalogo(datos):
+    categorias = []
+    for categoria in datos['data']:
+        paquetes = [
+            {
+                'nombre': paquete['name'],
+                'precio': float(paquete['total_price']),
+                'moneda': paquete['currency'],
+                'descripcion': ' '.join(html.unescape(ETIQUETA_HTML.sub(' ', paquete.get('description') or '')).split()),
+            }
+            for paquete in categoria.get('packages') or []
+        ]
+        if paquetes:
+            categorias.append((categoria['name'], paquetes))
+    return categorias
+
+# Caché del catálogo de una tienda con la estrategia "stale-while-revalidate":
+# - Durante `frescura` segundos desde la última consulta, el catálogo se sirve de memoria sin preguntar a Tebex.
+# - Pasado ese tiempo, se sigue sirviendo al momento el catálogo guardado, aunque esté desfasado, y se lanza en segundo plano
+#   una sola consulta para actualizarlo. Así ninguna respuesta de `+tienda` espera a la tienda.
+# - Si todavía no hay nada guardado (el bot acaba de arrancar y la primera consulta sigue en curso), tampoco se espera:
+#   `obtener` devuelve None y `+tienda` responde con el enlace, en vez de esperar hasta `timeout` segundos.
+# - Las consultas son condicionales (`If-None-Match` con la ETag y `If-Modified-Since`): si nada cambió, Tebex responde
+#   304 sin cuerpo y no hay que descargar ni interpretar el catálogo otra vez.
+# - Cortocircuito: si la tienda falla o tarda más de `timeout` segundos `fallos_corte` veces seguidas, se deja de consultar
+#   durante `enfriamiento_corte` segundos y se sirve el último catálogo bueno. Después se prueba con una sola consulta;
+#   si vuelve a fallar, el corte se repite.
+class CatalogoTienda:
+    def __init__(self, url, frescura, timeout, fallos_corte, enfriamiento_corte, reloj=time.monotonic):
+        self.url = url
+        self.frescura = frescura
+        self.timeout = timeout
+        self.fallos_corte = fallos_corte
+        self.enfriamiento_corte = enfriamiento_corte
+        self.reloj = reloj
+        self.categorias = None
+        self.comprobado = None
+        self.etag = None
+        self.modificado = None
+        self.embeds = {}
+        self.consultas = 0
+        self.no_modificados = 0
+        self.errores = 0
+        self.cortes = 0
+        self.fallos_seguidos = 0
+        self._abierto_hasta = 0.0
+        self._actualizado = 0.0
+        self._consulta = None
+        self._sesion = None
+
+    @property
+    def abierto(self):
+        return self.reloj() < self._abierto_hasta
+
+    # Devuelve al momento el catálogo guardado (o None si todavía no se ha podido descargar nunca) y, si no hay nada
+    # guardado o está desfasado, lanza la consulta en segundo plano. Nunca espera a la tienda.
+    async def obtener(self):
+        if self.categorias is None or self.reloj() - self._actualizado >= self.frescura:
+            self.revalidar()
+        return self.categorias
+
+    # Lanza la consulta en segundo plano, salvo que ya haya una en curso (todas las peticiones comparten la misma)
+    # o el cortocircuito esté abierto.
+    def revalidar(self):
+        if self._consulta is None and not self.abierto:
+            self._consulta = asyncio.ensure_future(self._actualizar())
+
+    # Consulta la tienda. El catálogo guardado solo se reemplaza con una respuesta correcta; si algo falla se conserva.
+    # Al terminar, bien o mal, se descartan los embeds guardados para que reflejen el pie nuevo (hora o aviso de fallo).
+    async def _actualizar(self):
+        try:
+            if self._sesion is None:
+                self._sesion = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout))
+            cabeceras = {'Accept': 'application/json'}
+            if self.etag is not None:
+                cabeceras['If-None-Match'] = self.etag
+            if self.modificado is not None:
+                cabeceras['If-Modified-Since'] = self.modificado
+            self.consultas += 1
+            async with self._sesion.get(self.url, headers=cabeceras) as respuesta:
+                if respuesta.status == 304 and self.categorias is not None:
+                    self.no_modificados += 1
+                else:
+                    respuesta.raise_for_status()
+                    self.categorias = interpretar_catalogo(await respuesta.json(content_type=None))
+                    self.etag = respuesta.headers.get('ETag')
+                    self.modificado = respuesta.headers.get('Last-Modified')
+            self._actualizado = self.reloj()
+            self.comprobado = time.time()
+            self.fallos_seguidos = 0
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError, KeyError, TypeError):
+            self.errores += 1
+            self.fallos_seguidos += 1
+            if self.fallos_seguidos >= self.fallos_corte:
+                self._abierto_hasta = self.reloj() + self.enfriamiento_corte
+                self.cortes += 1
+        finally:
+            self.embeds.clear()
+            self._consulta = None
+
+    # Busca un paquete por su nombre sin distinguir mayúsculas: primero el nombre exacto y, si no, el primero que lo contenga.
+    def buscar(self, rango):
+        buscado = rango.casefold()
+        paquetes = [(categoria, paquete) for categoria, lista in self.categorias for paquete in lista]
+        for categoria, paquete in paquetes:
+            if paquete['nombre'].casefold() == buscado:
+                return categoria, paquete
+        for categoria, paquete in paquetes:
+            if buscado in paquete['nombre'].casefold():
+                return categoria, paquete
+        return None
+
+    # Embed del catálogo completo (sin `rango`) o de un paquete (None si no existe). Se guardan por tienda y paquete hasta la
+    # siguiente consulta, así que las respuestas repetidas no vuelven a construir ni serializar el embed. Las búsquedas que no
+    # encuentran nada no se guardan, para que textos arbitrarios no llenen la memoria.
+    def embed(self, tienda, rango=None):
+        encontrado = None
+        if rango is not None:
+            encontrado = self.buscar(rango)
+            if encontrado is None:
+                return None
+        clave = (tienda, encontrado and encontrado[1]['nombre'])
+        embed = self.embeds.get(clave)
+        if embed is None:
+            embed = self.embeds[clave] = embed_catalogo(self, tienda) if encontrado is None else embed_paquete(self, tienda, *encontrado)
+            embed.to_dict()
+        return embed
+
+    # Cancela la consulta en curso, si la hay, y cierra la sesión HTTP. El bot lo llama al cerrarse (ver `bot.close`).
+    async def cerrar(self):
+        consulta = self._consulta
+        if consulta is not None:
+            consulta.cancel()
+            # Se espera a que la consulta termine de cancelarse, para no cerrar la sesión mientras la usa.
+            await asyncio.gather(consulta, return_exceptions=True)
+        if self._sesion is not None:
+            await self._sesion.close()
+            self._sesion = None
+
+def formatear_precio(paquete):
+    return f"{paquete['precio']:.2f} {paquete['moneda']}"
+
+# Pie de los embeds de la tienda: la hora de la última consulta correcta y un aviso si las últimas han fallado.
+def pie_catalogo(catalogo):
+    texto = f"Precios comprobados a las {time.strftime('%H:%M', time.localtime(catalogo.comprobado))}"
+    if catalogo.fallos_seguidos:
+        texto += ' · la tienda no responde, pueden haber cambiado'
+    return texto
+
+# Embed con todos los rangos: un campo por categoría con el nombre y el precio de cada paquete.
+# Respeta los límites de Discord: 1024 caracteres por campo, 25 campos y 6000 caracteres en total
+# (se deja margen para el pie); lo que no cabe se resume con "…".
+def embed_catalogo(catalogo, tienda):
+    embed = EmbedCacheado(title='Tienda', url=tienda, description=f'Rangos y ventajas disponibles en {tienda}', color=discord.Color.purple())
+    restante = 5500 - len(embed.title) - len(embed.description)
+    for categoria, paquetes in catalogo.categorias:
+        lineas = []
+        for paquete in paquetes:
+            linea = f"**{discord.utils.escape_markdown(paquete['nombre'])}**: {formatear_precio(paquete)}"
+            if sum(map(len, lineas)) + len(lineas) + len(linea) > 1000:
+                lineas.append('…')
+                break
+            lineas.append(linea)
+        valor = '\n'.join(lineas)
+        nombre = categoria[:256]
+        if len(embed.fields) == 25 or len(nombre) + len(valor) > restante:
+            embed.add_field(name='…', value='Hay más rangos en la tienda.', inline=False)
+            break
+        restante -= len(nombre) + len(valor)
+        embed.add_field(name=nombre, value=valor, inline=False)
+    embed.set_footer(text=pie_catalogo(catalogo))
+    return embed
+
+# Embed con los detalles de un paquete: descripción, precio y categoría.
+def embed_paquete(catalogo, tienda, categoria, paquete):
+    descripcion = paquete['descripcion']
+    embed = EmbedCacheado(
+        title=paquete['nombre'][:256],
+        url=tienda,
+        description=(descripcion if len(descripcion) <= 2000 else descripcion[:2000] + '…') or None,
+        color=discord.Color.purple()
     )
+    embed.add_field(name='Precio', value=formatear_precio(paquete), inline=True)
+    embed.add_field(name='Categoría', value=categoria[:1024], inline=True)
+    embed.set_footer(text=pie_catalogo(catalogo))
+    return embed
+
+# Catálogos por token de Tebex: los servidores de Discord que usan la misma tienda comparten caché.
+catalogos_tienda = {}
+
+# Catálogo de la tienda configurada en un servidor (`configuracion.tienda`), o None si no tiene token en `TOKENS_TEBEX`.
+def catalogo_de(tienda):
+    token = TOKENS_TEBEX.get(tienda)
+    if not token:
+        return None
+    catalogo = catalogos_tienda.get(token)
+    if catalogo is None:
+        catalogo = catalogos_tienda[token] = CatalogoTienda(
+            API_TEBEX.format(token=token), FRESCURA_TIENDA, TIMEOUT_TIENDA, FALLOS_CORTE_TIENDA, ENFRIAMIENTO_CORTE_TIENDA
+        )
+    return catalogo
+
+# Cada catálogo tiene su propia sesión HTTP (`aiohttp.ClientSession`), que hay que cerrar antes de que termine el bucle de
+# eventos; si no, aiohttp avisa de una sesión sin cerrar al salir. Se envuelve `bot.close` (lo llama `bot.run` al terminar,
+# también con Ctrl+C) para cerrar los catálogos después de desconectar el bot, aunque la desconexión falle.
+_cerrar_bot = bot.close
+
+async def _cerrar_bot_y_tiendas():
+    try:
+        await _cerrar_bot()
+    finally:
+        for catalogo in catalogos_tienda.values():
+            await catalogo.cerrar()
+
+bot.close = _cerrar_bot_y_tiendas
+
+
+# Cliente RCON
+# Cada paquete RCON es: longitud (4 bytes), identificador (4 bytes), tipo (4 bytes), texto y dos bytes nulos,
+# con los números en little-endian (`'<i'` en `struct`). Tipos: 3 = iniciar sesión, 2 = comando, 0 = respuesta.
+# Las respuestas largas llegan partidas en varios paquetes de `RCON_FRAGMENTO` bytes (no caracteres) con el mismo
+# identificador. Como el servidor corta por bytes, un carácter de varios bytes (`§`, `é`...) puede quedar partido entre
+# dos paquetes, así que el texto solo se decodifica cuando se tienen todos.
+# El protocolo no indica cuál es el último paquete. Si una respuesta mide justo un múltiplo de 4096 bytes, su último
+# paquete también mide 4096 y no hay forma de saber que no viene otro. Por eso, detrás de cada comando se envía un
+# paquete "centinela" de tipo 0 (`RCON_RESPUESTA`): el servidor responde a todo lo que no entiende con un
+# "Unknown request", y como atiende los paquetes de cada conexión en orden, esa respuesta llega siempre después de la
+# última parte de la respuesta del comando.
+RCON_LOGIN = 3
+RCON_COMANDO = 2
+RCON_RESPUESTA = 0
+RCON_FRAGMENTO = 4096
+
+# Error de RCON (sin conexión, contraseña incorrecta, tiempo agotado...). Los comandos lo muestran al staff tal cual.
+class ErrorRcon(Exception):
+    pass
+
+def _paquete_rcon(identificador, tipo, texto):
+    cuerpo = struct.pack('<ii', identificador, tipo) + texto.encode('utf-8') + b'\x00\x00'
+    return struct.pack('<i', len(cuerpo)) + cuerpo
+
+# Lee un paquete completo y devuelve su identificador, su tipo y su contenido en bytes, sin decodificar.
+# Una longitud imposible indica que la conexión está desincronizada.
+async def _leer_paquete_rcon(lector):
+    longitud, = struct.unpack('<i', await lector.readexactly(4))
+    if not 10 <= longitud <= RCON_FRAGMENTO * 4 + 10:
+        raise ValueError(f'Paquete RCON de longitud inválida: {longitud}')
+    datos = await lector.readexactly(longitud)
+    identificador, tipo = struct.unpack('<ii', datos[:8])
+    return identificador, tipo, datos[8:-2]
+
+# Una conexión RCON con pipelining: se pueden enviar varios comandos sin esperar a la respuesta del anterior.
+# Cada comando lleva un identificador distinto y espera en un futuro de `_pendientes`; la tarea `_recibir` lee las
+# respuestas según llegan y completa el futuro con el mismo identificador. Así, 500 comandos no cuestan 500 viajes
+# de ida y vuelta al servidor, sino casi uno.
+# `_hueco` limita los comandos en vuelo a la vez, para no llenar el búfer del servidor.
+# Si la conexión se pierde, `_recibir` termina y todos los comandos pendientes fallan con `ErrorRcon`.
+class ConexionRcon:
+    def __init__(self, lector, escritor, timeout, maximo_en_vuelo):
+        self.timeout = timeout
+        self._lector = lector
+        self._escritor = escritor
+        self._pendientes = {}
+        self._partes = {}
+        # Identificador de cada centinela en vuelo -> identificador del comando al que sigue.
+        self._centinelas = {}
+        self._siguiente = 0
+        self._hueco = asyncio.Semaphore(maximo_en_vuelo)
+        self._tarea = asyncio.create_task(self._recibir())
+
+    # Abre la conexión e inicia sesión con la contraseña. El servidor responde con el identificador -1 si es incorrecta.
+    # Cada paso tiene su límite de tiempo, así un servidor lento nunca deja al bot esperando indefinidamente.
+    @classmethod
+    async def abrir(cls, host, puerto, contrasena, timeout, maximo_en_vuelo=64):
+        lector, escritor = await asyncio.wait_for(asyncio.open_connection(host, puerto), timeout)
+        try:
+            escritor.write(_paquete_rcon(0, RCON_LOGIN, contrasena))
+            await asyncio.wait_for(escritor.drain(), timeout)
+            identificador, _, _ = await asyncio.wait_for(_leer_paquete_rcon(lector), timeout)
+            if identificador == -1:
+                raise ErrorRcon('contraseña incorrecta')
+        except BaseException:
+            escritor.close()
+            raise
+        return cls(lector, escritor, timeout, maximo_en_vuelo)
+
+    @property
+    def abierta(self):
+        return not self._tarea.done()
+
+    # Envía un comando seguido de su centinela y espera la respuesta como mucho `timeout` segundos.
+    # Cada comando usa dos identificadores seguidos: el impar para el comando y el par para su centinela.
+    # Los dos paquetes se escriben juntos, así nunca se cuela el paquete de otro comando entre ellos.
+    # Si el tiempo se agota o el comando se cancela, `finally` borra su futuro, sus partes y su centinela, y la respuesta
+    # que llegue más tarde se descarta (ya no hay futuro con ese identificador).
+    async def ejecutar(self, comando):
+        async with self._hueco:
+            if not self.abierta:
+                raise ErrorRcon('Se perdió la conexión RCON')
+            self._siguiente += 2
+            identificador = self._siguiente - 1
+            centinela = self._siguiente
+            futuro = asyncio.get_running_loop().create_future()
+            self._pendientes[identificador] = futuro
+            self._centinelas[centinela] = identificador
+            try:
+                self._escritor.write(_paquete_rcon(identificador, RCON_COMANDO, comando) + _paquete_rcon(centinela, RCON_RESPUESTA, ''))
+                await asyncio.wait_for(self._escritor.drain(), self.timeout)
+                return await asyncio.wait_for(futuro, self.timeout)
+            except asyncio.TimeoutError:
+                raise ErrorRcon(f'El servidor no respondió en {self.timeout} s') from None
+            except OSError as error:
+                raise ErrorRcon(f'Se perdió la conexión RCON: {error}') from error
+            finally:
+                self._pendientes.pop(identificador, None)
+                self._partes.pop(identificador, None)
+                self._centinelas.pop(centinela, None)
+
+    # Lee respuestas hasta que se cierre la conexión. Cada fragmento se guarda en `_partes`, en bytes, y la respuesta
+    # se completa en cuanto se sabe que no quedan más:
+    # - con un fragmento de menos de `RCON_FRAGMENTO` bytes, que siempre es el último (el caso normal: no hay que
+    #   esperar al centinela);
+    # - o con la respuesta al centinela, si todos los fragmentos medían justo `RCON_FRAGMENTO` bytes.
+    # Si llega la respuesta al centinela y no hay ningún fragmento guardado, la respuesta del comando ya se completó
+    # antes (o el comando no respondió nada), así que se ignora.
+    # Las partes se unen antes de decodificar, así los caracteres partidos entre dos paquetes se leen bien.
+    # Los fragmentos con identificadores que ya no esperan respuesta (de comandos que agotaron su tiempo o se cancelaron)
+    # se descartan al llegar, sin guardarlos: `ejecutar` ya borró sus partes, y una respuesta tardía que solo tuviera
+    # fragmentos de `RCON_FRAGMENTO` bytes se quedaría para siempre en `_partes`, porque su centinela ya no se reconoce.
+    async def _recibir(self):
+        try:
+            while True:
+                identificador, _, cuerpo = await _leer_paquete_rcon(self._lector)
+                if identificador in self._centinelas:
+                    identificador = self._centinelas.pop(identificador)
+                    if identificador not in self._partes:
+                        continue
+                elif identificador not in self._pendientes:
+                    continue
+                else:
+                    self._partes.setdefault(identificador, []).append(cuerpo)
+                    if len(cuerpo) >= RCON_FRAGMENTO:
+                        continue
+                partes = self._partes.pop(identificador)
+                futuro = self._pendientes.get(identificador)
+                if futuro is not None and not futuro.done():
+                    futuro.set_result(b''.join(partes).decode('utf-8', 'replace'))
+        except (OSError, EOFError, ValueError, struct.error):
+            pass
+        finally:
+            self._escritor.close()
+            for futuro in self._pendientes.values():
+                if not futuro.done():
+                    futuro.set_exception(ErrorRcon('Se perdió la conexión RCON'))
+
+    def cerrar(self):
+        self._tarea.cancel()
+
+# Pool de conexiones RCON
+# Mantiene hasta `conexiones` conexiones abiertas y reparte los comandos entre ellas por turnos.
+# Las conexiones se abren la primera vez que se necesitan y se vuelven a abrir si se pierden.
+# Si no se puede conectar, se espera cada vez más antes de volver a intentarlo (0.5 s, 1 s, 2 s... hasta
+# `espera_maxima`); mientras tanto, los comandos fallan al momento en lugar de esperar a que pase el tiempo de conexión.
+# El candado de cada conexión evita que varios comandos intenten abrir la misma a la vez.
+class PoolRcon:
+    def __init__(self, host, puerto, contrasena, conexiones, timeout, espera_maxima=30):
+        self.host = host
+        self.puerto = puerto
+        self.contrasena = contrasena
+        self.timeout = timeout
+        self.espera_maxima = espera_maxima
+        self.comandos = 0
+        self.errores = 0
+        self.reconexiones = 0
+        self._conexiones = [None] * conexiones
+        self._candados = [asyncio.Lock() for _ in range(conexiones)]
+        self._turno = 0
+        self._espera = 0.0
+        self._proximo_intento = 0.0
+
+    @property
+    def configurado(self):
+        return bool(self.contrasena)
+
+    async def _obtener_conexion(self):
+        indice = self._turno
+        self._turno = (indice + 1) % len(self._conexiones)
+        conexion = self._conexiones[indice]
+        if conexion is not None and conexion.abierta:
+            return conexion
+        async with self._candados[indice]:
+            # Otro comando pudo abrir la conexión mientras se esperaba el candado.
+            conexion = self._conexiones[indice]
+            if conexion is not None and conexion.abierta:
+                return conexion
+            espera = self._proximo_intento - time.monotonic()
+            if espera > 0:
+                raise ErrorRcon(f'Servidor RCON no disponible; se reintentará en {math.ceil(espera)} s')
+            try:
+                nueva = await ConexionRcon.abrir(self.host, self.puerto, self.contrasena, self.timeout)
+            except (OSError, EOFError, ValueError, asyncio.TimeoutError, ErrorRcon) as error:
+                self._espera = min(self.espera_maxima, self._espera * 2 or 0.5)
+                self._proximo_intento = time.monotonic() + self._espera
+                raise ErrorRcon(f'No se pudo conectar por RCON: {error or type(error).__name__}') from error
+            if conexion is not None:
+                self.reconexiones += 1
+            self._espera = 0.0
+            self._conexiones[indice] = nueva
+            return nueva
+
+    # Ejecuta un comando de consola y devuelve la respuesta del servidor. Lanza `ErrorRcon` si falla.
+    # Los comandos que fallan no se reintentan, porque pudieron llegar a ejecutarse (por ejemplo, un ban).
+    async def ejecutar(self, comando):
+        if not self.configurado:
+            raise ErrorRcon('RCON no está configurado (falta RCON_CONTRASENA)')
+        self.comandos += 1
+        try:
+            conexion = await self._obtener_conexion()
+            return await conexion.ejecutar(comando)
+        except ErrorRcon:
+            self.errores += 1
+            raise
+
+    # Ejecuta muchos comandos a la vez, repartidos entre las conexiones y con pipelining en cada una.
+    # Devuelve las respuestas en el mismo orden; los comandos que fallaron aparecen como su excepción.
+    async def ejecutar_varios(self, comandos):
+        return await asyncio.gather(*(self.ejecutar(comando) for comando in comandos), return_exceptions=True)
+
+    def cerrar(self):
+        for conexion in self._conexiones:
+            if conexion is not None:
+                conexion.cerrar()
+        self._conexiones = [None] * len(self._conexiones)
+
+# Se crea el pool; no se conecta hasta el primer comando de consola.
+rcon = PoolRcon(RCON_HOST, RCON_PUERTO, RCON_CONTRASENA, RCON_CONEXIONES, RCON_TIMEOUT)
+
+# Sigue un archivo de log como `tail -F`: devuelve las líneas nuevas a medida que se escriben, sin volver a leer
+# lo anterior. Se lee por bloques de `bloque` bytes en un hilo aparte, para no parar el bucle de eventos.
+# El servidor de Minecraft escribe el chat, las entradas, las salidas y las muertes en `logs/latest.log`; el puente del
+# chat (`PuenteChat`, más abajo) usa esta clase para enterarse de cada línea nueva sin tener que leer el archivo entero.
+class SeguidorLog:
+    # `ruta` es el archivo que se sigue e `intervalo` los segundos que se espera antes de volver a mirar cuando no hay
+    # nada nuevo. Leer el archivo en bloques grandes (64 KiB por defecto) hace pocas llamadas al sistema aunque el
+    # servidor escriba muchas líneas de golpe.
+    def __init__(self, ruta, intervalo, bloque=65536, maximo_linea=16384):
+        self.ruta = ruta  # Ruta del log del servidor de Minecraft
+        self.intervalo = intervalo  # Segundos de espera cuando no hay líneas nuevas
+        self.bloque = bloque  # Bytes que se leen de cada vez
+        # Una línea sin terminar más larga que esto se descarta, para no acumular memoria sin límite.
+        self.maximo_linea = maximo_linea
+        # Cuántas veces se ha detectado que el log rotó o se truncó; sirve para las pruebas y para diagnosticar.
+        self.rotaciones = 0
+
+    # Abre el log. La primera vez se empieza por el final (no se reenvía el chat antiguo); los archivos nuevos
+    # tras una rotación se leen desde el principio.
+    def _abrir(self, desde_inicio):
+        # El archivo se abre en modo binario (`'rb'`): así los bloques se pueden cortar en cualquier byte y la
+        # conversión a texto se hace línea a línea, cuando ya se sabe dónde termina cada una.
+        try:
+            archivo = open(self.ruta, 'rb')  # Abre el log en modo binario
+        except OSError:
+            # Si el archivo no existe (el servidor todavía no ha arrancado, por ejemplo), se devuelve None y
+            # `lineas` lo vuelve a intentar pasado `intervalo`.
+            return None
+        # `seek(0, os.SEEK_END)` coloca la posición de lectura al final del archivo.
+        if not desde_inicio:
+            archivo.seek(0, os.SEEK_END)  # Salta lo que ya estaba escrito
+        return archivo  # Archivo abierto, listo para leer
+
+    # Comprueba si el log cambió al llegar al final: 'rotado' si la ruta apunta a otro archivo (el servidor
+    # renombró el log y creó uno nuevo), 'truncado' si el archivo se vació, None si no cambió.
+    def _cambio(self, archivo):
+        # `os.stat` mira el archivo que hay ahora en la ruta; `os.fstat` mira el que se tiene abierto.
+        try:
+            actual = os.stat(self.ruta)  # Archivo que hay ahora en la ruta
+        except OSError:
+            # En plena rotación puede no existir todavía el archivo nuevo; se vuelve a mirar más tarde.
+            return None
+        abierto = os.fstat(archivo.fileno())  # Archivo que se está leyendo
+        # El número de inodo (`st_ino`) y el dispositivo (`st_dev`) identifican un archivo aunque cambie de nombre: si
+        # no coinciden, la ruta ya es otro archivo.
+        if (actual.st_ino, actual.st_dev) != (abierto.st_ino, abierto.st_dev):
+            return 'rotado'  # El servidor creó un log nuevo
+        # Si el archivo es más pequeño que lo que ya se ha leído, alguien lo vació y empezó a escribir de nuevo.
+        if actual.st_size < archivo.tell():
+            return 'truncado'  # El mismo archivo, vaciado
+        return None  # Sin cambios: solo no hay líneas nuevas todavía
+
+    # Generador asíncrono (`async for linea in seguidor.lineas()`) que devuelve cada línea completa del log, sin el
+    # salto de línea. No termina nunca por sí mismo: se detiene cancelando la tarea que lo recorre.
+    async def lineas(self, desde_inicio=False):
+        # El bucle de eventos hace falta para `run_in_executor`, que ejecuta las lecturas del disco en un hilo aparte.
+        loop = asyncio.get_running_loop()
+        archivo = None  # Todavía no hay ningún archivo abierto
+        # Trozo de la última línea leída que todavía no terminaba en salto de línea.
+        resto = b''
+        try:
+            while True:
+                # Sin archivo abierto (al empezar o tras una rotación), se intenta abrir. Desde la segunda vez los
+                # archivos siempre se leen desde el principio: son archivos nuevos que el servidor acaba de crear.
+                if archivo is None:
+                    archivo = await loop.run_in_executor(None, self._abrir, desde_inicio)  # Abre en otro hilo
+                    desde_inicio = True  # Los siguientes archivos se leen enteros
+                    if archivo is None:
+                        await asyncio.sleep(self.intervalo)  # El log no existe todavía: se espera
+                        continue
+                # Se lee el siguiente bloque. `read` devuelve `b''` cuando se llega al final del archivo.
+                datos = await loop.run_in_executor(None, archivo.read, self.bloque)
+                if datos:
+                    # Se separa en líneas. El último trozo no termina en salto de línea (o está vacío), así que se
+                    # guarda en `resto` y se completa con el bloque siguiente.
+                    lineas = (resto + datos).split(b'\n')
+                    resto = lineas.pop()  # Línea todavía a medias
+                    if len(resto) > self.maximo_linea:
+                        resto = b''  # Demasiado larga: se descarta
+                    # Cada línea se convierte a texto; los bytes que no son UTF-8 válido se cambian por "�" en vez de
+                    # dar error, y se quita el `\r` de los logs escritos con saltos de línea de Windows.
+                    for linea in lineas:
+                        yield linea.rstrip(b'\r').decode('utf-8', 'replace')
+                    continue  # Puede haber más datos: se vuelve a leer sin esperar
+                # Al final del archivo: antes de esperar, se mira si el log rotó o se truncó. Lo que quedara del
+                # archivo anterior ya se leyó, porque solo se comprueba al llegar a su final.
+                cambio = await loop.run_in_executor(None, self._cambio, archivo)
+                if cambio is not None:
+                    self.rotaciones += 1
+                    # La línea a medias del archivo anterior ya no se va a completar: se descarta.
+                    resto = b''
+                    # Si rotó, se cierra el archivo antiguo y en la siguiente vuelta se abre el nuevo; si se truncó,
+                    # se vuelve al principio del mismo archivo.
+                    if cambio == 'rotado':
+                        archivo.close()  # Cierra el log antiguo
+                        archivo = None  # El nuevo se abre en la siguiente vuelta
+                    else:
+                        archivo.seek(0)  # Vuelve al principio del archivo vaciado
+                    continue
+                # No hay nada nuevo: se espera `intervalo` segundos sin bloquear al resto del bot.
+                await asyncio.sleep(self.intervalo)
+        finally:
+            # Al cancelar la tarea (o si algo falla) se cierra el archivo, para no dejarlo abierto.
+            if archivo is not None:
+                archivo.close()
+
+# Formato de las líneas del log de Paper/Spigot, por ejemplo:
+#   [12:34:56] [Async Chat Thread - #0/INFO]: <Steve> hola
+#   [12:34:56] [Server thread/INFO]: Steve joined the game
+# Desde la 1.19 los mensajes sin firmar llevan delante "[Not Secure] ".
+# Las expresiones regulares se compilan una sola vez con `re.compile`, al cargar el bot, y se reutilizan en cada línea.
+# `\w{3,16}` es un nombre de jugador de Minecraft: entre 3 y 16 letras, números o guiones bajos.
+LINEA_LOG = re.compile(r'\[[\d:]+\] \[(?:Server thread|Async Chat Thread - #\d+)/INFO\]: (?:\[Not Secure\] )?(.*)')
+CHAT_LOG = re.compile(r'<(\w{3,16})> (.*)')  # `<jugador> mensaje`
+ENTRADA_LOG = re.compile(r'(\w{3,16}) joined the game')  # Un jugador entra al servidor
+SALIDA_LOG = re.compile(r'(\w{3,16}) left the game')  # Un jugador sale del servidor
+# Comienzos de los mensajes de muerte de Minecraft (después del nombre del jugador).
+# Minecraft tiene muchos mensajes de muerte distintos ("was slain by", "fell from a high place", "drowned"...); basta con
+# reconocer cómo empiezan para saber que la línea es una muerte y enviarla tal cual.
+MUERTE_LOG = re.compile(
+    r'(\w{3,16}) (?:was |fell |drowned|died|blew up|burned to death|went up in flames|hit the ground|starved|suffocated'
+    r'|tried to swim in lava|walked into|experienced kinetic energy|froze to death|withered away|discovered the floor was lava'
+    r"|didn't want to live|went off with a bang)"
+)
+
+# Convierte una línea del log en el texto que se envía a Discord, o None si no es del chat, una entrada, una salida
+# o una muerte. Se escapa el markdown para que un jugador no pueda dar formato al mensaje desde el juego.
+def interpretar_linea_log(linea):
+    # `LINEA_LOG.match` comprueba que la línea tiene el formato de un mensaje del servidor y separa la hora y el hilo
+    # del texto. Las líneas de otros hilos (avisos, errores, plugins) no coinciden y se ignoran.
+    coincidencia = LINEA_LOG.match(linea)
+    if coincidencia is None:
+        return None  # No es un mensaje del servidor
+    # `group(1)` es lo que va después de "INFO]: ", el texto del mensaje.
+    texto = coincidencia.group(1)
+    # Mensaje del chat: `<Steve> hola`. `fullmatch` exige que el patrón ocupe todo el texto.
+    # `escape_markdown` pone una barra delante de `*`, `_`, `~`... para que Discord los muestre tal cual.
+    chat = CHAT_LOG.fullmatch(texto)
+    if chat is not None:
+        return f'**{discord.utils.escape_markdown(chat.group(1))}**: {discord.utils.escape_markdown(chat.group(2))}'
+    # Entrada al servidor: `Steve joined the game`.
+    entrada = ENTRADA_LOG.fullmatch(texto)
+    if entrada is not None:
+        return f'**{discord.utils.escape_markdown(entrada.group(1))}** entró al servidor'
+    # Salida del servidor: `Steve left the game`.
+    salida = SALIDA_LOG.fullmatch(texto)
+    if salida is not None:
+        return f'**{discord.utils.escape_markdown(salida.group(1))}** salió del servidor'
+    # Muertes: el mensaje de Minecraft se envía entero, en cursiva. Aquí basta con `match`, que solo mira el
+    # principio, porque el final del mensaje cambia según la causa de la muerte.
+    if MUERTE_LOG.match(texto) is not None:
+        return f'*{discord.utils.escape_markdown(texto)}*'
+    return None  # Otro mensaje del servidor (comandos, avisos...): no se envía
+
+# Puente del chat: una tarea lee el log y mete las líneas en una cola de tamaño máximo `maximo_cola`; otra las saca
+# y las envía juntas. Cada mensaje junta todas las líneas que llegan en `ventana` segundos, sin pasar de
+# `maximo_mensaje` caracteres (el límite de Discord). Mientras se envía un mensaje (o se espera por el límite de
+# Discord) las líneas se siguen acumulando, así que con más movimiento los mensajes llevan más líneas.
+# Si la cola se llena, la tarea que lee espera a que haya sitio: el log deja de leerse y las líneas esperan en el
+# archivo, no en memoria.
+class PuenteChat:
+    # `seguidor` es el `SeguidorLog` del que salen las líneas. La cola (`asyncio.Queue`) comunica las dos tareas: una
+    # mete líneas y la otra las saca, y con un tamaño máximo la que mete espera cuando está llena.
+    def __init__(self, seguidor, ventana, maximo_cola, maximo_mensaje=2000):
+        self.seguidor = seguidor  # De dónde salen las líneas del log
+        self.ventana = ventana  # Segundos que se juntan líneas en un mismo mensaje
+        self.maximo_mensaje = maximo_mensaje  # Caracteres como mucho por mensaje de Discord
+        self.cola = asyncio.Queue(maximo_cola)  # Líneas esperando a enviarse
+        # Contadores que se publican en `/metrics`: líneas y mensajes enviados, y líneas que no se pudieron enviar.
+        self.lineas = 0
+        self.mensajes = 0
+        self.descartadas = 0
+        # Las dos tareas en marcha, para poder cancelarlas en `detener`.
+        self._tareas = []
+
+    # `enviar` es la función que envía un texto a Discord (en el bot, `Webhook.send`).
+    def iniciar(self, enviar, desde_inicio=False):
+        self.enviar = enviar  # Se guarda para usarla en `_entregar`
+        # `asyncio.create_task` ejecuta cada corrutina en segundo plano, a la vez que el resto del bot.
+        self._tareas = [
+            asyncio.create_task(self._leer(desde_inicio)),  # Lee el log y llena la cola
+            asyncio.create_task(self._entregar()),  # Vacía la cola y envía los mensajes
+        ]
+
+    # Cancela las dos tareas. La que lee cierra el archivo del log al cancelarse (ver `SeguidorLog.lineas`).
+    def detener(self):
+        for tarea in self._tareas:
+            tarea.cancel()  # La tarea termina en su siguiente `await`
+
+    # Tarea que lee: recorre las líneas del log y mete en la cola las que hay que enviar. Cada texto se recorta al
+    # tamaño máximo de un mensaje, para que siempre quepa al menos una línea en cada uno.
+    async def _leer(self, desde_inicio):
+        async for linea in self.seguidor.lineas(desde_inicio):
+            texto = interpretar_linea_log(linea)  # None si la línea no se envía a Discord
+            if texto is not None:
+                # `put` espera si la cola está llena; mientras tanto no se leen más líneas del log.
+                await self.cola.put(texto[:self.maximo_mensaje])
+
+    # Siguiente línea de la cola, esperando como mucho hasta `limite` (hora del bucle). None si no llegó ninguna.
+    async def _siguiente(self, limite):
+        # Si ya hay líneas esperando, se saca una sin esperar.
+        if not self.cola.empty():
+            return self.cola.get_nowait()
+        # Si no, se espera lo que quede de la ventana. Pasada la hora límite, el mensaje se envía con lo que tenga.
+        restante = limite - asyncio.get_running_loop().time()
+        if restante <= 0:
+            return None  # La ventana ya se cerró
+        # `asyncio.wait_for` deja de esperar pasado `restante` y lanza `TimeoutError`: no llegó nada más a tiempo.
+        try:
+            return await asyncio.wait_for(self.cola.get(), restante)
+        except asyncio.TimeoutError:
+            return None  # No llegó ninguna línea antes de cerrar la ventana
+
+    # Tarea que envía: junta en un mensaje todas las líneas de la ventana y lo envía, una y otra vez.
+    async def _entregar(self):
+        # Línea que no cupo en el mensaje anterior; empieza el siguiente.
+        sobrante = None
+        while True:
+            # El mensaje empieza con la línea sobrante o, si no la hay, con la siguiente de la cola (aquí se espera sin
+            # límite de tiempo: si nadie escribe en el juego, no hay nada que enviar).
+            lote = [sobrante if sobrante is not None else await self.cola.get()]
+            sobrante = None  # La línea sobrante ya está en el lote
+            # `longitud` lleva la cuenta de los caracteres del mensaje, para no pasar de `maximo_mensaje`.
+            longitud = len(lote[0])
+            # La ventana empieza con la primera línea: las que lleguen en los `ventana` segundos siguientes van juntas.
+            limite = asyncio.get_running_loop().time() + self.ventana
+            while True:
+                texto = await self._siguiente(limite)  # Siguiente línea de la ventana, o None
+                if texto is None:
+                    break  # Se cerró la ventana: se envía el lote
+                # El `+ 1` es el salto de línea que separa cada línea de la anterior. Si no cabe, la línea se guarda
+                # para el mensaje siguiente y este se envía ya.
+                if longitud + 1 + len(texto) > self.maximo_mensaje:
+                    sobrante = texto
+                    break
+                lote.append(texto)  # Cabe: se añade al mensaje
+                longitud += 1 + len(texto)
+            # discord.py ya espera y reintenta cuando Discord responde con un límite de peticiones (429); si el envío
+            # falla por otra causa, las líneas se pierden pero el puente sigue.
+            try:
+                await self.enviar('\n'.join(lote))  # Un solo mensaje con todas las líneas, una por renglón
+            except (discord.HTTPException, aiohttp.ClientError) as error:
+                self.descartadas += len(lote)
+                bitacora.warning(f'No se pudo enviar el chat de Minecraft a Discord: {error}')
+                continue  # Se sigue con el siguiente lote
+            # Envío correcto: se cuentan las líneas y el mensaje para `/metrics`.
+            self.lineas += len(lote)
+            self.mensajes += 1
+
+# Se crea el puente; no lee el log hasta que se inicia en `setup_hook`.
+# `ARCHIVO_LOG_MINECRAFT` e `INTERVALO_LOG` configuran el seguidor; `VENTANA_CHAT` y `MAXIMO_COLA_CHAT`, el puente.
+puente_chat = PuenteChat(SeguidorLog(ARCHIVO_LOG_MINECRAFT, INTERVALO_LOG), VENTANA_CHAT, MAXIMO_COLA_CHAT)
+
+# Estadísticas que se pueden consultar con `+top`: nombre -> (título, claves, divisor, unidad).
+# - `claves`: pares (categoría, estadística) del archivo de Minecraft que se suman. Así se cuentan juntos, por ejemplo,
+#   los diamantes de piedra y de pizarra profunda, o el tiempo jugado con su nombre antiguo (`play_one_minute`,
+#   hasta la 1.16) y el nuevo (`play_time`, desde la 1.17).
+# - `divisor` y `unidad`: el tiempo se guarda en ticks (72000 por hora) y las distancias en centímetros.
+# El nombre de cada entrada es lo que se escribe en el comando: `+top tiempo`, `+top muertes`...
+# Para añadir una estadística nueva basta con añadir una línea aquí; el índice y los comandos la recogen solos.
+ESTADISTICAS = {
+    'tiempo': ('Tiempo jugado', (('minecraft:custom', 'minecraft:play_time'), ('minecraft:custom', 'minecraft:play_one_minute')), 72000, 'h'),
+    'muertes': ('Muertes', (('minecraft:custom', 'minecraft:deaths'),), 1, ''),
+    'asesinatos': ('Jugadores asesinados', (('minecraft:custom', 'minecraft:player_kills'),), 1, ''),
+    'bichos': ('Criaturas asesinadas', (('minecraft:custom', 'minecraft:mob_kills'),), 1, ''),
+    'saltos': ('Saltos', (('minecraft:custom', 'minecraft:jump'),), 1, ''),
+    'distancia': ('Distancia recorrida', (('minecraft:custom', 'minecraft:walk_one_cm'), ('minecraft:custom', 'minecraft:sprint_one_cm')), 100000, 'km'),
+    'diamantes': ('Diamantes minados', (('minecraft:mined', 'minecraft:diamond_ore'), ('minecraft:mined', 'minecraft:deepslate_diamond_ore')), 1, ''),
+}
+
+# Formatea un valor como se escribe en español: puntos para los miles y coma para los decimales.
+def formatear_estadistica(estadistica, valor):
+    # Solo hacen falta el divisor y la unidad; `_` descarta el título y las claves.
+    _, _, divisor, unidad = ESTADISTICAS[estadistica]
+    # Los contadores (muertes, saltos...) se muestran enteros: `1,234` en inglés pasa a `1.234`.
+    if divisor == 1:
+        return f'{valor:,}'.replace(',', '.')
+    # El tiempo y la distancia se dividen y se muestran con un decimal y su unidad, por ejemplo `1 234,5 h`.
+    # Primero se cambian las comas de los miles por espacios, y después el punto decimal por una coma.
+    return f'{valor / divisor:,.1f} {unidad}'.replace(',', ' ').replace('.', ',')
+
+# Índice de las estadísticas de todos los jugadores, para responder `+top` y `+stats` sin leer los archivos.
+# Cada estadística se guarda en un array de enteros (`array('q')`, 8 bytes por jugador) en el que cada jugador
+# ocupa siempre la misma posición (`posiciones`), en vez de un diccionario por jugador: con decenas de miles de
+# jugadores ocupa una fracción de la memoria y recorrer una estadística es recorrer un bloque de memoria seguido.
+# Cada actualización solo vuelve a leer los archivos cuya fecha de modificación o tamaño cambió (`modificados`).
+class IndiceEstadisticas:
+    # `directorio` es la carpeta `world/stats` del servidor, con un archivo JSON por jugador (`<uuid>.json`), y
+    # `usercache` el archivo `usercache.json`, donde Minecraft guarda el nombre de cada UUID.
+    # `estadisticas` se puede cambiar para las pruebas; el bot usa siempre `ESTADISTICAS`.
+    def __init__(self, directorio, usercache, estadisticas=ESTADISTICAS):
+        self.directorio = directorio  # Carpeta con los archivos de estadísticas
+        self.usercache = usercache  # Archivo con los nombres de los jugadores
+        self.estadisticas = estadisticas  # Qué estadísticas se guardan (ver `ESTADISTICAS`)
+        self.uuids = []  # UUID del jugador de cada posición de los arrays
+        self.posiciones = {}  # UUID -> posición del jugador en los arrays
+        self.modificados = {}  # UUID -> (fecha de modificación, tamaño) del archivo cuando se leyó
+        # Un array por estadística; la posición `i` de cada uno es el valor del jugador `self.uuids[i]`.
+        self.valores = {estadistica: array.array('q') for estadistica in estadisticas}
+        self.nombres = {}  # UUID -> nombre del jugador
+        self.por_nombre = {}  # Nombre en minúsculas -> UUID, para buscar con `+stats <nombre>`
+        # Datos que se publican en `/metrics`: archivos leídos, duración de la última actualización y cuándo fue.
+        self.lecturas = 0
+        self.duracion = 0.0
+        self.actualizado = None  # None hasta la primera actualización
+        self._usercache_modificado = None  # Fecha de modificación del usercache la última vez que se leyó
+        # `asyncio.Lock` deja pasar a una sola tarea a la vez; las demás esperan su turno.
+        self._bloqueo = asyncio.Lock()
+
+    # Valores de todas las estadísticas del índice a partir del contenido de un archivo de Minecraft.
+    def _extraer(self, datos):
+        # Para cada estadística se suman los valores de todas sus claves. `datos.get(categoria, {})` evita un error
+        # si el jugador nunca hizo nada de esa categoría (por ejemplo, nunca minó nada), y el valor es 0 por defecto.
+        return tuple(
+            sum(int(datos.get(categoria, {}).get(clave, 0)) for categoria, clave in claves)
+            for _, claves, _, _ in self.estadisticas.values()
+        )
+
+    # Lee el `usercache.json` si cambió desde la última vez; devuelve {uuid: nombre} o None si no hay cambios.
+    def _leer_usercache(self):
+        try:
+            # `st_mtime_ns` es la fecha de modificación en nanosegundos: si no cambió, no hace falta volver a leerlo.
+            modificado = os.stat(self.usercache).st_mtime_ns
+            if modificado == self._usercache_modificado:
+                return None  # Sin cambios desde la última lectura
+            with open(self.usercache, 'rb') as archivo:
+                entradas = json.load(archivo)  # Lista de {"name": ..., "uuid": ..., "expiresOn": ...}
+            self._usercache_modificado = modificado  # Para no volver a leerlo si no cambia
+            return {entrada['uuid']: entrada['name'] for entrada in entradas}  # UUID -> nombre
+        except (OSError, ValueError, TypeError, KeyError):
+            # Si no existe o está a medio escribir, se deja para la siguiente actualización.
+            return None
+
+    # Se ejecuta en un hilo aparte: recorre la carpeta con `os.scandir` (que devuelve nombre y datos de cada
+    # archivo en una sola llamada) y lee solo los archivos nuevos o modificados. Devuelve los cambios, los
+    # jugadores presentes (para detectar archivos borrados) y el usercache si cambió. No modifica el índice:
+    # eso se hace en `_aplicar`, en el bucle de eventos, para que los comandos nunca lo vean a medias.
+    def _leer_cambios(self):
+        cambios = []  # (uuid, modificado, valores) de cada archivo nuevo o modificado
+        presentes = set()  # UUID de todos los archivos que hay en la carpeta
+        try:
+            entradas = os.scandir(self.directorio)  # Recorre la carpeta sin leer los archivos
+        except OSError:
+            # Sin carpeta (el servidor no está en esta máquina, por ejemplo): ningún cambio, y `presentes` es None
+            # para no borrar a nadie del índice por no poder leerla.
+            return cambios, None, self._leer_usercache()
+        # `with` cierra el recorrido de la carpeta al terminar, aunque haya un error.
+        with entradas:
+            for entrada in entradas:
+                # Solo interesan los archivos `<uuid>.json`.
+                if not entrada.name.endswith('.json'):
+                    continue
+                uuid = entrada.name[:-5]  # El nombre sin `.json`
+                presentes.add(uuid)  # El jugador sigue teniendo archivo
+                try:
+                    estado = entrada.stat()  # Fecha de modificación y tamaño del archivo
+                except OSError:
+                    continue  # El archivo se borró mientras se recorría la carpeta
+                # Si la fecha y el tamaño son los mismos que la última vez, el archivo no cambió y no se lee.
+                modificado = (estado.st_mtime_ns, estado.st_size)
+                if self.modificados.get(uuid) == modificado:
+                    continue
+                try:
+                    with open(entrada.path, 'rb') as archivo:
+                        valores = self._extraer(json.load(archivo)['stats'])  # Solo las estadísticas del índice
+                except (OSError, ValueError, TypeError, KeyError, AttributeError):
+                    # Un archivo a medio escribir o con otro formato se salta; se volverá a intentar la próxima vez,
+                    # porque no se guarda en `modificados`.
+                    continue
+                cambios.append((uuid, modificado, valores))  # Se aplicará en `_aplicar`
+        return cambios, presentes, self._leer_usercache()  # El usercache también se lee en este hilo
+
+    # Aplica los cambios al índice. Los jugadores nuevos se añaden al final de los arrays; a los jugadores cuyo
+    # archivo se borró se les pone todo a 0, así dejan de salir en las clasificaciones. Cada 5000 cambios se cede
+    # el control al bucle de eventos, para que la primera carga no bloquee al bot.
+    async def _aplicar(self, cambios, presentes, usercache):
+        # Los arrays en el mismo orden que los valores de `_extraer`, para recorrerlos juntos con `zip`.
+        columnas = list(self.valores.values())
+        for numero, (uuid, modificado, valores) in enumerate(cambios, 1):
+            posicion = self.posiciones.get(uuid)  # None si es un jugador nuevo
+            if posicion is None:
+                # Jugador nuevo: su posición es la siguiente libre, al final de todos los arrays.
+                self.posiciones[uuid] = len(self.uuids)
+                self.uuids.append(uuid)  # Así se sabe de quién es cada posición
+                for columna, valor in zip(columnas, valores):
+                    columna.append(valor)  # Un valor nuevo al final de cada array
+            else:
+                # Jugador conocido: se reemplazan sus valores en su posición de siempre.
+                for columna, valor in zip(columnas, valores):
+                    columna[posicion] = valor  # Se sobrescribe el valor anterior
+            self.modificados[uuid] = modificado  # Para no volver a leerlo si no cambia
+            # `asyncio.sleep(0)` no espera nada, pero deja que el bot atienda otros eventos antes de seguir.
+            if numero % 5000 == 0:
+                await asyncio.sleep(0)  # Cede el turno al resto del bot
+        # Jugadores que estaban en el índice pero cuyo archivo ya no existe: se ponen a 0. No se quitan de los arrays,
+        # porque eso movería las posiciones de todos los demás.
+        if presentes is not None:
+            for uuid in self.modificados.keys() - presentes:  # Diferencia de conjuntos: los que ya no están
+                del self.modificados[uuid]  # Si vuelve a aparecer, se leerá de nuevo
+                for columna in columnas:
+                    columna[self.posiciones[uuid]] = 0  # Ya no sale en `+top`
+        # Nombres nuevos del usercache, en los dos sentidos (UUID -> nombre y nombre -> UUID).
+        if usercache is not None:
+            self.nombres.update(usercache)  # Añade los nuevos y actualiza los que cambiaron de nombre
+            self.por_nombre.update((nombre.lower(), uuid) for uuid, nombre in usercache.items())
+        self.lecturas += len(cambios)  # Archivos leídos, para `/metrics`
+
+    # Una actualización completa: lee los cambios en un hilo aparte, los aplica y guarda cuánto tardó.
+    # Devuelve cuántos archivos se leyeron.
+    async def _actualizar(self):
+        inicio = time.perf_counter()  # Para medir la duración
+        # `run_in_executor(None, ...)` ejecuta la lectura de los archivos en un hilo, sin bloquear al bot.
+        cambios, presentes, usercache = await asyncio.get_running_loop().run_in_executor(None, self._leer_cambios)
+        await self._aplicar(cambios, presentes, usercache)
+        self.duracion = time.perf_counter() - inicio  # Duración, en segundos, para `/metrics`
+        self.actualizado = time.time()  # Hora de la actualización, que se muestra en `+top`
+        return len(cambios)
+
+    # El bloqueo evita que dos actualizaciones (la periódica y la de un comando) se ejecuten a la vez.
+    async def actualizar(self):
+        async with self._bloqueo:  # Espera si ya hay una actualización en curso
+            return await self._actualizar()
+
+    # Carga el índice si todavía no se cargó nunca (por ejemplo, un `+top` justo después de arrancar).
+    async def asegurar(self):
+        # Se comprueba antes y después de conseguir el bloqueo: si otra tarea estaba cargando el índice, al entrar
+        # ya está cargado y no hay que leerlo todo otra vez.
+        if self.actualizado is None:
+            async with self._bloqueo:  # Espera a la carga que ya esté en curso, si la hay
+                if self.actualizado is None:
+                    await self._actualizar()  # Primera carga: lee todos los archivos
+
+    # Nombre de un jugador, o el principio de su UUID si no está en el usercache (Minecraft solo guarda ahí
+    # los jugadores que entraron hace poco).
+    def nombre(self, uuid):
+        return self.nombres.get(uuid) or uuid[:8]  # Los 8 primeros caracteres bastan para distinguirlo
+
+    # Los `cantidad` jugadores con el valor más alto. `heapq.nlargest` recorre los valores una vez manteniendo un
+    # montículo de `cantidad` elementos, en vez de ordenar a todos los jugadores para quedarse con unos pocos.
+    def top(self, estadistica, cantidad):
+        valores = self.valores[estadistica]  # Array con el valor de cada jugador
+        # Se buscan las posiciones (no los valores) con mayor valor: `key=valores.__getitem__` compara por el valor
+        # de cada posición. Así después se sabe a qué jugador pertenece cada uno.
+        mejores = heapq.nlargest(cantidad, range(len(valores)), key=valores.__getitem__)
+        # Los jugadores con 0 no salen en la clasificación.
+        return [(self.nombre(self.uuids[posicion]), valores[posicion]) for posicion in mejores if valores[posicion] > 0]
+
+    # Valores y puesto de un jugador (por nombre o UUID) en cada estadística, o None si no tiene estadísticas.
+    # El puesto es 1 más el número de jugadores con un valor mayor; `map(valor.__lt__, valores)` hace la
+    # comparación en C, sin un bucle de Python.
+    def jugador(self, nombre):
+        # Se busca primero por nombre (sin distinguir mayúsculas); si no está, se prueba con lo escrito como UUID.
+        uuid = self.por_nombre.get(nombre.lower(), nombre)
+        if uuid not in self.modificados:
+            return None  # Jugador sin archivo de estadísticas
+        posicion = self.posiciones[uuid]  # Su posición en los arrays
+        resultado = {}  # Estadística -> (valor, puesto)
+        for estadistica, valores in self.valores.items():
+            valor = valores[posicion]  # Valor del jugador en esta estadística
+            resultado[estadistica] = (valor, 1 + sum(map(valor.__lt__, valores)))  # `True` cuenta como 1 al sumar
+        return self.nombre(uuid), resultado  # El nombre tal como lo guarda Minecraft
+
+# Se crea el índice vacío; se carga en la primera actualización.
+indice_estadisticas = IndiceEstadisticas(DIRECTORIO_ESTADISTICAS, ARCHIVO_USERCACHE)
+
+# Actualiza el índice de estadísticas cada `INTERVALO_ESTADISTICAS` segundos.
+# `@tasks.loop` crea una tarea que se repite sola; se inicia junto con los cogs, después de iniciar sesión.
+@tasks.loop(seconds=INTERVALO_ESTADISTICAS)
+async def actualizar_estadisticas():
+    # Solo lee los archivos que cambiaron desde la última vez, así que con el servidor tranquilo apenas hace nada.
+    await indice_estadisticas.actualizar()
+
+# Una sanción registrada: a qué jugador, cuándo (marca de tiempo Unix), por qué norma (categoría y número),
+# con qué motivo y qué miembro del staff la puso. `__slots__` reduce la memoria de cada sanción, ya que el registro
+# las tiene todas en memoria.
+class Sancion:
+    # Con `__slots__` cada objeto solo puede tener estos atributos y Python no le crea un diccionario (`__dict__`):
+    # con miles de sanciones en memoria, el ahorro se nota.
+    __slots__ = ('id', 'fecha', 'jugador', 'categoria', 'numero', 'motivo', 'staff')
+
+    def __init__(self, id, fecha, jugador, categoria, numero, motivo, staff):
+        self.id = id  # Número de la sanción (el que se usa en `+anular`)
+        self.fecha = fecha  # Cuándo se puso, en segundos desde 1970 (`time.time()`)
+        self.jugador = jugador  # Nombre del jugador de Minecraft, tal como lo escribió el staff
+        self.categoria = categoria  # Categoría de la norma incumplida (por ejemplo, "general")
+        self.numero = numero  # Número de la norma dentro de su categoría
+        self.motivo = motivo  # Texto libre con el motivo (puede estar vacío)
+        self.staff = staff  # ID de Discord del miembro del staff que la puso
+
+    # Línea JSON con la que se guarda la sanción en el archivo.
+    def a_json(self):
+        # `json.dumps` convierte el diccionario en texto. `ensure_ascii=False` deja las tildes y las eñes tal cual
+        # (`"Sí"`) en vez de escribirlas como códigos (`"S\u00ed"`), así el archivo se puede leer a simple vista.
+        return json.dumps({
+            'id': self.id, 'fecha': self.fecha, 'jugador': self.jugador, 'categoria': self.categoria,
+            'numero': self.numero, 'motivo': self.motivo, 'staff': self.staff,
+        }, ensure_ascii=False)
+
+# Registro de sanciones: un archivo en el que solo se añaden líneas (nunca se modifican las anteriores) y unos
+# índices en memoria con los que las consultas no recorren el registro entero:
+# - `sanciones`: número de sanción -> sanción, solo las vigentes.
+# - `por_jugador`: nombre del jugador en minúsculas -> números de sus sanciones, de la más antigua a la más reciente.
+# - `por_norma`: (categoría, número de norma) -> cuántas sanciones vigentes hay por esa norma.
+# Toda la lectura y escritura del archivo se hace en un único hilo aparte (`_hilo`), así nunca bloquea el bucle de
+# eventos y las líneas se escriben en el mismo orden en que se piden.
+class RegistroSanciones:
+    # `archivo` es la ruta del registro (`ARCHIVO_SANCIONES`). Aquí solo se prepara todo; se lee en `cargar`.
+    def __init__(self, archivo):
+        self.archivo = archivo  # Ruta del archivo del registro
+        self.sanciones = {}  # Número de sanción -> `Sancion`, solo las vigentes
+        self.por_jugador = {}  # Jugador en minúsculas -> lista de números de sus sanciones
+        # `collections.Counter` es un diccionario que cuenta: las claves que no existen valen 0.
+        self.por_norma = collections.Counter()
+        self.siguiente = 1  # Número que recibirá la próxima sanción
+        # Líneas del archivo que ya no sirven (sanciones anuladas y sus anulaciones); la compactación las quita.
+        self.lineas_muertas = 0
+        self.compactaciones = 0  # Cuántas veces se ha compactado, para `/metrics`
+        self._archivo = None  # Archivo abierto para añadir líneas; se abre con la primera sanción
+        # Un `ThreadPoolExecutor` con un solo hilo (`max_workers=1`) ejecuta las tareas una detrás de otra, en el
+        # orden en que se le piden: así dos escrituras nunca se mezclan en el archivo.
+        self._hilo = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='sanciones')
+
+    # Ejecuta `funcion(*args)` en el hilo del registro y espera su resultado sin bloquear el bucle de eventos.
+    async def _en_hilo(self, funcion, *args):
+        # `run_in_executor` devuelve algo que se puede esperar con `await`; mientras, el bot sigue atendiendo eventos.
+        return await asyncio.get_running_loop().run_in_executor(self._hilo, funcion, *args)
+
+    # Lee todas las líneas del archivo. Una línea dañada (por ejemplo, a medio escribir si el bot se cerró de golpe)
+    # se ignora en vez de impedir la carga.
+    def _leer(self):
+        registros = []  # Un diccionario por línea del archivo
+        try:
+            with open(self.archivo, encoding='utf-8') as archivo:
+                # Recorrer el archivo con `for` lo lee línea a línea, sin cargarlo entero de golpe.
+                for linea in archivo:
+                    try:
+                        registros.append(json.loads(linea))  # Convierte la línea JSON en un diccionario
+                    except ValueError:
+                        bitacora.warning(f'Línea dañada en {self.archivo}; se ignora.')
+        except FileNotFoundError:
+            # La primera vez que se usa el bot todavía no hay archivo: el registro empieza vacío.
+            pass
+        return registros
+
+    # Añade una línea al final del archivo. El archivo se mantiene abierto entre escrituras.
+    def _anexar(self, linea):
+        # El modo `'a'` (de "append") abre el archivo para escribir al final, sin borrar lo que ya tiene.
+        if self._archivo is None:
+            self._archivo = open(self.archivo, 'a', encoding='utf-8')
+        self._archivo.write(linea + '\n')  # Una sanción (o anulación) por línea
+        # `flush` pasa la línea al sistema operativo ya, en vez de esperar a que se llene el búfer de Python.
+        self._archivo.flush()
+
+    # Compactación: escribe las sanciones vigentes en un archivo temporal y lo pone en lugar del registro con
+    # `os.replace`, que es atómico: si el bot se cierra a mitad, queda el registro anterior completo.
+    # Como se ejecuta en el mismo hilo que `_anexar`, las sanciones que se registren mientras tanto se añaden
+    # después, al archivo nuevo.
+    def _reescribir(self, lista):
+        temporal = self.archivo + '.tmp'  # Por ejemplo, `sanciones.jsonl.tmp`
+        with open(temporal, 'w', encoding='utf-8') as archivo:
+            # `writelines` escribe todas las líneas de una vez a partir de un generador.
+            archivo.writelines(sancion.a_json() + '\n' for sancion in lista)
+            archivo.flush()
+            # `os.fsync` espera a que los datos estén de verdad en el disco antes de sustituir el registro.
+            os.fsync(archivo.fileno())
+        # El archivo abierto para añadir apunta al registro antiguo: se cierra y `_anexar` abrirá el nuevo.
+        if self._archivo is not None:
+            self._archivo.close()
+            self._archivo = None
+        os.replace(temporal, self.archivo)  # El archivo temporal pasa a ser el registro
+
+    # Añade una sanción a los índices en memoria.
+    def _indexar(self, sancion):
+        self.sanciones[sancion.id] = sancion
+        # `setdefault` devuelve la lista del jugador, creándola vacía si es su primera sanción.
+        self.por_jugador.setdefault(sancion.jugador.lower(), []).append(sancion.id)
+        self.por_norma[sancion.categoria, sancion.numero] += 1  # Una sanción más por esta norma
+        # Las sanciones se numeran seguidas: la siguiente siempre es mayor que cualquier número ya usado.
+        self.siguiente = max(self.siguiente, sancion.id + 1)
+
+    # Quita una sanción de los índices en memoria.
+    def _desindexar(self, sancion):
+        del self.sanciones[sancion.id]
+        ids = self.por_jugador[sancion.jugador.lower()]  # Sanciones del jugador
+        ids.remove(sancion.id)
+        # Si al jugador no le quedan sanciones, se quita del índice para no acumular listas vacías.
+        if not ids:
+            del self.por_jugador[sancion.jugador.lower()]
+        self.por_norma[sancion.categoria, sancion.numero] -= 1  # Una sanción menos por esta norma
+        # Igual con las normas: una norma sin sanciones vigentes no aparece en `+sanciones top`.
+        if not self.por_norma[sancion.categoria, sancion.numero]:
+            del self.por_norma[sancion.categoria, sancion.numero]
+
+    # Reconstruye los índices a partir del archivo. Cada sanción anulada deja dos líneas muertas (la sanción y la
+    # anulación), que se quitarán en la siguiente compactación.
+    def _cargar(self):
+        for registro in self._leer():
+            # Una línea de anulación (`{"anular": 12, ...}`) quita la sanción que se leyó antes.
+            if 'anular' in registro:
+                sancion = self.sanciones.get(registro['anular'])
+                if sancion is not None:
+                    self._desindexar(sancion)
+                self.lineas_muertas += 2
+                continue  # Se pasa a la siguiente línea
+            # Una sanción: se crea el objeto y se añade a los índices. `get` da un valor por defecto a los campos
+            # que pueden faltar en registros antiguos.
+            self._indexar(Sancion(
+                registro['id'], registro['fecha'], registro['jugador'], registro['categoria'],
+                registro['numero'], registro.get('motivo', ''), registro.get('staff'),
+            ))
+
+    # Carga el registro al arrancar, en el hilo de escritura para no bloquear el bucle de eventos.
+    async def cargar(self):
+        await self._en_hilo(self._cargar)
+
+    # Registra una sanción y espera a que esté escrita. Los índices se actualizan antes de escribir (una compactación
+    # pedida mientras tanto la incluirá) y se deshacen si la escritura falla.
+    async def registrar(self, jugador, categoria, numero, motivo, staff):
+        # `int(time.time())` es la hora actual en segundos enteros; basta para mostrar la fecha de la sanción.
+        sancion = Sancion(self.siguiente, int(time.time()), jugador, categoria, numero, motivo, staff)
+        self._indexar(sancion)  # Ya aparece en las consultas
+        try:
+            await self._en_hilo(self._anexar, sancion.a_json())  # Espera a que se escriba en el archivo
+        except OSError:
+            # No se pudo escribir (disco lleno, sin permisos...): se quita de los índices y el comando avisa del error.
+            self._desindexar(sancion)
+            raise
+        return sancion  # El comando muestra su número al staff
+
+    # Anula una sanción añadiendo una línea de anulación. Devuelve la sanción anulada, o None si no existe.
+    async def anular(self, identificador, staff):
+        sancion = self.sanciones.get(identificador)  # None si no existe o ya se anuló
+        if sancion is None:
+            return None
+        self._desindexar(sancion)  # Deja de aparecer en las consultas
+        # La anulación se guarda como una línea más; la sanción original no se toca.
+        try:
+            await self._en_hilo(self._anexar, json.dumps({'anular': identificador, 'fecha': int(time.time()), 'staff': staff}))
+        except OSError:
+            # Si no se pudo escribir, la sanción sigue vigente: se vuelve a añadir a los índices.
+            self._indexar(sancion)
+            raise
+        self.lineas_muertas += 2  # La sanción y su anulación ya no hacen falta
+        return sancion
+
+    # Sanciones vigentes de un jugador, de la más reciente a la más antigua.
+    def historial(self, jugador):
+        # `reversed` recorre la lista del final al principio sin copiarla; `()` evita un error si el jugador no tiene
+        # ninguna sanción.
+        return [self.sanciones[identificador] for identificador in reversed(self.por_jugador.get(jugador.lower(), ()))]
+
+    # Las `cantidad` normas con más sanciones. `Counter.most_common` usa un montículo (`heapq.nlargest`).
+    def mas_incumplidas(self, cantidad):
+        return self.por_norma.most_common(cantidad)  # Lista de ((categoría, número), sanciones)
+
+    # Reescribe el archivo sin las líneas muertas. La lista de sanciones se copia en el bucle de eventos (es una
+    # copia rápida de referencias) y se convierte a JSON y se escribe en el hilo de escritura.
+    async def compactar(self):
+        # Se recuerdan las líneas muertas de ahora: las anulaciones que lleguen mientras se compacta se escriben
+        # después en el archivo nuevo y seguirán contando para la próxima compactación.
+        muertas = self.lineas_muertas
+        await self._en_hilo(self._reescribir, list(self.sanciones.values()))
+        self.lineas_muertas -= muertas
+        self.compactaciones += 1  # Se publica en `/metrics`
+
+# Se crea el registro; se carga en `setup_hook`.
+sanciones = RegistroSanciones(ARCHIVO_SANCIONES)
+
+# Compacta el registro cada `HORAS_COMPACTACION_SANCIONES` horas, si hay sanciones anuladas.
+# `@tasks.loop` convierte la función en una tarea que discord.py repite cada cierto tiempo; se inicia en `on_ready`.
+@tasks.loop(hours=HORAS_COMPACTACION_SANCIONES)
+async def compactar_sanciones():
+    # Sin sanciones anuladas el archivo ya no tiene nada que quitar: no se reescribe.
+    if sanciones.lineas_muertas:
+        try:
+            await sanciones.compactar()
+        except OSError as error:
+            # Si falla, el registro anterior sigue completo (ver `_reescribir`) y se vuelve a intentar más tarde.
+            bitacora.error(f'No se pudo compactar {sanciones.archivo}: {error}')
+
+# Expresión cron de 5 campos (minuto, hora, día del mes, mes y día de la semana), como en Linux. Cada campo admite
+# `*`, valores (`5`), listas (`1,15`), rangos (`1-5`) y pasos (`*/15`, `0-30/10`). En el día de la semana, 0 y 7 son
+# domingo. Por ejemplo, `0 18 * * 5` es todos los viernes a las 18:00 y `*/30 * * * *` es cada media hora.
+class Cron:
+    # Valores mínimo y máximo de cada campo, en el mismo orden en que se escriben.
+    LIMITES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+    # Interpreta la expresión al crear el objeto: si no es válida, lanza `ValueError` y `+anunciar` muestra el motivo.
+    def __init__(self, expresion):
+        partes = expresion.split()  # `split()` sin argumentos separa por cualquier cantidad de espacios
+        if len(partes) != 5:
+            raise ValueError('Una expresión cron tiene 5 campos: minuto hora día mes día_de_la_semana.')
+        # La expresión se guarda con un solo espacio entre campos; es lo que se guarda en la base de datos.
+        self.expresion = ' '.join(partes)
+        # Cada campo pasa a ser el conjunto de valores que acepta. `zip` empareja cada parte con sus límites, y los
+        # cinco resultados se reparten entre los cinco atributos.
+        self.minutos, self.horas, self.dias, self.meses, self.dias_semana = (
+            self._campo(parte, minimo, maximo) for parte, (minimo, maximo) in zip(partes, self.LIMITES)
+        )
+        # El domingo se puede escribir como 0 o como 7; se deja siempre como 0.
+        if 7 in self.dias_semana:
+            self.dias_semana = self.dias_semana - {7} | {0}
+        # Si el día del mes o el de la semana es `*`, solo cuenta el otro (ver `_dia_valido`).
+        self.cualquier_dia = partes[2] == '*'
+        self.cualquier_dia_semana = partes[4] == '*'
+
+    # Convierte un campo en el conjunto de valores que acepta. Lanza `ValueError` si no es válido.
+    # `@staticmethod` indica que el método no usa `self`: solo trabaja con sus argumentos.
+    @staticmethod
+    def _campo(texto, minimo, maximo):
+        valores = set()  # Valores aceptados, sin repetidos
+        # Cada trozo separado por comas es un valor, un rango o un paso, y se suman todos.
+        for trozo in texto.split(','):
+            # `partition('/')` separa `0-30/10` en `0-30`, `/` y `10`; sin barra, `barra` y `paso` quedan vacíos.
+            rango, barra, paso = trozo.partition('/')
+            try:
+                paso = int(paso) if barra else 1  # Sin paso, se toman todos los valores del rango
+                if rango == '*':
+                    inicio, fin = minimo, maximo  # Todo el campo
+                elif '-' in rango:
+                    inicio, fin = map(int, rango.split('-', 1))  # Un rango: `1-5`
+                else:
+                    # Un valor suelto: `5`. Con paso (`5/15`), como en cron, va desde ese valor hasta el máximo.
+                    inicio = int(rango)
+                    fin = maximo if barra else inicio
+            except ValueError:
+                # `int` lanza `ValueError` si el texto no es un número; se cambia por un mensaje más claro.
+                # `from None` oculta el error original, que no le dice nada al usuario.
+                raise ValueError(f'Campo cron no válido: `{texto}`.') from None
+            if not minimo <= inicio <= fin <= maximo or paso < 1:
+                raise ValueError(f'Campo cron fuera de rango: `{texto}` (de {minimo} a {maximo}).')
+            # `range(inicio, fin + 1, paso)` son los valores del trozo; `update` los añade al conjunto.
+            valores.update(range(inicio, fin + 1, paso))
+        # `frozenset` es un conjunto que no se puede modificar; comprobar si contiene un valor es inmediato.
+        return frozenset(valores)
+
+    # Como en cron: si se restringen a la vez el día del mes y el de la semana, basta con que se cumpla uno.
+    def _dia_valido(self, fecha):
+        dia = fecha.day in self.dias  # ¿Se cumple el día del mes?
+        # `weekday()` cuenta desde el lunes (0) hasta el domingo (6); cron cuenta desde el domingo (0). `+ 1` y `% 7`
+        # pasan de una forma a la otra.
+        dia_semana = (fecha.weekday() + 1) % 7 in self.dias_semana
+        if self.cualquier_dia_semana:
+            return dia  # Solo cuenta el día del mes
+        if self.cualquier_dia:
+            return dia_semana  # Solo cuenta el día de la semana
+        return dia or dia_semana  # Los dos restringidos: basta con uno
+
+    # Siguiente momento (marca de tiempo Unix, hora local) posterior a `desde` que cumple la expresión. En vez de
+    # probar minuto a minuto, salta al siguiente mes, día u hora cuando el campo mayor no se cumple. Si en 8 años no
+    # hay ninguno (por ejemplo, `0 0 31 2 *`, el 31 de febrero), la expresión no se cumple nunca.
+    def siguiente(self, desde):
+        # Se empieza en el minuto siguiente a `desde`, sin segundos: cron trabaja con minutos enteros.
+        fecha = datetime.datetime.fromtimestamp(desde).replace(second=0, microsecond=0) + datetime.timedelta(minutes=1)
+        limite = fecha.year + 8  # Ocho años cubren cualquier combinación de día del mes y día de la semana
+        while fecha.year <= limite:
+            if fecha.month not in self.meses:
+                # Mes que no vale: al día 1 del mes siguiente. Sumar 32 días desde el día 1 siempre cae en el mes
+                # siguiente, y `replace(day=1)` vuelve a su primer día.
+                fecha = (fecha.replace(day=1, hour=0, minute=0) + datetime.timedelta(days=32)).replace(day=1)
+            elif not self._dia_valido(fecha):
+                fecha = fecha.replace(hour=0, minute=0) + datetime.timedelta(days=1)  # Al principio del día siguiente
+            elif fecha.hour not in self.horas:
+                fecha = fecha.replace(minute=0) + datetime.timedelta(hours=1)  # Al principio de la hora siguiente
+            elif fecha.minute not in self.minutos:
+                fecha += datetime.timedelta(minutes=1)  # Al minuto siguiente
+            else:
+                return fecha.timestamp()  # Se cumplen los cinco campos
+        raise ValueError(f'La expresión cron `{self.expresion}` no se cumple nunca.')
+
+# Duración relativa para `+anunciar`, por ejemplo `2h30m` o `1d`.
+# Cada parte es opcional (`(?:...)?`) y los números se capturan en tres grupos: días, horas y minutos.
+DURACION_ANUNCIO = re.compile(r'(?:(\d+)d)?(?:(\d+)h)?(?:(\d+)m)?')
+
+# Interpreta el `<cuándo>` de `+anunciar`: una expresión cron (anuncio periódico), una duración desde ahora o una
+# fecha `AAAA-MM-DDTHH:MM` en hora local (anuncio único). Devuelve la primera hora de envío y la expresión cron (o
+# None). Lanza `ValueError` con el motivo si no es válido.
+def interpretar_cuando(texto, ahora):
+    # Cinco palabras: una expresión cron. La primera hora de envío es la siguiente que la cumple.
+    if len(texto.split()) == 5:
+        cron = Cron(texto)
+        return cron.siguiente(ahora), cron
+    # Una duración: `fullmatch` exige que todo el texto sea la duración. Como todas sus partes son opcionales, también
+    # coincide con un texto vacío; `any(duracion.groups())` comprueba que haya al menos un número.
+    duracion = DURACION_ANUNCIO.fullmatch(texto.lower())
+    if duracion is not None and any(duracion.groups()):
+        # Las partes que no se escribieron valen None; `or 0` las cuenta como cero.
+        dias, horas, minutos = (int(valor or 0) for valor in duracion.groups())
+        return ahora + dias * 86400 + horas * 3600 + minutos * 60, None
+    # Una fecha: se acepta con `T` (`2024-05-01T18:00`) o con un espacio. `strptime` lanza `ValueError` si no encaja
+    # con el formato, y `timestamp()` la convierte en segundos desde 1970 en hora local.
+    try:
+        fecha = datetime.datetime.strptime(texto.replace('T', ' '), '%Y-%m-%d %H:%M').timestamp()
+    except ValueError:
+        raise ValueError('No entiendo cuándo enviar el anuncio.') from None
+    if fecha <= ahora:
+        raise ValueError('Esa fecha ya pasó.')
+    return fecha, None  # Un anuncio único no tiene expresión cron
+
+# Un anuncio programado. `siguiente` es la próxima hora de envío; `cron` es None en los anuncios únicos.
+class Anuncio:
+    # Como en `Sancion`, `__slots__` ahorra memoria por anuncio.
+    __slots__ = ('id', 'servidor', 'canal', 'mensaje', 'siguiente', 'cron', 'politica', 'autor')
+
+    def __init__(self, id, servidor, canal, mensaje, siguiente, cron, politica, autor):
+        self.id = id  # Número del anuncio en la base de datos (el que se usa en `+anuncio cancelar`)
+        self.servidor = servidor  # ID del servidor de Discord
+        self.canal = canal  # ID del canal donde se envía
+        self.mensaje = mensaje  # Texto del anuncio
+        self.siguiente = siguiente  # Próxima hora de envío, en segundos desde 1970
+        self.cron = cron  # `Cron` de los anuncios periódicos, None en los únicos
+        self.politica = politica  # 'saltar' o 'recuperar': qué hacer si se pasó la hora con el bot apagado
+        self.autor = autor  # ID de Discord de quien lo programó
+
+# Espera a que se active `evento` o pasen `segundos` (None: sin límite), lo que ocurra antes.
+async def esperar_evento(evento, segundos):
+    # `asyncio.wait_for` cancela la espera pasados `segundos` y lanza `TimeoutError`; aquí no es un error, solo
+    # significa que se acabó el tiempo.
+    try:
+        await asyncio.wait_for(evento.wait(), segundos)
+    except asyncio.TimeoutError:
+        pass
+
+# Programador de anuncios con una sola tarea para todos, en vez de un `tasks.loop` por anuncio. Los anuncios se
+# ordenan en un montículo (`heapq`) por hora de envío, así la tarea solo mira el primero y duerme hasta su hora; añadir
+# o reprogramar un anuncio cuesta O(log n) aunque haya miles. Al cancelar un anuncio no se busca en el montículo:
+# su entrada se descarta cuando llega arriba (si ya no está en `anuncios` o su hora no coincide con la del anuncio).
+# `reloj` y `esperar` se pueden sustituir por un reloj falso para probar el programador sin esperar de verdad.
+class ProgramadorAnuncios:
+    # `archivo` es la base de datos SQLite de los anuncios y `tolerancia` los segundos de retraso con los que un
+    # anuncio todavía se envía aunque se haya pasado su hora.
+    def __init__(self, archivo, tolerancia, reloj=time.time, esperar=esperar_evento):
+        self.archivo = archivo  # Ruta de la base de datos
+        self.tolerancia = tolerancia  # Segundos de retraso permitidos
+        self.reloj = reloj  # Función que da la hora actual
+        self.esperar = esperar  # Función que espera a un evento o a que pase un tiempo
+        self.anuncios = {}  # Número de anuncio -> `Anuncio`, solo los programados
+        # Contadores que se publican en `/metrics`: anuncios enviados, saltados por llegar tarde y envíos fallidos.
+        self.enviados = 0
+        self.saltados = 0
+        self.errores = 0
+        self.tarea = None  # Tarea de `_bucle`, mientras está en marcha
+        # Lista de (hora de envío, número de anuncio) ordenada como montículo: la primera es siempre la más próxima.
+        self._monticulo = []
+        # `asyncio.Event` es una señal: `set()` la activa y despierta a quien la espera con `wait()`.
+        self._cambio = asyncio.Event()
+        # Envíos en curso. `asyncio.create_task` solo guarda una referencia débil a la tarea: si nadie más la guarda,
+        # Python podría eliminarla antes de que termine.
+        self._envios = set()
+        self._conexion = None  # Conexión a SQLite; se abre con la primera consulta
+        # Un solo hilo para todas las consultas, que así se hacen de una en una y en orden.
+        self._hilo = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='anuncios')
+
+    # Las consultas a SQLite se hacen en un hilo aparte, como en la configuración por servidor.
+    def _abrir(self):
+        if self._conexion is None:
+            # `check_same_thread=False` permite usar la conexión desde el hilo de las consultas, aunque se haya creado
+            # en otro; es seguro porque solo ese hilo la usa.
+            self._conexion = sqlite3.connect(self.archivo, check_same_thread=False)
+            # El modo WAL escribe los cambios en un archivo aparte: cada escritura es más rápida y más segura si el
+            # bot se cierra de golpe.
+            self._conexion.execute('PRAGMA journal_mode=WAL')
+            # Crea la tabla la primera vez. `AUTOINCREMENT` da a cada anuncio un número que nunca se reutiliza.
+            self._conexion.execute(
+                'CREATE TABLE IF NOT EXISTS anuncios (id INTEGER PRIMARY KEY AUTOINCREMENT, servidor INTEGER, '
+                'canal INTEGER, mensaje TEXT, siguiente REAL, cron TEXT, politica TEXT, autor INTEGER)'
+            )
+        return self._conexion
+
+    # Todos los anuncios guardados, como una lista de tuplas.
+    def _leer(self):
+        # `fetchall` devuelve todas las filas de la consulta de una vez.
+        return self._abrir().execute(
+            'SELECT id, servidor, canal, mensaje, siguiente, cron, politica, autor FROM anuncios'
+        ).fetchall()
+
+    # Guarda un anuncio nuevo y devuelve el número que le dio SQLite (`lastrowid`).
+    def _insertar(self, *valores):
+        conexion = self._abrir()
+        # `with conexion` confirma los cambios al terminar (o los deshace si hay un error).
+        with conexion:
+            # Los `?` se sustituyen por los valores: SQLite los escapa, así un mensaje con comillas no rompe la consulta.
+            return conexion.execute(
+                'INSERT INTO anuncios (servidor, canal, mensaje, siguiente, cron, politica, autor) VALUES (?, ?, ?, ?, ?, ?, ?)', valores
+            ).lastrowid
+
+    # Guarda la próxima hora de envío de un anuncio periódico.
+    def _guardar_siguiente(self, identificador, siguiente):
+        conexion = self._abrir()
+        with conexion:  # Se confirma al salir del bloque
+            conexion.execute('UPDATE anuncios SET siguiente = ? WHERE id = ?', (siguiente, identificador))
+
+    # Borra un anuncio (cancelado, o único ya enviado).
+    def _borrar(self, identificador):
+        conexion = self._abrir()
+        with conexion:
+            # `(identificador,)` es una tupla de un solo elemento: la coma es necesaria.
+            conexion.execute('DELETE FROM anuncios WHERE id = ?', (identificador,))
+
+    # Ejecuta `funcion(*args)` en el hilo de las consultas y espera su resultado sin bloquear el bucle de eventos.
+    async def _en_hilo(self, funcion, *args):
+        # Mientras el hilo consulta la base de datos, el bot sigue atendiendo comandos y eventos.
+        return await asyncio.get_running_loop().run_in_executor(self._hilo, funcion, *args)
+
+    # Carga los anuncios guardados y construye el montículo de una vez con `heapify` (O(n)). `filtro` decide, por el
+    # id del servidor de Discord, qué anuncios le tocan a este proceso.
+    async def cargar(self, filtro=None):
+        # Cada fila se reparte en sus ocho columnas directamente en el `for`.
+        for identificador, servidor, canal, mensaje, siguiente, cron, politica, autor in await self._en_hilo(self._leer):
+            if filtro is None or filtro(servidor):
+                # La expresión cron se guarda como texto y se vuelve a interpretar al cargar.
+                self.anuncios[identificador] = Anuncio(
+                    identificador, servidor, canal, mensaje, siguiente, Cron(cron) if cron else None, politica, autor
+                )
+        # Las tuplas se comparan por su primer elemento, la hora de envío; el número de anuncio desempata.
+        self._monticulo = [(anuncio.siguiente, anuncio.id) for anuncio in self.anuncios.values()]
+        heapq.heapify(self._monticulo)  # Ordena la lista como montículo, sin ordenarla entera
+        self.despertar()  # La tarea vuelve a mirar cuál es el primer anuncio
+
+    # Inicia la tarea del programador. `enviar` es la función que envía un anuncio a Discord (`enviar_anuncio`).
+    def iniciar(self, enviar):
+        self.enviar = enviar  # Se guarda para usarla en `_enviar`
+        self.tarea = asyncio.create_task(self._bucle())  # Se ejecuta en segundo plano
+
+    # Detiene la tarea del programador (al cerrar el bot, por ejemplo).
+    def detener(self):
+        if self.tarea is not None:
+            self.tarea.cancel()  # La tarea termina en su siguiente `await`
+            self.tarea = None
+
+    # Hace que la tarea vuelva a calcular cuánto dormir (cuando cambia el primer anuncio o el reloj).
+    def despertar(self):
+        self._cambio.set()  # Despierta a `esperar`, si la tarea está dormida
+
+    # Añade el anuncio al montículo; solo hace falta despertar a la tarea si pasa a ser el primero.
+    def _programar(self, anuncio):
+        # `heappush` añade la entrada manteniendo el orden del montículo, en O(log n).
+        heapq.heappush(self._monticulo, (anuncio.siguiente, anuncio.id))
+        # `self._monticulo[0]` es siempre el anuncio más próximo; si es este, la tarea debe dormir menos.
+        if self._monticulo[0][1] == anuncio.id:
+            self.despertar()
+
+    # Programa un anuncio nuevo: primero se guarda en la base de datos (que le da su número) y después se añade al
+    # montículo. Devuelve el `Anuncio` para que `+anunciar` muestre su número y su hora.
+    async def agregar(self, servidor, canal, mensaje, siguiente, cron, politica, autor):
+        # En la base de datos se guarda el texto de la expresión cron, no el objeto.
+        identificador = await self._en_hilo(
+            self._insertar, servidor, canal, mensaje, siguiente, cron.expresion if cron is not None else None, politica, autor
+        )
+        # Asignación encadenada: el anuncio se guarda en el diccionario y en la variable `anuncio` a la vez.
+        anuncio = self.anuncios[identificador] = Anuncio(identificador, servidor, canal, mensaje, siguiente, cron, politica, autor)
+        self._programar(anuncio)
+        return anuncio
+
+    # Cancela un anuncio. Devuelve el anuncio cancelado, o None si no existía.
+    async def cancelar(self, identificador):
+        # `pop` lo quita del diccionario y lo devuelve; su entrada del montículo se descartará sola (ver `_bucle`).
+        anuncio = self.anuncios.pop(identificador, None)
+        if anuncio is not None:
+            await self._en_hilo(self._borrar, identificador)  # También se borra de la base de datos
+        return anuncio
+
+    # Los `cantidad` próximos anuncios de un servidor de Discord, para `+anuncios`.
+    def de_servidor(self, servidor, cantidad):
+        # `heapq.nsmallest` devuelve los `cantidad` de hora más próxima sin ordenar todos los del servidor.
+        return heapq.nsmallest(
+            cantidad, (anuncio for anuncio in self.anuncios.values() if anuncio.servidor == servidor), key=lambda anuncio: anuncio.siguiente
+        )
+
+    # Tarea del programador: descarta las entradas caducadas, duerme hasta la hora del primer anuncio (o hasta que
+    # algo cambie) y envía los que ya vencieron.
+    async def _bucle(self):
+        while True:
+            # Se apaga la señal antes de mirar el montículo: si algo cambia a partir de ahora, la espera termina enseguida.
+            self._cambio.clear()
+            # Sin anuncios: se espera sin límite a que se programe alguno.
+            if not self._monticulo:
+                await self.esperar(self._cambio, None)
+                continue
+            siguiente, identificador = self._monticulo[0]  # El anuncio más próximo, sin sacarlo
+            anuncio = self.anuncios.get(identificador)
+            # Entrada caducada: el anuncio se canceló, o se reprogramó y tiene otra entrada con su hora nueva.
+            if anuncio is None or anuncio.siguiente != siguiente:
+                heapq.heappop(self._monticulo)  # Se saca y se descarta
+                continue
+            espera = siguiente - self.reloj()  # Segundos que faltan para su hora
+            # Todavía no es la hora: se duerme hasta entonces, o hasta que `despertar` avise de un cambio.
+            if espera > 0:
+                await self.esperar(self._cambio, espera)
+                continue
+            heapq.heappop(self._monticulo)  # Ya es la hora: se saca del montículo
+            await self._vencido(anuncio)
+
+    # Procesa un anuncio que ha llegado a su hora. Si lleva más de `tolerancia` segundos de retraso se perdió, y
+    # solo se envía con la política `recuperar`; en los periódicos, las ejecuciones perdidas se juntan en un solo envío
+    # y la siguiente se calcula desde ahora. El cambio se guarda antes de que termine el envío: si el bot se cierra a
+    # mitad, el anuncio no se repite. El envío va en su propia tarea para que un canal lento no retrase a los demás.
+    async def _vencido(self, anuncio):
+        ahora = self.reloj()
+        enviar = ahora - anuncio.siguiente <= self.tolerancia or anuncio.politica == 'recuperar'  # ¿Se envía?
+        if anuncio.cron is None:
+            # Anuncio único: se quita del programador y se borra de la base de datos.
+            del self.anuncios[anuncio.id]
+            guardado = self._en_hilo(self._borrar, anuncio.id)
+        else:
+            # Anuncio periódico: se calcula su próxima hora desde la última programada o desde ahora (la que sea más
+            # tarde), se vuelve a añadir al montículo y se guarda la hora nueva.
+            anuncio.siguiente = anuncio.cron.siguiente(max(anuncio.siguiente, ahora))
+            self._programar(anuncio)
+            guardado = self._en_hilo(self._guardar_siguiente, anuncio.id, anuncio.siguiente)
+        # `guardado` es una corrutina que todavía no se ha esperado; la consulta empieza al hacer `await` más abajo.
+        if enviar:
+            tarea = asyncio.create_task(self._enviar(anuncio))  # El envío sigue por su cuenta
+            self._envios.add(tarea)
+            # Cuando la tarea termina, `discard` la quita del conjunto de envíos en curso.
+            tarea.add_done_callback(self._envios.discard)
+        else:
+            self.saltados += 1  # Se pasó la hora y su política es 'saltar'
+        try:
+            await guardado  # Espera a que la base de datos tenga el cambio
+        except sqlite3.Error as error:
+            # El anuncio ya está reprogramado en memoria; solo se avisa en la bitácora.
+            bitacora.error(f'No se pudo guardar el anuncio #{anuncio.id}: {error}')
+
+    # Envía el anuncio y cuenta los envíos correctos y fallidos.
+    async def _enviar(self, anuncio):
+        try:
+            await self.enviar(anuncio)  # En el bot, `enviar_anuncio`
+        except (discord.HTTPException, aiohttp.ClientError) as error:
+            # Discord rechazó el mensaje (canal borrado, sin permisos...) o falló la conexión: se cuenta y se sigue.
+            self.errores += 1
+            bitacora.error(f'No se pudo enviar el anuncio #{anuncio.id}: {error}')
+            return
+        self.enviados += 1  # Envío correcto
+
+# Se crea el programador; se carga en `setup_hook` y se inicia en `on_ready`.
+anuncios = ProgramadorAnuncios(ARCHIVO_ANUNCIOS, TOLERANCIA_ANUNCIOS)
+
+# Envía un anuncio a su canal. Si el canal no está en la caché se pide a Discord; si ya no existe, `fetch_channel`
+# lanza `discord.NotFound` y el programador lo cuenta como error.
+async def enviar_anuncio(anuncio):
+    # `get_channel` busca en la caché del bot (no hace ninguna petición); `or` solo llama a `fetch_channel` si no estaba.
+    canal = bot.get_channel(anuncio.canal) or await bot.fetch_channel(anuncio.canal)
+    await canal.send(anuncio.mensaje)  # El anuncio se envía como un mensaje normal
+
+# Búsqueda de normas
+# Para responder preguntas como "¿está permitido el xray?" sin tener que leer todas las normas,
+# se construye un índice invertido: un diccionario que relaciona cada palabra con las normas en las que aparece.
+# Así, buscar una palabra es una simple consulta al diccionario, sin recorrer el texto de todas las normas.
+
+# Palabras muy comunes en español que no aportan nada a la búsqueda y se ignoran al indexar y al buscar.
+PALABRAS_VACIAS = {
+    'a', 'al', 'con', 'de', 'del', 'el', 'en', 'es', 'esta', 'la', 'las', 'lo', 'los', 'o',
+    'para', 'por', 'que', 'se', 'si', 'su', 'sus', 'un', 'una', 'y',
+}
+
+# Convierte un texto en la lista de palabras (tokens) que se usan en el índice.
+# - Pasa el texto a minúsculas y quita las tildes (`cárcel` y `carcel` se consideran la misma palabra).
+#   `unicodedata.normalize('NFD', ...)` separa cada letra de su tilde, y luego se descartan las tildes (categoría 'Mn').
+# - `re.findall(r'\w+', ...)` separa el texto en palabras, ignorando signos de puntuación.
+# - Se descartan las palabras vacías y se quita la `s` final de las palabras largas para que
+#   el singular y el plural coincidan (`hack` y `hacks`, `construcción` y `construcciones`).
+def tokenizar(texto):
+    texto = unicodedata.normalize('NFD', texto.lower())
+    texto = ''.join(c for c in texto if unicodedata.category(c) != 'Mn')
+    tokens = []
+    for palabra in re.findall(r'\w+', texto):
+        if palabra in PALABRAS_VACIAS:
+            continue
+        if len(palabra) > 3 and palabra.endswith('s'):
+            palabra = palabra[:-1]
+        # Los plurales en `-es` (`construcciones`, `jugadores`, `cárceles`) quedan con una `e` final después de una
+        # consonante; se quita también, y en el singular igual (`nombre` y `nombres` quedan los dos en `nombr`),
+        # para que las dos formas den la misma palabra.
+        if len(palabra) > 4 and palabra.endswith('e') and palabra[-2] not in 'aeiou':
+            palabra = palabra[:-1]
+        tokens.append(palabra)
+    return tokens
+
+# Índice invertido de normas y comandos del servidor.
+class IndiceNormas:
+    def __init__(self):
+        # `_indice` relaciona cada palabra con un diccionario {posición de la norma: veces que aparece la palabra}.
+        self._indice = {}
+        # `_entradas` guarda cada norma como (categoría, número, texto); la posición en esta lista la identifica.
+        self._entradas = []
+
+    # Construye el índice a partir del catálogo de normas y la lista de comandos del servidor.
+    # Se llama una vez al arrancar (y de nuevo si cambia el contenido de las normas).
+    def construir(self, normas, comandos):
+        entradas = []
+        for titulo, reglas in normas.values():
+            for numero, regla in enumerate(reglas, 1):
+                entradas.append((titulo, numero, regla))
+        for numero, linea in enumerate(comandos, 1):
+            entradas.append(('Comandos del servidor', numero, linea))
+        indice = {}
+        for posicion, (_, _, texto) in enumerate(entradas):
+            for token in tokenizar(texto):
+                frecuencias = indice.setdefault(token, {})
+                frecuencias[posicion] = frecuencias.get(posicion, 0) + 1
+        # El índice nuevo se asigna de una sola vez, así una búsqueda nunca ve un índice a medio construir.
+        self._indice, self._entradas = indice, entradas
+
+    # Devuelve las normas que contienen las palabras buscadas, de la más relevante a la menos relevante.
+    # Cada norma se puntúa con (cantidad de palabras distintas que coinciden, frecuencia total de esas palabras),
+    # y `heapq.nlargest` obtiene solo las `limite` mejores sin ordenar todas las coincidencias.
+    def buscar(self, consulta, limite=10):
+        puntuaciones = {}
+        for termino in set(tokenizar(consulta)):
+            for posicion, frecuencia in self._indice.get(termino, {}).items():
+                coincidencias, total = puntuaciones.get(posicion, (0, 0))
+                puntuaciones[posicion] = (coincidencias + 1, total + frecuencia)
+        # En caso de empate, `-posicion` da prioridad a la norma que aparece antes en el catálogo.
+        mejores = heapq.nlargest(limite, puntuaciones, key=lambda posicion: (puntuaciones[posicion], -posicion))
+        return [self._entradas[posicion] for posicion in mejores]
+
+# Configuración por servidor de Discord
+# Cada servidor puede cambiar con `+config` el prefijo, la IP del servidor de Minecraft, el enlace de la tienda
+# y el texto de cada categoría de normas. Lo que no cambia se toma de las constantes del principio del archivo.
+CAMPOS_CONFIGURACION = ('prefijo', 'ip', 'tienda', 'normas')
+
+# Funciones que registran las respuestas estáticas (los embeds de `+help`, `+ip`, las normas...) en la caché de
+# respuestas de una configuración, una por extensión (nombre de la extensión -> función). Las respuestas las
+# definen las extensiones de `DIRECTORIO_EXTENSIONES`, que se añaden aquí al cargarse con
+# `configuraciones.registrar_respuestas`.
+proveedores_respuestas = {}
+
+# Configuración de un servidor de Discord.
+# `personalizadas` son solo las categorías de normas que el servidor cambió; `normas` es el resultado de
+# combinarlas con `NORMAS`, así las categorías que no cambió siguen siendo las de por defecto.
+# La caché de respuestas y el índice de búsqueda se crean la primera vez que se usan, porque dependen de
+# la configuración (el prefijo aparece en los pies de página y las normas pueden ser otras).
+# `__slots__` reduce la memoria de cada objeto, ya que puede haber miles en la caché.
+class ConfiguracionServidor:
+    __slots__ = ('prefijo', 'ip', 'tienda', 'personalizadas', 'normas', 'respuestas', 'indice')
+
+    def __init__(self, prefijo=None, ip=None, tienda=None, normas=None):
+        self.prefijo = prefijo or PREFIJO
+        self.ip = ip or SERVIDOR_MINECRAFT
+        self.tienda = tienda or URL_TIENDA
+        self.personalizadas = normas or {}
+        self.normas = {**NORMAS, **self.personalizadas}
+        self.respuestas = None
+        self.indice = None
+
+    # Estado del servidor de Minecraft de esta configuración (compartido con las demás que usan la misma IP).
+    @property
+    def estado(self):
+        return estado_de(self.ip)
+
+    # Crea la caché de respuestas y deja que cada extensión registre en ella sus respuestas estáticas.
+    # `list(...)` copia las funciones por si una extensión se carga o se descarga mientras tanto.
+    def obtener_respuestas(self):
+        if self.respuestas is None:
+            respuestas = CacheRespuestas()
+            for registrar in list(proveedores_respuestas.values()):
+                registrar(self, respuestas)
+            self.respuestas = respuestas
+        return self.respuestas
+
+    # Crea el índice de búsqueda de `+buscar` con las normas de esta configuración.
+    def obtener_indice(self):
+        if self.indice is None:
+            self.indice = IndiceNormas()
+            self.indice.construir(self.normas, COMANDOS_SERVIDOR)
+        return self.indice
+
+    # Vuelve a combinar las normas por defecto con las personalizadas tras una recarga de las normas, y descarta
+    # los embeds de normas y el índice de búsqueda para que se construyan con el texto nuevo.
+    def recalcular_normas(self):
+        self.normas = {**NORMAS, **self.personalizadas}
+        self.indice = None
+        if self.respuestas is not None:
+            for categoria in NORMAS:
+                self.respuestas.invalidar(categoria)
+
+# Almacén de configuraciones: una base de datos SQLite con una caché LRU delante.
+# - SQLite es una base de datos en un solo archivo que viene incluida con Python. Sus consultas bloquean,
+#   así que se hacen en un hilo aparte (`_hilo`) con `run_in_executor`, y el bot sigue atendiendo mensajes
+#   mientras tanto. El hilo es uno solo, así que las consultas nunca se ejecutan a la vez.
+# - La caché LRU (`_cache`) guarda en memoria las últimas `capacidad` configuraciones usadas. Es un `OrderedDict`:
+#   cada acierto mueve la entrada al final y, cuando se llena, se descarta la primera (la usada hace más tiempo).
+#   Todas las operaciones son O(1), así que resolver el prefijo de un mensaje no depende del número de servidores.
+# - Los servidores sin configuración propia guardan en la caché el mismo objeto `por_defecto`, así no se vuelve
+#   a consultar la base de datos por ellos y tampoco se crea un objeto por servidor.
+# - `_cargas` evita consultas repetidas: si llegan varios mensajes de un servidor que no está en la caché,
+#   todos esperan a la misma lectura (igual que `EstadoServidor` con las consultas al servidor de Minecraft).
+# En el modo cluster cada proceso tiene su propia caché, pero cada servidor de Discord lo atiende un solo proceso,
+# que es también el que recibe sus comandos `+config`, así que su caché nunca queda desactualizada.
+class AlmacenConfiguracion:
+    def __init__(self, archivo, capacidad):
+        self.archivo = archivo
+        self.capacidad = capacidad
+        self.por_defecto = ConfiguracionServidor()
+        self.aciertos = 0
+        self.fallos = 0
+        self._cache = collections.OrderedDict()
+        self._cargas = {}
+        self._conexion = None
+        self._hilo = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='configuracion')
+
+    # Abre la base de datos la primera vez que se usa (siempre desde el hilo de consultas) y crea la tabla si no existe.
+    # El modo WAL permite que varios procesos del cluster lean y escriban el mismo archivo sin bloquearse entre sí.
+    # Cada columna vacía (NULL) significa "usar el valor por defecto".
+    def _abrir(self):
+        if self._conexion is None:
+            self._conexion = sqlite3.connect(self.archivo, check_same_thread=False)
+            self._conexion.execute('PRAGMA journal_mode=WAL')
+            self._conexion.execute(
+                'CREATE TABLE IF NOT EXISTS configuracion '
+                '(servidor INTEGER PRIMARY KEY, prefijo TEXT, ip TEXT, tienda TEXT, normas TEXT)'
+            )
+        return self._conexion
+
+    def _leer(self, servidor_id):
+        return self._abrir().execute(
+            'SELECT prefijo, ip, tienda, normas FROM configuracion WHERE servidor = ?', (servidor_id,)
+        ).fetchone()
+
+    # Crea la fila del servidor si no existe y cambia un campo. `with conexion` confirma los cambios al terminar.
+    # `campo` siempre es uno de `CAMPOS_CONFIGURACION` (se comprueba en `actualizar`), nunca texto del usuario.
+    def _escribir(self, servidor_id, campo, valor):
+        conexion = self._abrir()
+        with conexion:
+            conexion.execute('INSERT OR IGNORE INTO configuracion (servidor) VALUES (?)', (servidor_id,))
+            conexion.execute(f'UPDATE configuracion SET {campo} = ? WHERE servidor = ?', (valor, servidor_id))
+
+    def _borrar(self, servidor_id):
+        conexion = self._abrir()
+        with conexion:
+            conexion.execute('DELETE FROM configuracion WHERE servidor = ?', (servidor_id,))
+
+    # Ejecuta `funcion` en el hilo de consultas y espera su resultado sin bloquear el bucle de eventos.
+    async def _en_hilo(self, funcion, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._hilo, funcion, *args)
+
+    # Devuelve la configuración si está en la caché (o None), sin esperar a nada. Es lo que usa `obtener_prefijo`.
+    def en_cache(self, servidor_id):
+        configuracion = self._cache.get(servidor_id)
+        if configuracion is not None:
+            self._cache.move_to_end(servidor_id)
+            self.aciertos += 1
+        return configuracion
+
+    # Devuelve la configuración de un servidor, leyéndola de la base de datos si no está en la caché.
+    # `servidor_id=None` (mensajes directos) devuelve la configuración por defecto.
+    async def obtener(self, servidor_id):
+        if servidor_id is None:
+            return self.por_defecto
+        configuracion = self.en_cache(servidor_id)
+        if configuracion is not None:
+            return configuracion
+        carga = self._cargas.get(servidor_id)
+        if carga is None:
+            self.fallos += 1
+            carga = self._cargas[servidor_id] = asyncio.ensure_future(self._cargar(servidor_id))
+        return await asyncio.shield(carga)
+
+    # Lee la configuración y la guarda en la caché.
+    # Solo se guarda si la carga sigue siendo la vigente: si mientras tanto se editó la configuración, `invalidar`
+    # la habrá quitado de `_cargas` y el resultado (que puede ser anterior a la edición) no se guarda.
+    # Si la base de datos falla, se usa la configuración por defecto sin guardarla, para volver a intentarlo después.
+    async def _cargar(self, servidor_id):
+        tarea = asyncio.current_task()
+        try:
+            try:
+                fila = await self._en_hilo(self._leer, servidor_id)
+            except sqlite3.Error as error:
+                bitacora.error(f'No se pudo leer la configuración del servidor {servidor_id}: {error}')
+                return self.por_defecto
+            if fila is None:
+                configuracion = self.por_defecto
+            else:
+                prefijo, ip, tienda, normas = fila
+                configuracion = ConfiguracionServidor(prefijo, ip, tienda, json.loads(normas) if normas else None)
+            if self._cargas.get(servidor_id) is tarea:
+                self._cache[servidor_id] = configuracion
+                if len(self._cache) > self.capacidad:
+                    self._cache.popitem(last=False)
+            return configuracion
+        finally:
+            if self._cargas.get(servidor_id) is tarea:
+                del self._cargas[servidor_id]
+
+    # Cambia un campo (`valor=None` vuelve al valor por defecto) e invalida la caché del servidor,
+    # para que el siguiente mensaje lea la configuración nueva.
+    async def actualizar(self, servidor_id, campo, valor):
+        if campo not in CAMPOS_CONFIGURACION:
+            raise ValueError(f'Campo de configuración desconocido: {campo}')
+        await self._en_hilo(self._escribir, servidor_id, campo, valor)
+        self.invalidar(servidor_id)
+
+    # Borra toda la configuración del servidor.
+    async def restablecer(self, servidor_id):
+        await self._en_hilo(self._borrar, servidor_id)
+        self.invalidar(servidor_id)
+
+    def invalidar(self, servidor_id):
+        self._cache.pop(servidor_id, None)
+        self._cargas.pop(servidor_id, None)
+
+    # Invalida el embed de `+ip` de todas las configuraciones en memoria que usan la IP `ip`.
+    def invalidar_ip(self, ip):
+        for configuracion in (self.por_defecto, *self._cache.values()):
+            if configuracion.ip == ip and configuracion.respuestas is not None:
+                configuracion.respuestas.invalidar('ip')
+
+    # Aplica las normas nuevas a todas las configuraciones en memoria. Las de la configuración por defecto se
+    # construyen al momento, como al arrancar, para que el siguiente `+leves` no tenga que esperar.
+    def recalcular_normas(self):
+        for configuracion in (self.por_defecto, *self._cache.values()):
+            configuracion.recalcular_normas()
+        self.por_defecto.obtener_respuestas().reconstruir()
+        self.por_defecto.obtener_indice()
+
+    # Añade (o, con `registrar=None`, quita) la función de una extensión que registra sus respuestas estáticas.
+    # Las cachés de respuestas en memoria se descartan para que se vuelvan a crear con las funciones actuales, y
+    # las de la configuración por defecto se construyen al momento, así el primer comando no tiene que esperar.
+    def registrar_respuestas(self, nombre, registrar):
+        if registrar is None:
+            proveedores_respuestas.pop(nombre, None)
+        else:
+            proveedores_respuestas[nombre] = registrar
+        for configuracion in (self.por_defecto, *self._cache.values()):
+            configuracion.respuestas = None
+        self.por_defecto.obtener_respuestas().reconstruir()
+
+# Lee `ARCHIVO_NORMAS` antes de crear el almacén, para que la configuración por defecto ya use esas normas.
+# Si el archivo no es válido, el bot arranca con las normas del código.
+try:
+    NORMAS.update(leer_normas(ARCHIVO_NORMAS))
+except (OSError, ValueError) as error:
+    bitacora.warning(f'No se pudieron leer las normas de {ARCHIVO_NORMAS}: {error}')
+
+# Se crea el almacén. Las respuestas estáticas de la configuración por defecto se construyen al cargar las
+# extensiones que las definen (ver `registrar_respuestas`).
+configuraciones = AlmacenConfiguracion(ARCHIVO_CONFIGURACION, CAPACIDAD_CACHE_CONFIGURACION)
+
+# Cambia las normas en uso por `normas`. Todo ocurre sin ceder el control al bucle de eventos, así que ningún
+# comando ve una mezcla de normas viejas y nuevas.
+def aplicar_normas(normas):
+    NORMAS.clear()
+    NORMAS.update(normas)
+    configuraciones.recalcular_normas()
+
+# Configuración del servidor de Discord donde se escribió el comando.
+async def configuracion_de(ctx):
+    return await configuraciones.obtener(ctx.guild.id if ctx.guild is not None else None)
+
+# Categorías de comandos (cogs)
+# Los comandos se agrupan en clases que heredan de `commands.Cog`, una por tema: staff, consola del servidor,
+# estadísticas, sanciones y anuncios. Cada comando es un método de su clase y recibe `self` (la categoría) antes de `ctx`.
+# Estas categorías se añaden al bot en `setup_hook` (ver `cargar_cogs`), así el bot puede iniciar sesión antes de
+# registrar los comandos. Las de información, tienda y normas son extensiones de `DIRECTORIO_EXTENSIONES`, que se cargan
+# cuando el bot ya está conectado a Discord (ver `cargar_extensiones`).
+
+# Comprueba un valor de `+config` antes de guardarlo. Devuelve el mensaje de error o None si el valor es válido.
+# Ningún valor puede tener espacios (el prefijo no se podría escribir y la IP o el enlace no serían válidos)
+# y, si la IP lleva puerto (`host:puerto`), el puerto debe ser un número válido.
+def validar_configuracion(campo, valor):
+    if not valor or any(caracter.isspace() for caracter in valor):
+        return f'El valor de {campo} no puede estar vacío ni contener espacios.'
+    if campo == 'prefijo' and len(valor) > 5:
+        return 'El prefijo puede tener como máximo 5 caracteres.'
+    if campo == 'ip':
+        _, separador, puerto = valor.partition(':')
+        if separador and not (puerto.isdigit() and 0 < int(puerto) < 65536):
+            return 'El puerto debe ser un número entre 1 y 65535.'
+    return None
+
+# Comprobación de staff
+# `es_staff()` devuelve una comprobación de discord.py que se añade a los comandos exclusivos del staff.
+# `commands.check_any` acepta al usuario si cumple cualquiera de las condiciones:
+# tener el rol `ROL_STAFF` o ser administrador del servidor de Discord.
+def es_staff():
+    return commands.check_any(commands.has_role(ROL_STAFF), commands.has_permissions(administrator=True))
+
+# Categoría de comandos exclusivos del staff.
+class Staff(commands.Cog):
+    # Comando del staff para controlar el vigilante del bucle de eventos
+    # - `+vigilante on`: activa el vigilante.
+    # - `+vigilante off`: lo desactiva.
+    # - `+vigilante` o `+vigilante informe`: muestra el retraso del bucle y los comandos que más lo han bloqueado.
+    @registrar_comando(name='vigilante', description='Activa, desactiva o muestra el informe del vigilante del bucle de eventos.')
+    @es_staff()
+    async def vigilante(self, ctx, accion='informe'):
+        if accion == 'on':
+            vigilante_bucle.iniciar()
+            await ctx.send(f'Vigilante del bucle activado (umbral: {vigilante_bucle.umbral * 1000:.0f} ms).')
+        elif accion == 'off':
+            vigilante_bucle.detener()
+            await ctx.send('Vigilante del bucle desactivado.')
+        else:
+            embed = discord.Embed(
+                title='Vigilante del bucle de eventos',
+                description=f"Estado: {'activo' if vigilante_bucle.activo else 'inactivo'}\n"
+                            f'Retraso actual: {vigilante_bucle.retraso * 1000:.1f} ms\n'
+                            f'Retraso máximo: {vigilante_bucle.retraso_maximo * 1000:.1f} ms',
+                color=discord.Color.purple()  # Color morado para el borde del embed
+            )
+            # Un campo por cada comando que ha bloqueado el bucle, empezando por el peor.
+            for nombre, (veces, maximo, total) in vigilante_bucle.peores():
+                embed.add_field(name=nombre, value=f'{veces} bloqueos, máx. {maximo * 1000:.0f} ms, total {total * 1000:.0f} ms', inline=False)
+            # `ctx.prefix` es el prefijo con el que se escribió el comando, que depende del servidor.
+            embed.set_footer(text=f'Uso: {ctx.prefix}vigilante on | off | informe')
+            await ctx.send(embed=embed)
+
+    # Comando del staff para recargar las extensiones de `DIRECTORIO_EXTENSIONES` y las normas de `ARCHIVO_NORMAS`
+    # sin reiniciar el bot ni desconectarlo de Discord. Responde con el resultado, la duración y los errores.
+    @registrar_comando(name='recargar', description='Recarga las extensiones de comandos y las normas sin reiniciar el bot.')
+    @es_staff()
+    async def recargar(self, ctx):
+        aplicada, errores = await extensiones.recargar(bot)
+        if not aplicada:
+            titulo, descripcion = 'Recarga cancelada', 'No se cambió nada: se siguen usando las versiones anteriores.'
+        elif errores:
+            # Con errores pero aplicada: solo puede fallar la sincronización de los comandos de barra con Discord.
+            titulo, descripcion = 'Recarga con errores', 'Los cambios se aplicaron, pero no se pudieron sincronizar los comandos con Discord.'
+        else:
+            titulo, descripcion = 'Recarga completada', 'Comandos y normas actualizados.'
+        embed = discord.Embed(
+            title=titulo,
+            description=f'{descripcion}\nDuración: {extensiones.duracion * 1000:.1f} ms',
+            color=discord.Color.purple()
+        )
+        embed.add_field(name='Extensiones', value=', '.join(extensiones.cargadas(bot)) or 'ninguna', inline=False)
+        # Como mucho 10 errores, para no superar el límite de campos del embed.
+        for nombre, error in list(errores.items())[:10]:
+            embed.add_field(name=nombre, value=f'{type(error).__name__}: {error}'[:1024], inline=False)
+        embed.set_footer(text=f"Normas: {ARCHIVO_NORMAS if os.path.exists(ARCHIVO_NORMAS) else 'las del código'}")
+        await ctx.send(embed=embed)
+
+    # Comando del staff para configurar el bot en su servidor de Discord
+    # - `+config`: muestra la configuración actual.
+    # - `+config prefijo !`, `+config ip mc.ejemplo.com:25566`, `+config tienda https://...`: cambian ese valor.
+    # - `+config normas leves` seguido de una norma por línea (o separadas por `|`): reemplaza las normas de esa categoría.
+    #   Sin normas, la categoría vuelve a las normas por defecto.
+    # - `+config restablecer prefijo` vuelve al valor por defecto de un campo; `+config restablecer` (o `todo`), de todos.
+    # Cada cambio se guarda en la base de datos e invalida la configuración en la caché, así que se aplica desde el siguiente mensaje.
+    # `@commands.guild_only()` impide usarlo en mensajes directos, donde no hay servidor que configurar.
+    @registrar_comando(name='config', description='Muestra o cambia la configuración del bot en este servidor.')
+    @commands.guild_only()
+    @es_staff()
+    async def config(self, ctx, campo='', *, valor=''):
+        configuracion = await configuracion_de(ctx)
+        if campo in ('prefijo', 'ip', 'tienda'):
+            error = validar_configuracion(campo, valor)
+            if error is not None:
+                await ctx.send(error)
+                return
+            await configuraciones.actualizar(ctx.guild.id, campo, valor)
+            await ctx.send(f'Configuración actualizada: {campo} = `{valor}`')
+        elif campo == 'normas':
+            # La primera palabra es la categoría y el resto son las normas.
+            partes = valor.split(None, 1)
+            categoria = partes[0] if partes else ''
+            if categoria not in NORMAS:
+                await ctx.send(f"Categoría desconocida. Usa una de: {', '.join(NORMAS)}")
+                return
+            # Se guardan solo las categorías personalizadas, como JSON; el título de la categoría se conserva.
+            personalizadas = dict(configuracion.personalizadas)
+            reglas = [regla.strip() for regla in re.split(r'\n|\|', partes[1] if len(partes) > 1 else '') if regla.strip()]
+            # Antes de guardar, se comprueba que las normas caben en la descripción del embed de `+<categoría>`: si no,
+            # Discord rechazaría el mensaje cada vez que alguien usara el comando.
+            largo = len(texto_normas(reglas))
+            if largo > LARGO_DESCRIPCION:
+                await ctx.send(f'Las normas {categoria} ocupan {largo} caracteres y un mensaje admite {LARGO_DESCRIPCION}. Acórtalas o quita alguna.')
+                return
+            if reglas:
+                personalizadas[categoria] = (NORMAS[categoria][0], reglas)
+            else:
+                personalizadas.pop(categoria, None)
+            await configuraciones.actualizar(ctx.guild.id, 'normas', json.dumps(personalizadas, ensure_ascii=False) if personalizadas else None)
+            await ctx.send(f'Normas {categoria}: ' + (f'{len(reglas)} reglas personalizadas.' if reglas else 'se usan las normas por defecto.'))
+        elif campo == 'restablecer':
+            if valor in CAMPOS_CONFIGURACION:
+                await configuraciones.actualizar(ctx.guild.id, valor, None)
+                await ctx.send(f'Se restableció el valor por defecto de {valor}.')
+            elif valor in ('', 'todo'):
+                await configuraciones.restablecer(ctx.guild.id)
+                await ctx.send('Se restableció toda la configuración de este servidor.')
+            else:
+                await ctx.send(f"Campo desconocido. Usa uno de: {', '.join(CAMPOS_CONFIGURACION)} o todo")
+        else:
+            embed = discord.Embed(title='Configuración del servidor', color=discord.Color.purple())
+            embed.add_field(name='Prefijo', value=f'`{configuracion.prefijo}`', inline=True)
+            embed.add_field(name='IP', value=configuracion.ip, inline=True)
+            embed.add_field(name='Tienda', value=configuracion.tienda, inline=False)
+            embed.add_field(name='Normas personalizadas', value=', '.join(configuracion.personalizadas) or 'ninguna', inline=False)
+            embed.set_footer(text=f'Uso: {ctx.prefix}config prefijo | ip | tienda | normas <categoría> <reglas> | restablecer [campo]')
+            await ctx.send(embed=embed)
+
+# Nombres de jugador de Minecraft válidos: de 3 a 16 letras, números o guiones bajos.
+# Se comprueban antes de enviarlos por RCON, para que nadie pueda colar otro comando dentro de un nombre.
+NOMBRE_JUGADOR = re.compile(r'[A-Za-z0-9_]{3,16}')
+
+# Quita los códigos de color de Minecraft (`§` seguido de un carácter) y recorta la respuesta
+# para que quepa en un mensaje de Discord (2000 caracteres como máximo).
+def limpiar_respuesta_rcon(texto, limite=1900):
+    texto = re.sub('§.', '', texto).strip() or '(sin respuesta)'
+    return texto if len(texto) <= limite else texto[:limite] + '…'
+
+# Categoría de comandos del staff que se ejecutan en la consola del servidor de Minecraft por RCON.
+# - `+lista`: jugadores conectados (`/list`).
+# - `+ban <jugador> [motivo]`: banea a un jugador.
+# - `+whitelist add | remove <jugadores...>`: añade o quita uno o muchos jugadores a la vez (separados por espacios o comas).
+# - `+rcon <comando>`: cualquier comando de consola; solo para administradores del servidor de Discord.
+class Consola(commands.Cog):
+    # Se ejecuta antes de cada comando de la categoría. Con comandos de barra avisa a Discord de que la respuesta
+    # puede tardar (el servidor de Minecraft puede ser lento); con comandos de prefijo no hace nada.
+    async def cog_before_invoke(self, ctx):
+        await ctx.defer()
+
+    # Ejecuta un comando y envía la respuesta en un bloque de código, o el error si falló.
+    async def _responder(self, ctx, comando):
+        try:
+            respuesta = await rcon.ejecutar(comando)
+        except ErrorRcon as error:
+            await ctx.send(f'Error de RCON: {error}')
+            return
+        await ctx.send(f'```\n{limpiar_respuesta_rcon(respuesta)}\n```')
+
+    @registrar_comando(name='lista', description='Muestra los jugadores conectados al servidor de Minecraft.')
+    @es_staff()
+    async def lista(self, ctx):
+        await self._responder(ctx, 'list')
+
+    # `' '.join(motivo.split())` junta el motivo en una sola línea, ya que un salto de línea cortaría el comando.
+    @registrar_comando(name='ban', description='Banea a un jugador del servidor de Minecraft.')
+    @es_staff()
+    async def ban(self, ctx, jugador, *, motivo=''):
+        if not NOMBRE_JUGADOR.fullmatch(jugador):
+            await ctx.send(f'`{jugador}` no es un nombre de jugador válido.')
+            return
+        await self._responder(ctx, f"ban {jugador} {' '.join(motivo.split())}".strip())
+
+    # Con varios jugadores, todos los comandos se envían a la vez con `rcon.ejecutar_varios` y se responde
+    # con un resumen (cuántos se completaron, cuánto tardó y qué jugadores fallaron).
+    # `dict.fromkeys` quita los nombres repetidos conservando el orden.
+    @registrar_comando(name='whitelist', description='Añade o quita jugadores de la whitelist del servidor de Minecraft.')
+    @es_staff()
+    async def whitelist(self, ctx, accion, *, jugadores=''):
+        if accion not in ('add', 'remove'):
+            await ctx.send(f'Uso: {ctx.prefix}whitelist add | remove <jugador> [jugador...]')
+            return
+        nombres = list(dict.fromkeys(jugadores.replace(',', ' ').split()))
+        invalidos = [nombre for nombre in nombres if not NOMBRE_JUGADOR.fullmatch(nombre)]
+        if not nombres or invalidos:
+            await ctx.send(f"Nombres de jugador no válidos: {', '.join(invalidos) or '(ninguno)'}")
+            return
+        if len(nombres) == 1:
+            await self._responder(ctx, f'whitelist {accion} {nombres[0]}')
+            return
+        inicio = time.perf_counter()
+        resultados = await rcon.ejecutar_varios([f'whitelist {accion} {nombre}' for nombre in nombres])
+        fallidos = [nombre for nombre, resultado in zip(nombres, resultados) if isinstance(resultado, Exception)]
+        mensaje = f'whitelist {accion}: {len(nombres) - len(fallidos)} de {len(nombres)} jugadores en {time.perf_counter() - inicio:.1f} s.'
+        if fallidos:
+            mensaje += f"\nFallaron ({resultados[nombres.index(fallidos[0])]}): {', '.join(fallidos)}"
+        await ctx.send(mensaje[:1900])
+
+    # El comando se llama `rcon`, pero el método `consola`, para no ocultar el pool `rcon`.
+    # Se quita la `/` inicial (la consola no la necesita) y los saltos de línea.
+    @registrar_comando(name='rcon', description='Ejecuta un comando en la consola del servidor de Minecraft.')
+    @commands.has_permissions(administrator=True)
+    async def consola(self, ctx, *, comando):
+        await self._responder(ctx, ' '.join(comando.split()).lstrip('/'))
+
+# Categoría de comandos con las estadísticas de los jugadores del servidor de Minecraft.
+# Los comandos leen el índice en memoria (`indice_estadisticas`), nunca los archivos de estadísticas: responder
+# `+top` o `+stats` cuesta lo mismo con diez jugadores que con diez mil.
+class Estadisticas(commands.Cog):
+    # Clasificación de una estadística. La cantidad se limita a 25 para que el mensaje no sea demasiado largo.
+    # `cantidad: int = 10` hace que discord.py convierta el texto escrito en un número, y que valga 10 si no se escribe.
+    @registrar_comando(name='top', description='Muestra la clasificación de jugadores en una estadística.')
+    async def top(self, ctx, estadistica='', cantidad: int = 10):
+        # Sin estadística, o con una que no existe, se explica cómo usar el comando y qué estadísticas hay.
+        if estadistica not in ESTADISTICAS:
+            await ctx.send(f"Uso: {ctx.prefix}top <estadística> [cantidad]. Estadísticas: {', '.join(ESTADISTICAS)}")
+            return
+        # `ctx.defer()` avisa a Discord de que la respuesta tardará un poco (con comandos de barra, muestra "pensando...").
+        await ctx.defer()
+        # Si el índice todavía no se ha cargado (el bot acaba de arrancar), se espera a que termine la primera carga.
+        await indice_estadisticas.asegurar()
+        # `max(1, min(cantidad, 25))` deja la cantidad entre 1 y 25, escriba lo que escriba el usuario.
+        mejores = indice_estadisticas.top(estadistica, max(1, min(cantidad, 25)))
+        if not mejores:
+            await ctx.send('Todavía no hay estadísticas de jugadores.')
+            return
+        # Crea el embed con la clasificación, una línea por jugador.
+        embed = discord.Embed(
+            title=f'Top {len(mejores)}: {ESTADISTICAS[estadistica][0]}',  # Título del embed, por ejemplo "Top 10: Muertes"
+            # `enumerate(mejores, 1)` numera los jugadores desde 1. `escape_markdown` evita que un nombre con `_` se
+            # muestre en cursiva.
+            description='\n'.join(
+                f'**{puesto}.** {discord.utils.escape_markdown(nombre)}: {formatear_estadistica(estadistica, valor)}'
+                for puesto, (nombre, valor) in enumerate(mejores, 1)
+            ),
+            color=discord.Color.purple()  # Color del borde del embed, en este caso morado
+        )
+        # El pie de página indica cuántos jugadores hay en el índice y a qué hora se actualizó por última vez.
+        # `time.localtime` convierte la marca de tiempo en una fecha local y `strftime("%H:%M")` la escribe como `18:05`.
+        embed.set_footer(text=f'{len(indice_estadisticas.modificados)} jugadores · actualizado {time.strftime("%H:%M", time.localtime(indice_estadisticas.actualizado))}')
+        await ctx.send(embed=embed)  # Envía el embed en el canal donde se usó el comando
+
+    # Estadísticas de un jugador, con su puesto en cada una.
+    @registrar_comando(name='stats', description='Muestra las estadísticas de un jugador.')
+    async def stats(self, ctx, jugador):
+        await ctx.defer()  # La respuesta puede tardar si el índice todavía se está cargando
+        await indice_estadisticas.asegurar()
+        # Busca al jugador por su nombre (sin distinguir mayúsculas) y devuelve su nombre real y sus valores.
+        encontrado = indice_estadisticas.jugador(jugador)
+        if encontrado is None:
+            await ctx.send(f'No hay estadísticas de `{discord.utils.escape_markdown(jugador)}`.')
+            return
+        nombre, valores = encontrado  # `valores`: estadística -> (valor, puesto)
+        embed = discord.Embed(title=f'Estadísticas de {discord.utils.escape_markdown(nombre)}', color=discord.Color.purple())
+        # Un campo por estadística. `inline=True` coloca los campos uno al lado de otro, en columnas.
+        for estadistica, (valor, puesto) in valores.items():
+            embed.add_field(name=ESTADISTICAS[estadistica][0], value=f'{formatear_estadistica(estadistica, valor)} (#{puesto})', inline=True)
+        # El pie de página recuerda cómo ver la clasificación completa de una estadística.
+        embed.set_footer(text=f'Clasificación: {ctx.prefix}top <estadística>')
+        await ctx.send(embed=embed)
+
+# Texto de una norma para las respuestas de sanciones, por ejemplo "Graves #2: Hacks están prohibidos...".
+# Si la norma ya no existe (se cambiaron las normas con `+config normas`), se indica en vez del texto.
+def describir_norma(configuracion, categoria, numero, limite=80):
+    # `configuracion.normas[categoria]` es (título, lista de normas); solo hace falta la lista.
+    _, reglas = configuracion.normas[categoria]
+    # Las normas se numeran desde 1, pero la lista empieza en 0: la norma 2 es `reglas[1]`.
+    texto = reglas[numero - 1] if 0 < numero <= len(reglas) else '(norma eliminada)'
+    # Los textos largos se recortan a `limite` caracteres y terminan en "…".
+    return f'{categoria.capitalize()} #{numero}: ' + (texto if len(texto) <= limite else texto[:limite] + '…')
+
+# Categoría de comandos del staff para registrar y consultar sanciones.
+# Todos llevan `@es_staff()`: solo los puede usar quien tenga el rol de staff configurado en el servidor de Discord.
+class Sanciones(commands.Cog):
+    # Comprueba que la norma existe en las normas de este servidor de Discord antes de registrar la sanción.
+    # `*, motivo=''` hace que el motivo sea todo lo que se escriba después del número, con espacios incluidos.
+    @registrar_comando(name='sancionar', description='Registra una sanción a un jugador por incumplir una norma.')
+    @es_staff()  # Solo para el staff de este servidor de Discord
+    async def sancionar(self, ctx, jugador, categoria, numero: int, *, motivo=''):
+        configuracion = await configuracion_de(ctx)  # Normas de este servidor de Discord
+        # El nombre tiene que ser un nombre de Minecraft válido (ver `NOMBRE_JUGADOR`).
+        if not NOMBRE_JUGADOR.fullmatch(jugador):
+            await ctx.send(f'`{jugador}` no es un nombre de jugador válido.')
+            return  # No se registra nada
+        categoria = categoria.lower()  # `Graves` y `graves` son la misma categoría
+        # La categoría tiene que existir y el número estar entre 1 y el número de normas de esa categoría.
+        if categoria not in configuracion.normas or not 0 < numero <= len(configuracion.normas[categoria][1]):
+            await ctx.send(f"No existe la norma {categoria} #{numero}. Categorías: {', '.join(configuracion.normas)}")
+            return  # Sin norma válida no hay sanción
+        # `' '.join(motivo.split())` quita los espacios y saltos de línea sobrantes del motivo. Si el archivo no se
+        # puede escribir, la sanción no se registra y se avisa al staff.
+        try:
+            sancion = await sanciones.registrar(jugador, categoria, numero, ' '.join(motivo.split()), ctx.author.id)
+        except OSError as error:
+            await ctx.send(f'No se pudo guardar la sanción: {error}')
+            return  # La sanción no quedó registrada
+        total = len(sanciones.por_jugador[jugador.lower()])  # Sanciones vigentes del jugador, con esta incluida
+        await ctx.send(f'Sanción #{sancion.id} registrada a **{jugador}** por {describir_norma(configuracion, categoria, numero)} ({total} en total).')
+
+    # Anula una sanción por su número (el que aparece en `+historial`).
+    @registrar_comando(name='anular', description='Anula una sanción registrada por error.')
+    @es_staff()  # Solo para el staff de este servidor de Discord
+    async def anular(self, ctx, identificador: int):
+        # Se guarda quién la anuló, igual que quién la puso.
+        try:
+            sancion = await sanciones.anular(identificador, ctx.author.id)
+        except OSError as error:
+            await ctx.send(f'No se pudo anular la sanción: {error}')
+            return  # La sanción sigue vigente
+        # None: el número no existe o la sanción ya estaba anulada.
+        if sancion is None:
+            await ctx.send(f'No existe la sanción #{identificador}.')
+            return
+        await ctx.send(f'Sanción #{identificador} a **{sancion.jugador}** anulada.')
+
+    # Muestra el total de sanciones del jugador por categoría y las 15 más recientes. `<t:fecha:d>` hace que Discord
+    # muestre la fecha en el formato y la zona horaria de quien lo lee.
+    @registrar_comando(name='historial', description='Muestra las sanciones de un jugador.')
+    @es_staff()  # Solo para el staff de este servidor de Discord
+    async def historial(self, ctx, jugador):
+        configuracion = await configuracion_de(ctx)  # Normas de este servidor de Discord
+        lista = sanciones.historial(jugador)  # De la más reciente a la más antigua
+        if not lista:
+            await ctx.send(f'**{discord.utils.escape_markdown(jugador)}** no tiene sanciones.')
+            return  # Nada que mostrar
+        # `collections.Counter` cuenta cuántas sanciones hay de cada categoría.
+        por_categoria = collections.Counter(sancion.categoria for sancion in lista)
+        # Una línea por sanción: número, fecha, norma y motivo (si lo tiene). Si la categoría ya no existe en las
+        # normas de este servidor, se muestra solo su nombre y número.
+        lineas = [
+            f'**#{sancion.id}** <t:{sancion.fecha}:d> ' + (describir_norma(configuracion, sancion.categoria, sancion.numero, 60) if sancion.categoria in configuracion.normas else f'{sancion.categoria} #{sancion.numero}')
+            + (f' · {sancion.motivo[:100]}' if sancion.motivo else '')
+            for sancion in lista[:15]
+        ]
+        # El título usa el nombre tal como se escribió en la última sanción, con sus mayúsculas.
+        embed = discord.Embed(
+            title=f'Historial de {discord.utils.escape_markdown(lista[0].jugador)}',
+            # Primero el resumen ("5 sanciones: 3 leves, 2 graves") y, tras una línea en blanco, las sanciones.
+            description=f"{len(lista)} sanciones: {', '.join(f'{cantidad} {categoria}' for categoria, cantidad in por_categoria.most_common())}\n\n" + '\n'.join(lineas),
+            color=discord.Color.purple()  # Color del borde del embed, en este caso morado
+        )
+        embed.set_footer(text=f'Mostrando las {min(len(lista), 15)} más recientes. Para anular una: {ctx.prefix}anular <número>')
+        await ctx.send(embed=embed)  # Envía el embed en el canal donde se usó el comando
+
+    # Muestra las normas por las que más se sanciona.
+    @registrar_comando(name='infracciones', description='Muestra las normas más incumplidas.')
+    @es_staff()  # Solo para el staff de este servidor de Discord
+    async def infracciones(self, ctx, cantidad: int = 10):
+        configuracion = await configuracion_de(ctx)  # Normas de este servidor de Discord
+        # Como en `+top`, la cantidad se deja entre 1 y 25.
+        normas = sanciones.mas_incumplidas(max(1, min(cantidad, 25)))
+        if not normas:
+            await ctx.send('Todavía no hay sanciones registradas.')
+            return
+        embed = discord.Embed(
+            title='Normas más incumplidas',  # Título del embed
+            # Una línea por norma: cuántas sanciones tiene y su texto.
+            description='\n'.join(
+                f'**{veces}** · ' + (describir_norma(configuracion, categoria, numero, 60) if categoria in configuracion.normas else f'{categoria} #{numero}')
+                for (categoria, numero), veces in normas
+            ),
+            color=discord.Color.purple()
+        )
+        # El pie de página resume el registro: sanciones vigentes y jugadores sancionados.
+        embed.set_footer(text=f'{len(sanciones.sanciones)} sanciones a {len(sanciones.por_jugador)} jugadores.')
+        await ctx.send(embed=embed)  # Envía el embed en el canal donde se usó el comando
+
+# Texto de uso de `+anunciar`, que se muestra cuando falta algo o no se entiende la hora.
+# `{prefijo}` se sustituye con `format` por el prefijo de cada servidor de Discord.
+USO_ANUNCIAR = '{prefijo}anunciar #canal <cuándo> [--saltar] <mensaje>. <cuándo> puede ser `2h30m`, `2024-06-01T18:00` o una expresión cron entre comillas, como `"0 18 * * 5"`.'
+
+# Categoría de comandos del staff para programar anuncios en los canales del servidor de Discord.
+# `@commands.guild_only()` impide usarlos por mensaje privado: cada anuncio pertenece a un servidor de Discord.
+class Anuncios(commands.Cog):
+    # Programa un anuncio. `--saltar` al principio del mensaje elige la política `saltar` para las ejecuciones perdidas.
+    # `canal: discord.TextChannel` hace que discord.py convierta la mención `#canal` en el canal de texto.
+    @registrar_comando(name='anunciar', description='Programa un anuncio único o periódico en un canal.')
+    @commands.guild_only()  # No se puede usar por mensaje privado
+    @es_staff()  # Solo para el staff de este servidor de Discord
+    async def anunciar(self, ctx, canal: discord.TextChannel, cuando, *, mensaje):
+        politica = 'recuperar'  # Por defecto, un anuncio que se pasó de hora se envía igualmente
+        # `split(maxsplit=1)[0]` es la primera palabra del mensaje.
+        if mensaje.split(maxsplit=1)[0] == '--saltar':
+            politica = 'saltar'
+            mensaje = mensaje[len('--saltar'):].strip()  # Se quita `--saltar` del texto del anuncio
+        if not mensaje:
+            await ctx.send(f'Falta el mensaje. Uso: {USO_ANUNCIAR.format(prefijo=ctx.prefix)}')
+            return  # No se programa nada
+        # Cada servidor de Discord puede tener como mucho `MAXIMO_ANUNCIOS_SERVIDOR` anuncios programados.
+        # La suma cuenta los anuncios de este servidor (`True` cuenta como 1).
+        if sum(anuncio.servidor == ctx.guild.id for anuncio in anuncios.anuncios.values()) >= MAXIMO_ANUNCIOS_SERVIDOR:
+            await ctx.send(f'Este servidor ya tiene {MAXIMO_ANUNCIOS_SERVIDOR} anuncios programados; cancela alguno antes.')
+            return  # No se programa nada
+        # Interpreta `cuando`; si no es válido, el error explica por qué y se muestra junto al uso del comando.
+        try:
+            siguiente, cron = interpretar_cuando(cuando, anuncios.reloj())
+        except ValueError as error:
+            await ctx.send(f'{error} Uso: {USO_ANUNCIAR.format(prefijo=ctx.prefix)}')
+            return  # Sin hora válida no hay anuncio
+        # El mensaje se recorta a 2000 caracteres, el máximo de un mensaje de Discord.
+        anuncio = await anuncios.agregar(ctx.guild.id, canal.id, mensaje[:2000], siguiente, cron, politica, ctx.author.id)
+        repeticion = f' y se repetirá según `{cron.expresion}`' if cron is not None else ''  # Solo en los periódicos
+        # `<t:...:f>` hace que Discord muestre la fecha y la hora en la zona horaria de quien lo lee.
+        await ctx.send(f'Anuncio #{anuncio.id} programado en {canal.mention} para <t:{int(siguiente)}:f>{repeticion}.')
+
+    # Lista los 20 próximos anuncios del servidor. El método no se llama `anuncios` para no ocultar al programador.
+    @registrar_comando(name='anuncios', description='Muestra los próximos anuncios programados en el servidor.')
+    @commands.guild_only()  # No se puede usar por mensaje privado
+    @es_staff()  # Solo para el staff de este servidor de Discord
+    async def lista_anuncios(self, ctx):
+        proximos = anuncios.de_servidor(ctx.guild.id, 20)  # Ordenados por hora de envío
+        if not proximos:
+            await ctx.send(f'No hay anuncios programados. Uso: {USO_ANUNCIAR.format(prefijo=ctx.prefix)}')
+            return
+        # Dos líneas por anuncio: número, hora, canal, expresión cron y política en la primera, y el principio del
+        # mensaje (80 caracteres) en la segunda. `<#id>` es la mención de un canal.
+        embed = discord.Embed(
+            title='Anuncios programados',  # Título del embed
+            description='\n'.join(
+                f"**#{anuncio.id}** <t:{int(anuncio.siguiente)}:f> en <#{anuncio.canal}>"
+                + (f' · `{anuncio.cron.expresion}`' if anuncio.cron is not None else '')
+                + (' · saltar' if anuncio.politica == 'saltar' else '')
+                + f"\n{anuncio.mensaje[:80] + ('…' if len(anuncio.mensaje) > 80 else '')}"
+                for anuncio in proximos
+            ),
+            color=discord.Color.purple()  # Color del borde del embed, en este caso morado
+        )
+        embed.set_footer(text=f'Para cancelar uno: {ctx.prefix}cancelar <número>')
+        await ctx.send(embed=embed)  # Envía el embed en el canal donde se usó el comando
+
+    # Cancela un anuncio; solo se pueden cancelar los del propio servidor de Discord.
+    @registrar_comando(name='cancelar', description='Cancela un anuncio programado.')
+    @commands.guild_only()  # No se puede usar por mensaje privado
+    @es_staff()  # Solo para el staff de este servidor de Discord
+    async def cancelar(self, ctx, identificador: int):
+        anuncio = anuncios.anuncios.get(identificador)  # None si no existe
+        # Un anuncio de otro servidor de Discord se trata como si no existiera, para no revelar nada de otros servidores.
+        if anuncio is None or anuncio.servidor != ctx.guild.id:
+            await ctx.send(f'No existe el anuncio #{identificador} en este servidor.')
+            return  # No se cancela nada
+        await anuncios.cancelar(identificador)  # Lo quita del programador y de la base de datos
+        await ctx.send(f'Anuncio #{identificador} cancelado.')
+
+# Carpeta de este archivo, con la que se resuelve `DIRECTORIO_EXTENSIONES`, y si este es el archivo con documentación
+# (`Código_con_documentación.py`) o sin ella, para cargar la misma versión de las extensiones.
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+DOCUMENTADO = 'con_documentaci' in os.path.basename(__file__)
+
+# Cargador de módulos que no lee ningún archivo: devuelve un módulo que ya estaba ejecutado.
+# `+recargar` lo usa para deshacer una recarga fallida. `bot.load_extension` de discord.py busca el módulo con
+# `importlib.util.find_spec`, que, si el nombre ya está en `sys.modules`, devuelve su `__spec__`; con un `__spec__`
+# que apunta a este cargador, `load_extension` vuelve a registrar la versión anterior (el mismo objeto módulo, con sus
+# funciones y variables) y llama a su `setup` como si la cargara por primera vez, sin volver a leer el archivo nuevo.
+class _CargadorAnterior:
+    def __init__(self, modulo):
+        self.modulo = modulo
+        # El `__spec__` original (el que apunta al archivo), para devolvérselo al módulo después.
+        self.spec = modulo.__spec__
+
+    # `importlib.util.module_from_spec` llama a este método para crear el módulo: se devuelve el antiguo tal cual.
+    def create_module(self, spec):
+        return self.modulo
+
+    # Normalmente aquí se ejecutaría el código del archivo. El módulo ya está ejecutado, así que solo se le devuelve
+    # su `__spec__` y su `__loader__` originales, que `module_from_spec` acaba de reemplazar por los de este cargador.
+    def exec_module(self, modulo):
+        modulo.__spec__ = self.spec
+        modulo.__loader__ = self.spec.loader
+
+# Extensiones de comandos que se pueden recargar en caliente
+# Cada archivo `.py` de `directorio` (que no empiece por `_`) es una extensión de discord.py: define sus cogs o
+# comandos y una función `async def setup(bot)` que los añade. `recargar` cambia los comandos en dos pasos:
+# 1. Comprueba todas las versiones nuevas: compila y ejecuta cada archivo en un módulo aparte (sin tocar los comandos
+#    en uso), en un hilo para no bloquear el bot, y mira que `setup` sea una función asíncrona. También lee
+#    `ARCHIVO_NORMAS`. Si algo falla (un error de sintaxis, un import roto, falta `setup`, normas mal escritas), se
+#    cancela sin cambiar nada.
+# 2. Si todo está bien, descarga las extensiones cuyo archivo se borró y carga o recarga las demás. Es todo o nada:
+#    si cualquier extensión falla al cargarse (por ejemplo, una excepción en su `setup`), todas las que ya se habían
+#    cambiado vuelven a su versión anterior y las normas no se tocan.
+# La conexión con Discord no se toca, y los comandos que se estaban ejecutando terminan con el código con el que
+# empezaron, porque siguen teniendo su propia referencia a la función antigua.
+# La carpeta se busca junto a este archivo, no en la carpeta desde la que se ejecuta el bot, y su carpeta superior se
+# añade a `sys.path` para que Python encuentre el paquete (`extensiones.informacion_con_documentacion`...).
+# Las extensiones que trae el bot vienen en dos versiones, como el propio bot: `_con_documentacion` y
+# `_sin_documentacion`. `documentado` indica cuál es la de este archivo; la otra no se carga, porque sus comandos
+# tienen los mismos nombres. Las extensiones sin ninguno de los dos finales se cargan siempre.
+class GestorExtensiones:
+    def __init__(self, directorio, documentado):
+        self.directorio = os.path.join(DIRECTORIO, directorio)
+        # `os.path.split` separa la ruta en la carpeta superior (`raiz`) y el nombre de la carpeta, que es el del paquete.
+        self.raiz, self.paquete = os.path.split(self.directorio)
+        self.otra_version = '_sin_documentacion' if documentado else '_con_documentacion'
+        self.recargas = 0
+        self.fallidas = 0
+        self.duracion = None
+        # Se activa cuando terminan de cargarse las extensiones al arrancar (ver `cargar_extensiones`).
+        self.preparadas = asyncio.Event()
+        # Evita que dos `+recargar` a la vez se mezclen.
+        self._bloqueo = asyncio.Lock()
+        if self.raiz not in sys.path:
+            sys.path.insert(0, self.raiz)
+
+    # Nombres de módulo (`extensiones.archivo`) de los archivos que hay ahora en la carpeta, sin los de la otra versión.
+    def nombres(self):
+        if not os.path.isdir(self.directorio):
+            return []
+        return sorted(
+            f'{self.paquete}.{archivo[:-3]}' for archivo in os.listdir(self.directorio)
+            if archivo.endswith('.py') and not archivo.startswith('_') and not archivo[:-3].endswith(self.otra_version)
+        )
+
+    # Nombres de las extensiones de la carpeta que están cargadas en el bot.
+    def cargadas(self, bot):
+        return [nombre for nombre in bot.extensions if nombre.startswith(self.paquete + '.')]
+
+    # Carga todas las extensiones al arrancar. Una extensión con errores no impide que arranquen las demás.
+    async def cargar(self, bot):
+        for nombre in self.nombres():
+            try:
+                await bot.load_extension(nombre)
+            except commands.ExtensionError:
+                bitacora.exception(f'No se pudo cargar la extensión {nombre}')
+
+    # Compila y ejecuta la versión del archivo en disco en un módulo nuevo que no se registra en ninguna parte.
+    # `importlib.util.find_spec` busca el archivo igual que lo hará `load_extension`, y `get_code` lo compila a bytecode
+    # (lanza `SyntaxError` si el código no es válido). discord.py hace `await setup(bot)`, así que `setup` tiene que
+    # ser una función asíncrona (`async def`); `inspect.iscoroutinefunction` da False si no existe o es otra cosa.
+    # `recargar` la llama en un hilo aparte: leer, compilar y ejecutar el archivo no bloquea el bucle de eventos.
+    def _comprobar(self, nombre):
+        spec = importlib.util.find_spec(nombre)
+        if spec is None or spec.loader is None:
+            raise commands.ExtensionNotFound(nombre)
+        codigo = spec.loader.get_code(nombre)
+        modulo = importlib.util.module_from_spec(spec)
+        exec(codigo, modulo.__dict__)
+        if not inspect.iscoroutinefunction(getattr(modulo, 'setup', None)):
+            raise commands.NoEntryPointError(nombre)
+
+    # Deshace una recarga a medias: `cambiadas` son las extensiones que ya se descargaron, cargaron o recargaron, y
+    # `anteriores` los módulos que estaban cargados antes de empezar. Se recorren al revés, en el orden contrario al
+    # que se cambiaron. Cada una se descarga (si está cargada) y, si existía antes, se vuelve a registrar el módulo
+    # antiguo con `_CargadorAnterior`, que ejecuta su `setup` antiguo sin leer el archivo nuevo.
+    async def _deshacer(self, bot, cambiadas, anteriores):
+        for nombre in reversed(cambiadas):
+            try:
+                if nombre in bot.extensions:
+                    await bot.unload_extension(nombre)
+                anterior = anteriores.get(nombre)
+                if anterior is not None:
+                    anterior.__spec__ = importlib.util.spec_from_loader(nombre, _CargadorAnterior(anterior))
+                    sys.modules[nombre] = anterior
+                    await bot.load_extension(nombre)
+            # Si una extensión no se puede restaurar, se anota y se siguen restaurando las demás.
+            except commands.ExtensionError:
+                bitacora.exception(f'No se pudo restaurar la extensión {nombre}')
+
+    # Devuelve si se aplicaron los cambios y los errores por extensión (o por archivo de normas).
+    async def recargar(self, bot):
+        async with self._bloqueo:
+            inicio = time.perf_counter()
+            # Python guarda qué archivos hay en cada carpeta; sin esto no vería los archivos nuevos.
+            importlib.invalidate_caches()
+            nombres = self.nombres()
+            errores = {}
+            bucle = asyncio.get_running_loop()
+            for nombre in nombres:
+                try:
+                    # `run_in_executor(None, ...)` ejecuta la comprobación en el grupo de hilos por defecto del bucle.
+                    await bucle.run_in_executor(None, self._comprobar, nombre)
+                # El archivo es código arbitrario y puede lanzar cualquier excepción al ejecutarse.
+                except Exception as error:
+                    errores[nombre] = error
+            try:
+                normas = leer_normas(ARCHIVO_NORMAS)
+            except (OSError, ValueError) as error:
+                errores[ARCHIVO_NORMAS] = error
+            aplicada = not errores
+            if aplicada:
+                # Los módulos cargados antes de la recarga, para poder volver a ellos si algo falla.
+                # `bot.extensions` es un diccionario de solo lectura con el nombre y el módulo de cada extensión.
+                anteriores = {nombre: bot.extensions[nombre] for nombre in self.cargadas(bot)}
+                cambiadas = []
+                try:
+                    # Primero se descargan las extensiones cuyo archivo se borró, así sus comandos no chocan con
+                    # los de una extensión nueva que los defina con el mismo nombre.
+                    for nombre in anteriores:
+                        if nombre not in nombres:
+                            await bot.unload_extension(nombre)
+                            cambiadas.append(nombre)
+                    # `reload_extension` cambia una extensión cargada por su versión nueva y, si la nueva falla, deja
+                    # esa misma extensión como estaba; por eso una extensión que falla no se añade a `cambiadas`.
+                    for nombre in nombres:
+                        if nombre in anteriores:
+                            await bot.reload_extension(nombre)
+                        else:
+                            await bot.load_extension(nombre)
+                        cambiadas.append(nombre)
+                # Todos los errores de carga y descarga de discord.py heredan de `ExtensionError`, que guarda en
+                # `name` el nombre de la extensión. La primera que falla cancela la recarga y se deshace todo.
+                except commands.ExtensionError as error:
+                    errores[error.name] = error
+                    aplicada = False
+                    await self._deshacer(bot, cambiadas, anteriores)
+            # Las normas solo se aplican si se aplicaron también todas las extensiones.
+            if aplicada:
+                aplicar_normas(normas)
+                # Con comandos de barra, Discord tiene que conocer los comandos nuevos o sus parámetros nuevos.
+                if (nombres or anteriores) and MODO_COMANDOS != 'prefijo' and SINCRONIZAR_COMANDOS:
+                    try:
+                        await bot.tree.sync()
+                    except discord.HTTPException as error:
+                        errores['sincronización'] = error
+            self.duracion = time.perf_counter() - inicio
+            if errores:
+                self.fallidas += 1
+            else:
+                self.recargas += 1
+            return aplicada, errores
+
+extensiones = GestorExtensiones(DIRECTORIO_EXTENSIONES, DOCUMENTADO)
+# Las extensiones importan lo que necesitan de este archivo con `from olympusbot import ...`. El archivo no se llama así
+# (y al ejecutarlo con `python` su módulo es `__main__`), así que se registra también con ese nombre.
+sys.modules['olympusbot'] = sys.modules[__name__]
+
+# Añade al bot las categorías de comandos de este archivo, una tras otra. `bot.add_cog` es asíncrona, pero no espera a
+# nada: añadirlas a la vez con `asyncio.gather` no sería más rápido.
+async def cargar_cogs():
+    for cog in (Staff(), Consola(), Estadisticas(), Sanciones(), Anuncios()):
+        await bot.add_cog(cog)
+
+# Carga las extensiones de `DIRECTORIO_EXTENSIONES` (información, normas, tienda y las que se añadan) y registra los
+# comandos de barra en Discord, que tienen que incluir los de las extensiones. Se llama desde `on_ready`, con el bot ya
+# conectado: así importar las extensiones y construir sus embeds no retrasa la conexión. En el modo cluster solo el
+# primer proceso registra los comandos de barra.
+# Si Discord rechaza el registro, el bot sigue funcionando con los comandos de prefijo. Pase lo que pase, se guarda la
+# marca `extensiones` del perfil de arranque y se activa `extensiones.preparadas`.
+async def cargar_extensiones():
+    try:
+        await extensiones.cargar(bot)
+        if MODO_COMANDOS != 'prefijo' and SINCRONIZAR_COMANDOS and (cluster is None or cluster.indice == 0):
+            await bot.tree.sync()
+    except discord.HTTPException as error:
+        bitacora.error(f'No se pudieron sincronizar los comandos de barra: {error}')
+    finally:
+        marcas_arranque['extensiones'] = time.perf_counter()
+        extensiones.preparadas.set()
+
+# Muestra en la consola la duración total del arranque y la de cada etapa,
+# calculada como la diferencia entre cada marca y la anterior. Por ejemplo:
+# "Arranque en 2.40 s (importaciones 0.32 s, preparacion 0.01 s, inicio_sesion 0.00 s, comandos 0.01 s, gateway 0.03 s,
+# listo 2.01 s, extensiones 0.01 s)". Para ver cuánto tarda en importarse cada módulo, ejecuta el bot con `python -X importtime`.
+def informe_arranque():
+    etapas = list(marcas_arranque.items())
+    duraciones = ', '.join(f'{etapa} {fin - inicio:.2f} s' for (_, inicio), (etapa, fin) in zip(etapas, etapas[1:]))
+    bitacora.info(f'Arranque en {etapas[-1][1] - etapas[0][1]:.2f} s ({duraciones})')
+
+
+# Modo cluster
+# En el modo cluster, un proceso principal reparte los shards entre varios procesos "trabajadores",
+# cada uno con su propia conexión a Discord, y los reinicia si alguno se cae.
+# Los procesos comparten su estado (servidores, latencia y si están listos) a través de memoria compartida,
+# para que el estado del bot muestre el total de servidores y el servidor web informe del cluster completo.
+
+# Estado compartido entre el proceso principal y los trabajadores.
+# `multiprocessing.RawArray` crea un arreglo en memoria compartida con una posición por trabajador;
+# cada trabajador solo escribe en su propia posición (`indice`), así que no hace falta ningún bloqueo.
+class Cluster:
+    def __init__(self, procesos):
+        self.servidores = multiprocessing.RawArray('i', procesos)
+        self.latencias = multiprocessing.RawArray('d', procesos)
+        self.listos = multiprocessing.RawArray('b', procesos)
+        # Posición del trabajador actual; se asigna en `_trabajador`.
+        self.indice = None
+
+    # Lo llama cada trabajador para publicar su número de servidores, su latencia y si está listo.
+    def publicar(self, bot):
+        self.servidores[self.indice] = len(bot.guilds)
+        self.latencias[self.indice] = bot.latency if math.isfinite(bot.latency) else 0.0
+        self.listos[self.indice] = bot.is_ready()
+
+    # Total de servidores sumando todos los trabajadores.
+    def total_servidores(self):
+        return sum(self.servidores)
+
+    # Los métodos y propiedades siguientes imitan los de `bot` que usa `keep_alive_async`,
+    # para que el proceso principal pueda servir `/healthz` con el estado de todo el cluster.
+    def is_ready(self):
+        return all(self.listos)
+
+    def is_closed(self):
+        return False
+
+    @property
+    def latency(self):
+        return max(self.latencias)
+
+    @property
+    def guilds(self):
+        return range(self.total_servidores())
+
+# Reparte los shards `0 .. total - 1` en grupos consecutivos, uno por proceso.
+# Por ejemplo, 5 shards en 2 procesos: [[0, 1], [2, 3, 4]].
+def repartir_shards(total, procesos):
+    procesos = max(1, min(procesos, total))
+    return [list(range(indice * total // procesos, (indice + 1) * total // procesos)) for indice in range(procesos)]
+
+# Pregunta a Discord cuántos shards recomienda para este bot.
+async def _shards_recomendados():
+    async with aiohttp.ClientSession() as sesion:
+        async with sesion.get('https://discord.com/api/v10/gateway/bot', headers={'Authorization': f'Bot {TOKEN}'}) as respuesta:
+            respuesta.raise_for_status()
+            return (await respuesta.json())['shards']
+
+# Función que ejecuta cada proceso trabajador: configura sus shards y arranca el bot.
+# `global cluster` permite asignar la variable `cluster` del módulo, que activa el comportamiento del modo cluster.
+def _trabajador(estado, indice, shard_ids, total_shards):
+    global cluster
+    estado.indice = indice
+    cluster = estado
+    bot.shard_ids = shard_ids
+    bot.shard_count = total_shards
+    base, extension = os.path.splitext(ARCHIVO_REGISTRO)
+    oyente = iniciar_registro(f'{base}-{indice}{extension}')
+    try:
+        bot.run(TOKEN, log_handler=None)
+    finally:
+        oyente.stop()
+
+# Proceso principal: inicia el servidor web y cada 5 segundos comprueba que los trabajadores siguen vivos.
+# Si alguno terminó (por un error, por ejemplo), se reinicia con los mismos shards.
+async def _supervisar(estado, procesos, lanzar):
+    if MODO_SERVIDOR_WEB == 'async':
+        await keep_alive_async(estado, red=red)
+    else:
+        keep_alive(red=red)
+    # El monitor de la red no depende de Discord, así que se ejecuta en el proceso principal junto al servidor web.
+    red.iniciar()
+    while True:
+        await asyncio.sleep(5)
+        for indice, proceso in enumerate(procesos):
+            if not proceso.is_alive():
+                bitacora.warning(f'El proceso {proceso.name} terminó con código {proceso.exitcode}, reiniciándolo')
+                estado.servidores[indice] = 0
+                estado.listos[indice] = 0
+                procesos[indice] = lanzar(indice)
 
-    # Añade un pie de página al embed.
-    # `set_footer` coloca un texto en la parte inferior del embed. En este caso, sugiere al usuario escribir `+help` para ver otros comandos.
-    embed.set_footer(text='Para ver más comandos, escribe +help')
+# Arranca el cluster: calcula los shards, los reparte y lanza un proceso por grupo.
+# Se usa el método 'spawn' para que cada trabajador empiece como un proceso de Python nuevo y limpio.
+def iniciar_cluster():
+    oyente = iniciar_registro(ARCHIVO_REGISTRO)
+    total = TOTAL_SHARDS or asyncio.run(_shards_recomendados())
+    grupos = repartir_shards(total, PROCESOS_CLUSTER)
+    estado = Cluster(len(grupos))
+    contexto = multiprocessing.get_context('spawn')
 
-    # Envía el mensaje embed en el canal donde el usuario ejecutó el comando.
-    # `ctx.send(embed=embed)` utiliza el contexto (`ctx`) para enviar el embed, que presenta los comandos de forma organizada.
-    # `await` se utiliza para esperar a que se complete el envío del mensaje antes de continuar con otras operaciones.
-    await ctx.send(embed=embed)
+    def lanzar(indice):
+        proceso = contexto.Process(target=_trabajador, args=(estado, indice, grupos[indice], total), name=f'cluster-{indice}')
+        proceso.start()
+        return proceso
 
+    procesos = [lanzar(indice) for indice in range(len(grupos))]
+    bitacora.info(f'Cluster iniciado: {total} shards repartidos en {len(grupos)} procesos')
+    try:
+        asyncio.run(_supervisar(estado, procesos, lanzar))
+    finally:
+        oyente.stop()
 
-# Llama a la función keep_alive para mantener el bot en línea en un servidor web.
-keep_alive()
+# Fin de la etapa de preparación del módulo (configuración, caché de respuestas, índice de normas, etc.).
+marcas_arranque['preparacion'] = time.perf_counter()
 
-# Inicia el bot. Reemplaza "BOT_TOKEN" con el token real del bot de Discord.
-bot.run("BOT_TOKEN")
+# Punto de entrada del programa
+# `if __name__ == '__main__':` hace que este bloque solo se ejecute al lanzar el archivo directamente
+# (`python bot.py`), y no cuando los procesos del cluster importan el archivo.
+if __name__ == '__main__':
+    if MODO_CLUSTER:
+        iniciar_cluster()
+    else:
+        # Inicia el registro antes que nada, para que también pasen por él los mensajes del servidor web.
+        oyente = iniciar_registro(ARCHIVO_REGISTRO)
+        # Llama a la función keep_alive para mantener el bot en línea en un servidor web.
+        # En el modo 'async' no se llama: el servidor web se inicia en `setup_hook`, dentro del bucle de eventos del bot.
+        if MODO_SERVIDOR_WEB == 'flask':
+            keep_alive(metricas, red)
+        # Inicia el bot con el token configurado en `TOKEN`. `log_handler=None` evita que discord.py añada su propio
+        # manejador, que escribiría en la consola desde el bucle de eventos.
+        # Al terminar, `oyente.stop()` espera a que se escriban los eventos que queden en la cola.
+        try:
+            bot.run(TOKEN, log_handler=None)
+        finally:
+            oyente.stop()
@@ -1,190 +1,3148 @@
+import time
+
+marcas_arranque = {'inicio': time.perf_counter()}
+
 import discord
 from discord.ext import commands, tasks
-from webserver import keep_alive
+from webserver import keep_alive, keep_alive_async
 import datetime
 import asyncio
-from urllib import parse, request
 import re
+import heapq
+import unicodedata
+import json
+import struct
+import bisect
+import logging
+import os
+import sys
+import threading
+import traceback
+import weakref
+import math
+import multiprocessing
+import aiohttp
+import functools
+import sqlite3
+import collections
+import concurrent.futures
+import array
+import html
+import importlib.util
+import logging.handlers
+import queue
+import contextvars
+import random
+import inspect
+
+marcas_arranque['importaciones'] = time.perf_counter()
+
+TOKEN = "BOT_TOKEN"
+PREFIJO = '+'
+
+SERVIDOR_MINECRAFT = 'play.olympusland.xyz'
+PUERTO_MINECRAFT = 25565
+TTL_ESTADO_SERVIDOR = 30
+URL_TIENDA = 'https://olympusland.tebex.io'
+
+ARCHIVO_CONFIGURACION = 'configuracion.db'
+CAPACIDAD_CACHE_CONFIGURACION = 10000
+
+PLANTILLAS_ESTADO = [
+    'En {servidores} servidores. Prefijo {prefijo}',
+    '{jugadores} jugadores en {ip}',
+]
+ROTACION_ESTADO = 60
+ESPERA_ESTADO = 5
+
+MODO_SERVIDOR_WEB = 'flask'
+
+MODO_COMANDOS = 'prefijo'
+SINCRONIZAR_COMANDOS = True
+MEDIR_GATEWAY = False
+
+MODO_CLUSTER = False
+TOTAL_SHARDS = None
+PROCESOS_CLUSTER = os.cpu_count() or 1
+
+VENTANA_AGRUPACION = 3
+MENCIONAR_AGRUPADOS = True
+ENFRIAMIENTO_USUARIO = (3, 10)
+ENFRIAMIENTO_CANAL = (10, 10)
+
+PERFIL_MEMORIA = 'normal'
+HORAS_INFORME_MEMORIA = 6
+
+ROL_STAFF = 'Staff'
+
+RCON_HOST = SERVIDOR_MINECRAFT
+RCON_PUERTO = 25575
+RCON_CONTRASENA = ''
+RCON_CONEXIONES = 2
+RCON_TIMEOUT = 5
+
+PUENTE_CHAT_ACTIVO = False
+ARCHIVO_LOG_MINECRAFT = 'logs/latest.log'
+WEBHOOK_CHAT = ''
+INTERVALO_LOG = 0.5
+VENTANA_CHAT = 1.0
+MAXIMO_COLA_CHAT = 1000
+
+DIRECTORIO_ESTADISTICAS = 'world/stats'
+ARCHIVO_USERCACHE = 'usercache.json'
+INTERVALO_ESTADISTICAS = 300
+
+ARCHIVO_SANCIONES = 'sanciones.jsonl'
+HORAS_COMPACTACION_SANCIONES = 24
+
+ARCHIVO_ANUNCIOS = 'anuncios.db'
+TOLERANCIA_ANUNCIOS = 60
+MAXIMO_ANUNCIOS_SERVIDOR = 200
+
+SERVIDORES_RED = {'Principal': SERVIDOR_MINECRAFT}
+INTERVALO_RED = 60
+CONSULTAS_RED_SIMULTANEAS = 8
+HISTORIAL_RED = 1440
+
+TOKENS_TEBEX = {URL_TIENDA: ''}
+API_TEBEX = 'https://headless.tebex.io/api/accounts/{token}/categories?includePackages=1'
+FRESCURA_TIENDA = 300
+TIMEOUT_TIENDA = 5
+FALLOS_CORTE_TIENDA = 3
+ENFRIAMIENTO_CORTE_TIENDA = 60
+
+VIGILANTE_ACTIVO = True
+UMBRAL_BLOQUEO = 0.25
+DIRECTORIO_VOLCADOS = 'volcados'
+MAXIMO_VOLCADOS = 20
+
+DIRECTORIO_EXTENSIONES = 'extensiones'
+ARCHIVO_NORMAS = 'normas.json'
+
+ARCHIVO_REGISTRO = 'bot.log'
+TAMANO_REGISTRO = 10 * 1024 * 1024
+COPIAS_REGISTRO = 5
+MUESTREO_TRAZAS = 0.01
 
-intents = discord.Intents.default()
-intents.message_content = True
+if MODO_COMANDOS == 'barra':
+    intents = discord.Intents.none()
+    intents.guilds = True
+elif PERFIL_MEMORIA == 'bajo':
+    intents = discord.Intents(guilds=True, guild_messages=True, dm_messages=True, message_content=True)
+else:
+    intents = discord.Intents.default()
+    intents.message_content = True
 
-bot = commands.Bot(command_prefix="+", help_command=None, intents=intents)
+if PERFIL_MEMORIA == 'bajo':
+    opciones_cache = {
+        'max_messages': None,
+        'member_cache_flags': discord.MemberCacheFlags.none(),
+        'chunk_guilds_at_startup': False,
+    }
+else:
+    opciones_cache = {}
+
+def obtener_prefijo(bot, message):
+    if message.guild is None:
+        return PREFIJO
+    configuracion = configuraciones.en_cache(message.guild.id)
+    if configuracion is not None:
+        return configuracion.prefijo
+    return _prefijo_desde_disco(message.guild.id)
+
+async def _prefijo_desde_disco(servidor_id):
+    return (await configuraciones.obtener(servidor_id)).prefijo
+
+ClaseBot = commands.AutoShardedBot if MODO_CLUSTER else commands.Bot
+traza_http = aiohttp.TraceConfig()
+bot = ClaseBot(command_prefix=obtener_prefijo, help_command=None, intents=intents, enable_debug_events=MEDIR_GATEWAY, http_trace=traza_http, **opciones_cache)
+registrar_comando = commands.command if MODO_COMANDOS == 'prefijo' else commands.hybrid_command
+cluster = None
+
+@bot.event
+async def setup_hook():
+    marcas_arranque.setdefault('inicio_sesion', time.perf_counter())
+    if MODO_SERVIDOR_WEB == 'async' and cluster is None:
+        await keep_alive_async(bot, metricas, red)
+    if VIGILANTE_ACTIVO:
+        vigilante_bucle.iniciar()
+    if cluster is None and red.tarea is None:
+        red.iniciar()
+    for tienda in TOKENS_TEBEX:
+        catalogo = catalogo_de(tienda)
+        if catalogo is not None:
+            catalogo.revalidar()
+    if PUENTE_CHAT_ACTIVO and (cluster is None or cluster.indice == 0):
+        webhook = discord.Webhook.from_url(WEBHOOK_CHAT, client=bot)
+        puente_chat.iniciar(functools.partial(webhook.send, username='Minecraft', allowed_mentions=discord.AllowedMentions.none()))
+    await sanciones.cargar()
+    await anuncios.cargar(lambda servidor_id: cluster is None or (servidor_id >> 22) % bot.shard_count in bot.shard_ids)
+    await cargar_cogs()
+    marcas_arranque.setdefault('comandos', time.perf_counter())
+    sesion_gateway.conectando()
 
 @bot.event
 async def on_ready():
-    print('El bot está listo')
+    bitacora.info('El bot está listo')
+    sesion_gateway.listo('identificacion')
+    if 'listo' not in marcas_arranque:
+        marcas_arranque['listo'] = time.perf_counter()
+        await cargar_extensiones()
+        informe_arranque()
+    if cluster is not None:
+        cluster.publicar(bot)
+    if not change_status.is_running():
+        change_status.start()
+    if not informe_memoria.is_running():
+        informe_memoria.start()
+    if os.path.isdir(DIRECTORIO_ESTADISTICAS) and not actualizar_estadisticas.is_running():
+        actualizar_estadisticas.start()
+    if not compactar_sanciones.is_running():
+        compactar_sanciones.start()
+    if anuncios.tarea is None:
+        anuncios.iniciar(enviar_anuncio)
+
+@bot.event
+async def on_guild_join(guild):
+    presencia.solicitar()
+
+@bot.event
+async def on_guild_remove(guild):
+    presencia.solicitar()
+
+class CubetaTokens:
+    def __init__(self, capacidad, periodo):
+        self.capacidad = capacidad
+        self.por_segundo = capacidad / periodo
+        self.tokens = capacidad
+        self._ultima_recarga = time.monotonic()
+
+    def _recargar(self):
+        ahora = time.monotonic()
+        self.tokens = min(self.capacidad, self.tokens + (ahora - self._ultima_recarga) * self.por_segundo)
+        self._ultima_recarga = ahora
+
+    def consumir(self):
+        self._recargar()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def devolver(self):
+        self.tokens = min(self.capacidad, self.tokens + 1)
+
+    def espera(self):
+        self._recargar()
+        return max(0.0, (1 - self.tokens) / self.por_segundo)
+
+class ProgramadorPresencia:
+    def __init__(self, plantillas, rotacion, espera, cubeta):
+        self.plantillas = plantillas
+        self.rotacion = rotacion
+        self.espera = espera
+        self.cubeta = cubeta
+        self.enviadas = 0
+        self.suprimidas = 0
+        self._ultimo_texto = None
+        self._pendiente = None
+        self._candado = asyncio.Lock()
+
+    def renderizar(self):
+        plantilla = self.plantillas[int(time.monotonic() // self.rotacion) % len(self.plantillas)]
+        estado = estado_servidor.ultimo or {}
+        return plantilla.format(
+            servidores=cluster.total_servidores() if cluster is not None else len(bot.guilds),
+            jugadores=estado.get('jugadores', 0),
+            ip=SERVIDOR_MINECRAFT,
+            prefijo=PREFIJO,
+        )
+
+    def solicitar(self):
+        if self._pendiente is None or self._pendiente.done():
+            self._pendiente = asyncio.ensure_future(self._actualizar_tras_espera())
+
+    async def _actualizar_tras_espera(self):
+        await asyncio.sleep(self.espera)
+        await self.actualizar()
+
+    async def actualizar(self):
+        async with self._candado:
+            if any('{jugadores}' in plantilla for plantilla in self.plantillas):
+                await estado_servidor.obtener()
+            texto = self.renderizar()
+            if texto == self._ultimo_texto:
+                self.suprimidas += 1
+                return
+            while not self.cubeta.consumir():
+                await asyncio.sleep(self.cubeta.espera())
+                texto = self.renderizar()
+            if texto == self._ultimo_texto:
+                self.cubeta.devolver()
+                self.suprimidas += 1
+                return
+            await bot.change_presence(activity=discord.Game(name=texto))
+            self._ultimo_texto = texto
+            self.enviadas += 1
+
+presencia = ProgramadorPresencia(PLANTILLAS_ESTADO, ROTACION_ESTADO, ESPERA_ESTADO, CubetaTokens(5, 60))
 
 @tasks.loop(seconds=10)
 async def change_status():
-    await bot.change_presence(activity=discord.Game(name="En " + str(len(bot.guilds)) + " servidores. Prefijo +"))
+    if cluster is not None:
+        cluster.publicar(bot)
+    await presencia.actualizar()
 
-@bot.command(name='help')
-async def help(ctx):
-    embed = discord.Embed(
-        title='Comandos',
-        description='Aquí están los comandos que puedes utilizar para mejorar tu experiencia en Discord y en el servidor de Minecraft.',
-        color=discord.Color.purple()
-    )
-    embed.add_field(name='`+ip`', value='Muestra la IP del servidor de Minecraft.', inline=False)
-    embed.add_field(name='`+normas`', value='Clasificación de normas del servidor de Minecraft: graves, leves, juicio y staff.', inline=False)
-    embed.add_field(name='`+leves`', value='Muestra las normas leves.', inline=False)
-    embed.add_field(name='`+graves`', value='Muestra las normas graves.', inline=False)
-    embed.add_field(name='`+juicio`', value='Muestra las normas aplicables en el juicio.', inline=False)
-    embed.add_field(name='`+staff`', value='Muestra las normas del staff de Minecraft.', inline=False)
-    embed.add_field(name='`+clanes`', value='Muestra las reglas para los clanes.', inline=False)
-    embed.add_field(name='`+comandos`', value='Lista de comandos que puedes usar en el servidor.', inline=False)
-    embed.add_field(name='`+tienda`', value='Página de donaciones y rangos.', inline=False)
-    embed.add_field(name='Emergencia', value='Para reportar un bug o problema de OlympusBot, contacta a la creadora Paulidex.', inline=False)
-    embed.set_footer(text='Para contrataciones, contactar a Paulidex#9510.')
-    await ctx.send(embed=embed)
-
-@bot.command()
-async def a(ctx):
-    await ctx.send('El bot está funcionando correctamente')
-
-@bot.command()
-async def tienda(ctx):
-    await ctx.send('Visita nuestra tienda para ver nuestros rangos y realizar donaciones ^.^ `https://olympusland.tebex.io`')
-
-@bot.command()
-async def ip(ctx):
-    embed = discord.Embed(
-        title='Servidor Minecraft Java',
-        description='Versión 1.16.5 - 1.17.1: play.olympusland.xyz',
-        color=discord.Color.purple()
-    )
-    embed.set_footer(text='Para ver más comandos, escribe +help')
-    await ctx.send(embed=embed)
-
-@bot.command()
-async def normas(ctx):
-    await ctx.send('Las normas están clasificadas en graves, leves, staff y juicio. Para verlas, escribe `+graves` `+leves` `+staff` `+juicio` `+clanes`')
-
-@bot.command(name='leves')
-async def leves(ctx):
-    embed = discord.Embed(
-        title='Normas Leves',
-        description='1) Los bugs están permitidos, pero antes debes consultar su uso con alguien del staff. \n'
-                    '2) No insultar a otros jugadores si no es de su agrado. \n'
-                    '3) Evita hacer flood (ejemplo: holaaaaaa), spam o texto innecesario que sature el chat. \n'
-                    '4) No se permite tener más de dos relojes de Redstone; generadores de lag y cargadores de chunks están prohibidos. \n'
-                    '5) Las mascotas son propiedad privada; está prohibido matarlas intencionalmente, aunque no estén en una zona protegida. \n'
-                    '6) Los lobos no pueden ser utilizados como armas para PVP. \n'
-                    '7) En caso de problemas aislados, el staff puede realizar reuniones para encontrar una solución justa. \n'
-                    '8) No salirse de un juicio.',
-        color=discord.Color.purple()
-    )
-    embed.set_footer(text='Las normas se acumulan y los castigos pueden variar según la persona. Para más comandos, escribe +help')
-    await ctx.send(embed=embed)
-
-@bot.command(name='graves')
-async def graves(ctx):
-    embed = discord.Embed(
-        title='Normas Graves',
-        description='1) El uso de multicuentas está prohibido. Si deseas cambiar de cuenta, notifica al staff para transferir tus ítems y propiedades. \n'
-                    '2) Hacks están prohibidos y serán sancionados con ip-ban. \n'
-                    '3) Destrucción de construcciones protegidas y robo de ítems en zonas de otros jugadores están prohibidos. \n'
-                    '4) Cualquier tipo de asesinato como tpakill y spawn kill está prohibido. \n'
-                    '5) Prohibido aprovechar bugs, como duplicación o glitches de movilidad. \n'
-                    '6) Prohibido el uso de hacks como xray o autoclick. \n'
-                    '7) No se permite distribuir enlaces externos sin aprobación del staff. \n'
-                    '8) Hablar con respeto al staff y evitar faltas de respeto. \n'
-                    '9) Intentos de evadir sentencias aumentarán la pena; ayudar a otro jugador a evadir es sancionable. \n'
-                    '10) Mentirle al staff está prohibido. \n'
-                    '11) Prohibido hacerse pasar por el staff. \n'
-                    '12) No usar otros casos para justificar acciones. \n'
-                    '13) Mensajes y construcciones ofensivas están prohibidas. \n'
-                    '14) Prohibido escapar de la cárcel. \n'
-                    '15) No ayudar a un preso a salir de la cárcel. \n'
-                    '16) No explorar, minar o talar en el mundo normal; utiliza /warp recursos.',
-        color=discord.Color.purple()
-    )
-    embed.set_footer(text='Las normas se acumulan y los castigos pueden variar según la persona. Para más comandos, escribe +help')
-    await ctx.send(embed=embed)
-
-@bot.command(name='juicio')
-async def juicio(ctx):
-    embed = discord.Embed(
-        title='Normas del Juicio',
-        description='1) No interrumpir el juicio. \n'
-                    '2) Presentar pruebas. \n'
-                    '3) No hacer perder el tiempo al staff que actúe como juez. \n'
-                    '4) Leer las normas antes de solicitar un juicio. \n'
-                    '5) Solo se permite la presencia de testigos y partes involucradas en el juicio. \n'
-                    '6) Solo Owners, Admins y Mods pueden actuar como jueces. \n'
-                    '7) Ambas partes (acusados y acusadores) deben estar presentes.',
-        color=discord.Color.purple()
-    )
-    embed.set_footer(text='Las normas se acumulan y los castigos pueden variar según la persona. Para más comandos, escribe +help')
-    await ctx.send(embed=embed)
-
-@bot.command(name='clanes')
-async def clanes(ctx):
-    embed = discord.Embed(
-        title='Normas de los Clanes',
-        description='1) Todo tipo de PVP es válido si ambos jugadores pertenecen a un clan. \n'
-                    '2) Se permite el grifeo, pero solo a bases de clanes.',
-        color=discord.Color.purple()
+def memoria_rss():
+    try:
+        with open('/proc/self/statm') as archivo:
+            return int(archivo.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return None
+
+@tasks.loop(hours=HORAS_INFORME_MEMORIA)
+async def informe_memoria():
+    rss = memoria_rss()
+    bitacora.info(
+        f'Memoria (perfil {PERFIL_MEMORIA}, {informe_memoria.current_loop * HORAS_INFORME_MEMORIA} h): '
+        f"RSS {f'{rss / 1048576:.1f} MiB' if rss is not None else 'desconocido'}, "
+        f'{sys.getallocatedblocks()} bloques de Python, '
+        f'{len(bot.guilds)} servidores, '
+        f'{sum(len(servidor.members) for servidor in bot.guilds)} miembros y '
+        f'{len(bot.cached_messages)} mensajes en caché'
     )
-    embed.set_footer(text='Las normas se acumulan y los castigos pueden variar según la persona. Para más comandos, escribe +help')
-    await ctx.send(embed=embed)
-
-@bot.command(name='staff')
-async def staff(ctx):
-    embed = discord.Embed(
-        title='Normas del Staff',
-        description='1) Las quejas sobre baneos se atienden por Discord. \n'
-                    '2) Objetos exclusivos del staff no deben caer en manos de jugadores; ambos involucrados serán sancionados si esto sucede. \n'
-                    '3) Responder a las dudas de los jugadores. \n'
-                    '4) Saludar a los nuevos jugadores. \n'
-                    '5) No abusar del poder. \n'
-                    '6) Solo Owners, Admins y Mods pueden sancionar. \n'
-                    '7) Tratar a todos los jugadores por igual. \n'
-                    '8) No dar ítems del creativo a jugadores; solo por survival. \n'
-                    '9) Ser neutral en juicios. \n'
-                    '10) La inactividad injustificada puede resultar en expulsión del staff. \n'
-                    '11) No revelar novedades en desarrollo a jugadores.',
-        color=discord.Color.purple()
+
+LIMITES_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+class Histograma:
+    __slots__ = ('limites', 'cubetas', 'suma', 'cuenta')
+
+    def __init__(self, limites=LIMITES_LATENCIA):
+        self.limites = limites
+        self.cubetas = [0] * (len(limites) + 1)
+        self.suma = 0.0
+        self.cuenta = 0
+
+    def observar(self, valor):
+        self.cubetas[bisect.bisect_left(self.limites, valor)] += 1
+        self.suma += valor
+        self.cuenta += 1
+
+    def exponer(self, nombre, etiquetas=''):
+        prefijo = etiquetas + ',' if etiquetas else ''
+        sufijo = '{' + etiquetas + '}' if etiquetas else ''
+        lineas = []
+        acumulado = 0
+        for limite, cantidad in zip(self.limites, self.cubetas):
+            acumulado += cantidad
+            lineas.append(f'{nombre}_bucket{{{prefijo}le="{limite}"}} {acumulado}')
+        lineas.append(f'{nombre}_bucket{{{prefijo}le="+Inf"}} {self.cuenta}')
+        lineas.append(f'{nombre}_sum{sufijo} {self.suma}')
+        lineas.append(f'{nombre}_count{sufijo} {self.cuenta}')
+        return lineas
+
+class Metricas:
+    def __init__(self, bot):
+        self.bot = bot
+        self.comandos = {}
+        self.errores = {}
+        self.latencia_rest = Histograma()
+        self.limites_rest = 0
+        self.eventos_gateway = {}
+        self.bytes_gateway = 0
+
+    def observar_comando(self, nombre, segundos):
+        histograma = self.comandos.get(nombre)
+        if histograma is None:
+            histograma = self.comandos[nombre] = Histograma()
+        histograma.observar(segundos)
+
+    def contar_error(self, nombre, error):
+        clave = (nombre, error)
+        self.errores[clave] = self.errores.get(clave, 0) + 1
+
+    def exponer(self):
+        lineas = [
+            '# HELP bot_comandos_total Comandos ejecutados.',
+            '# TYPE bot_comandos_total counter',
+        ]
+        comandos = list(self.comandos.items())
+        for nombre, histograma in comandos:
+            lineas.append(f'bot_comandos_total{{comando="{nombre}"}} {histograma.cuenta}')
+        lineas += [
+            '# HELP bot_comando_duracion_segundos Tiempo desde que llega el mensaje hasta que se envía la respuesta.',
+            '# TYPE bot_comando_duracion_segundos histogram',
+        ]
+        for nombre, histograma in comandos:
+            lineas += histograma.exponer('bot_comando_duracion_segundos', f'comando="{nombre}"')
+        lineas += [
+            '# HELP bot_comando_errores_total Errores al ejecutar comandos.',
+            '# TYPE bot_comando_errores_total counter',
+        ]
+        for (nombre, error), cantidad in list(self.errores.items()):
+            lineas.append(f'bot_comando_errores_total{{comando="{nombre}",error="{error}"}} {cantidad}')
+        lineas += [
+            '# HELP bot_rest_duracion_segundos Duración de las peticiones a la API REST de Discord.',
+            '# TYPE bot_rest_duracion_segundos histogram',
+        ]
+        lineas += self.latencia_rest.exponer('bot_rest_duracion_segundos')
+        lineas += [
+            '# HELP bot_rest_limites_total Respuestas 429 (límite de frecuencia) recibidas de Discord.',
+            '# TYPE bot_rest_limites_total counter',
+            f'bot_rest_limites_total {self.limites_rest}',
+            '# HELP bot_gateway_latencia_segundos Latencia del websocket del gateway.',
+            '# TYPE bot_gateway_latencia_segundos gauge',
+            f'bot_gateway_latencia_segundos {self.bot.latency}',
+            '# HELP bot_servidores Servidores de Discord en los que está el bot.',
+            '# TYPE bot_servidores gauge',
+            f'bot_servidores {len(self.bot.guilds)}',
+            '# HELP bot_memoria_rss_bytes Memoria residente (RSS) del proceso.',
+            '# TYPE bot_memoria_rss_bytes gauge',
+            f'bot_memoria_rss_bytes {memoria_rss() or 0}',
+            '# HELP bot_presencia_enviadas_total Actualizaciones de estado enviadas a Discord.',
+            '# TYPE bot_presencia_enviadas_total counter',
+            f'bot_presencia_enviadas_total {presencia.enviadas}',
+            '# HELP bot_presencia_suprimidas_total Actualizaciones de estado evitadas porque el texto no cambió.',
+            '# TYPE bot_presencia_suprimidas_total counter',
+            f'bot_presencia_suprimidas_total {presencia.suprimidas}',
+            '# HELP bot_envios_ahorrados_total Respuestas no enviadas por agrupar comandos repetidos en el mismo canal.',
+            '# TYPE bot_envios_ahorrados_total counter',
+            f'bot_envios_ahorrados_total {agrupador.ahorrados}',
+            '# HELP bot_configuracion_cache_aciertos_total Configuraciones de servidor resueltas desde la caché en memoria.',
+            '# TYPE bot_configuracion_cache_aciertos_total counter',
+            f'bot_configuracion_cache_aciertos_total {configuraciones.aciertos}',
+            '# HELP bot_configuracion_cache_fallos_total Configuraciones de servidor que hubo que leer de la base de datos.',
+            '# TYPE bot_configuracion_cache_fallos_total counter',
+            f'bot_configuracion_cache_fallos_total {configuraciones.fallos}',
+            '# HELP bot_rcon_comandos_total Comandos enviados al servidor de Minecraft por RCON.',
+            '# TYPE bot_rcon_comandos_total counter',
+            f'bot_rcon_comandos_total {rcon.comandos}',
+            '# HELP bot_rcon_errores_total Comandos RCON que fallaron (sin conexión, tiempo agotado o conexión perdida).',
+            '# TYPE bot_rcon_errores_total counter',
+            f'bot_rcon_errores_total {rcon.errores}',
+            '# HELP bot_rcon_reconexiones_total Conexiones RCON abiertas de nuevo tras perderse.',
+            '# TYPE bot_rcon_reconexiones_total counter',
+            f'bot_rcon_reconexiones_total {rcon.reconexiones}',
+            '# HELP bot_puente_lineas_total Líneas del chat de Minecraft enviadas a Discord.',
+            '# TYPE bot_puente_lineas_total counter',
+            f'bot_puente_lineas_total {puente_chat.lineas}',
+            '# HELP bot_puente_mensajes_total Mensajes de webhook enviados por el puente de chat.',
+            '# TYPE bot_puente_mensajes_total counter',
+            f'bot_puente_mensajes_total {puente_chat.mensajes}',
+            '# HELP bot_puente_descartadas_total Líneas del chat de Minecraft que no se pudieron enviar.',
+            '# TYPE bot_puente_descartadas_total counter',
+            f'bot_puente_descartadas_total {puente_chat.descartadas}',
+            '# HELP bot_puente_cola Líneas del chat de Minecraft esperando a enviarse.',
+            '# TYPE bot_puente_cola gauge',
+            f'bot_puente_cola {puente_chat.cola.qsize()}',
+            '# HELP bot_estadisticas_jugadores Jugadores en el índice de estadísticas.',
+            '# TYPE bot_estadisticas_jugadores gauge',
+            f'bot_estadisticas_jugadores {len(indice_estadisticas.modificados)}',
+            '# HELP bot_estadisticas_lecturas_total Archivos de estadísticas leídos desde el arranque.',
+            '# TYPE bot_estadisticas_lecturas_total counter',
+            f'bot_estadisticas_lecturas_total {indice_estadisticas.lecturas}',
+            '# HELP bot_estadisticas_actualizacion_segundos Duración de la última actualización del índice de estadísticas.',
+            '# TYPE bot_estadisticas_actualizacion_segundos gauge',
+            f'bot_estadisticas_actualizacion_segundos {indice_estadisticas.duracion:.6f}',
+            '# HELP bot_sanciones Sanciones vigentes en el registro.',
+            '# TYPE bot_sanciones gauge',
+            f'bot_sanciones {len(sanciones.sanciones)}',
+            '# HELP bot_sanciones_lineas_muertas Líneas del registro de sanciones que se quitarán al compactarlo.',
+            '# TYPE bot_sanciones_lineas_muertas gauge',
+            f'bot_sanciones_lineas_muertas {sanciones.lineas_muertas}',
+            '# HELP bot_sanciones_compactaciones_total Compactaciones del registro de sanciones.',
+            '# TYPE bot_sanciones_compactaciones_total counter',
+            f'bot_sanciones_compactaciones_total {sanciones.compactaciones}',
+            '# HELP bot_anuncios Anuncios programados.',
+            '# TYPE bot_anuncios gauge',
+            f'bot_anuncios {len(anuncios.anuncios)}',
+            '# HELP bot_anuncios_enviados_total Anuncios enviados.',
+            '# TYPE bot_anuncios_enviados_total counter',
+            f'bot_anuncios_enviados_total {anuncios.enviados}',
+            '# HELP bot_anuncios_saltados_total Anuncios no enviados por haberse perdido su hora (política saltar).',
+            '# TYPE bot_anuncios_saltados_total counter',
+            f'bot_anuncios_saltados_total {anuncios.saltados}',
+            '# HELP bot_anuncios_errores_total Anuncios que fallaron al enviarse.',
+            '# TYPE bot_anuncios_errores_total counter',
+            f'bot_anuncios_errores_total {anuncios.errores}',
+            '# HELP bot_red_consultas_total Consultas a los servidores de la red.',
+            '# TYPE bot_red_consultas_total counter',
+            f'bot_red_consultas_total {red.consultas}',
+            '# HELP bot_red_fallos_total Consultas a los servidores de la red sin respuesta.',
+            '# TYPE bot_red_fallos_total counter',
+            f'bot_red_fallos_total {red.fallos}',
+            '# HELP bot_red_ronda_segundos Duración de la última ronda de consultas a la red.',
+            '# TYPE bot_red_ronda_segundos gauge',
+            f'bot_red_ronda_segundos {red.duracion_ronda}',
+            '# HELP bot_red_en_linea Si cada servidor de la red respondió en la última consulta.',
+            '# TYPE bot_red_en_linea gauge',
+        ]
+        for nombre, estado in red.ultimos.items():
+            lineas.append(f'bot_red_en_linea{{servidor="{nombre}"}} {int(estado["en_linea"])}')
+        lineas += [
+            '# HELP bot_tienda_consultas_total Consultas a la API de Tebex para el catálogo de la tienda.',
+            '# TYPE bot_tienda_consultas_total counter',
+            f'bot_tienda_consultas_total {sum(catalogo.consultas for catalogo in catalogos_tienda.values())}',
+            '# HELP bot_tienda_no_modificado_total Consultas a Tebex respondidas con 304 Not Modified.',
+            '# TYPE bot_tienda_no_modificado_total counter',
+            f'bot_tienda_no_modificado_total {sum(catalogo.no_modificados for catalogo in catalogos_tienda.values())}',
+            '# HELP bot_tienda_errores_total Consultas a Tebex fallidas o sin respuesta a tiempo.',
+            '# TYPE bot_tienda_errores_total counter',
+            f'bot_tienda_errores_total {sum(catalogo.errores for catalogo in catalogos_tienda.values())}',
+            '# HELP bot_tienda_cortes_total Veces que se dejó de consultar a Tebex tras varios fallos seguidos.',
+            '# TYPE bot_tienda_cortes_total counter',
+            f'bot_tienda_cortes_total {sum(catalogo.cortes for catalogo in catalogos_tienda.values())}',
+        ]
+        lineas += [
+            '# HELP bot_recargas_total Recargas de extensiones y normas con +recargar.',
+            '# TYPE bot_recargas_total counter',
+            f'bot_recargas_total{{resultado="correcta"}} {extensiones.recargas}',
+            f'bot_recargas_total{{resultado="con_errores"}} {extensiones.fallidas}',
+        ]
+        if extensiones.duracion is not None:
+            lineas += [
+                '# HELP bot_recarga_segundos Duración de la última recarga con +recargar.',
+                '# TYPE bot_recarga_segundos gauge',
+                f'bot_recarga_segundos {extensiones.duracion}',
+            ]
+        lineas += [
+            '# HELP bot_arranque_segundos Segundos desde el inicio del programa hasta cada etapa del arranque.',
+            '# TYPE bot_arranque_segundos gauge',
+        ]
+        inicio = marcas_arranque['inicio']
+        for etapa, momento in list(marcas_arranque.items())[1:]:
+            lineas.append(f'bot_arranque_segundos{{etapa="{etapa}"}} {momento - inicio}')
+        if sesion_gateway.tiempos:
+            lineas += [
+                '# HELP bot_tiempo_hasta_listo_segundos Tiempo de la última conexión al gateway hasta que el bot está listo.',
+                '# TYPE bot_tiempo_hasta_listo_segundos gauge',
+            ]
+            for modo, segundos in sesion_gateway.tiempos.items():
+                lineas.append(f'bot_tiempo_hasta_listo_segundos{{modo="{modo}"}} {segundos}')
+        if MEDIR_GATEWAY:
+            lineas += [
+                '# HELP bot_gateway_recibidos_bytes_total Bytes recibidos del gateway (ya descomprimidos).',
+                '# TYPE bot_gateway_recibidos_bytes_total counter',
+                f'bot_gateway_recibidos_bytes_total {self.bytes_gateway}',
+                '# HELP bot_gateway_eventos_total Eventos recibidos del gateway.',
+                '# TYPE bot_gateway_eventos_total counter',
+            ]
+            for tipo, cantidad in list(self.eventos_gateway.items()):
+                lineas.append(f'bot_gateway_eventos_total{{evento="{tipo}"}} {cantidad}')
+        return '\n'.join(lineas) + '\n'
+
+bitacora = logging.getLogger('olympusbot')
+
+class FormatoJSON(logging.Formatter):
+    def format(self, evento):
+        datos = {
+            'fecha': datetime.datetime.fromtimestamp(evento.created, datetime.timezone.utc).isoformat(timespec='milliseconds'),
+            'nivel': evento.levelname,
+            'origen': evento.name,
+            'mensaje': evento.getMessage(),
+        }
+        traza = getattr(evento, 'traza', None)
+        if traza is not None:
+            datos['traza'] = traza
+        return json.dumps(datos, ensure_ascii=False)
+
+def _sin_trazas(evento):
+    return not hasattr(evento, 'traza')
+
+def iniciar_registro(archivo):
+    cola = queue.SimpleQueue()
+    salida = logging.handlers.RotatingFileHandler(archivo, maxBytes=TAMANO_REGISTRO, backupCount=COPIAS_REGISTRO, encoding='utf-8', delay=True)
+    salida.setFormatter(FormatoJSON())
+    consola = logging.StreamHandler()
+    consola.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+    consola.addFilter(_sin_trazas)
+    raiz = logging.getLogger()
+    raiz.setLevel(logging.INFO)
+    raiz.addHandler(logging.handlers.QueueHandler(cola))
+    oyente = logging.handlers.QueueListener(cola, salida, consola, respect_handler_level=True)
+    oyente.start()
+    return oyente
+
+class Traza:
+    __slots__ = ('id', 'inicio', 'marca', 'tramos')
+
+    def __init__(self, identificador, inicio):
+        self.id = identificador
+        self.inicio = inicio
+        self.marca = inicio
+        self.tramos = []
+
+    def tramo(self, nombre, inicio, fin=None, **datos):
+        if fin is None:
+            fin = time.perf_counter()
+        self.tramos.append({'tramo': nombre, 'inicio_ms': round((inicio - self.inicio) * 1000, 3), 'duracion_ms': round((fin - inicio) * 1000, 3), **datos})
+
+    def emitir(self, comando):
+        bitacora.info('traza', extra={'traza': {
+            'id': str(self.id),
+            'comando': comando,
+            'total_ms': round((time.perf_counter() - self.inicio) * 1000, 3),
+            'tramos': self.tramos,
+        }})
+
+traza_actual = contextvars.ContextVar('traza_actual', default=None)
+
+def muestrear():
+    return MUESTREO_TRAZAS > 0 and random.random() < MUESTREO_TRAZAS
+
+metricas = Metricas(bot)
+
+espera_rest = contextvars.ContextVar('espera_rest', default=None)
+
+async def _peticion_http_enviada(sesion, contexto, datos):
+    espera = espera_rest.get()
+    if espera:
+        inicio = espera.pop()
+        if time.perf_counter() - inicio > 0.001:
+            traza_actual.get().tramo('espera_limite', inicio)
+
+async def _peticion_http_respondida(sesion, contexto, datos):
+    if datos.response.status != 429:
+        return
+    metricas.limites_rest += 1
+    espera = espera_rest.get()
+    if espera is not None:
+        ahora = time.perf_counter()
+        cabeceras = datos.response.headers
+        reintento = cabeceras.get('Retry-After')
+        traza_actual.get().tramo(
+            'limite_429', ahora, ahora,
+            reintento_s=float(reintento) if reintento else None, alcance=cabeceras.get('X-RateLimit-Scope'),
+        )
+        espera.append(ahora)
+
+traza_http.on_request_start.append(_peticion_http_enviada)
+traza_http.on_request_end.append(_peticion_http_respondida)
+
+_peticion_rest = bot.http.request
+
+async def _peticion_rest_medida(*args, **kwargs):
+    inicio = time.perf_counter()
+    traza = traza_actual.get()
+    marca = None if traza is None else espera_rest.set([inicio])
+    try:
+        return await _peticion_rest(*args, **kwargs)
+    finally:
+        fin = time.perf_counter()
+        metricas.latencia_rest.observar(fin - inicio)
+        if traza is not None:
+            espera_rest.reset(marca)
+            ruta = args[0]
+            traza.tramo('rest', inicio, fin, ruta=f'{ruta.method} {ruta.path}')
+
+bot.http.request = _peticion_rest_medida
+
+if MEDIR_GATEWAY:
+    @bot.event
+    async def on_socket_raw_receive(mensaje):
+        metricas.bytes_gateway += len(mensaje)
+
+    @bot.event
+    async def on_socket_event_type(tipo):
+        metricas.eventos_gateway[tipo] = metricas.eventos_gateway.get(tipo, 0) + 1
+
+class SesionGateway:
+    def __init__(self):
+        self.inicio = None
+        self.tiempos = {}
+
+    def conectando(self):
+        if self.inicio is None:
+            self.inicio = time.perf_counter()
+
+    def listo(self, modo):
+        if self.inicio is None:
+            return
+        self.tiempos[modo] = time.perf_counter() - self.inicio
+        self.inicio = None
+        bitacora.info(f'Listo en {self.tiempos[modo]:.2f} s ({modo})')
+
+sesion_gateway = SesionGateway()
+
+@bot.event
+async def on_disconnect():
+    sesion_gateway.conectando()
+
+@bot.event
+async def on_resumed():
+    sesion_gateway.listo('reanudacion')
+
+@bot.event
+async def on_connect():
+    marcas_arranque.setdefault('gateway', time.perf_counter())
+
+@bot.event
+async def on_message(message):
+    inicio = time.perf_counter()
+    if message.author.bot:
+        return
+    traza = None
+    if muestrear():
+        traza = Traza(message.id, inicio)
+        traza.tramo('recepcion', inicio - (discord.utils.utcnow() - message.created_at).total_seconds(), inicio)
+        traza_actual.set(traza)
+    ctx = await bot.get_context(message)
+    ctx.inicio = inicio
+    if traza is None:
+        await bot.invoke(ctx)
+        return
+    traza.tramo('analisis', inicio)
+    traza.marca = time.perf_counter()
+    try:
+        await bot.invoke(ctx)
+    finally:
+        if ctx.command is not None:
+            traza.emitir(ctx.command.qualified_name)
+
+@bot.before_invoke
+async def antes_de_comando(ctx):
+    if ctx.interaction is not None:
+        ctx.inicio = time.perf_counter()
+        if muestrear():
+            traza_actual.set(Traza(ctx.interaction.id, ctx.inicio))
+    traza = traza_actual.get()
+    if traza is not None:
+        traza.tramo('comprobaciones', traza.marca)
+        traza.marca = time.perf_counter()
+    vigilante_bucle.comandos[asyncio.current_task()] = ctx.command.qualified_name
+
+@bot.after_invoke
+async def despues_de_comando(ctx):
+    metricas.observar_comando(ctx.command.qualified_name, time.perf_counter() - getattr(ctx, 'inicio', time.perf_counter()))
+    vigilante_bucle.comandos.pop(asyncio.current_task(), None)
+    traza = traza_actual.get()
+    if traza is not None:
+        traza.tramo('comando', traza.marca)
+        if ctx.interaction is not None:
+            traza.emitir(ctx.command.qualified_name)
+
+@bot.event
+async def on_command_error(ctx, error):
+    if ctx.command is not None:
+        metricas.contar_error(ctx.command.qualified_name, type(error).__name__)
+    await commands.Bot.on_command_error(bot, ctx, error)
+
+enfriamientos = [
+    commands.CooldownMapping.from_cooldown(*limite, tipo)
+    for limite, tipo in (
+        (ENFRIAMIENTO_USUARIO, commands.BucketType.user),
+        (ENFRIAMIENTO_CANAL, commands.BucketType.channel),
     )
-    embed.set_footer(text='Las normas se acumulan y los castigos pueden variar según la persona. Para más comandos, escribe +help')
-    await ctx.send(embed=embed)
-
-@bot.command(name='comandos')
-async def comandos(ctx):
-    embed = discord.Embed(
-        title='Comandos que puedes usar en el servidor',
-        description='/tpa (ir a otro jugador) \n'
-                    '/tpaccept (aceptar tpa) \n'
-                    '/tpahere (traer a otro jugador) \n'
-                    '/back (volver al sitio anterior) \n'
-                    '/sit (sentarse) \n'
-                    '/afk (ausentarse) \n'
-                    '/sethome (marcar un home) \n'
-                    '/home "nombre" (ir a un home marcado) \n'
-                    '/delhome "nombre" (borrar un home) \n'
-                    '/ps add "nombre" (agregar persona a tu piedra de protección) \n'
-                    '/ps remove "nombre" (quitar persona de tu piedra) \n'
-                    '/tienda (ver tienda) \n'
-                    '/piedras (información sobre piedra de protección) \n'
-                    '/trabajos (para conseguir dinero) \n'
-                    '/jobs join "nombre" (unirse a un trabajo) \n'
-                    '/jobs remove "nombre" (salir de un trabajo) \n'
-                    '/ec (acceder a ender chest) \n'
-                    '/pay "cantidad" "nickname" (pagar a otro jugador) \n'
-                    '/money (ver tu dinero) \n'
-                    '/baltop (ver las personas más ricas en Olympus) \n'
-                    '/ah (subasta) \n'
-                    '/ah sell "precio" (vender ítem en mano en el ah) \n'
-                    '/tienda (comprar piedras, torretas, etc.) \n'
-                    '/warp recursos (para recolección de materiales, no recomendado construir aquí) \n'
-                    '/warp matadero (conseguir comida) \n'
-                    '/warp boda (iglesia) \n\n'
-                    'Puedes crear ascensores colocando un bloque de cuarzo con uno de redstone debajo.',
+    if limite is not None
+]
+
+class AgrupadorRespuestas:
+    def __init__(self, ventana, mencionar, enfriamientos):
+        self.ventana = ventana
+        self.mencionar = mencionar
+        self.enfriamientos = enfriamientos
+        self.ahorrados = 0
+        self._grupos = {}
+        self._tareas = set()
+        self._avisos = {}
+
+    def agrupar(self, funcion):
+        @functools.wraps(funcion)
+        async def envoltura(cog, ctx, *args, **kwargs):
+            agrupar = self.ventana and ctx.interaction is None
+            clave = (ctx.channel.id, ctx.command.qualified_name)
+            if agrupar and clave in self._grupos:
+                self._grupos[clave].append(ctx.author)
+                return
+            if not await self._permitir(ctx):
+                return
+            if not agrupar:
+                return await funcion(cog, ctx, *args, **kwargs)
+            self._grupos[clave] = []
+            tarea = asyncio.create_task(self._cerrar(clave, ctx.channel, ctx.prefix))
+            self._tareas.add(tarea)
+            tarea.add_done_callback(self._tareas.discard)
+            return await funcion(cog, ctx, *args, **kwargs)
+        return envoltura
+
+    async def _permitir(self, ctx):
+        for mapa in self.enfriamientos:
+            restante = mapa.update_rate_limit(ctx.message)
+            if not restante:
+                continue
+            metricas.contar_error(ctx.command.qualified_name, 'CommandOnCooldown')
+            texto = f'Espera {math.ceil(restante)} segundos antes de volver a usar este comando.'
+            if ctx.interaction is not None:
+                await ctx.send(texto, ephemeral=True)
+                return False
+            ahora = time.monotonic()
+            aviso = (mapa.type, mapa.type(ctx.message))
+            if self._avisos.get(aviso, 0) <= ahora:
+                if len(self._avisos) >= 1000:
+                    self._avisos = {clave: hasta for clave, hasta in self._avisos.items() if hasta > ahora}
+                self._avisos[aviso] = ahora + restante
+                await ctx.send(texto, delete_after=restante)
+            return False
+        return True
+
+    async def _cerrar(self, clave, canal, prefijo):
+        await asyncio.sleep(self.ventana)
+        grupo = self._grupos.pop(clave)
+        if not grupo:
+            return
+        self.ahorrados += len(grupo)
+        if self.mencionar:
+            self.ahorrados -= 1
+            menciones = ' '.join(dict.fromkeys(autor.mention for autor in grupo))
+            try:
+                await canal.send(f'{menciones} la respuesta a `{prefijo}{clave[1]}` está justo arriba.')
+            except discord.HTTPException:
+                pass
+
+agrupador = AgrupadorRespuestas(VENTANA_AGRUPACION, MENCIONAR_AGRUPADOS, enfriamientos)
+
+class VigilanteBucle:
+    def __init__(self, umbral, directorio, maximo_volcados, intervalo=0.05, muestras=200):
+        self.umbral = umbral
+        self.directorio = directorio
+        self.maximo_volcados = maximo_volcados
+        self.intervalo = intervalo
+        self.muestras = muestras
+        self.perfilar = True
+        self.activo = False
+        self.retraso = 0.0
+        self.retraso_maximo = 0.0
+        self.bloqueos = {}
+        self._cerrojo = threading.Lock()
+        self.comandos = weakref.WeakKeyDictionary()
+        self._latido = 0.0
+        self._hilo = None
+
+    def iniciar(self):
+        if self.activo:
+            return
+        self.activo = True
+        self._bucle = asyncio.get_running_loop()
+        self._hilo_bucle = threading.get_ident()
+        self._latido = time.monotonic()
+        self._parar = threading.Event()
+        self._tarea = asyncio.create_task(self._latir())
+        self._hilo = threading.Thread(target=self._vigilar, name='vigilante-bucle', daemon=True)
+        self._hilo.start()
+
+    def detener(self):
+        if not self.activo:
+            return
+        self.activo = False
+        self._tarea.cancel()
+        self._parar.set()
+        self._hilo.join()
+        self._hilo = None
+
+    async def _latir(self):
+        while True:
+            inicio = time.monotonic()
+            await asyncio.sleep(self.intervalo)
+            self._latido = time.monotonic()
+            self.retraso = max(0.0, self._latido - inicio - self.intervalo)
+            self.retraso_maximo = max(self.retraso_maximo, self.retraso)
+
+    def _vigilar(self):
+        while not self._parar.wait(self.intervalo):
+            if time.monotonic() - self._latido > self.umbral:
+                self._capturar(self._latido)
+
+    def _capturar(self, latido):
+        tarea = asyncio.current_task(self._bucle)
+        nombre = self.comandos.get(tarea, 'otro') if tarea is not None else 'callback'
+        marco = sys._current_frames().get(self._hilo_bucle)
+        pila = ''.join(traceback.format_stack(marco)) if marco is not None else ''
+        perfil = {}
+        tomadas = 0
+        while self._latido == latido and not self._parar.is_set():
+            if self.perfilar and tomadas < self.muestras:
+                marco = sys._current_frames().get(self._hilo_bucle)
+                if marco is not None:
+                    clave = ';'.join(f'{cuadro.name} ({os.path.basename(cuadro.filename)}:{cuadro.lineno})' for cuadro in traceback.extract_stack(marco))
+                    perfil[clave] = perfil.get(clave, 0) + 1
+                    tomadas += 1
+            time.sleep(0.005)
+        duracion = max(0.0, (self._latido if self._latido != latido else time.monotonic()) - latido - self.intervalo)
+        with self._cerrojo:
+            veces, maximo, total = self.bloqueos.get(nombre, (0, 0.0, 0.0))
+            self.bloqueos[nombre] = (veces + 1, max(maximo, duracion), total + duracion)
+        self._volcar(nombre, duracion, pila, perfil)
+
+    def _volcar(self, nombre, duracion, pila, perfil):
+        os.makedirs(self.directorio, exist_ok=True)
+        archivo = os.path.join(self.directorio, datetime.datetime.now().strftime('bloqueo-%Y%m%d-%H%M%S-%f.txt'))
+        with open(archivo, 'w', encoding='utf-8') as salida:
+            salida.write(f'Comando: {nombre}\nDuración: {duracion * 1000:.0f} ms\n\n{pila}')
+            if perfil:
+                salida.write('\nPerfil (pilas muestreadas cada 5 ms):\n')
+                for clave, cantidad in sorted(perfil.items(), key=lambda elemento: -elemento[1]):
+                    salida.write(f'{clave} {cantidad}\n')
+        volcados = sorted(volcado for volcado in os.listdir(self.directorio) if volcado.startswith('bloqueo-'))
+        for sobrante in volcados[:-self.maximo_volcados]:
+            os.remove(os.path.join(self.directorio, sobrante))
+
+    def peores(self, cantidad=5):
+        with self._cerrojo:
+            copia = list(self.bloqueos.items())
+        return heapq.nlargest(cantidad, copia, key=lambda elemento: elemento[1][1])
+
+vigilante_bucle = VigilanteBucle(UMBRAL_BLOQUEO, DIRECTORIO_VOLCADOS, MAXIMO_VOLCADOS)
+
+PIE_NORMAS = 'Las normas se acumulan y los castigos pueden variar según la persona. Para más comandos, escribe {prefijo}help'
+PIE_AYUDA = 'Para ver más comandos, escribe {prefijo}help'
+LARGO_CONSULTA = 200
+LARGO_DESCRIPCION = 4096
+
+NORMAS = {
+    'leves': ('Normas Leves', [
+        'Los bugs están permitidos, pero antes debes consultar su uso con alguien del staff.',
+        'No insultar a otros jugadores si no es de su agrado.',
+        'Evita hacer flood (ejemplo: holaaaaaa), spam o texto innecesario que sature el chat.',
+        'No se permite tener más de dos relojes de Redstone; generadores de lag y cargadores de chunks están prohibidos.',
+        'Las mascotas son propiedad privada; está prohibido matarlas intencionalmente, aunque no estén en una zona protegida.',
+        'Los lobos no pueden ser utilizados como armas para PVP.',
+        'En caso de problemas aislados, el staff puede realizar reuniones para encontrar una solución justa.',
+        'No salirse de un juicio.',
+    ]),
+    'graves': ('Normas Graves', [
+        'El uso de multicuentas está prohibido. Si deseas cambiar de cuenta, notifica al staff para transferir tus ítems y propiedades.',
+        'Hacks están prohibidos y serán sancionados con ip-ban.',
+        'Destrucción de construcciones protegidas y robo de ítems en zonas de otros jugadores están prohibidos.',
+        'Cualquier tipo de asesinato como tpakill y spawn kill está prohibido.',
+        'Prohibido aprovechar bugs, como duplicación o glitches de movilidad.',
+        'Prohibido el uso de hacks como xray o autoclick.',
+        'No se permite distribuir enlaces externos sin aprobación del staff.',
+        'Hablar con respeto al staff y evitar faltas de respeto.',
+        'Intentos de evadir sentencias aumentarán la pena; ayudar a otro jugador a evadir es sancionable.',
+        'Mentirle al staff está prohibido.',
+        'Prohibido hacerse pasar por el staff.',
+        'No usar otros casos para justificar acciones.',
+        'Mensajes y construcciones ofensivas están prohibidas.',
+        'Prohibido escapar de la cárcel.',
+        'No ayudar a un preso a salir de la cárcel.',
+        'No explorar, minar o talar en el mundo normal; utiliza /warp recursos.',
+    ]),
+    'juicio': ('Normas del Juicio', [
+        'No interrumpir el juicio.',
+        'Presentar pruebas.',
+        'No hacer perder el tiempo al staff que actúe como juez.',
+        'Leer las normas antes de solicitar un juicio.',
+        'Solo se permite la presencia de testigos y partes involucradas en el juicio.',
+        'Solo Owners, Admins y Mods pueden actuar como jueces.',
+        'Ambas partes (acusados y acusadores) deben estar presentes.',
+    ]),
+    'clanes': ('Normas de los Clanes', [
+        'Todo tipo de PVP es válido si ambos jugadores pertenecen a un clan.',
+        'Se permite el grifeo, pero solo a bases de clanes.',
+    ]),
+    'staff': ('Normas del Staff', [
+        'Las quejas sobre baneos se atienden por Discord.',
+        'Objetos exclusivos del staff no deben caer en manos de jugadores; ambos involucrados serán sancionados si esto sucede.',
+        'Responder a las dudas de los jugadores.',
+        'Saludar a los nuevos jugadores.',
+        'No abusar del poder.',
+        'Solo Owners, Admins y Mods pueden sancionar.',
+        'Tratar a todos los jugadores por igual.',
+        'No dar ítems del creativo a jugadores; solo por survival.',
+        'Ser neutral en juicios.',
+        'La inactividad injustificada puede resultar en expulsión del staff.',
+        'No revelar novedades en desarrollo a jugadores.',
+    ]),
+}
+
+NORMAS_CODIGO = dict(NORMAS)
+
+def texto_normas(reglas):
+    return ' \n'.join(f'{numero}) {regla}' for numero, regla in enumerate(reglas, 1))
+
+def leer_normas(archivo):
+    normas = dict(NORMAS_CODIGO)
+    if not os.path.exists(archivo):
+        return normas
+    with open(archivo, encoding='utf-8') as entrada:
+        datos = json.load(entrada)
+    if not isinstance(datos, dict):
+        raise ValueError(f'{archivo} debe contener un objeto con una lista de normas por categoría.')
+    for categoria, reglas in datos.items():
+        if categoria not in NORMAS_CODIGO:
+            raise ValueError(f"Categoría desconocida en {archivo}: {categoria}. Usa una de: {', '.join(NORMAS_CODIGO)}")
+        if not isinstance(reglas, list) or not reglas or not all(isinstance(regla, str) and regla.strip() for regla in reglas):
+            raise ValueError(f'Las normas {categoria} de {archivo} deben ser una lista de textos no vacíos.')
+        reglas = [regla.strip() for regla in reglas]
+        if len(texto_normas(reglas)) > LARGO_DESCRIPCION:
+            raise ValueError(f'Las normas {categoria} de {archivo} son demasiado largas para un mensaje.')
+        normas[categoria] = (NORMAS_CODIGO[categoria][0], reglas)
+    return normas
+
+COMANDOS_SERVIDOR = [
+    '/tpa (ir a otro jugador)',
+    '/tpaccept (aceptar tpa)',
+    '/tpahere (traer a otro jugador)',
+    '/back (volver al sitio anterior)',
+    '/sit (sentarse)',
+    '/afk (ausentarse)',
+    '/sethome (marcar un home)',
+    '/home "nombre" (ir a un home marcado)',
+    '/delhome "nombre" (borrar un home)',
+    '/ps add "nombre" (agregar persona a tu piedra de protección)',
+    '/ps remove "nombre" (quitar persona de tu piedra)',
+    '/tienda (ver tienda)',
+    '/piedras (información sobre piedra de protección)',
+    '/trabajos (para conseguir dinero)',
+    '/jobs join "nombre" (unirse a un trabajo)',
+    '/jobs remove "nombre" (salir de un trabajo)',
+    '/ec (acceder a ender chest)',
+    '/pay "cantidad" "nickname" (pagar a otro jugador)',
+    '/money (ver tu dinero)',
+    '/baltop (ver las personas más ricas en Olympus)',
+    '/ah (subasta)',
+    '/ah sell "precio" (vender ítem en mano en el ah)',
+    '/tienda (comprar piedras, torretas, etc.)',
+    '/warp recursos (para recolección de materiales, no recomendado construir aquí)',
+    '/warp matadero (conseguir comida)',
+    '/warp boda (iglesia)',
+]
+NOTA_COMANDOS = 'Puedes crear ascensores colocando un bloque de cuarzo con uno de redstone debajo.'
+
+class EmbedCacheado(discord.Embed):
+    def to_dict(self):
+        try:
+            return self._serializado
+        except AttributeError:
+            self._serializado = super().to_dict()
+            return self._serializado
+
+class CacheRespuestas:
+    def __init__(self):
+        self._constructores = {}
+        self._embeds = {}
+
+    def registrar(self, nombre, constructor):
+        self._constructores[nombre] = constructor
+        self._embeds.pop(nombre, None)
+
+    def obtener(self, nombre):
+        embed = self._embeds.get(nombre)
+        if embed is None:
+            embed = self._construir(nombre)
+        return embed
+
+    def invalidar(self, nombre=None):
+        if nombre is None:
+            self._embeds.clear()
+        else:
+            self._embeds.pop(nombre, None)
+
+    def reconstruir(self):
+        self._embeds.clear()
+        for nombre in self._constructores:
+            self._construir(nombre)
+
+    def _construir(self, nombre):
+        embed = self._constructores[nombre]()
+        embed.to_dict()
+        self._embeds[nombre] = embed
+        return embed
+
+def _varint(valor):
+    valor &= 0xFFFFFFFF
+    datos = bytearray()
+    while True:
+        byte = valor & 0x7F
+        valor >>= 7
+        if valor:
+            datos.append(byte | 0x80)
+        else:
+            datos.append(byte)
+            return bytes(datos)
+
+async def _leer_varint(lector):
+    valor = 0
+    for desplazamiento in range(0, 35, 7):
+        byte = (await lector.readexactly(1))[0]
+        valor |= (byte & 0x7F) << desplazamiento
+        if not byte & 0x80:
+            return valor
+    raise ValueError('VarInt demasiado largo')
+
+def _decodificar_varint(datos, posicion=0):
+    valor = 0
+    for desplazamiento in range(0, 35, 7):
+        byte = datos[posicion]
+        posicion += 1
+        valor |= (byte & 0x7F) << desplazamiento
+        if not byte & 0x80:
+            return valor, posicion
+    raise ValueError('VarInt demasiado largo')
+
+def _paquete(identificador, datos=b''):
+    cuerpo = _varint(identificador) + datos
+    return _varint(len(cuerpo)) + cuerpo
+
+async def _leer_paquete(lector):
+    longitud = await _leer_varint(lector)
+    identificador = await _leer_varint(lector)
+    return identificador, await lector.readexactly(longitud - len(_varint(identificador)))
+
+async def _ping_servidor(host, puerto):
+    lector, escritor = await asyncio.open_connection(host, puerto)
+    try:
+        direccion = host.encode('utf-8')
+        escritor.write(_paquete(0x00, _varint(-1) + _varint(len(direccion)) + direccion + struct.pack('>H', puerto) + _varint(1)))
+        escritor.write(_paquete(0x00))
+        await escritor.drain()
+        identificador, datos = await _leer_paquete(lector)
+        if identificador != 0x00:
+            raise ValueError('Respuesta de estado inesperada')
+        longitud, inicio_json = _decodificar_varint(datos)
+        estado = json.loads(datos[inicio_json:inicio_json + longitud].decode('utf-8'))
+        loop = asyncio.get_running_loop()
+        inicio = loop.time()
+        escritor.write(_paquete(0x01, struct.pack('>q', int(inicio * 1000))))
+        await escritor.drain()
+        await _leer_paquete(lector)
+        latencia = round((loop.time() - inicio) * 1000)
+    finally:
+        escritor.close()
+    return {
+        'en_linea': True,
+        'version': estado['version']['name'],
+        'jugadores': estado['players']['online'],
+        'maximo': estado['players']['max'],
+        'latencia': latencia,
+    }
+
+class EstadoServidor:
+    def __init__(self, host, puerto, ttl, timeout=5, al_actualizar=None):
+        self.host = host
+        self.puerto = puerto
+        self.ttl = ttl
+        self.timeout = timeout
+        self.al_actualizar = al_actualizar
+        self.ultimo = None
+        self.consultas = 0
+        self._caduca = 0.0
+        self._consulta = None
+
+    async def obtener(self):
+        if self.ultimo is not None and asyncio.get_running_loop().time() < self._caduca:
+            return self.ultimo
+        if self._consulta is None:
+            self._consulta = asyncio.ensure_future(self._actualizar())
+        return await asyncio.shield(self._consulta)
+
+    async def _actualizar(self):
+        try:
+            self.consultas += 1
+            try:
+                estado = await asyncio.wait_for(_ping_servidor(self.host, self.puerto), self.timeout)
+            except (OSError, asyncio.TimeoutError, EOFError, ValueError, KeyError, TypeError):
+                estado = {'en_linea': False}
+            self.ultimo = estado
+            self._caduca = asyncio.get_running_loop().time() + self.ttl
+            if self.al_actualizar is not None:
+                self.al_actualizar(estado)
+            return estado
+        finally:
+            self._consulta = None
+
+estados_servidor = {}
+
+def estado_de(ip):
+    estado = estados_servidor.get(ip)
+    if estado is None:
+        host, _, puerto = ip.partition(':')
+        estado = estados_servidor[ip] = EstadoServidor(
+            host, int(puerto or PUERTO_MINECRAFT), TTL_ESTADO_SERVIDOR,
+            al_actualizar=lambda _, ip=ip: configuraciones.invalidar_ip(ip)
+        )
+    return estado
+
+estado_servidor = estado_de(SERVIDOR_MINECRAFT)
+
+class HistorialServidor:
+    __slots__ = ('latencias', 'jugadores', 'posicion', 'muestras', 'en_linea', 'suma_latencias')
+
+    def __init__(self, capacidad):
+        self.latencias = array.array('i', [-1]) * capacidad
+        self.jugadores = array.array('i', [0]) * capacidad
+        self.posicion = 0
+        self.muestras = 0
+        self.en_linea = 0
+        self.suma_latencias = 0
+
+    def agregar(self, latencia, jugadores):
+        anterior = self.latencias[self.posicion]
+        if anterior >= 0:
+            self.en_linea -= 1
+            self.suma_latencias -= anterior
+        if latencia >= 0:
+            self.en_linea += 1
+            self.suma_latencias += latencia
+        self.latencias[self.posicion] = latencia
+        self.jugadores[self.posicion] = jugadores
+        self.posicion = (self.posicion + 1) % len(self.latencias)
+        self.muestras = min(self.muestras + 1, len(self.latencias))
+
+    def disponibilidad(self):
+        return self.en_linea / self.muestras if self.muestras else None
+
+    def latencia_media(self):
+        return round(self.suma_latencias / self.en_linea) if self.en_linea else None
+
+    def serie(self, valores):
+        if self.muestras < len(valores):
+            return valores[:self.muestras].tolist()
+        return valores[self.posicion:].tolist() + valores[:self.posicion].tolist()
+
+class MonitorRed:
+    def __init__(self, servidores, intervalo, simultaneas, capacidad, timeout=5, consultar=_ping_servidor, reloj=time.time):
+        self.direcciones = {}
+        for nombre, ip in servidores.items():
+            host, _, puerto = ip.partition(':')
+            self.direcciones[nombre] = (host, int(puerto or PUERTO_MINECRAFT))
+        self.intervalo = intervalo
+        self.simultaneas = simultaneas
+        self.timeout = timeout
+        self.consultar = consultar
+        self.reloj = reloj
+        self.historiales = {nombre: HistorialServidor(capacidad) for nombre in servidores}
+        self.ultimos = {nombre: {'en_linea': False} for nombre in servidores}
+        self.publicado = None
+        self.rondas = 0
+        self.consultas = 0
+        self.fallos = 0
+        self.duracion_ronda = 0.0
+        self.tarea = None
+        self._semaforo = None
+
+    def iniciar(self):
+        self.tarea = asyncio.create_task(self._bucle())
+
+    def detener(self):
+        if self.tarea is not None:
+            self.tarea.cancel()
+            self.tarea = None
+
+    async def _bucle(self):
+        loop = asyncio.get_running_loop()
+        siguiente = loop.time()
+        while True:
+            await self.ronda()
+            siguiente += self.intervalo
+            if siguiente < loop.time():
+                siguiente = loop.time()
+            await asyncio.sleep(siguiente - loop.time())
+
+    async def _consultar(self, nombre):
+        host, puerto = self.direcciones[nombre]
+        async with self._semaforo:
+            self.consultas += 1
+            try:
+                return await asyncio.wait_for(self.consultar(host, puerto), self.timeout)
+            except (OSError, asyncio.TimeoutError, EOFError, ValueError, KeyError, TypeError):
+                self.fallos += 1
+                return {'en_linea': False}
+
+    async def ronda(self):
+        if self._semaforo is None:
+            self._semaforo = asyncio.Semaphore(self.simultaneas)
+        loop = asyncio.get_running_loop()
+        inicio = loop.time()
+        nombres = list(self.direcciones)
+        resultados = await asyncio.gather(*map(self._consultar, nombres))
+        for nombre, estado in zip(nombres, resultados):
+            self.ultimos[nombre] = estado
+            if estado['en_linea']:
+                self.historiales[nombre].agregar(estado['latencia'], estado['jugadores'])
+            else:
+                self.historiales[nombre].agregar(-1, 0)
+        self.rondas += 1
+        self.duracion_ronda = loop.time() - inicio
+        self.publicado = self._instantanea()
+
+    def _instantanea(self):
+        servidores = []
+        for nombre, (host, puerto) in self.direcciones.items():
+            estado = self.ultimos[nombre]
+            historial = self.historiales[nombre]
+            disponibilidad = historial.disponibilidad()
+            servidores.append({
+                'nombre': nombre,
+                'direccion': host if puerto == PUERTO_MINECRAFT else f'{host}:{puerto}',
+                'en_linea': estado['en_linea'],
+                'version': estado.get('version'),
+                'jugadores': estado.get('jugadores'),
+                'maximo': estado.get('maximo'),
+                'latencia_ms': estado.get('latencia'),
+                'disponibilidad': None if disponibilidad is None else round(disponibilidad, 4),
+                'latencia_media_ms': historial.latencia_media(),
+                'historial': {
+                    'latencia_ms': [None if latencia < 0 else latencia for latencia in historial.serie(historial.latencias)],
+                    'jugadores': historial.serie(historial.jugadores),
+                },
+            })
+        return {
+            'actualizado': int(self.reloj()),
+            'intervalo_s': self.intervalo,
+            'en_linea': sum(servidor['en_linea'] for servidor in servidores),
+            'servidores': servidores,
+        }
+
+red = MonitorRed(SERVIDORES_RED, INTERVALO_RED, CONSULTAS_RED_SIMULTANEAS, HISTORIAL_RED)
+
+ETIQUETA_HTML = re.compile(r'<[^>]+>')
+
+def interpretar_catalogo(datos):
+    categorias = []
+    for categoria in datos['data']:
+        paquetes = [
+            {
+                'nombre': paquete['name'],
+                'precio': float(paquete['total_price']),
+                'moneda': paquete['currency'],
+                'descripcion': ' '.join(html.unescape(ETIQUETA_HTML.sub(' ', paquete.get('description') or '')).split()),
+            }
+            for paquete in categoria.get('packages') or []
+        ]
+        if paquetes:
+            categorias.append((categoria['name'], paquetes))
+    return categorias
+
+class CatalogoTienda:
+    def __init__(self, url, frescura, timeout, fallos_corte, enfriamiento_corte, reloj=time.monotonic):
+        self.url = url
+        self.frescura = frescura
+        self.timeout = timeout
+        self.fallos_corte = fallos_corte
+        self.enfriamiento_corte = enfriamiento_corte
+        self.reloj = reloj
+        self.categorias = None
+        self.comprobado = None
+        self.etag = None
+        self.modificado = None
+        self.embeds = {}
+        self.consultas = 0
+        self.no_modificados = 0
+        self.errores = 0
+        self.cortes = 0
+        self.fallos_seguidos = 0
+        self._abierto_hasta = 0.0
+        self._actualizado = 0.0
+        self._consulta = None
+        self._sesion = None
+
+    @property
+    def abierto(self):
+        return self.reloj() < self._abierto_hasta
+
+    async def obtener(self):
+        if self.categorias is None or self.reloj() - self._actualizado >= self.frescura:
+            self.revalidar()
+        return self.categorias
+
+    def revalidar(self):
+        if self._consulta is None and not self.abierto:
+            self._consulta = asyncio.ensure_future(self._actualizar())
+
+    async def _actualizar(self):
+        try:
+            if self._sesion is None:
+                self._sesion = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout))
+            cabeceras = {'Accept': 'application/json'}
+            if self.etag is not None:
+                cabeceras['If-None-Match'] = self.etag
+            if self.modificado is not None:
+                cabeceras['If-Modified-Since'] = self.modificado
+            self.consultas += 1
+            async with self._sesion.get(self.url, headers=cabeceras) as respuesta:
+                if respuesta.status == 304 and self.categorias is not None:
+                    self.no_modificados += 1
+                else:
+                    respuesta.raise_for_status()
+                    self.categorias = interpretar_catalogo(await respuesta.json(content_type=None))
+                    self.etag = respuesta.headers.get('ETag')
+                    self.modificado = respuesta.headers.get('Last-Modified')
+            self._actualizado = self.reloj()
+            self.comprobado = time.time()
+            self.fallos_seguidos = 0
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError, KeyError, TypeError):
+            self.errores += 1
+            self.fallos_seguidos += 1
+            if self.fallos_seguidos >= self.fallos_corte:
+                self._abierto_hasta = self.reloj() + self.enfriamiento_corte
+                self.cortes += 1
+        finally:
+            self.embeds.clear()
+            self._consulta = None
+
+    def buscar(self, rango):
+        buscado = rango.casefold()
+        paquetes = [(categoria, paquete) for categoria, lista in self.categorias for paquete in lista]
+        for categoria, paquete in paquetes:
+            if paquete['nombre'].casefold() == buscado:
+                return categoria, paquete
+        for categoria, paquete in paquetes:
+            if buscado in paquete['nombre'].casefold():
+                return categoria, paquete
+        return None
+
+    def embed(self, tienda, rango=None):
+        encontrado = None
+        if rango is not None:
+            encontrado = self.buscar(rango)
+            if encontrado is None:
+                return None
+        clave = (tienda, encontrado and encontrado[1]['nombre'])
+        embed = self.embeds.get(clave)
+        if embed is None:
+            embed = self.embeds[clave] = embed_catalogo(self, tienda) if encontrado is None else embed_paquete(self, tienda, *encontrado)
+            embed.to_dict()
+        return embed
+
+    async def cerrar(self):
+        consulta = self._consulta
+        if consulta is not None:
+            consulta.cancel()
+            await asyncio.gather(consulta, return_exceptions=True)
+        if self._sesion is not None:
+            await self._sesion.close()
+            self._sesion = None
+
+def formatear_precio(paquete):
+    return f"{paquete['precio']:.2f} {paquete['moneda']}"
+
+def pie_catalogo(catalogo):
+    texto = f"Precios comprobados a las {time.strftime('%H:%M', time.localtime(catalogo.comprobado))}"
+    if catalogo.fallos_seguidos:
+        texto += ' · la tienda no responde, pueden haber cambiado'
+    return texto
+
+def embed_catalogo(catalogo, tienda):
+    embed = EmbedCacheado(title='Tienda', url=tienda, description=f'Rangos y ventajas disponibles en {tienda}', color=discord.Color.purple())
+    restante = 5500 - len(embed.title) - len(embed.description)
+    for categoria, paquetes in catalogo.categorias:
+        lineas = []
+        for paquete in paquetes:
+            linea = f"**{discord.utils.escape_markdown(paquete['nombre'])}**: {formatear_precio(paquete)}"
+            if sum(map(len, lineas)) + len(lineas) + len(linea) > 1000:
+                lineas.append('…')
+                break
+            lineas.append(linea)
+        valor = '\n'.join(lineas)
+        nombre = categoria[:256]
+        if len(embed.fields) == 25 or len(nombre) + len(valor) > restante:
+            embed.add_field(name='…', value='Hay más rangos en la tienda.', inline=False)
+            break
+        restante -= len(nombre) + len(valor)
+        embed.add_field(name=nombre, value=valor, inline=False)
+    embed.set_footer(text=pie_catalogo(catalogo))
+    return embed
+
+def embed_paquete(catalogo, tienda, categoria, paquete):
+    descripcion = paquete['descripcion']
+    embed = EmbedCacheado(
+        title=paquete['nombre'][:256],
+        url=tienda,
+        description=(descripcion if len(descripcion) <= 2000 else descripcion[:2000] + '…') or None,
         color=discord.Color.purple()
     )
-    embed.set_footer(text='Para ver más comandos, escribe +help')
-    await ctx.send(embed=embed)
+    embed.add_field(name='Precio', value=formatear_precio(paquete), inline=True)
+    embed.add_field(name='Categoría', value=categoria[:1024], inline=True)
+    embed.set_footer(text=pie_catalogo(catalogo))
+    return embed
+
+catalogos_tienda = {}
+
+def catalogo_de(tienda):
+    token = TOKENS_TEBEX.get(tienda)
+    if not token:
+        return None
+    catalogo = catalogos_tienda.get(token)
+    if catalogo is None:
+        catalogo = catalogos_tienda[token] = CatalogoTienda(
+            API_TEBEX.format(token=token), FRESCURA_TIENDA, TIMEOUT_TIENDA, FALLOS_CORTE_TIENDA, ENFRIAMIENTO_CORTE_TIENDA
+        )
+    return catalogo
+
+_cerrar_bot = bot.close
+
+async def _cerrar_bot_y_tiendas():
+    try:
+        await _cerrar_bot()
+    finally:
+        for catalogo in catalogos_tienda.values():
+            await catalogo.cerrar()
+
+bot.close = _cerrar_bot_y_tiendas
+
+RCON_LOGIN = 3
+RCON_COMANDO = 2
+RCON_RESPUESTA = 0
+RCON_FRAGMENTO = 4096
+
+class ErrorRcon(Exception):
+    pass
+
+def _paquete_rcon(identificador, tipo, texto):
+    cuerpo = struct.pack('<ii', identificador, tipo) + texto.encode('utf-8') + b'\x00\x00'
+    return struct.pack('<i', len(cuerpo)) + cuerpo
+
+async def _leer_paquete_rcon(lector):
+    longitud, = struct.unpack('<i', await lector.readexactly(4))
+    if not 10 <= longitud <= RCON_FRAGMENTO * 4 + 10:
+        raise ValueError(f'Paquete RCON de longitud inválida: {longitud}')
+    datos = await lector.readexactly(longitud)
+    identificador, tipo = struct.unpack('<ii', datos[:8])
+    return identificador, tipo, datos[8:-2]
+
+class ConexionRcon:
+    def __init__(self, lector, escritor, timeout, maximo_en_vuelo):
+        self.timeout = timeout
+        self._lector = lector
+        self._escritor = escritor
+        self._pendientes = {}
+        self._partes = {}
+        self._centinelas = {}
+        self._siguiente = 0
+        self._hueco = asyncio.Semaphore(maximo_en_vuelo)
+        self._tarea = asyncio.create_task(self._recibir())
+
+    @classmethod
+    async def abrir(cls, host, puerto, contrasena, timeout, maximo_en_vuelo=64):
+        lector, escritor = await asyncio.wait_for(asyncio.open_connection(host, puerto), timeout)
+        try:
+            escritor.write(_paquete_rcon(0, RCON_LOGIN, contrasena))
+            await asyncio.wait_for(escritor.drain(), timeout)
+            identificador, _, _ = await asyncio.wait_for(_leer_paquete_rcon(lector), timeout)
+            if identificador == -1:
+                raise ErrorRcon('contraseña incorrecta')
+        except BaseException:
+            escritor.close()
+            raise
+        return cls(lector, escritor, timeout, maximo_en_vuelo)
+
+    @property
+    def abierta(self):
+        return not self._tarea.done()
+
+    async def ejecutar(self, comando):
+        async with self._hueco:
+            if not self.abierta:
+                raise ErrorRcon('Se perdió la conexión RCON')
+            self._siguiente += 2
+            identificador = self._siguiente - 1
+            centinela = self._siguiente
+            futuro = asyncio.get_running_loop().create_future()
+            self._pendientes[identificador] = futuro
+            self._centinelas[centinela] = identificador
+            try:
+                self._escritor.write(_paquete_rcon(identificador, RCON_COMANDO, comando) + _paquete_rcon(centinela, RCON_RESPUESTA, ''))
+                await asyncio.wait_for(self._escritor.drain(), self.timeout)
+                return await asyncio.wait_for(futuro, self.timeout)
+            except asyncio.TimeoutError:
+                raise ErrorRcon(f'El servidor no respondió en {self.timeout} s') from None
+            except OSError as error:
+                raise ErrorRcon(f'Se perdió la conexión RCON: {error}') from error
+            finally:
+                self._pendientes.pop(identificador, None)
+                self._partes.pop(identificador, None)
+                self._centinelas.pop(centinela, None)
+
+    async def _recibir(self):
+        try:
+            while True:
+                identificador, _, cuerpo = await _leer_paquete_rcon(self._lector)
+                if identificador in self._centinelas:
+                    identificador = self._centinelas.pop(identificador)
+                    if identificador not in self._partes:
+                        continue
+                elif identificador not in self._pendientes:
+                    continue
+                else:
+                    self._partes.setdefault(identificador, []).append(cuerpo)
+                    if len(cuerpo) >= RCON_FRAGMENTO:
+                        continue
+                partes = self._partes.pop(identificador)
+                futuro = self._pendientes.get(identificador)
+                if futuro is not None and not futuro.done():
+                    futuro.set_result(b''.join(partes).decode('utf-8', 'replace'))
+        except (OSError, EOFError, ValueError, struct.error):
+            pass
+        finally:
+            self._escritor.close()
+            for futuro in self._pendientes.values():
+                if not futuro.done():
+                    futuro.set_exception(ErrorRcon('Se perdió la conexión RCON'))
+
+    def cerrar(self):
+        self._tarea.cancel()
+
+class PoolRcon:
+    def __init__(self, host, puerto, contrasena, conexiones, timeout, espera_maxima=30):
+        self.host = host
+        self.puerto = puerto
+        self.contrasena = contrasena
+        self.timeout = timeout
+        self.espera_maxima = espera_maxima
+        self.comandos = 0
+        self.errores = 0
+        self.reconexiones = 0
+        self._conexiones = [None] * conexiones
+        self._candados = [asyncio.Lock() for _ in range(conexiones)]
+        self._turno = 0
+        self._espera = 0.0
+        self._proximo_intento = 0.0
+
+    @property
+    def configurado(self):
+        return bool(self.contrasena)
+
+    async def _obtener_conexion(self):
+        indice = self._turno
+        self._turno = (indice + 1) % len(self._conexiones)
+        conexion = self._conexiones[indice]
+        if conexion is not None and conexion.abierta:
+            return conexion
+        async with self._candados[indice]:
+            conexion = self._conexiones[indice]
+            if conexion is not None and conexion.abierta:
+                return conexion
+            espera = self._proximo_intento - time.monotonic()
+            if espera > 0:
+                raise ErrorRcon(f'Servidor RCON no disponible; se reintentará en {math.ceil(espera)} s')
+            try:
+                nueva = await ConexionRcon.abrir(self.host, self.puerto, self.contrasena, self.timeout)
+            except (OSError, EOFError, ValueError, asyncio.TimeoutError, ErrorRcon) as error:
+                self._espera = min(self.espera_maxima, self._espera * 2 or 0.5)
+                self._proximo_intento = time.monotonic() + self._espera
+                raise ErrorRcon(f'No se pudo conectar por RCON: {error or type(error).__name__}') from error
+            if conexion is not None:
+                self.reconexiones += 1
+            self._espera = 0.0
+            self._conexiones[indice] = nueva
+            return nueva
+
+    async def ejecutar(self, comando):
+        if not self.configurado:
+            raise ErrorRcon('RCON no está configurado (falta RCON_CONTRASENA)')
+        self.comandos += 1
+        try:
+            conexion = await self._obtener_conexion()
+            return await conexion.ejecutar(comando)
+        except ErrorRcon:
+            self.errores += 1
+            raise
+
+    async def ejecutar_varios(self, comandos):
+        return await asyncio.gather(*(self.ejecutar(comando) for comando in comandos), return_exceptions=True)
+
+    def cerrar(self):
+        for conexion in self._conexiones:
+            if conexion is not None:
+                conexion.cerrar()
+        self._conexiones = [None] * len(self._conexiones)
+
+rcon = PoolRcon(RCON_HOST, RCON_PUERTO, RCON_CONTRASENA, RCON_CONEXIONES, RCON_TIMEOUT)
+
+class SeguidorLog:
+    def __init__(self, ruta, intervalo, bloque=65536, maximo_linea=16384):
+        self.ruta = ruta
+        self.intervalo = intervalo
+        self.bloque = bloque
+        self.maximo_linea = maximo_linea
+        self.rotaciones = 0
+
+    def _abrir(self, desde_inicio):
+        try:
+            archivo = open(self.ruta, 'rb')
+        except OSError:
+            return None
+        if not desde_inicio:
+            archivo.seek(0, os.SEEK_END)
+        return archivo
+
+    def _cambio(self, archivo):
+        try:
+            actual = os.stat(self.ruta)
+        except OSError:
+            return None
+        abierto = os.fstat(archivo.fileno())
+        if (actual.st_ino, actual.st_dev) != (abierto.st_ino, abierto.st_dev):
+            return 'rotado'
+        if actual.st_size < archivo.tell():
+            return 'truncado'
+        return None
+
+    async def lineas(self, desde_inicio=False):
+        loop = asyncio.get_running_loop()
+        archivo = None
+        resto = b''
+        try:
+            while True:
+                if archivo is None:
+                    archivo = await loop.run_in_executor(None, self._abrir, desde_inicio)
+                    desde_inicio = True
+                    if archivo is None:
+                        await asyncio.sleep(self.intervalo)
+                        continue
+                datos = await loop.run_in_executor(None, archivo.read, self.bloque)
+                if datos:
+                    lineas = (resto + datos).split(b'\n')
+                    resto = lineas.pop()
+                    if len(resto) > self.maximo_linea:
+                        resto = b''
+                    for linea in lineas:
+                        yield linea.rstrip(b'\r').decode('utf-8', 'replace')
+                    continue
+                cambio = await loop.run_in_executor(None, self._cambio, archivo)
+                if cambio is not None:
+                    self.rotaciones += 1
+                    resto = b''
+                    if cambio == 'rotado':
+                        archivo.close()
+                        archivo = None
+                    else:
+                        archivo.seek(0)
+                    continue
+                await asyncio.sleep(self.intervalo)
+        finally:
+            if archivo is not None:
+                archivo.close()
+
+LINEA_LOG = re.compile(r'\[[\d:]+\] \[(?:Server thread|Async Chat Thread - #\d+)/INFO\]: (?:\[Not Secure\] )?(.*)')
+CHAT_LOG = re.compile(r'<(\w{3,16})> (.*)')
+ENTRADA_LOG = re.compile(r'(\w{3,16}) joined the game')
+SALIDA_LOG = re.compile(r'(\w{3,16}) left the game')
+MUERTE_LOG = re.compile(
+    r'(\w{3,16}) (?:was |fell |drowned|died|blew up|burned to death|went up in flames|hit the ground|starved|suffocated'
+    r'|tried to swim in lava|walked into|experienced kinetic energy|froze to death|withered away|discovered the floor was lava'
+    r"|didn't want to live|went off with a bang)"
+)
+
+def interpretar_linea_log(linea):
+    coincidencia = LINEA_LOG.match(linea)
+    if coincidencia is None:
+        return None
+    texto = coincidencia.group(1)
+    chat = CHAT_LOG.fullmatch(texto)
+    if chat is not None:
+        return f'**{discord.utils.escape_markdown(chat.group(1))}**: {discord.utils.escape_markdown(chat.group(2))}'
+    entrada = ENTRADA_LOG.fullmatch(texto)
+    if entrada is not None:
+        return f'**{discord.utils.escape_markdown(entrada.group(1))}** entró al servidor'
+    salida = SALIDA_LOG.fullmatch(texto)
+    if salida is not None:
+        return f'**{discord.utils.escape_markdown(salida.group(1))}** salió del servidor'
+    if MUERTE_LOG.match(texto) is not None:
+        return f'*{discord.utils.escape_markdown(texto)}*'
+    return None
+
+class PuenteChat:
+    def __init__(self, seguidor, ventana, maximo_cola, maximo_mensaje=2000):
+        self.seguidor = seguidor
+        self.ventana = ventana
+        self.maximo_mensaje = maximo_mensaje
+        self.cola = asyncio.Queue(maximo_cola)
+        self.lineas = 0
+        self.mensajes = 0
+        self.descartadas = 0
+        self._tareas = []
+
+    def iniciar(self, enviar, desde_inicio=False):
+        self.enviar = enviar
+        self._tareas = [
+            asyncio.create_task(self._leer(desde_inicio)),
+            asyncio.create_task(self._entregar()),
+        ]
+
+    def detener(self):
+        for tarea in self._tareas:
+            tarea.cancel()
+
+    async def _leer(self, desde_inicio):
+        async for linea in self.seguidor.lineas(desde_inicio):
+            texto = interpretar_linea_log(linea)
+            if texto is not None:
+                await self.cola.put(texto[:self.maximo_mensaje])
+
+    async def _siguiente(self, limite):
+        if not self.cola.empty():
+            return self.cola.get_nowait()
+        restante = limite - asyncio.get_running_loop().time()
+        if restante <= 0:
+            return None
+        try:
+            return await asyncio.wait_for(self.cola.get(), restante)
+        except asyncio.TimeoutError:
+            return None
+
+    async def _entregar(self):
+        sobrante = None
+        while True:
+            lote = [sobrante if sobrante is not None else await self.cola.get()]
+            sobrante = None
+            longitud = len(lote[0])
+            limite = asyncio.get_running_loop().time() + self.ventana
+            while True:
+                texto = await self._siguiente(limite)
+                if texto is None:
+                    break
+                if longitud + 1 + len(texto) > self.maximo_mensaje:
+                    sobrante = texto
+                    break
+                lote.append(texto)
+                longitud += 1 + len(texto)
+            try:
+                await self.enviar('\n'.join(lote))
+            except (discord.HTTPException, aiohttp.ClientError) as error:
+                self.descartadas += len(lote)
+                bitacora.warning(f'No se pudo enviar el chat de Minecraft a Discord: {error}')
+                continue
+            self.lineas += len(lote)
+            self.mensajes += 1
+
+puente_chat = PuenteChat(SeguidorLog(ARCHIVO_LOG_MINECRAFT, INTERVALO_LOG), VENTANA_CHAT, MAXIMO_COLA_CHAT)
+
+ESTADISTICAS = {
+    'tiempo': ('Tiempo jugado', (('minecraft:custom', 'minecraft:play_time'), ('minecraft:custom', 'minecraft:play_one_minute')), 72000, 'h'),
+    'muertes': ('Muertes', (('minecraft:custom', 'minecraft:deaths'),), 1, ''),
+    'asesinatos': ('Jugadores asesinados', (('minecraft:custom', 'minecraft:player_kills'),), 1, ''),
+    'bichos': ('Criaturas asesinadas', (('minecraft:custom', 'minecraft:mob_kills'),), 1, ''),
+    'saltos': ('Saltos', (('minecraft:custom', 'minecraft:jump'),), 1, ''),
+    'distancia': ('Distancia recorrida', (('minecraft:custom', 'minecraft:walk_one_cm'), ('minecraft:custom', 'minecraft:sprint_one_cm')), 100000, 'km'),
+    'diamantes': ('Diamantes minados', (('minecraft:mined', 'minecraft:diamond_ore'), ('minecraft:mined', 'minecraft:deepslate_diamond_ore')), 1, ''),
+}
+
+def formatear_estadistica(estadistica, valor):
+    _, _, divisor, unidad = ESTADISTICAS[estadistica]
+    if divisor == 1:
+        return f'{valor:,}'.replace(',', '.')
+    return f'{valor / divisor:,.1f} {unidad}'.replace(',', ' ').replace('.', ',')
+
+class IndiceEstadisticas:
+    def __init__(self, directorio, usercache, estadisticas=ESTADISTICAS):
+        self.directorio = directorio
+        self.usercache = usercache
+        self.estadisticas = estadisticas
+        self.uuids = []
+        self.posiciones = {}
+        self.modificados = {}
+        self.valores = {estadistica: array.array('q') for estadistica in estadisticas}
+        self.nombres = {}
+        self.por_nombre = {}
+        self.lecturas = 0
+        self.duracion = 0.0
+        self.actualizado = None
+        self._usercache_modificado = None
+        self._bloqueo = asyncio.Lock()
+
+    def _extraer(self, datos):
+        return tuple(
+            sum(int(datos.get(categoria, {}).get(clave, 0)) for categoria, clave in claves)
+            for _, claves, _, _ in self.estadisticas.values()
+        )
+
+    def _leer_usercache(self):
+        try:
+            modificado = os.stat(self.usercache).st_mtime_ns
+            if modificado == self._usercache_modificado:
+                return None
+            with open(self.usercache, 'rb') as archivo:
+                entradas = json.load(archivo)
+            self._usercache_modificado = modificado
+            return {entrada['uuid']: entrada['name'] for entrada in entradas}
+        except (OSError, ValueError, TypeError, KeyError):
+            return None
+
+    def _leer_cambios(self):
+        cambios = []
+        presentes = set()
+        try:
+            entradas = os.scandir(self.directorio)
+        except OSError:
+            return cambios, None, self._leer_usercache()
+        with entradas:
+            for entrada in entradas:
+                if not entrada.name.endswith('.json'):
+                    continue
+                uuid = entrada.name[:-5]
+                presentes.add(uuid)
+                try:
+                    estado = entrada.stat()
+                except OSError:
+                    continue
+                modificado = (estado.st_mtime_ns, estado.st_size)
+                if self.modificados.get(uuid) == modificado:
+                    continue
+                try:
+                    with open(entrada.path, 'rb') as archivo:
+                        valores = self._extraer(json.load(archivo)['stats'])
+                except (OSError, ValueError, TypeError, KeyError, AttributeError):
+                    continue
+                cambios.append((uuid, modificado, valores))
+        return cambios, presentes, self._leer_usercache()
+
+    async def _aplicar(self, cambios, presentes, usercache):
+        columnas = list(self.valores.values())
+        for numero, (uuid, modificado, valores) in enumerate(cambios, 1):
+            posicion = self.posiciones.get(uuid)
+            if posicion is None:
+                self.posiciones[uuid] = len(self.uuids)
+                self.uuids.append(uuid)
+                for columna, valor in zip(columnas, valores):
+                    columna.append(valor)
+            else:
+                for columna, valor in zip(columnas, valores):
+                    columna[posicion] = valor
+            self.modificados[uuid] = modificado
+            if numero % 5000 == 0:
+                await asyncio.sleep(0)
+        if presentes is not None:
+            for uuid in self.modificados.keys() - presentes:
+                del self.modificados[uuid]
+                for columna in columnas:
+                    columna[self.posiciones[uuid]] = 0
+        if usercache is not None:
+            self.nombres.update(usercache)
+            self.por_nombre.update((nombre.lower(), uuid) for uuid, nombre in usercache.items())
+        self.lecturas += len(cambios)
+
+    async def _actualizar(self):
+        inicio = time.perf_counter()
+        cambios, presentes, usercache = await asyncio.get_running_loop().run_in_executor(None, self._leer_cambios)
+        await self._aplicar(cambios, presentes, usercache)
+        self.duracion = time.perf_counter() - inicio
+        self.actualizado = time.time()
+        return len(cambios)
+
+    async def actualizar(self):
+        async with self._bloqueo:
+            return await self._actualizar()
+
+    async def asegurar(self):
+        if self.actualizado is None:
+            async with self._bloqueo:
+                if self.actualizado is None:
+                    await self._actualizar()
+
+    def nombre(self, uuid):
+        return self.nombres.get(uuid) or uuid[:8]
+
+    def top(self, estadistica, cantidad):
+        valores = self.valores[estadistica]
+        mejores = heapq.nlargest(cantidad, range(len(valores)), key=valores.__getitem__)
+        return [(self.nombre(self.uuids[posicion]), valores[posicion]) for posicion in mejores if valores[posicion] > 0]
+
+    def jugador(self, nombre):
+        uuid = self.por_nombre.get(nombre.lower(), nombre)
+        if uuid not in self.modificados:
+            return None
+        posicion = self.posiciones[uuid]
+        resultado = {}
+        for estadistica, valores in self.valores.items():
+            valor = valores[posicion]
+            resultado[estadistica] = (valor, 1 + sum(map(valor.__lt__, valores)))
+        return self.nombre(uuid), resultado
+
+indice_estadisticas = IndiceEstadisticas(DIRECTORIO_ESTADISTICAS, ARCHIVO_USERCACHE)
+
+@tasks.loop(seconds=INTERVALO_ESTADISTICAS)
+async def actualizar_estadisticas():
+    await indice_estadisticas.actualizar()
+
+class Sancion:
+    __slots__ = ('id', 'fecha', 'jugador', 'categoria', 'numero', 'motivo', 'staff')
+
+    def __init__(self, id, fecha, jugador, categoria, numero, motivo, staff):
+        self.id = id
+        self.fecha = fecha
+        self.jugador = jugador
+        self.categoria = categoria
+        self.numero = numero
+        self.motivo = motivo
+        self.staff = staff
+
+    def a_json(self):
+        return json.dumps({
+            'id': self.id, 'fecha': self.fecha, 'jugador': self.jugador, 'categoria': self.categoria,
+            'numero': self.numero, 'motivo': self.motivo, 'staff': self.staff,
+        }, ensure_ascii=False)
+
+class RegistroSanciones:
+    def __init__(self, archivo):
+        self.archivo = archivo
+        self.sanciones = {}
+        self.por_jugador = {}
+        self.por_norma = collections.Counter()
+        self.siguiente = 1
+        self.lineas_muertas = 0
+        self.compactaciones = 0
+        self._archivo = None
+        self._hilo = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='sanciones')
+
+    async def _en_hilo(self, funcion, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._hilo, funcion, *args)
+
+    def _leer(self):
+        registros = []
+        try:
+            with open(self.archivo, encoding='utf-8') as archivo:
+                for linea in archivo:
+                    try:
+                        registros.append(json.loads(linea))
+                    except ValueError:
+                        bitacora.warning(f'Línea dañada en {self.archivo}; se ignora.')
+        except FileNotFoundError:
+            pass
+        return registros
+
+    def _anexar(self, linea):
+        if self._archivo is None:
+            self._archivo = open(self.archivo, 'a', encoding='utf-8')
+        self._archivo.write(linea + '\n')
+        self._archivo.flush()
+
+    def _reescribir(self, lista):
+        temporal = self.archivo + '.tmp'
+        with open(temporal, 'w', encoding='utf-8') as archivo:
+            archivo.writelines(sancion.a_json() + '\n' for sancion in lista)
+            archivo.flush()
+            os.fsync(archivo.fileno())
+        if self._archivo is not None:
+            self._archivo.close()
+            self._archivo = None
+        os.replace(temporal, self.archivo)
+
+    def _indexar(self, sancion):
+        self.sanciones[sancion.id] = sancion
+        self.por_jugador.setdefault(sancion.jugador.lower(), []).append(sancion.id)
+        self.por_norma[sancion.categoria, sancion.numero] += 1
+        self.siguiente = max(self.siguiente, sancion.id + 1)
+
+    def _desindexar(self, sancion):
+        del self.sanciones[sancion.id]
+        ids = self.por_jugador[sancion.jugador.lower()]
+        ids.remove(sancion.id)
+        if not ids:
+            del self.por_jugador[sancion.jugador.lower()]
+        self.por_norma[sancion.categoria, sancion.numero] -= 1
+        if not self.por_norma[sancion.categoria, sancion.numero]:
+            del self.por_norma[sancion.categoria, sancion.numero]
+
+    def _cargar(self):
+        for registro in self._leer():
+            if 'anular' in registro:
+                sancion = self.sanciones.get(registro['anular'])
+                if sancion is not None:
+                    self._desindexar(sancion)
+                self.lineas_muertas += 2
+                continue
+            self._indexar(Sancion(
+                registro['id'], registro['fecha'], registro['jugador'], registro['categoria'],
+                registro['numero'], registro.get('motivo', ''), registro.get('staff'),
+            ))
+
+    async def cargar(self):
+        await self._en_hilo(self._cargar)
+
+    async def registrar(self, jugador, categoria, numero, motivo, staff):
+        sancion = Sancion(self.siguiente, int(time.time()), jugador, categoria, numero, motivo, staff)
+        self._indexar(sancion)
+        try:
+            await self._en_hilo(self._anexar, sancion.a_json())
+        except OSError:
+            self._desindexar(sancion)
+            raise
+        return sancion
+
+    async def anular(self, identificador, staff):
+        sancion = self.sanciones.get(identificador)
+        if sancion is None:
+            return None
+        self._desindexar(sancion)
+        try:
+            await self._en_hilo(self._anexar, json.dumps({'anular': identificador, 'fecha': int(time.time()), 'staff': staff}))
+        except OSError:
+            self._indexar(sancion)
+            raise
+        self.lineas_muertas += 2
+        return sancion
+
+    def historial(self, jugador):
+        return [self.sanciones[identificador] for identificador in reversed(self.por_jugador.get(jugador.lower(), ()))]
+
+    def mas_incumplidas(self, cantidad):
+        return self.por_norma.most_common(cantidad)
+
+    async def compactar(self):
+        muertas = self.lineas_muertas
+        await self._en_hilo(self._reescribir, list(self.sanciones.values()))
+        self.lineas_muertas -= muertas
+        self.compactaciones += 1
+
+sanciones = RegistroSanciones(ARCHIVO_SANCIONES)
+
+@tasks.loop(hours=HORAS_COMPACTACION_SANCIONES)
+async def compactar_sanciones():
+    if sanciones.lineas_muertas:
+        try:
+            await sanciones.compactar()
+        except OSError as error:
+            bitacora.error(f'No se pudo compactar {sanciones.archivo}: {error}')
+
+class Cron:
+    LIMITES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+    def __init__(self, expresion):
+        partes = expresion.split()
+        if len(partes) != 5:
+            raise ValueError('Una expresión cron tiene 5 campos: minuto hora día mes día_de_la_semana.')
+        self.expresion = ' '.join(partes)
+        self.minutos, self.horas, self.dias, self.meses, self.dias_semana = (
+            self._campo(parte, minimo, maximo) for parte, (minimo, maximo) in zip(partes, self.LIMITES)
+        )
+        if 7 in self.dias_semana:
+            self.dias_semana = self.dias_semana - {7} | {0}
+        self.cualquier_dia = partes[2] == '*'
+        self.cualquier_dia_semana = partes[4] == '*'
+
+    @staticmethod
+    def _campo(texto, minimo, maximo):
+        valores = set()
+        for trozo in texto.split(','):
+            rango, barra, paso = trozo.partition('/')
+            try:
+                paso = int(paso) if barra else 1
+                if rango == '*':
+                    inicio, fin = minimo, maximo
+                elif '-' in rango:
+                    inicio, fin = map(int, rango.split('-', 1))
+                else:
+                    inicio = int(rango)
+                    fin = maximo if barra else inicio
+            except ValueError:
+                raise ValueError(f'Campo cron no válido: `{texto}`.') from None
+            if not minimo <= inicio <= fin <= maximo or paso < 1:
+                raise ValueError(f'Campo cron fuera de rango: `{texto}` (de {minimo} a {maximo}).')
+            valores.update(range(inicio, fin + 1, paso))
+        return frozenset(valores)
+
+    def _dia_valido(self, fecha):
+        dia = fecha.day in self.dias
+        dia_semana = (fecha.weekday() + 1) % 7 in self.dias_semana
+        if self.cualquier_dia_semana:
+            return dia
+        if self.cualquier_dia:
+            return dia_semana
+        return dia or dia_semana
+
+    def siguiente(self, desde):
+        fecha = datetime.datetime.fromtimestamp(desde).replace(second=0, microsecond=0) + datetime.timedelta(minutes=1)
+        limite = fecha.year + 8
+        while fecha.year <= limite:
+            if fecha.month not in self.meses:
+                fecha = (fecha.replace(day=1, hour=0, minute=0) + datetime.timedelta(days=32)).replace(day=1)
+            elif not self._dia_valido(fecha):
+                fecha = fecha.replace(hour=0, minute=0) + datetime.timedelta(days=1)
+            elif fecha.hour not in self.horas:
+                fecha = fecha.replace(minute=0) + datetime.timedelta(hours=1)
+            elif fecha.minute not in self.minutos:
+                fecha += datetime.timedelta(minutes=1)
+            else:
+                return fecha.timestamp()
+        raise ValueError(f'La expresión cron `{self.expresion}` no se cumple nunca.')
+
+DURACION_ANUNCIO = re.compile(r'(?:(\d+)d)?(?:(\d+)h)?(?:(\d+)m)?')
+
+def interpretar_cuando(texto, ahora):
+    if len(texto.split()) == 5:
+        cron = Cron(texto)
+        return cron.siguiente(ahora), cron
+    duracion = DURACION_ANUNCIO.fullmatch(texto.lower())
+    if duracion is not None and any(duracion.groups()):
+        dias, horas, minutos = (int(valor or 0) for valor in duracion.groups())
+        return ahora + dias * 86400 + horas * 3600 + minutos * 60, None
+    try:
+        fecha = datetime.datetime.strptime(texto.replace('T', ' '), '%Y-%m-%d %H:%M').timestamp()
+    except ValueError:
+        raise ValueError('No entiendo cuándo enviar el anuncio.') from None
+    if fecha <= ahora:
+        raise ValueError('Esa fecha ya pasó.')
+    return fecha, None
+
+class Anuncio:
+    __slots__ = ('id', 'servidor', 'canal', 'mensaje', 'siguiente', 'cron', 'politica', 'autor')
+
+    def __init__(self, id, servidor, canal, mensaje, siguiente, cron, politica, autor):
+        self.id = id
+        self.servidor = servidor
+        self.canal = canal
+        self.mensaje = mensaje
+        self.siguiente = siguiente
+        self.cron = cron
+        self.politica = politica
+        self.autor = autor
+
+async def esperar_evento(evento, segundos):
+    try:
+        await asyncio.wait_for(evento.wait(), segundos)
+    except asyncio.TimeoutError:
+        pass
+
+class ProgramadorAnuncios:
+    def __init__(self, archivo, tolerancia, reloj=time.time, esperar=esperar_evento):
+        self.archivo = archivo
+        self.tolerancia = tolerancia
+        self.reloj = reloj
+        self.esperar = esperar
+        self.anuncios = {}
+        self.enviados = 0
+        self.saltados = 0
+        self.errores = 0
+        self.tarea = None
+        self._monticulo = []
+        self._cambio = asyncio.Event()
+        self._envios = set()
+        self._conexion = None
+        self._hilo = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='anuncios')
+
+    def _abrir(self):
+        if self._conexion is None:
+            self._conexion = sqlite3.connect(self.archivo, check_same_thread=False)
+            self._conexion.execute('PRAGMA journal_mode=WAL')
+            self._conexion.execute(
+                'CREATE TABLE IF NOT EXISTS anuncios (id INTEGER PRIMARY KEY AUTOINCREMENT, servidor INTEGER, '
+                'canal INTEGER, mensaje TEXT, siguiente REAL, cron TEXT, politica TEXT, autor INTEGER)'
+            )
+        return self._conexion
+
+    def _leer(self):
+        return self._abrir().execute(
+            'SELECT id, servidor, canal, mensaje, siguiente, cron, politica, autor FROM anuncios'
+        ).fetchall()
+
+    def _insertar(self, *valores):
+        conexion = self._abrir()
+        with conexion:
+            return conexion.execute(
+                'INSERT INTO anuncios (servidor, canal, mensaje, siguiente, cron, politica, autor) VALUES (?, ?, ?, ?, ?, ?, ?)', valores
+            ).lastrowid
+
+    def _guardar_siguiente(self, identificador, siguiente):
+        conexion = self._abrir()
+        with conexion:
+            conexion.execute('UPDATE anuncios SET siguiente = ? WHERE id = ?', (siguiente, identificador))
+
+    def _borrar(self, identificador):
+        conexion = self._abrir()
+        with conexion:
+            conexion.execute('DELETE FROM anuncios WHERE id = ?', (identificador,))
+
+    async def _en_hilo(self, funcion, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._hilo, funcion, *args)
+
+    async def cargar(self, filtro=None):
+        for identificador, servidor, canal, mensaje, siguiente, cron, politica, autor in await self._en_hilo(self._leer):
+            if filtro is None or filtro(servidor):
+                self.anuncios[identificador] = Anuncio(
+                    identificador, servidor, canal, mensaje, siguiente, Cron(cron) if cron else None, politica, autor
+                )
+        self._monticulo = [(anuncio.siguiente, anuncio.id) for anuncio in self.anuncios.values()]
+        heapq.heapify(self._monticulo)
+        self.despertar()
+
+    def iniciar(self, enviar):
+        self.enviar = enviar
+        self.tarea = asyncio.create_task(self._bucle())
+
+    def detener(self):
+        if self.tarea is not None:
+            self.tarea.cancel()
+            self.tarea = None
+
+    def despertar(self):
+        self._cambio.set()
+
+    def _programar(self, anuncio):
+        heapq.heappush(self._monticulo, (anuncio.siguiente, anuncio.id))
+        if self._monticulo[0][1] == anuncio.id:
+            self.despertar()
+
+    async def agregar(self, servidor, canal, mensaje, siguiente, cron, politica, autor):
+        identificador = await self._en_hilo(
+            self._insertar, servidor, canal, mensaje, siguiente, cron.expresion if cron is not None else None, politica, autor
+        )
+        anuncio = self.anuncios[identificador] = Anuncio(identificador, servidor, canal, mensaje, siguiente, cron, politica, autor)
+        self._programar(anuncio)
+        return anuncio
+
+    async def cancelar(self, identificador):
+        anuncio = self.anuncios.pop(identificador, None)
+        if anuncio is not None:
+            await self._en_hilo(self._borrar, identificador)
+        return anuncio
+
+    def de_servidor(self, servidor, cantidad):
+        return heapq.nsmallest(
+            cantidad, (anuncio for anuncio in self.anuncios.values() if anuncio.servidor == servidor), key=lambda anuncio: anuncio.siguiente
+        )
+
+    async def _bucle(self):
+        while True:
+            self._cambio.clear()
+            if not self._monticulo:
+                await self.esperar(self._cambio, None)
+                continue
+            siguiente, identificador = self._monticulo[0]
+            anuncio = self.anuncios.get(identificador)
+            if anuncio is None or anuncio.siguiente != siguiente:
+                heapq.heappop(self._monticulo)
+                continue
+            espera = siguiente - self.reloj()
+            if espera > 0:
+                await self.esperar(self._cambio, espera)
+                continue
+            heapq.heappop(self._monticulo)
+            await self._vencido(anuncio)
+
+    async def _vencido(self, anuncio):
+        ahora = self.reloj()
+        enviar = ahora - anuncio.siguiente <= self.tolerancia or anuncio.politica == 'recuperar'
+        if anuncio.cron is None:
+            del self.anuncios[anuncio.id]
+            guardado = self._en_hilo(self._borrar, anuncio.id)
+        else:
+            anuncio.siguiente = anuncio.cron.siguiente(max(anuncio.siguiente, ahora))
+            self._programar(anuncio)
+            guardado = self._en_hilo(self._guardar_siguiente, anuncio.id, anuncio.siguiente)
+        if enviar:
+            tarea = asyncio.create_task(self._enviar(anuncio))
+            self._envios.add(tarea)
+            tarea.add_done_callback(self._envios.discard)
+        else:
+            self.saltados += 1
+        try:
+            await guardado
+        except sqlite3.Error as error:
+            bitacora.error(f'No se pudo guardar el anuncio #{anuncio.id}: {error}')
+
+    async def _enviar(self, anuncio):
+        try:
+            await self.enviar(anuncio)
+        except (discord.HTTPException, aiohttp.ClientError) as error:
+            self.errores += 1
+            bitacora.error(f'No se pudo enviar el anuncio #{anuncio.id}: {error}')
+            return
+        self.enviados += 1
+
+anuncios = ProgramadorAnuncios(ARCHIVO_ANUNCIOS, TOLERANCIA_ANUNCIOS)
+
+async def enviar_anuncio(anuncio):
+    canal = bot.get_channel(anuncio.canal) or await bot.fetch_channel(anuncio.canal)
+    await canal.send(anuncio.mensaje)
+
+PALABRAS_VACIAS = {
+    'a', 'al', 'con', 'de', 'del', 'el', 'en', 'es', 'esta', 'la', 'las', 'lo', 'los', 'o',
+    'para', 'por', 'que', 'se', 'si', 'su', 'sus', 'un', 'una', 'y',
+}
+
+def tokenizar(texto):
+    texto = unicodedata.normalize('NFD', texto.lower())
+    texto = ''.join(c for c in texto if unicodedata.category(c) != 'Mn')
+    tokens = []
+    for palabra in re.findall(r'\w+', texto):
+        if palabra in PALABRAS_VACIAS:
+            continue
+        if len(palabra) > 3 and palabra.endswith('s'):
+            palabra = palabra[:-1]
+        if len(palabra) > 4 and palabra.endswith('e') and palabra[-2] not in 'aeiou':
+            palabra = palabra[:-1]
+        tokens.append(palabra)
+    return tokens
+
+class IndiceNormas:
+    def __init__(self):
+        self._indice = {}
+        self._entradas = []
+
+    def construir(self, normas, comandos):
+        entradas = []
+        for titulo, reglas in normas.values():
+            for numero, regla in enumerate(reglas, 1):
+                entradas.append((titulo, numero, regla))
+        for numero, linea in enumerate(comandos, 1):
+            entradas.append(('Comandos del servidor', numero, linea))
+        indice = {}
+        for posicion, (_, _, texto) in enumerate(entradas):
+            for token in tokenizar(texto):
+                frecuencias = indice.setdefault(token, {})
+                frecuencias[posicion] = frecuencias.get(posicion, 0) + 1
+        self._indice, self._entradas = indice, entradas
+
+    def buscar(self, consulta, limite=10):
+        puntuaciones = {}
+        for termino in set(tokenizar(consulta)):
+            for posicion, frecuencia in self._indice.get(termino, {}).items():
+                coincidencias, total = puntuaciones.get(posicion, (0, 0))
+                puntuaciones[posicion] = (coincidencias + 1, total + frecuencia)
+        mejores = heapq.nlargest(limite, puntuaciones, key=lambda posicion: (puntuaciones[posicion], -posicion))
+        return [self._entradas[posicion] for posicion in mejores]
+
+CAMPOS_CONFIGURACION = ('prefijo', 'ip', 'tienda', 'normas')
+
+proveedores_respuestas = {}
+
+class ConfiguracionServidor:
+    __slots__ = ('prefijo', 'ip', 'tienda', 'personalizadas', 'normas', 'respuestas', 'indice')
+
+    def __init__(self, prefijo=None, ip=None, tienda=None, normas=None):
+        self.prefijo = prefijo or PREFIJO
+        self.ip = ip or SERVIDOR_MINECRAFT
+        self.tienda = tienda or URL_TIENDA
+        self.personalizadas = normas or {}
+        self.normas = {**NORMAS, **self.personalizadas}
+        self.respuestas = None
+        self.indice = None
+
+    @property
+    def estado(self):
+        return estado_de(self.ip)
+
+    def obtener_respuestas(self):
+        if self.respuestas is None:
+            respuestas = CacheRespuestas()
+            for registrar in list(proveedores_respuestas.values()):
+                registrar(self, respuestas)
+            self.respuestas = respuestas
+        return self.respuestas
+
+    def obtener_indice(self):
+        if self.indice is None:
+            self.indice = IndiceNormas()
+            self.indice.construir(self.normas, COMANDOS_SERVIDOR)
+        return self.indice
+
+    def recalcular_normas(self):
+        self.normas = {**NORMAS, **self.personalizadas}
+        self.indice = None
+        if self.respuestas is not None:
+            for categoria in NORMAS:
+                self.respuestas.invalidar(categoria)
+
+class AlmacenConfiguracion:
+    def __init__(self, archivo, capacidad):
+        self.archivo = archivo
+        self.capacidad = capacidad
+        self.por_defecto = ConfiguracionServidor()
+        self.aciertos = 0
+        self.fallos = 0
+        self._cache = collections.OrderedDict()
+        self._cargas = {}
+        self._conexion = None
+        self._hilo = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='configuracion')
+
+    def _abrir(self):
+        if self._conexion is None:
+            self._conexion = sqlite3.connect(self.archivo, check_same_thread=False)
+            self._conexion.execute('PRAGMA journal_mode=WAL')
+            self._conexion.execute(
+                'CREATE TABLE IF NOT EXISTS configuracion '
+                '(servidor INTEGER PRIMARY KEY, prefijo TEXT, ip TEXT, tienda TEXT, normas TEXT)'
+            )
+        return self._conexion
+
+    def _leer(self, servidor_id):
+        return self._abrir().execute(
+            'SELECT prefijo, ip, tienda, normas FROM configuracion WHERE servidor = ?', (servidor_id,)
+        ).fetchone()
+
+    def _escribir(self, servidor_id, campo, valor):
+        conexion = self._abrir()
+        with conexion:
+            conexion.execute('INSERT OR IGNORE INTO configuracion (servidor) VALUES (?)', (servidor_id,))
+            conexion.execute(f'UPDATE configuracion SET {campo} = ? WHERE servidor = ?', (valor, servidor_id))
+
+    def _borrar(self, servidor_id):
+        conexion = self._abrir()
+        with conexion:
+            conexion.execute('DELETE FROM configuracion WHERE servidor = ?', (servidor_id,))
+
+    async def _en_hilo(self, funcion, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._hilo, funcion, *args)
+
+    def en_cache(self, servidor_id):
+        configuracion = self._cache.get(servidor_id)
+        if configuracion is not None:
+            self._cache.move_to_end(servidor_id)
+            self.aciertos += 1
+        return configuracion
+
+    async def obtener(self, servidor_id):
+        if servidor_id is None:
+            return self.por_defecto
+        configuracion = self.en_cache(servidor_id)
+        if configuracion is not None:
+            return configuracion
+        carga = self._cargas.get(servidor_id)
+        if carga is None:
+            self.fallos += 1
+            carga = self._cargas[servidor_id] = asyncio.ensure_future(self._cargar(servidor_id))
+        return await asyncio.shield(carga)
+
+    async def _cargar(self, servidor_id):
+        tarea = asyncio.current_task()
+        try:
+            try:
+                fila = await self._en_hilo(self._leer, servidor_id)
+            except sqlite3.Error as error:
+                bitacora.error(f'No se pudo leer la configuración del servidor {servidor_id}: {error}')
+                return self.por_defecto
+            if fila is None:
+                configuracion = self.por_defecto
+            else:
+                prefijo, ip, tienda, normas = fila
+                configuracion = ConfiguracionServidor(prefijo, ip, tienda, json.loads(normas) if normas else None)
+            if self._cargas.get(servidor_id) is tarea:
+                self._cache[servidor_id] = configuracion
+                if len(self._cache) > self.capacidad:
+                    self._cache.popitem(last=False)
+            return configuracion
+        finally:
+            if self._cargas.get(servidor_id) is tarea:
+                del self._cargas[servidor_id]
+
+    async def actualizar(self, servidor_id, campo, valor):
+        if campo not in CAMPOS_CONFIGURACION:
+            raise ValueError(f'Campo de configuración desconocido: {campo}')
+        await self._en_hilo(self._escribir, servidor_id, campo, valor)
+        self.invalidar(servidor_id)
+
+    async def restablecer(self, servidor_id):
+        await self._en_hilo(self._borrar, servidor_id)
+        self.invalidar(servidor_id)
+
+    def invalidar(self, servidor_id):
+        self._cache.pop(servidor_id, None)
+        self._cargas.pop(servidor_id, None)
+
+    def invalidar_ip(self, ip):
+        for configuracion in (self.por_defecto, *self._cache.values()):
+            if configuracion.ip == ip and configuracion.respuestas is not None:
+                configuracion.respuestas.invalidar('ip')
+
+    def recalcular_normas(self):
+        for configuracion in (self.por_defecto, *self._cache.values()):
+            configuracion.recalcular_normas()
+        self.por_defecto.obtener_respuestas().reconstruir()
+        self.por_defecto.obtener_indice()
+
+    def registrar_respuestas(self, nombre, registrar):
+        if registrar is None:
+            proveedores_respuestas.pop(nombre, None)
+        else:
+            proveedores_respuestas[nombre] = registrar
+        for configuracion in (self.por_defecto, *self._cache.values()):
+            configuracion.respuestas = None
+        self.por_defecto.obtener_respuestas().reconstruir()
+
+try:
+    NORMAS.update(leer_normas(ARCHIVO_NORMAS))
+except (OSError, ValueError) as error:
+    bitacora.warning(f'No se pudieron leer las normas de {ARCHIVO_NORMAS}: {error}')
+
+configuraciones = AlmacenConfiguracion(ARCHIVO_CONFIGURACION, CAPACIDAD_CACHE_CONFIGURACION)
+
+def aplicar_normas(normas):
+    NORMAS.clear()
+    NORMAS.update(normas)
+    configuraciones.recalcular_normas()
+
+async def configuracion_de(ctx):
+    return await configuraciones.obtener(ctx.guild.id if ctx.guild is not None else None)
+
+def validar_configuracion(campo, valor):
+    if not valor or any(caracter.isspace() for caracter in valor):
+        return f'El valor de {campo} no puede estar vacío ni contener espacios.'
+    if campo == 'prefijo' and len(valor) > 5:
+        return 'El prefijo puede tener como máximo 5 caracteres.'
+    if campo == 'ip':
+        _, separador, puerto = valor.partition(':')
+        if separador and not (puerto.isdigit() and 0 < int(puerto) < 65536):
+            return 'El puerto debe ser un número entre 1 y 65535.'
+    return None
+
+def es_staff():
+    return commands.check_any(commands.has_role(ROL_STAFF), commands.has_permissions(administrator=True))
+
+class Staff(commands.Cog):
+    @registrar_comando(name='vigilante', description='Activa, desactiva o muestra el informe del vigilante del bucle de eventos.')
+    @es_staff()
+    async def vigilante(self, ctx, accion='informe'):
+        if accion == 'on':
+            vigilante_bucle.iniciar()
+            await ctx.send(f'Vigilante del bucle activado (umbral: {vigilante_bucle.umbral * 1000:.0f} ms).')
+        elif accion == 'off':
+            vigilante_bucle.detener()
+            await ctx.send('Vigilante del bucle desactivado.')
+        else:
+            embed = discord.Embed(
+                title='Vigilante del bucle de eventos',
+                description=f"Estado: {'activo' if vigilante_bucle.activo else 'inactivo'}\n"
+                            f'Retraso actual: {vigilante_bucle.retraso * 1000:.1f} ms\n'
+                            f'Retraso máximo: {vigilante_bucle.retraso_maximo * 1000:.1f} ms',
+                color=discord.Color.purple()
+            )
+            for nombre, (veces, maximo, total) in vigilante_bucle.peores():
+                embed.add_field(name=nombre, value=f'{veces} bloqueos, máx. {maximo * 1000:.0f} ms, total {total * 1000:.0f} ms', inline=False)
+            embed.set_footer(text=f'Uso: {ctx.prefix}vigilante on | off | informe')
+            await ctx.send(embed=embed)
+
+    @registrar_comando(name='recargar', description='Recarga las extensiones de comandos y las normas sin reiniciar el bot.')
+    @es_staff()
+    async def recargar(self, ctx):
+        aplicada, errores = await extensiones.recargar(bot)
+        if not aplicada:
+            titulo, descripcion = 'Recarga cancelada', 'No se cambió nada: se siguen usando las versiones anteriores.'
+        elif errores:
+            titulo, descripcion = 'Recarga con errores', 'Los cambios se aplicaron, pero no se pudieron sincronizar los comandos con Discord.'
+        else:
+            titulo, descripcion = 'Recarga completada', 'Comandos y normas actualizados.'
+        embed = discord.Embed(
+            title=titulo,
+            description=f'{descripcion}\nDuración: {extensiones.duracion * 1000:.1f} ms',
+            color=discord.Color.purple()
+        )
+        embed.add_field(name='Extensiones', value=', '.join(extensiones.cargadas(bot)) or 'ninguna', inline=False)
+        for nombre, error in list(errores.items())[:10]:
+            embed.add_field(name=nombre, value=f'{type(error).__name__}: {error}'[:1024], inline=False)
+        embed.set_footer(text=f"Normas: {ARCHIVO_NORMAS if os.path.exists(ARCHIVO_NORMAS) else 'las del código'}")
+        await ctx.send(embed=embed)
+
+    @registrar_comando(name='config', description='Muestra o cambia la configuración del bot en este servidor.')
+    @commands.guild_only()
+    @es_staff()
+    async def config(self, ctx, campo='', *, valor=''):
+        configuracion = await configuracion_de(ctx)
+        if campo in ('prefijo', 'ip', 'tienda'):
+            error = validar_configuracion(campo, valor)
+            if error is not None:
+                await ctx.send(error)
+                return
+            await configuraciones.actualizar(ctx.guild.id, campo, valor)
+            await ctx.send(f'Configuración actualizada: {campo} = `{valor}`')
+        elif campo == 'normas':
+            partes = valor.split(None, 1)
+            categoria = partes[0] if partes else ''
+            if categoria not in NORMAS:
+                await ctx.send(f"Categoría desconocida. Usa una de: {', '.join(NORMAS)}")
+                return
+            personalizadas = dict(configuracion.personalizadas)
+            reglas = [regla.strip() for regla in re.split(r'\n|\|', partes[1] if len(partes) > 1 else '') if regla.strip()]
+            largo = len(texto_normas(reglas))
+            if largo > LARGO_DESCRIPCION:
+                await ctx.send(f'Las normas {categoria} ocupan {largo} caracteres y un mensaje admite {LARGO_DESCRIPCION}. Acórtalas o quita alguna.')
+                return
+            if reglas:
+                personalizadas[categoria] = (NORMAS[categoria][0], reglas)
+            else:
+                personalizadas.pop(categoria, None)
+            await configuraciones.actualizar(ctx.guild.id, 'normas', json.dumps(personalizadas, ensure_ascii=False) if personalizadas else None)
+            await ctx.send(f'Normas {categoria}: ' + (f'{len(reglas)} reglas personalizadas.' if reglas else 'se usan las normas por defecto.'))
+        elif campo == 'restablecer':
+            if valor in CAMPOS_CONFIGURACION:
+                await configuraciones.actualizar(ctx.guild.id, valor, None)
+                await ctx.send(f'Se restableció el valor por defecto de {valor}.')
+            elif valor in ('', 'todo'):
+                await configuraciones.restablecer(ctx.guild.id)
+                await ctx.send('Se restableció toda la configuración de este servidor.')
+            else:
+                await ctx.send(f"Campo desconocido. Usa uno de: {', '.join(CAMPOS_CONFIGURACION)} o todo")
+        else:
+            embed = discord.Embed(title='Configuración del servidor', color=discord.Color.purple())
+            embed.add_field(name='Prefijo', value=f'`{configuracion.prefijo}`', inline=True)
+            embed.add_field(name='IP', value=configuracion.ip, inline=True)
+            embed.add_field(name='Tienda', value=configuracion.tienda, inline=False)
+            embed.add_field(name='Normas personalizadas', value=', '.join(configuracion.personalizadas) or 'ninguna', inline=False)
+            embed.set_footer(text=f'Uso: {ctx.prefix}config prefijo | ip | tienda | normas <categoría> <reglas> | restablecer [campo]')
+            await ctx.send(embed=embed)
+
+NOMBRE_JUGADOR = re.compile(r'[A-Za-z0-9_]{3,16}')
+
+def limpiar_respuesta_rcon(texto, limite=1900):
+    texto = re.sub('§.', '', texto).strip() or '(sin respuesta)'
+    return texto if len(texto) <= limite else texto[:limite] + '…'
+
+class Consola(commands.Cog):
+    async def cog_before_invoke(self, ctx):
+        await ctx.defer()
+
+    async def _responder(self, ctx, comando):
+        try:
+            respuesta = await rcon.ejecutar(comando)
+        except ErrorRcon as error:
+            await ctx.send(f'Error de RCON: {error}')
+            return
+        await ctx.send(f'```\n{limpiar_respuesta_rcon(respuesta)}\n```')
+
+    @registrar_comando(name='lista', description='Muestra los jugadores conectados al servidor de Minecraft.')
+    @es_staff()
+    async def lista(self, ctx):
+        await self._responder(ctx, 'list')
+
+    @registrar_comando(name='ban', description='Banea a un jugador del servidor de Minecraft.')
+    @es_staff()
+    async def ban(self, ctx, jugador, *, motivo=''):
+        if not NOMBRE_JUGADOR.fullmatch(jugador):
+            await ctx.send(f'`{jugador}` no es un nombre de jugador válido.')
+            return
+        await self._responder(ctx, f"ban {jugador} {' '.join(motivo.split())}".strip())
+
+    @registrar_comando(name='whitelist', description='Añade o quita jugadores de la whitelist del servidor de Minecraft.')
+    @es_staff()
+    async def whitelist(self, ctx, accion, *, jugadores=''):
+        if accion not in ('add', 'remove'):
+            await ctx.send(f'Uso: {ctx.prefix}whitelist add | remove <jugador> [jugador...]')
+            return
+        nombres = list(dict.fromkeys(jugadores.replace(',', ' ').split()))
+        invalidos = [nombre for nombre in nombres if not NOMBRE_JUGADOR.fullmatch(nombre)]
+        if not nombres or invalidos:
+            await ctx.send(f"Nombres de jugador no válidos: {', '.join(invalidos) or '(ninguno)'}")
+            return
+        if len(nombres) == 1:
+            await self._responder(ctx, f'whitelist {accion} {nombres[0]}')
+            return
+        inicio = time.perf_counter()
+        resultados = await rcon.ejecutar_varios([f'whitelist {accion} {nombre}' for nombre in nombres])
+        fallidos = [nombre for nombre, resultado in zip(nombres, resultados) if isinstance(resultado, Exception)]
+        mensaje = f'whitelist {accion}: {len(nombres) - len(fallidos)} de {len(nombres)} jugadores en {time.perf_counter() - inicio:.1f} s.'
+        if fallidos:
+            mensaje += f"\nFallaron ({resultados[nombres.index(fallidos[0])]}): {', '.join(fallidos)}"
+        await ctx.send(mensaje[:1900])
+
+    @registrar_comando(name='rcon', description='Ejecuta un comando en la consola del servidor de Minecraft.')
+    @commands.has_permissions(administrator=True)
+    async def consola(self, ctx, *, comando):
+        await self._responder(ctx, ' '.join(comando.split()).lstrip('/'))
+
+class Estadisticas(commands.Cog):
+    @registrar_comando(name='top', description='Muestra la clasificación de jugadores en una estadística.')
+    async def top(self, ctx, estadistica='', cantidad: int = 10):
+        if estadistica not in ESTADISTICAS:
+            await ctx.send(f"Uso: {ctx.prefix}top <estadística> [cantidad]. Estadísticas: {', '.join(ESTADISTICAS)}")
+            return
+        await ctx.defer()
+        await indice_estadisticas.asegurar()
+        mejores = indice_estadisticas.top(estadistica, max(1, min(cantidad, 25)))
+        if not mejores:
+            await ctx.send('Todavía no hay estadísticas de jugadores.')
+            return
+        embed = discord.Embed(
+            title=f'Top {len(mejores)}: {ESTADISTICAS[estadistica][0]}',
+            description='\n'.join(
+                f'**{puesto}.** {discord.utils.escape_markdown(nombre)}: {formatear_estadistica(estadistica, valor)}'
+                for puesto, (nombre, valor) in enumerate(mejores, 1)
+            ),
+            color=discord.Color.purple()
+        )
+        embed.set_footer(text=f'{len(indice_estadisticas.modificados)} jugadores · actualizado {time.strftime("%H:%M", time.localtime(indice_estadisticas.actualizado))}')
+        await ctx.send(embed=embed)
+
+    @registrar_comando(name='stats', description='Muestra las estadísticas de un jugador.')
+    async def stats(self, ctx, jugador):
+        await ctx.defer()
+        await indice_estadisticas.asegurar()
+        encontrado = indice_estadisticas.jugador(jugador)
+        if encontrado is None:
+            await ctx.send(f'No hay estadísticas de `{discord.utils.escape_markdown(jugador)}`.')
+            return
+        nombre, valores = encontrado
+        embed = discord.Embed(title=f'Estadísticas de {discord.utils.escape_markdown(nombre)}', color=discord.Color.purple())
+        for estadistica, (valor, puesto) in valores.items():
+            embed.add_field(name=ESTADISTICAS[estadistica][0], value=f'{formatear_estadistica(estadistica, valor)} (#{puesto})', inline=True)
+        embed.set_footer(text=f'Clasificación: {ctx.prefix}top <estadística>')
+        await ctx.send(embed=embed)
+
+def describir_norma(configuracion, categoria, numero, limite=80):
+    _, reglas = configuracion.normas[categoria]
+    texto = reglas[numero - 1] if 0 < numero <= len(reglas) else '(norma eliminada)'
+    return f'{categoria.capitalize()} #{numero}: ' + (texto if len(texto) <= limite else texto[:limite] + '…')
+
+class Sanciones(commands.Cog):
+    @registrar_comando(name='sancionar', description='Registra una sanción a un jugador por incumplir una norma.')
+    @es_staff()
+    async def sancionar(self, ctx, jugador, categoria, numero: int, *, motivo=''):
+        configuracion = await configuracion_de(ctx)
+        if not NOMBRE_JUGADOR.fullmatch(jugador):
+            await ctx.send(f'`{jugador}` no es un nombre de jugador válido.')
+            return
+        categoria = categoria.lower()
+        if categoria not in configuracion.normas or not 0 < numero <= len(configuracion.normas[categoria][1]):
+            await ctx.send(f"No existe la norma {categoria} #{numero}. Categorías: {', '.join(configuracion.normas)}")
+            return
+        try:
+            sancion = await sanciones.registrar(jugador, categoria, numero, ' '.join(motivo.split()), ctx.author.id)
+        except OSError as error:
+            await ctx.send(f'No se pudo guardar la sanción: {error}')
+            return
+        total = len(sanciones.por_jugador[jugador.lower()])
+        await ctx.send(f'Sanción #{sancion.id} registrada a **{jugador}** por {describir_norma(configuracion, categoria, numero)} ({total} en total).')
+
+    @registrar_comando(name='anular', description='Anula una sanción registrada por error.')
+    @es_staff()
+    async def anular(self, ctx, identificador: int):
+        try:
+            sancion = await sanciones.anular(identificador, ctx.author.id)
+        except OSError as error:
+            await ctx.send(f'No se pudo anular la sanción: {error}')
+            return
+        if sancion is None:
+            await ctx.send(f'No existe la sanción #{identificador}.')
+            return
+        await ctx.send(f'Sanción #{identificador} a **{sancion.jugador}** anulada.')
+
+    @registrar_comando(name='historial', description='Muestra las sanciones de un jugador.')
+    @es_staff()
+    async def historial(self, ctx, jugador):
+        configuracion = await configuracion_de(ctx)
+        lista = sanciones.historial(jugador)
+        if not lista:
+            await ctx.send(f'**{discord.utils.escape_markdown(jugador)}** no tiene sanciones.')
+            return
+        por_categoria = collections.Counter(sancion.categoria for sancion in lista)
+        lineas = [
+            f'**#{sancion.id}** <t:{sancion.fecha}:d> ' + (describir_norma(configuracion, sancion.categoria, sancion.numero, 60) if sancion.categoria in configuracion.normas else f'{sancion.categoria} #{sancion.numero}')
+            + (f' · {sancion.motivo[:100]}' if sancion.motivo else '')
+            for sancion in lista[:15]
+        ]
+        embed = discord.Embed(
+            title=f'Historial de {discord.utils.escape_markdown(lista[0].jugador)}',
+            description=f"{len(lista)} sanciones: {', '.join(f'{cantidad} {categoria}' for categoria, cantidad in por_categoria.most_common())}\n\n" + '\n'.join(lineas),
+            color=discord.Color.purple()
+        )
+        embed.set_footer(text=f'Mostrando las {min(len(lista), 15)} más recientes. Para anular una: {ctx.prefix}anular <número>')
+        await ctx.send(embed=embed)
+
+    @registrar_comando(name='infracciones', description='Muestra las normas más incumplidas.')
+    @es_staff()
+    async def infracciones(self, ctx, cantidad: int = 10):
+        configuracion = await configuracion_de(ctx)
+        normas = sanciones.mas_incumplidas(max(1, min(cantidad, 25)))
+        if not normas:
+            await ctx.send('Todavía no hay sanciones registradas.')
+            return
+        embed = discord.Embed(
+            title='Normas más incumplidas',
+            description='\n'.join(
+                f'**{veces}** · ' + (describir_norma(configuracion, categoria, numero, 60) if categoria in configuracion.normas else f'{categoria} #{numero}')
+                for (categoria, numero), veces in normas
+            ),
+            color=discord.Color.purple()
+        )
+        embed.set_footer(text=f'{len(sanciones.sanciones)} sanciones a {len(sanciones.por_jugador)} jugadores.')
+        await ctx.send(embed=embed)
+
+USO_ANUNCIAR = '{prefijo}anunciar #canal <cuándo> [--saltar] <mensaje>. <cuándo> puede ser `2h30m`, `2024-06-01T18:00` o una expresión cron entre comillas, como `"0 18 * * 5"`.'
+
+class Anuncios(commands.Cog):
+    @registrar_comando(name='anunciar', description='Programa un anuncio único o periódico en un canal.')
+    @commands.guild_only()
+    @es_staff()
+    async def anunciar(self, ctx, canal: discord.TextChannel, cuando, *, mensaje):
+        politica = 'recuperar'
+        if mensaje.split(maxsplit=1)[0] == '--saltar':
+            politica = 'saltar'
+            mensaje = mensaje[len('--saltar'):].strip()
+        if not mensaje:
+            await ctx.send(f'Falta el mensaje. Uso: {USO_ANUNCIAR.format(prefijo=ctx.prefix)}')
+            return
+        if sum(anuncio.servidor == ctx.guild.id for anuncio in anuncios.anuncios.values()) >= MAXIMO_ANUNCIOS_SERVIDOR:
+            await ctx.send(f'Este servidor ya tiene {MAXIMO_ANUNCIOS_SERVIDOR} anuncios programados; cancela alguno antes.')
+            return
+        try:
+            siguiente, cron = interpretar_cuando(cuando, anuncios.reloj())
+        except ValueError as error:
+            await ctx.send(f'{error} Uso: {USO_ANUNCIAR.format(prefijo=ctx.prefix)}')
+            return
+        anuncio = await anuncios.agregar(ctx.guild.id, canal.id, mensaje[:2000], siguiente, cron, politica, ctx.author.id)
+        repeticion = f' y se repetirá según `{cron.expresion}`' if cron is not None else ''
+        await ctx.send(f'Anuncio #{anuncio.id} programado en {canal.mention} para <t:{int(siguiente)}:f>{repeticion}.')
+
+    @registrar_comando(name='anuncios', description='Muestra los próximos anuncios programados en el servidor.')
+    @commands.guild_only()
+    @es_staff()
+    async def lista_anuncios(self, ctx):
+        proximos = anuncios.de_servidor(ctx.guild.id, 20)
+        if not proximos:
+            await ctx.send(f'No hay anuncios programados. Uso: {USO_ANUNCIAR.format(prefijo=ctx.prefix)}')
+            return
+        embed = discord.Embed(
+            title='Anuncios programados',
+            description='\n'.join(
+                f"**#{anuncio.id}** <t:{int(anuncio.siguiente)}:f> en <#{anuncio.canal}>"
+                + (f' · `{anuncio.cron.expresion}`' if anuncio.cron is not None else '')
+                + (' · saltar' if anuncio.politica == 'saltar' else '')
+                + f"\n{anuncio.mensaje[:80] + ('…' if len(anuncio.mensaje) > 80 else '')}"
+                for anuncio in proximos
+            ),
+            color=discord.Color.purple()
+        )
+        embed.set_footer(text=f'Para cancelar uno: {ctx.prefix}cancelar <número>')
+        await ctx.send(embed=embed)
+
+    @registrar_comando(name='cancelar', description='Cancela un anuncio programado.')
+    @commands.guild_only()
+    @es_staff()
+    async def cancelar(self, ctx, identificador: int):
+        anuncio = anuncios.anuncios.get(identificador)
+        if anuncio is None or anuncio.servidor != ctx.guild.id:
+            await ctx.send(f'No existe el anuncio #{identificador} en este servidor.')
+            return
+        await anuncios.cancelar(identificador)
+        await ctx.send(f'Anuncio #{identificador} cancelado.')
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+DOCUMENTADO = 'con_documentaci' in os.path.basename(__file__)
+
+class _CargadorAnterior:
+    def __init__(self, modulo):
+        self.modulo = modulo
+        self.spec = modulo.__spec__
+
+    def create_module(self, spec):
+        return self.modulo
+
+    def exec_module(self, modulo):
+        modulo.__spec__ = self.spec
+        modulo.__loader__ = self.spec.loader
+
+class GestorExtensiones:
+    def __init__(self, directorio, documentado):
+        self.directorio = os.path.join(DIRECTORIO, directorio)
+        self.raiz, self.paquete = os.path.split(self.directorio)
+        self.otra_version = '_sin_documentacion' if documentado else '_con_documentacion'
+        self.recargas = 0
+        self.fallidas = 0
+        self.duracion = None
+        self.preparadas = asyncio.Event()
+        self._bloqueo = asyncio.Lock()
+        if self.raiz not in sys.path:
+            sys.path.insert(0, self.raiz)
+
+    def nombres(self):
+        if not os.path.isdir(self.directorio):
+            return []
+        return sorted(
+            f'{self.paquete}.{archivo[:-3]}' for archivo in os.listdir(self.directorio)
+            if archivo.endswith('.py') and not archivo.startswith('_') and not archivo[:-3].endswith(self.otra_version)
+        )
+
+    def cargadas(self, bot):
+        return [nombre for nombre in bot.extensions if nombre.startswith(self.paquete + '.')]
+
+    async def cargar(self, bot):
+        for nombre in self.nombres():
+            try:
+                await bot.load_extension(nombre)
+            except commands.ExtensionError:
+                bitacora.exception(f'No se pudo cargar la extensión {nombre}')
+
+    def _comprobar(self, nombre):
+        spec = importlib.util.find_spec(nombre)
+        if spec is None or spec.loader is None:
+            raise commands.ExtensionNotFound(nombre)
+        codigo = spec.loader.get_code(nombre)
+        modulo = importlib.util.module_from_spec(spec)
+        exec(codigo, modulo.__dict__)
+        if not inspect.iscoroutinefunction(getattr(modulo, 'setup', None)):
+            raise commands.NoEntryPointError(nombre)
+
+    async def _deshacer(self, bot, cambiadas, anteriores):
+        for nombre in reversed(cambiadas):
+            try:
+                if nombre in bot.extensions:
+                    await bot.unload_extension(nombre)
+                anterior = anteriores.get(nombre)
+                if anterior is not None:
+                    anterior.__spec__ = importlib.util.spec_from_loader(nombre, _CargadorAnterior(anterior))
+                    sys.modules[nombre] = anterior
+                    await bot.load_extension(nombre)
+            except commands.ExtensionError:
+                bitacora.exception(f'No se pudo restaurar la extensión {nombre}')
+
+    async def recargar(self, bot):
+        async with self._bloqueo:
+            inicio = time.perf_counter()
+            importlib.invalidate_caches()
+            nombres = self.nombres()
+            errores = {}
+            bucle = asyncio.get_running_loop()
+            for nombre in nombres:
+                try:
+                    await bucle.run_in_executor(None, self._comprobar, nombre)
+                except Exception as error:
+                    errores[nombre] = error
+            try:
+                normas = leer_normas(ARCHIVO_NORMAS)
+            except (OSError, ValueError) as error:
+                errores[ARCHIVO_NORMAS] = error
+            aplicada = not errores
+            if aplicada:
+                anteriores = {nombre: bot.extensions[nombre] for nombre in self.cargadas(bot)}
+                cambiadas = []
+                try:
+                    for nombre in anteriores:
+                        if nombre not in nombres:
+                            await bot.unload_extension(nombre)
+                            cambiadas.append(nombre)
+                    for nombre in nombres:
+                        if nombre in anteriores:
+                            await bot.reload_extension(nombre)
+                        else:
+                            await bot.load_extension(nombre)
+                        cambiadas.append(nombre)
+                except commands.ExtensionError as error:
+                    errores[error.name] = error
+                    aplicada = False
+                    await self._deshacer(bot, cambiadas, anteriores)
+            if aplicada:
+                aplicar_normas(normas)
+                if (nombres or anteriores) and MODO_COMANDOS != 'prefijo' and SINCRONIZAR_COMANDOS:
+                    try:
+                        await bot.tree.sync()
+                    except discord.HTTPException as error:
+                        errores['sincronización'] = error
+            self.duracion = time.perf_counter() - inicio
+            if errores:
+                self.fallidas += 1
+            else:
+                self.recargas += 1
+            return aplicada, errores
+
+extensiones = GestorExtensiones(DIRECTORIO_EXTENSIONES, DOCUMENTADO)
+sys.modules['olympusbot'] = sys.modules[__name__]
+
+async def cargar_cogs():
+    for cog in (Staff(), Consola(), Estadisticas(), Sanciones(), Anuncios()):
+        await bot.add_cog(cog)
+
+async def cargar_extensiones():
+    try:
+        await extensiones.cargar(bot)
+        if MODO_COMANDOS != 'prefijo' and SINCRONIZAR_COMANDOS and (cluster is None or cluster.indice == 0):
+            await bot.tree.sync()
+    except discord.HTTPException as error:
+        bitacora.error(f'No se pudieron sincronizar los comandos de barra: {error}')
+    finally:
+        marcas_arranque['extensiones'] = time.perf_counter()
+        extensiones.preparadas.set()
+
+def informe_arranque():
+    etapas = list(marcas_arranque.items())
+    duraciones = ', '.join(f'{etapa} {fin - inicio:.2f} s' for (_, inicio), (etapa, fin) in zip(etapas, etapas[1:]))
+    bitacora.info(f'Arranque en {etapas[-1][1] - etapas[0][1]:.2f} s ({duraciones})')
+
+class Cluster:
+    def __init__(self, procesos):
+        self.servidores = multiprocessing.RawArray('i', procesos)
+        self.latencias = multiprocessing.RawArray('d', procesos)
+        self.listos = multiprocessing.RawArray('b', procesos)
+        self.indice = None
+
+    def publicar(self, bot):
+        self.servidores[self.indice] = len(bot.guilds)
+        self.latencias[self.indice] = bot.latency if math.isfinite(bot.latency) else 0.0
+        self.listos[self.indice] = bot.is_ready()
+
+    def total_servidores(self):
+        return sum(self.servidores)
+
+    def is_ready(self):
+        return all(self.listos)
+
+    def is_closed(self):
+        return False
+
+    @property
+    def latency(self):
+        return max(self.latencias)
+
+    @property
+    def guilds(self):
+        return range(self.total_servidores())
+
+def repartir_shards(total, procesos):
+    procesos = max(1, min(procesos, total))
+    return [list(range(indice * total // procesos, (indice + 1) * total // procesos)) for indice in range(procesos)]
+
+async def _shards_recomendados():
+    async with aiohttp.ClientSession() as sesion:
+        async with sesion.get('https://discord.com/api/v10/gateway/bot', headers={'Authorization': f'Bot {TOKEN}'}) as respuesta:
+            respuesta.raise_for_status()
+            return (await respuesta.json())['shards']
+
+def _trabajador(estado, indice, shard_ids, total_shards):
+    global cluster
+    estado.indice = indice
+    cluster = estado
+    bot.shard_ids = shard_ids
+    bot.shard_count = total_shards
+    base, extension = os.path.splitext(ARCHIVO_REGISTRO)
+    oyente = iniciar_registro(f'{base}-{indice}{extension}')
+    try:
+        bot.run(TOKEN, log_handler=None)
+    finally:
+        oyente.stop()
+
+async def _supervisar(estado, procesos, lanzar):
+    if MODO_SERVIDOR_WEB == 'async':
+        await keep_alive_async(estado, red=red)
+    else:
+        keep_alive(red=red)
+    red.iniciar()
+    while True:
+        await asyncio.sleep(5)
+        for indice, proceso in enumerate(procesos):
+            if not proceso.is_alive():
+                bitacora.warning(f'El proceso {proceso.name} terminó con código {proceso.exitcode}, reiniciándolo')
+                estado.servidores[indice] = 0
+                estado.listos[indice] = 0
+                procesos[indice] = lanzar(indice)
+
+def iniciar_cluster():
+    oyente = iniciar_registro(ARCHIVO_REGISTRO)
+    total = TOTAL_SHARDS or asyncio.run(_shards_recomendados())
+    grupos = repartir_shards(total, PROCESOS_CLUSTER)
+    estado = Cluster(len(grupos))
+    contexto = multiprocessing.get_context('spawn')
+
+    def lanzar(indice):
+        proceso = contexto.Process(target=_trabajador, args=(estado, indice, grupos[indice], total), name=f'cluster-{indice}')
+        proceso.start()
+        return proceso
+
+    procesos = [lanzar(indice) for indice in range(len(grupos))]
+    bitacora.info(f'Cluster iniciado: {total} shards repartidos en {len(grupos)} procesos')
+    try:
+        asyncio.run(_supervisar(estado, procesos, lanzar))
+    finally:
+        oyente.stop()
+
+marcas_arranque['preparacion'] = time.perf_counter()
 
-keep_alive()
-bot.run("BOT_TOKEN")
+if __name__ == '__main__':
+    if MODO_CLUSTER:
+        iniciar_cluster()
+    else:
+        oyente = iniciar_registro(ARCHIVO_REGISTRO)
+        if MODO_SERVIDOR_WEB == 'flask':
+            keep_alive(metricas, red)
+        try:
+            bot.run(TOKEN, log_handler=None)
+        finally:
+            oyente.stop()
@@ -1,24 +1,154 @@
-from flask import Flask  # Importa Flask, un marco de trabajo para crear aplicaciones web de forma simple y rápida.
-
 from threading import Thread  # Importa Thread de threading para ejecutar funciones en paralelo sin bloquear la ejecución del programa.
+import asyncio  # Importa asyncio para ejecutar el servidor web asíncrono en el mismo bucle de eventos que el bot.
+import math  # Importa math para comprobar si la latencia del bot es un número válido (`math.isfinite`).
+import json  # Importa json para generar la respuesta JSON de `/status`.
+import hashlib  # Importa hashlib para calcular la etiqueta ETag de cada respuesta de `/status`.
+import html  # Importa html para escapar los nombres de los servidores en la página de `/status`.
+
+# Tipo de contenido del formato de texto de Prometheus, usado por la ruta `/metrics`.
+TIPO_METRICAS = 'text/plain; version=0.0.4; charset=utf-8'
+TIPO_JSON = 'application/json; charset=utf-8'  # Tipo de contenido de `/status` en JSON
+TIPO_HTML = 'text/html; charset=utf-8'  # Tipo de contenido de la página de `/status`
+
+# Página de estado de la red
+# `red` es el monitor de servidores del bot (`MonitorRed`): consulta todos los servidores de Minecraft de la red
+# cada cierto tiempo y deja el resultado en `red.publicado`. Estas funciones lo convierten en la respuesta de `/status`.
+# Cada respuesta se genera una sola vez por consulta del monitor y se guarda aquí junto a su ETag, por formato
+# ('json' o 'html'), así que las visitas a `/status` entre dos consultas no vuelven a generar el JSON ni la página.
+_cuerpos_estado = {}
+
+# Elige el formato de la respuesta: el que se pida con `?formato=json` o `?formato=html` y, si no, JSON solo cuando
+# la cabecera `Accept` lo pide y no acepta HTML (los navegadores siempre aceptan HTML y reciben la página).
+def formato_estado(formato, aceptados):
+    # `formato` es el parámetro `?formato=` de la dirección (o None) y `aceptados` el texto de la cabecera `Accept`.
+    if formato in ('json', 'html'):
+        return formato  # El formato pedido explícitamente tiene prioridad
+    # Los monitores como UptimeRobot o `curl -H "Accept: application/json"` reciben JSON; el resto, la página.
+    return 'json' if 'application/json' in aceptados and 'text/html' not in aceptados else 'html'
+
+# Comprueba si la cabecera `If-None-Match` del cliente incluye la etiqueta actual. Puede traer varias etiquetas
+# separadas por comas, `*` o etiquetas débiles (`W/"..."`), que se comparan igual que las normales.
+def _coincide_etiqueta(cabecera, etiqueta):
+    # `*` significa "cualquier versión": el cliente ya tiene una copia, sea cual sea.
+    if cabecera.strip() == '*':
+        return True
+    # `removeprefix('W/')` quita la marca de etiqueta débil; `any` devuelve True en cuanto una coincide.
+    return any(parte.strip().removeprefix('W/') == etiqueta for parte in cabecera.split(','))
 
-# Inicializa una instancia de la aplicación Flask.
-# Flask toma el nombre del módulo actual como argumento, que en este caso es una cadena vacía ('').
-# Esto le permite a Flask saber dónde encontrar archivos y recursos relacionados con la aplicación.
-app = Flask('')
+# Gráfica SVG de la latencia de un servidor en su historial: una línea con la latencia de cada consulta,
+# escalada a la máxima, y una barra roja en cada consulta en la que el servidor no respondió.
+def _grafica_latencia(latencias):
+    # La latencia más alta del historial ocupa toda la altura de la gráfica. `default=0` cubre un historial sin
+    # ninguna respuesta, y `or 1` evita dividir entre cero.
+    maximo = max((latencia for latencia in latencias if latencia is not None), default=0) or 1
+    # Un punto por consulta con respuesta: `x` es su posición en el historial y la altura se escala a 28 de los 30
+    # píxeles. En SVG la `y` crece hacia abajo, por eso se resta de 30: más latencia, punto más alto.
+    puntos = ' '.join(f'{x},{30 - latencia * 28 // maximo}' for x, latencia in enumerate(latencias) if latencia is not None)
+    # Un rectángulo de toda la altura en cada consulta sin respuesta (`None`).
+    caidas = ''.join(f'<rect x="{x}" y="0" width="1" height="30"/>' for x, latencia in enumerate(latencias) if latencia is None)
+    # `viewBox` usa una unidad por consulta y `preserveAspectRatio="none"` estira la gráfica a 300x30 píxeles, tenga
+    # el historial las consultas que tenga. `vector-effect="non-scaling-stroke"` mantiene la línea fina al estirarla.
+    return (
+        f'<svg viewBox="0 0 {max(len(latencias), 1)} 30" preserveAspectRatio="none" width="300" height="30">'
+        f'<g fill="#e74c3c">{caidas}</g><polyline points="{puntos}" fill="none" stroke="#9b59b6" vector-effect="non-scaling-stroke"/></svg>'
+    )
 
-# Define la ruta raíz de la aplicación web.
-# @app.route('/') es un decorador que especifica que la función `home` se ejecutará
-# cuando se acceda a la URL raíz (/) del servidor. Esto configura un punto de acceso a la aplicación.
-@app.route('/')
-def home():
-    # La función `home` responde con el texto "I'm alive" cuando la URL raíz es solicitada.
-    # Esto indica que el servidor está funcionando correctamente.
-    return "I'm alive"
+# Página HTML de `/status`: una fila por servidor con su estado, su disponibilidad en el historial y la gráfica de latencia.
+# Los nombres y versiones vienen de la configuración y de los propios servidores, así que se escapan con `html.escape`.
+def _pagina_estado(datos):
+    filas = []  # Una fila de la tabla (`<tr>`) por servidor
+    for servidor in datos['servidores']:
+        # En línea: jugadores, latencia y versión. `html.escape` cambia `<`, `>` y `&` para que una versión con
+        # etiquetas HTML no pueda alterar la página.
+        if servidor['en_linea']:
+            estado = f"En línea · {servidor['jugadores']}/{servidor['maximo']} jugadores · {servidor['latencia_ms']} ms · {html.escape(str(servidor['version']))}"
+        else:
+            estado = 'Sin conexión'
+        # La disponibilidad es una fracción (0.9876); se muestra como porcentaje con dos decimales (98.76 %).
+        disponibilidad = '-' if servidor['disponibilidad'] is None else f"{servidor['disponibilidad'] * 100:.2f} %"
+        # Las celdas (`<td>`) de la fila: nombre, estado, disponibilidad y gráfica.
+        filas.append(
+            f"<tr><td>{html.escape(servidor['nombre'])}</td><td>{estado}</td><td>{disponibilidad}</td>"
+            f"<td>{_grafica_latencia(servidor['historial']['latencia_ms'])}</td></tr>"
+        )
+    # La página completa: cabecera con los estilos (fondo oscuro, como Discord), un resumen y la tabla con las filas.
+    # Los trozos de texto seguidos se juntan solos en Python; `+` une el resultado con las filas.
+    return (
+        '<!DOCTYPE html><html lang="es"><head><meta charset="utf-8"><title>Estado de la red</title>'
+        '<style>body{font-family:sans-serif;background:#2c2f33;color:#fff}td,th{padding:6px 12px;text-align:left}</style></head>'
+        f"<body><h1>Estado de la red</h1><p>{datos['en_linea']} de {len(datos['servidores'])} servidores en línea.</p>"
+        '<table><tr><th>Servidor</th><th>Estado</th><th>Disponibilidad</th><th>Latencia</th></tr>'
+        + ''.join(filas) + '</table></body></html>'
+    )
+
+# Genera la respuesta de `/status` para los dos servidores web (Flask y aiohttp): devuelve el código, el cuerpo y las cabeceras.
+# - Sin datos todavía (el monitor no terminó su primera consulta): 503 con `Retry-After`.
+# - Si el cliente envía en `If-None-Match` la ETag de la respuesta actual: 304 sin cuerpo, así UptimeRobot y los navegadores
+#   no vuelven a descargar una respuesta que no ha cambiado.
+# - Si no, 200 con la respuesta guardada. La ETag es un hash del cuerpo, así que no cambia si el contenido es el mismo,
+#   y `Cache-Control: no-cache` hace que los navegadores pregunten siempre antes de usar su copia.
+def respuesta_estado(red, formato, etiqueta_cliente=None):
+    datos = red.publicado  # Último estado publicado por el monitor (None antes de la primera ronda)
+    if datos is None:
+        # `Retry-After: 5` indica al cliente que vuelva a probar en 5 segundos.
+        return 503, 'Todavía no hay datos de los servidores'.encode('utf-8'), {'Content-Type': 'text/plain; charset=utf-8', 'Retry-After': '5'}
+    guardado = _cuerpos_estado.get(formato)  # (datos, cuerpo, etiqueta) de la última respuesta en este formato
+    # Solo se genera el cuerpo si el monitor ha publicado datos nuevos desde la última vez (se compara el objeto).
+    if guardado is None or guardado[0] is not datos:
+        if formato == 'json':
+            # `separators=(',', ':')` quita los espacios del JSON para que ocupe menos.
+            cuerpo = json.dumps(datos, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+        else:
+            cuerpo = _pagina_estado(datos).encode('utf-8')  # La página HTML
+        # La ETag va entre comillas, como pide HTTP. `blake2b` con 12 bytes es rápido y basta para distinguir versiones.
+        guardado = _cuerpos_estado[formato] = (datos, cuerpo, '"' + hashlib.blake2b(cuerpo, digest_size=12).hexdigest() + '"')
+    _, cuerpo, etiqueta = guardado
+    # `Vary: Accept` avisa a las cachés de que la respuesta cambia según la cabecera `Accept` (JSON o HTML).
+    cabeceras = {'ETag': etiqueta, 'Cache-Control': 'no-cache', 'Vary': 'Accept'}
+    if etiqueta_cliente and _coincide_etiqueta(etiqueta_cliente, etiqueta):
+        return 304, b'', cabeceras  # El cliente ya tiene esta versión: sin cuerpo
+    cabeceras['Content-Type'] = TIPO_JSON if formato == 'json' else TIPO_HTML
+    return 200, cuerpo, cabeceras  # Respuesta completa
 
 # Define una función `run` que iniciará el servidor Flask cuando se llame.
 # Esta función configura el servidor para que sea accesible públicamente en la red.
-def run():
+# Si se recibe un objeto `metricas`, también se publica la ruta `/metrics` con las métricas del bot,
+# y si se recibe el monitor `red`, la ruta `/status` con el estado de los servidores de la red.
+def run(metricas=None, red=None):
+    # Flask se importa aquí dentro, y no al principio del archivo, para que solo se cargue en memoria
+    # cuando se usa el modo Flask. En el modo asíncrono (`keep_alive_async`) Flask nunca se importa.
+    # `Response` permite indicar el tipo de contenido de la respuesta de `/metrics`.
+    from flask import Flask, Response, request  # Importa Flask, un marco de trabajo para crear aplicaciones web de forma simple y rápida.
+
+    # Inicializa una instancia de la aplicación Flask.
+    # Flask toma el nombre del módulo actual como argumento, que en este caso es una cadena vacía ('').
+    # Esto le permite a Flask saber dónde encontrar archivos y recursos relacionados con la aplicación.
+    app = Flask('')
+
+    # Define la ruta raíz de la aplicación web.
+    # @app.route('/') es un decorador que especifica que la función `home` se ejecutará
+    # cuando se acceda a la URL raíz (/) del servidor. Esto configura un punto de acceso a la aplicación.
+    @app.route('/')
+    def home():
+        # La función `home` responde con el texto "I'm alive" cuando la URL raíz es solicitada.
+        # Esto indica que el servidor está funcionando correctamente.
+        return "I'm alive"
+
+    # Ruta `/metrics`: devuelve las métricas del bot en el formato de texto de Prometheus.
+    if metricas is not None:
+        @app.route('/metrics')
+        def metrics():
+            return Response(metricas.exponer(), content_type=TIPO_METRICAS)
+
+    # Ruta `/status`: estado de todos los servidores de la red en HTML o JSON (ver `respuesta_estado`).
+    if red is not None:
+        @app.route('/status')
+        def status():
+            codigo, cuerpo, cabeceras = respuesta_estado(
+                red, formato_estado(request.args.get('formato'), request.headers.get('Accept', '')), request.headers.get('If-None-Match')
+            )
+            return Response(cuerpo, status=codigo, headers=cabeceras)
+
     # `app.run` inicia el servidor Flask con las siguientes configuraciones:
     # - host='0.0.0.0' permite el acceso público al servidor en la red, lo que es ideal para aplicaciones que necesitan ser monitoreadas externamente.
     # - port=8080 establece el puerto en el que el servidor escuchará las solicitudes entrantes.
@@ -26,9 +156,82 @@ def run():
 
 # Define una función `keep_alive` que mantiene el servidor web en funcionamiento en segundo plano.
 # Esto es útil para bots o servicios que necesitan un servidor en funcionamiento continuo sin bloquear el flujo principal del programa.
-def keep_alive():
+def keep_alive(metricas=None, red=None):
     # Crea y lanza un nuevo hilo que ejecutará la función `run` de forma independiente.
-    # `Thread(target=run)` crea un hilo que ejecutará la función `run`.
+    # `Thread(target=run, args=(metricas, red))` crea un hilo que ejecutará la función `run` pasándole las métricas y el monitor de la red.
     # `t.start()` inicia el hilo, ejecutando el servidor Flask en segundo plano.
-    t = Thread(target=run)
+    t = Thread(target=run, args=(metricas, red))
     t.start()
+
+# Medición del retraso del bucle de eventos
+# El bot atiende todos sus eventos en un único bucle de eventos de asyncio. Si algo lo bloquea,
+# los comandos tardan en responder. Esta tarea duerme `intervalo` segundos y mide cuánto tiempo pasó realmente:
+# la diferencia es el retraso del bucle, que se guarda en `estado['retraso']` para mostrarlo en `/healthz`.
+async def _medir_retraso(estado, intervalo=1.0):
+    loop = asyncio.get_running_loop()
+    while True:
+        inicio = loop.time()
+        await asyncio.sleep(intervalo)
+        estado['retraso'] = max(0.0, loop.time() - inicio - intervalo)
+
+# Servidor web asíncrono
+# Alternativa a `keep_alive` que no necesita un hilo aparte ni Flask: el servidor web se ejecuta con aiohttp
+# dentro del mismo bucle de eventos que el bot, por lo que también puede informar del estado real del bot.
+# Rutas disponibles:
+# - `/`        responde "I'm alive", igual que el servidor Flask (compatible con UptimeRobot).
+# - `/livez`   responde "ok" sin hacer ninguna comprobación; indica que el proceso sigue vivo.
+# - `/healthz` responde en JSON si el bot está conectado a Discord, su latencia y el retraso del bucle de eventos.
+#              Devuelve el código 200 si el bot está listo y 503 si todavía no se ha conectado o se ha cerrado.
+# - `/metrics` responde con las métricas del bot en formato Prometheus (solo si se pasa el objeto `metricas`).
+# - `/status`  responde con el estado de los servidores de la red en HTML o JSON (solo si se pasa el monitor `red`).
+# Debe llamarse desde dentro del bucle de eventos del bot (por ejemplo, en `setup_hook`).
+async def keep_alive_async(bot, metricas=None, red=None, host='0.0.0.0', port=8080):
+    # El servidor web de aiohttp (que ya viene instalado como dependencia de discord.py) se importa aquí dentro, igual
+    # que Flask en `run`: importarlo tarda unas decenas de milisegundos y en el modo Flask no se usa.
+    from aiohttp import web
+
+    estado = {'retraso': 0.0}
+    # Se guarda la tarea de medición en `estado` para que no se pierda la referencia mientras se ejecuta.
+    estado['tarea'] = asyncio.create_task(_medir_retraso(estado))
+
+    async def home(peticion):
+        return web.Response(text="I'm alive")
+
+    async def livez(peticion):
+        return web.Response(text='ok')
+
+    async def healthz(peticion):
+        # El bot está listo si ya recibió el evento `on_ready` y su conexión no se ha cerrado.
+        listo = bot.is_ready() and not bot.is_closed()
+        # `bot.latency` es infinita mientras el bot no está conectado; en ese caso se muestra `null`.
+        latencia = bot.latency
+        return web.json_response({
+            'listo': listo,
+            'latencia_ws_ms': round(latencia * 1000, 1) if math.isfinite(latencia) else None,
+            'retraso_bucle_ms': round(estado['retraso'] * 1000, 1),
+            'servidores': len(bot.guilds),
+        }, status=200 if listo else 503)
+
+    # Crea la aplicación web, registra las rutas y la inicia en el host y puerto indicados.
+    # `access_log=None` desactiva el registro de cada petición, que solo añadiría trabajo en cada comprobación.
+    app = web.Application()
+    app.router.add_get('/', home)
+    app.router.add_get('/livez', livez)
+    app.router.add_get('/healthz', healthz)
+    if metricas is not None:
+        async def metrics(peticion):
+            return web.Response(body=metricas.exponer().encode('utf-8'), headers={'Content-Type': TIPO_METRICAS})
+
+        app.router.add_get('/metrics', metrics)
+    if red is not None:
+        async def status(peticion):
+            codigo, cuerpo, cabeceras = respuesta_estado(
+                red, formato_estado(peticion.query.get('formato'), peticion.headers.get('Accept', '')), peticion.headers.get('If-None-Match')
+            )
+            return web.Response(body=cuerpo, status=codigo, headers=cabeceras)
+
+        app.router.add_get('/status', status)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
@@ -1,16 +1,148 @@
-from flask import Flask
-
 from threading import Thread
+import asyncio
+import math
+import json
+import hashlib
+import html
+
+TIPO_METRICAS = 'text/plain; version=0.0.4; charset=utf-8'
+TIPO_JSON = 'application/json; charset=utf-8'
+TIPO_HTML = 'text/html; charset=utf-8'
+
+_cuerpos_estado = {}
+
+def formato_estado(formato, aceptados):
+    if formato in ('json', 'html'):
+        return formato
+    return 'json' if 'application/json' in aceptados and 'text/html' not in aceptados else 'html'
+
+def _coincide_etiqueta(cabecera, etiqueta):
+    if cabecera.strip() == '*':
+        return True
+    return any(parte.strip().removeprefix('W/') == etiqueta for parte in cabecera.split(','))
+
+def _grafica_latencia(latencias):
+    maximo = max((latencia for latencia in latencias if latencia is not None), default=0) or 1
+    puntos = ' '.join(f'{x},{30 - latencia * 28 // maximo}' for x, latencia in enumerate(latencias) if latencia is not None)
+    caidas = ''.join(f'<rect x="{x}" y="0" width="1" height="30"/>' for x, latencia in enumerate(latencias) if latencia is None)
+    return (
+        f'<svg viewBox="0 0 {max(len(latencias), 1)} 30" preserveAspectRatio="none" width="300" height="30">'
+        f'<g fill="#e74c3c">{caidas}</g><polyline points="{puntos}" fill="none" stroke="#9b59b6" vector-effect="non-scaling-stroke"/></svg>'
+    )
+
+def _pagina_estado(datos):
+    filas = []
+    for servidor in datos['servidores']:
+        if servidor['en_linea']:
+            estado = f"En línea · {servidor['jugadores']}/{servidor['maximo']} jugadores · {servidor['latencia_ms']} ms · {html.escape(str(servidor['version']))}"
+        else:
+            estado = 'Sin conexión'
+        disponibilidad = '-' if servidor['disponibilidad'] is None else f"{servidor['disponibilidad'] * 100:.2f} %"
+        filas.append(
+            f"<tr><td>{html.escape(servidor['nombre'])}</td><td>{estado}</td><td>{disponibilidad}</td>"
+            f"<td>{_grafica_latencia(servidor['historial']['latencia_ms'])}</td></tr>"
+        )
+    return (
+        '<!DOCTYPE html><html lang="es"><head><meta charset="utf-8"><title>Estado de la red</title>'
+        '<style>body{font-family:sans-serif;background:#2c2f33;color:#fff}td,th{padding:6px 12px;text-align:left}</style></head>'
+        f"<body><h1>Estado de la red</h1><p>{datos['en_linea']} de {len(datos['servidores'])} servidores en línea.</p>"
+        '<table><tr><th>Servidor</th><th>Estado</th><th>Disponibilidad</th><th>Latencia</th></tr>'
+        + ''.join(filas) + '</table></body></html>'
+    )
+
+def respuesta_estado(red, formato, etiqueta_cliente=None):
+    datos = red.publicado
+    if datos is None:
+        return 503, 'Todavía no hay datos de los servidores'.encode('utf-8'), {'Content-Type': 'text/plain; charset=utf-8', 'Retry-After': '5'}
+    guardado = _cuerpos_estado.get(formato)
+    if guardado is None or guardado[0] is not datos:
+        if formato == 'json':
+            cuerpo = json.dumps(datos, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+        else:
+            cuerpo = _pagina_estado(datos).encode('utf-8')
+        guardado = _cuerpos_estado[formato] = (datos, cuerpo, '"' + hashlib.blake2b(cuerpo, digest_size=12).hexdigest() + '"')
+    _, cuerpo, etiqueta = guardado
+    cabeceras = {'ETag': etiqueta, 'Cache-Control': 'no-cache', 'Vary': 'Accept'}
+    if etiqueta_cliente and _coincide_etiqueta(etiqueta_cliente, etiqueta):
+        return 304, b'', cabeceras
+    cabeceras['Content-Type'] = TIPO_JSON if formato == 'json' else TIPO_HTML
+    return 200, cuerpo, cabeceras
+
+def run(metricas=None, red=None):
+    from flask import Flask, Response, request
+
+    app = Flask('')
 
-app = Flask('')
+    @app.route('/')
+    def home():
+        return "I'm alive"
 
-@app.route('/')
-def home():
-    return "I'm alive"
+    if metricas is not None:
+        @app.route('/metrics')
+        def metrics():
+            return Response(metricas.exponer(), content_type=TIPO_METRICAS)
+
+    if red is not None:
+        @app.route('/status')
+        def status():
+            codigo, cuerpo, cabeceras = respuesta_estado(
+                red, formato_estado(request.args.get('formato'), request.headers.get('Accept', '')), request.headers.get('If-None-Match')
+            )
+            return Response(cuerpo, status=codigo, headers=cabeceras)
 
-def run():
     app.run(host='0.0.0.0', port=8080)
 
-def keep_alive():
-    t = Thread(target=run)
+def keep_alive(metricas=None, red=None):
+    t = Thread(target=run, args=(metricas, red))
     t.start()
+
+async def _medir_retraso(estado, intervalo=1.0):
+    loop = asyncio.get_running_loop()
+    while True:
+        inicio = loop.time()
+        await asyncio.sleep(intervalo)
+        estado['retraso'] = max(0.0, loop.time() - inicio - intervalo)
+
+async def keep_alive_async(bot, metricas=None, red=None, host='0.0.0.0', port=8080):
+    from aiohttp import web
+
+    estado = {'retraso': 0.0}
+    estado['tarea'] = asyncio.create_task(_medir_retraso(estado))
+
+    async def home(peticion):
+        return web.Response(text="I'm alive")
+
+    async def livez(peticion):
+        return web.Response(text='ok')
+
+    async def healthz(peticion):
+        listo = bot.is_ready() and not bot.is_closed()
+        latencia = bot.latency
+        return web.json_response({
+            'listo': listo,
+            'latencia_ws_ms': round(latencia * 1000, 1) if math.isfinite(latencia) else None,
+            'retraso_bucle_ms': round(estado['retraso'] * 1000, 1),
+            'servidores': len(bot.guilds),
+        }, status=200 if listo else 503)
+
+    app = web.Application()
+    app.router.add_get('/', home)
+    app.router.add_get('/livez', livez)
+    app.router.add_get('/healthz', healthz)
+    if metricas is not None:
+        async def metrics(peticion):
+            return web.Response(body=metricas.exponer().encode('utf-8'), headers={'Content-Type': TIPO_METRICAS})
+
+        app.router.add_get('/metrics', metrics)
+    if red is not None:
+        async def status(peticion):
+            codigo, cuerpo, cabeceras = respuesta_estado(
+                red, formato_estado(peticion.query.get('formato'), peticion.headers.get('Accept', '')), peticion.headers.get('If-None-Match')
+            )
+            return web.Response(body=cuerpo, status=codigo, headers=cabeceras)
+
+        app.router.add_get('/status', status)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
@@ -0,0 +1,164 @@
+# Extensión de comandos de información general: ayuda, estado del bot, IP del servidor y comandos del juego.
+# El bot la carga con `bot.load_extension` en cuanto se conecta a Discord (ver `cargar_extensiones`), y `+recargar`
+# la vuelve a cargar si se cambia este archivo: así se puede cambiar, por ejemplo, el texto de `+help` sin reiniciar.
+# Como el bot, cada extensión viene en dos versiones: esta, con documentación, la carga `Código_con_documentación.py`,
+# y `informacion_sin_documentacion.py` la carga `Código_sin_documentación.py` (ver `GestorExtensiones`).
+# `olympusbot` es el propio archivo del bot, que se registra con ese nombre para que las extensiones puedan usar
+# sus funciones y objetos (la configuración de cada servidor, el agrupador de respuestas...).
+import discord
+from discord.ext import commands
+
+from olympusbot import COMANDOS_SERVIDOR, NOTA_COMANDOS, PIE_AYUDA, EmbedCacheado, agrupador, configuracion_de, configuraciones, registrar_comando
+
+# Funciones constructoras de los embeds
+# Cada función crea el embed de una respuesta. Solo se ejecutan al registrar/reconstruir la caché,
+# nunca en cada llamada a un comando.
+# Todas reciben la configuración del servidor de Discord, de la que toman el prefijo y la IP.
+
+# Embed de `+help` con la lista de comandos del bot.
+def embed_ayuda(configuracion):
+    prefijo = configuracion.prefijo
+    # Crea un mensaje "embed" o incrustado, que es un mensaje estilizado con título, descripción, campos y otros detalles.
+    embed = EmbedCacheado(
+        title='Comandos',  # Título del embed
+        description='Aquí están los comandos que puedes utilizar para mejorar tu experiencia en Discord y en el servidor de Minecraft.',
+        color=discord.Color.purple()  # Color del borde del embed, en este caso morado
+    )
+    # Usa `add_field` para añadir cada comando con su respectiva descripción en el embed.
+    # El parámetro `name` especifica el nombre del campo (comando), y `value` especifica la descripción.
+    # `inline=False` hace que cada campo se muestre en una línea separada.
+    embed.add_field(name=f'`{prefijo}ip`', value='Muestra la IP del servidor de Minecraft.', inline=False)
+    embed.add_field(name=f'`{prefijo}normas`', value='Clasificación de normas del servidor de Minecraft: graves, leves, juicio y staff.', inline=False)
+    embed.add_field(name=f'`{prefijo}leves`', value='Muestra las normas leves.', inline=False)
+    embed.add_field(name=f'`{prefijo}graves`', value='Muestra las normas graves.', inline=False)
+    embed.add_field(name=f'`{prefijo}juicio`', value='Muestra las normas aplicables en el juicio.', inline=False)
+    embed.add_field(name=f'`{prefijo}staff`', value='Muestra las normas del staff de Minecraft.', inline=False)
+    embed.add_field(name=f'`{prefijo}clanes`', value='Muestra las reglas para los clanes.', inline=False)
+    embed.add_field(name=f'`{prefijo}comandos`', value='Lista de comandos que puedes usar en el servidor.', inline=False)
+    embed.add_field(name=f'`{prefijo}buscar <términos>`', value='Busca normas y comandos que contengan esas palabras.', inline=False)
+    embed.add_field(name=f'`{prefijo}tienda [rango]`', value='Rangos y precios de la tienda, o los detalles de un rango.', inline=False)
+    embed.add_field(name=f'`{prefijo}top <estadística>`', value='Clasificación de jugadores del servidor de Minecraft.', inline=False)
+    embed.add_field(name=f'`{prefijo}stats <jugador>`', value='Estadísticas de un jugador del servidor de Minecraft.', inline=False)
+    embed.add_field(name='Emergencia', value='Para reportar un bug o problema de OlympusBot, contacta a la creadora Paulidex.', inline=False)
+    # El pie de página proporciona información de contacto, indicando cómo comunicarse para contrataciones.
+    embed.set_footer(text='Para contrataciones, contactar a Paulidex#9510.')
+    return embed
+
+# Embed de `+ip` con la IP y las versiones compatibles del servidor.
+# Si ya se consultó el estado del servidor, se añaden campos con el estado, los jugadores, la versión y la latencia.
+def embed_ip(configuracion):
+    embed = EmbedCacheado(
+        title='Servidor Minecraft Java',  # Título del embed
+        description=f'Versión 1.16.5 - 1.17.1: {configuracion.ip}',  # Descripción con la IP y versiones del servidor
+        color=discord.Color.purple()  # Color del borde del embed
+    )
+    estado = configuracion.estado.ultimo
+    if estado is not None and estado['en_linea']:
+        # `inline=True` muestra estos campos uno al lado del otro.
+        embed.add_field(name='Estado', value='En línea', inline=True)
+        embed.add_field(name='Jugadores', value=f"{estado['jugadores']}/{estado['maximo']}", inline=True)
+        embed.add_field(name='Versión', value=estado['version'], inline=True)
+        embed.add_field(name='Latencia', value=f"{estado['latencia']} ms", inline=True)
+    elif estado is not None:
+        embed.add_field(name='Estado', value='Fuera de línea', inline=True)
+    embed.set_footer(text=PIE_AYUDA.format(prefijo=configuracion.prefijo))
+    return embed
+
+# Embed de `+comandos` con los comandos que se pueden usar dentro del servidor de Minecraft.
+def embed_comandos(configuracion):
+    embed = EmbedCacheado(
+        title='Comandos que puedes usar en el servidor',  # Título del embed
+        description=' \n'.join(COMANDOS_SERVIDOR) + ' \n\n' + NOTA_COMANDOS,
+        color=discord.Color.purple()  # Color morado para el borde del embed
+    )
+    embed.set_footer(text=PIE_AYUDA.format(prefijo=configuracion.prefijo))
+    return embed
+
+# Registra en la caché de respuestas de una configuración las respuestas estáticas de esta extensión.
+# El bot llama a esta función cada vez que crea la caché de un servidor (ver `ConfiguracionServidor.obtener_respuestas`).
+def registrar_respuestas(configuracion, respuestas):
+    respuestas.registrar('help', lambda: embed_ayuda(configuracion))
+    respuestas.registrar('ip', lambda: embed_ip(configuracion))
+    respuestas.registrar('comandos', lambda: embed_comandos(configuracion))
+
+# Categoría de comandos de información general: ayuda, estado del bot, IP del servidor y comandos del juego.
+class Informacion(commands.Cog):
+    # Comando de ayuda que muestra un mensaje incrustado (embed) con la lista de comandos del bot.
+    # `@registrar_comando` es un decorador que convierte la función siguiente en un comando accesible para los usuarios.
+    # Al usar `@registrar_comando(name='help')`, se define un comando `+help` que los usuarios pueden escribir para ver la lista de comandos.
+    # `description` es el texto que Discord muestra junto al comando cuando se usa como comando de barra (`/help`).
+    # `@agrupador.agrupar` agrupa las peticiones repetidas de este comando en un mismo canal (ver `AgrupadorRespuestas`).
+
+    @registrar_comando(name='help', description='Muestra la lista de comandos del bot.')
+    @agrupador.agrupar
+    async def help(self, ctx):
+        # Se obtiene la configuración del servidor de Discord (normalmente ya está en la caché, porque se usó para el prefijo).
+        # El embed ya está construido y serializado en su caché de respuestas; solo hay que obtenerlo y enviarlo.
+        # `ctx.send(embed=...)` utiliza el contexto (`ctx`) para enviar el embed en el canal donde se ejecutó el comando.
+        # `await` se utiliza para esperar a que se complete el envío del mensaje antes de continuar con otras operaciones.
+        configuracion = await configuracion_de(ctx)
+        await ctx.send(embed=configuracion.obtener_respuestas().obtener('help'))
+
+    # Comando para verificar si el bot está funcionando
+    # `@registrar_comando()` es un decorador que convierte la función siguiente en un comando de bot.
+    # Aquí se define un comando sin nombre específico, lo que significa que su nombre será el mismo que el de la función: `a`.
+    # Los usuarios pueden escribir `+a` para ejecutar este comando y comprobar si el bot está activo.
+
+    @registrar_comando(description='Comprueba que el bot está funcionando.')
+    async def a(self, ctx):
+        # La función `a` es asincrónica, permitiendo que el bot responda a este comando sin bloquear otras operaciones.
+        # El parámetro `ctx` (contexto) contiene información sobre el lugar donde se llamó al comando,
+        # incluyendo el canal en el que debe enviarse la respuesta.
+
+        # `ctx.send` es el método que envía un mensaje en el canal desde el que se llamó el comando.
+        # Aquí se envía el mensaje "El bot está funcionando correctamente" como confirmación de que el bot está activo.
+        # `await` se utiliza para esperar a que se complete el envío del mensaje antes de continuar con otras operaciones.
+        await ctx.send('El bot está funcionando correctamente')  # Envía el mensaje de confirmación como prueba.
+
+    # Comando para mostrar la IP del servidor de Minecraft
+    # `@registrar_comando()` es un decorador que convierte la función siguiente en un comando del bot.
+    # Como no se especifica un nombre, el comando usará el nombre de la función: `ip`.
+    # Los usuarios pueden escribir `+ip` para ejecutar este comando y recibir la IP del servidor de Minecraft.
+
+    # Comando que muestra la IP del servidor de Minecraft
+    # `@registrar_comando()` convierte la función siguiente en un comando del bot accesible para los usuarios.
+    # Al no especificar un nombre en el decorador, el comando se ejecutará escribiendo `+ip`, permitiendo que los usuarios vean la IP del servidor.
+
+    @registrar_comando(description='Muestra la IP y el estado del servidor de Minecraft.')
+    @agrupador.agrupar
+    async def ip(self, ctx):
+        # Como consultar el servidor puede tardar más de los 3 segundos que Discord da para responder a un comando de barra,
+        # `ctx.defer()` avisa a Discord de que la respuesta llegará más tarde. Con comandos de prefijo no hace nada.
+        await ctx.defer()
+        # Primero se obtiene el estado del servidor de Minecraft configurado en este servidor de Discord
+        # (desde la caché si aún no caducó).
+        # Si el estado cambió, el embed de `+ip` se habrá invalidado y se construirá de nuevo al obtenerlo.
+        configuracion = await configuracion_de(ctx)
+        await configuracion.estado.obtener()
+        # El embed ya está construido y serializado en la caché de respuestas; solo hay que obtenerlo y enviarlo.
+        # `ctx.send(embed=...)` utiliza el contexto (`ctx`) para enviar el embed en el canal donde se ejecutó el comando.
+        # `await` se utiliza para esperar a que se complete el envío del mensaje antes de continuar con otras operaciones.
+        await ctx.send(embed=configuracion.obtener_respuestas().obtener('ip'))
+
+    # Comando que muestra los comandos utilizables en el servidor
+    # `@registrar_comando(name='comandos')` convierte la función siguiente en un comando del bot accesible para los usuarios.
+    # Con `name='comandos'`, el comando se ejecuta escribiendo `+comandos`, permitiendo que los usuarios vean una lista de comandos disponibles en el servidor.
+
+    @registrar_comando(name='comandos', description='Muestra los comandos del servidor de Minecraft.')
+    @agrupador.agrupar
+    async def comandos(self, ctx):
+        # El embed ya está construido y serializado en la caché de respuestas; solo hay que obtenerlo y enviarlo.
+        # `ctx.send(embed=...)` utiliza el contexto (`ctx`) para enviar el embed en el canal donde se ejecutó el comando.
+        # `await` se utiliza para esperar a que se complete el envío del mensaje antes de continuar con otras operaciones.
+        configuracion = await configuracion_de(ctx)
+        await ctx.send(embed=configuracion.obtener_respuestas().obtener('comandos'))
+
+# discord.py llama a `setup` al cargar la extensión: registra las respuestas (que se construyen al momento para la
+# configuración por defecto) y añade los comandos.
+async def setup(bot):
+    configuraciones.registrar_respuestas(__name__, registrar_respuestas)
+    await bot.add_cog(Informacion())
+
+# Y a `teardown` al descargarla o antes de recargarla: quita sus respuestas de las cachés.
+async def teardown(bot):
+    configuraciones.registrar_respuestas(__name__, None)
@@ -0,0 +1,90 @@
+import discord
+from discord.ext import commands
+
+from olympusbot import COMANDOS_SERVIDOR, NOTA_COMANDOS, PIE_AYUDA, EmbedCacheado, agrupador, configuracion_de, configuraciones, registrar_comando
+
+def embed_ayuda(configuracion):
+    prefijo = configuracion.prefijo
+    embed = EmbedCacheado(
+        title='Comandos',
+        description='Aquí están los comandos que puedes utilizar para mejorar tu experiencia en Discord y en el servidor de Minecraft.',
+        color=discord.Color.purple()
+    )
+    embed.add_field(name=f'`{prefijo}ip`', value='Muestra la IP del servidor de Minecraft.', inline=False)
+    embed.add_field(name=f'`{prefijo}normas`', value='Clasificación de normas del servidor de Minecraft: graves, leves, juicio y staff.', inline=False)
+    embed.add_field(name=f'`{prefijo}leves`', value='Muestra las normas leves.', inline=False)
+    embed.add_field(name=f'`{prefijo}graves`', value='Muestra las normas graves.', inline=False)
+    embed.add_field(name=f'`{prefijo}juicio`', value='Muestra las normas aplicables en el juicio.', inline=False)
+    embed.add_field(name=f'`{prefijo}staff`', value='Muestra las normas del staff de Minecraft.', inline=False)
+    embed.add_field(name=f'`{prefijo}clanes`', value='Muestra las reglas para los clanes.', inline=False)
+    embed.add_field(name=f'`{prefijo}comandos`', value='Lista de comandos que puedes usar en el servidor.', inline=False)
+    embed.add_field(name=f'`{prefijo}buscar <términos>`', value='Busca normas y comandos que contengan esas palabras.', inline=False)
+    embed.add_field(name=f'`{prefijo}tienda [rango]`', value='Rangos y precios de la tienda, o los detalles de un rango.', inline=False)
+    embed.add_field(name=f'`{prefijo}top <estadística>`', value='Clasificación de jugadores del servidor de Minecraft.', inline=False)
+    embed.add_field(name=f'`{prefijo}stats <jugador>`', value='Estadísticas de un jugador del servidor de Minecraft.', inline=False)
+    embed.add_field(name='Emergencia', value='Para reportar un bug o problema de OlympusBot, contacta a la creadora Paulidex.', inline=False)
+    embed.set_footer(text='Para contrataciones, contactar a Paulidex#9510.')
+    return embed
+
+def embed_ip(configuracion):
+    embed = EmbedCacheado(
+        title='Servidor Minecraft Java',
+        description=f'Versión 1.16.5 - 1.17.1: {configuracion.ip}',
+        color=discord.Color.purple()
+    )
+    estado = configuracion.estado.ultimo
+    if estado is not None and estado['en_linea']:
+        embed.add_field(name='Estado', value='En línea', inline=True)
+        embed.add_field(name='Jugadores', value=f"{estado['jugadores']}/{estado['maximo']}", inline=True)
+        embed.add_field(name='Versión', value=estado['version'], inline=True)
+        embed.add_field(name='Latencia', value=f"{estado['latencia']} ms", inline=True)
+    elif estado is not None:
+        embed.add_field(name='Estado', value='Fuera de línea', inline=True)
+    embed.set_footer(text=PIE_AYUDA.format(prefijo=configuracion.prefijo))
+    return embed
+
+def embed_comandos(configuracion):
+    embed = EmbedCacheado(
+        title='Comandos que puedes usar en el servidor',
+        description=' \n'.join(COMANDOS_SERVIDOR) + ' \n\n' + NOTA_COMANDOS,
+        color=discord.Color.purple()
+    )
+    embed.set_footer(text=PIE_AYUDA.format(prefijo=configuracion.prefijo))
+    return embed
+
+def registrar_respuestas(configuracion, respuestas):
+    respuestas.registrar('help', lambda: embed_ayuda(configuracion))
+    respuestas.registrar('ip', lambda: embed_ip(configuracion))
+    respuestas.registrar('comandos', lambda: embed_comandos(configuracion))
+
+class Informacion(commands.Cog):
+    @registrar_comando(name='help', description='Muestra la lista de comandos del bot.')
+    @agrupador.agrupar
+    async def help(self, ctx):
+        configuracion = await configuracion_de(ctx)
+        await ctx.send(embed=configuracion.obtener_respuestas().obtener('help'))
+
+    @registrar_comando(description='Comprueba que el bot está funcionando.')
+    async def a(self, ctx):
+        await ctx.send('El bot está funcionando correctamente')
+
+    @registrar_comando(description='Muestra la IP y el estado del servidor de Minecraft.')
+    @agrupador.agrupar
+    async def ip(self, ctx):
+        await ctx.defer()
+        configuracion = await configuracion_de(ctx)
+        await configuracion.estado.obtener()
+        await ctx.send(embed=configuracion.obtener_respuestas().obtener('ip'))
+
+    @registrar_comando(name='comandos', description='Muestra los comandos del servidor de Minecraft.')
+    @agrupador.agrupar
+    async def comandos(self, ctx):
+        configuracion = await configuracion_de(ctx)
+        await ctx.send(embed=configuracion.obtener_respuestas().obtener('comandos'))
+
+async def setup(bot):
+    configuraciones.registrar_respuestas(__name__, registrar_respuestas)
+    await bot.add_cog(Informacion())
+
+async def teardown(bot):
+    configuraciones.registrar_respuestas(__name__, None)
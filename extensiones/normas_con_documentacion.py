@@ -0,0 +1,152 @@
+# Extensión de comandos de normas: la explicación general, cada categoría de normas y el buscador.
+# El bot la carga en cuanto se conecta a Discord, y `+recargar` la vuelve a cargar si se cambia este archivo.
+# Es la versión con documentación de `normas_sin_documentacion.py`.
+# El texto de las normas no está aquí, sino en `NORMAS` del bot y en `ARCHIVO_NORMAS` (ver "Recarga en caliente").
+import discord
+from discord.ext import commands
+
+from olympusbot import LARGO_CONSULTA, LARGO_DESCRIPCION, PIE_AYUDA, PIE_NORMAS, EmbedCacheado, agrupador, configuracion_de, configuraciones, registrar_comando, texto_normas
+
+# Embed de una categoría de normas (`leves`, `graves`, `juicio`, `clanes` o `staff`).
+# La descripción numera cada norma de la lista con `texto_normas` del bot: "1) ... \n2) ...".
+def embed_normas(configuracion, categoria):
+    titulo, reglas = configuracion.normas[categoria]
+    embed = EmbedCacheado(
+        title=titulo,
+        description=texto_normas(reglas),
+        color=discord.Color.purple()  # Color morado para el borde del embed
+    )
+    # El pie de página recuerda que las normas son acumulativas y sugiere escribir `+help`.
+    embed.set_footer(text=PIE_NORMAS.format(prefijo=configuracion.prefijo))
+    return embed
+
+# Registra una respuesta por categoría de normas en la caché de respuestas de una configuración.
+# `categoria=categoria` fija el valor de la categoría en cada función, ya que de lo contrario todas usarían la
+# última categoría del bucle.
+def registrar_respuestas(configuracion, respuestas):
+    for categoria in configuracion.normas:
+        respuestas.registrar(categoria, lambda categoria=categoria: embed_normas(configuracion, categoria))
+
+# Categoría de comandos de normas: la explicación general, cada categoría de normas y el buscador.
+class Normas(commands.Cog):
+    # Comando que muestra cómo acceder a las normas del servidor
+    # `@registrar_comando()` es un decorador que convierte la función siguiente en un comando del bot.
+    # Como no se especifica un nombre, el comando usará el nombre de la función: `normas`.
+    # Los usuarios pueden escribir `+normas` para ejecutar este comando y recibir información sobre cómo ver las normas del servidor.
+
+    @registrar_comando(description='Explica cómo consultar las normas del servidor.')
+    @agrupador.agrupar
+    async def normas(self, ctx):
+        # La función `normas` es asincrónica, lo cual permite que el bot responda a este comando sin bloquear otras operaciones.
+        # El parámetro `ctx` (contexto) proporciona información sobre dónde se llamó el comando,
+        # permitiendo que el bot envíe la respuesta en el mismo canal.
+
+        # `ctx.send` es el método que envía un mensaje en el canal donde se activó el comando.
+        # Aquí, el mensaje informa que las normas están clasificadas y sugiere comandos para ver cada tipo de norma,
+        # escritos con el prefijo de este servidor.
+        # `await` se utiliza para esperar a que se complete el envío del mensaje antes de continuar con otras operaciones.
+        prefijo = (await configuracion_de(ctx)).prefijo
+        await ctx.send(f'Las normas están clasificadas en graves, leves, staff y juicio. Para verlas, escribe `{prefijo}graves` `{prefijo}leves` `{prefijo}staff` `{prefijo}juicio` `{prefijo}clanes`')
+
+    # Comando que muestra las normas leves del servidor
+    # `@registrar_comando(name='leves')` convierte la función siguiente en un comando del bot accesible para los usuarios.
+    # Con `name='leves'`, el comando se ejecuta escribiendo `+leves`, permitiendo que los usuarios vean las normas leves.
+
+    @registrar_comando(name='leves', description='Muestra las normas leves.')
+    @agrupador.agrupar
+    async def leves(self, ctx):
+        # El embed ya está construido y serializado en la caché de respuestas; solo hay que obtenerlo y enviarlo.
+        # `ctx.send(embed=...)` utiliza el contexto (`ctx`) para enviar el embed en el canal donde se ejecutó el comando.
+        # `await` se utiliza para esperar a que se complete el envío del mensaje antes de continuar con otras operaciones.
+        configuracion = await configuracion_de(ctx)
+        await ctx.send(embed=configuracion.obtener_respuestas().obtener('leves'))
+
+    # Comando que muestra las normas graves del servidor
+    # `@registrar_comando(name='graves')` convierte la función siguiente en un comando del bot accesible para los usuarios.
+    # Con `name='graves'`, el comando se ejecuta escribiendo `+graves`, permitiendo que los usuarios vean las normas graves.
+
+    @registrar_comando(name='graves', description='Muestra las normas graves.')
+    @agrupador.agrupar
+    async def graves(self, ctx):
+        # El embed ya está construido y serializado en la caché de respuestas; solo hay que obtenerlo y enviarlo.
+        # `ctx.send(embed=...)` utiliza el contexto (`ctx`) para enviar el embed en el canal donde se ejecutó el comando.
+        # `await` se utiliza para esperar a que se complete el envío del mensaje antes de continuar con otras operaciones.
+        configuracion = await configuracion_de(ctx)
+        await ctx.send(embed=configuracion.obtener_respuestas().obtener('graves'))
+
+    # Comando que muestra las normas de juicio
+    # `@registrar_comando(name='juicio')` convierte la función siguiente en un comando del bot accesible para los usuarios.
+    # Con `name='juicio'`, el comando se ejecuta escribiendo `+juicio`, permitiendo que los usuarios vean las normas aplicables en el juicio.
+
+    @registrar_comando(name='juicio', description='Muestra las normas aplicables en el juicio.')
+    @agrupador.agrupar
+    async def juicio(self, ctx):
+        # El embed ya está construido y serializado en la caché de respuestas; solo hay que obtenerlo y enviarlo.
+        # `ctx.send(embed=...)` utiliza el contexto (`ctx`) para enviar el embed en el canal donde se ejecutó el comando.
+        # `await` se utiliza para esperar a que se complete el envío del mensaje antes de continuar con otras operaciones.
+        configuracion = await configuracion_de(ctx)
+        await ctx.send(embed=configuracion.obtener_respuestas().obtener('juicio'))
+
+    # Comando que muestra las normas de los clanes
+    # `@registrar_comando(name='clanes')` convierte la función siguiente en un comando del bot accesible para los usuarios.
+    # Con `name='clanes'`, el comando se ejecuta escribiendo `+clanes`, permitiendo que los usuarios vean las normas aplicables a los clanes.
+
+    @registrar_comando(name='clanes', description='Muestra las normas de los clanes.')
+    @agrupador.agrupar
+    async def clanes(self, ctx):
+        # El embed ya está construido y serializado en la caché de respuestas; solo hay que obtenerlo y enviarlo.
+        # `ctx.send(embed=...)` utiliza el contexto (`ctx`) para enviar el embed en el canal donde se ejecutó el comando.
+        # `await` se utiliza para esperar a que se complete el envío del mensaje antes de continuar con otras operaciones.
+        configuracion = await configuracion_de(ctx)
+        await ctx.send(embed=configuracion.obtener_respuestas().obtener('clanes'))
+
+    # Comando que muestra las normas del staff
+    # `@registrar_comando(name='staff')` convierte la función siguiente en un comando del bot accesible para los usuarios.
+    # Con `name='staff'`, el comando se ejecuta escribiendo `+staff`, permitiendo que los usuarios vean las normas aplicables al staff.
+
+    @registrar_comando(name='staff', description='Muestra las normas del staff de Minecraft.')
+    @agrupador.agrupar
+    async def staff(self, ctx):
+        # El embed ya está construido y serializado en la caché de respuestas; solo hay que obtenerlo y enviarlo.
+        # `ctx.send(embed=...)` utiliza el contexto (`ctx`) para enviar el embed en el canal donde se ejecutó el comando.
+        # `await` se utiliza para esperar a que se complete el envío del mensaje antes de continuar con otras operaciones.
+        configuracion = await configuracion_de(ctx)
+        await ctx.send(embed=configuracion.obtener_respuestas().obtener('staff'))
+
+    # Comando para buscar normas por palabras clave
+    # `@registrar_comando(name='buscar')` crea el comando `+buscar`, por ejemplo: `+buscar xray` o `+buscar cárcel`.
+    # El parámetro `*, terminos` indica a discord.py que todo el texto escrito después del comando
+    # se entregue como una sola cadena en `terminos`, aunque tenga espacios.
+
+    @registrar_comando(name='buscar', description='Busca normas y comandos por palabras clave.')
+    async def buscar(self, ctx, *, terminos=''):
+        # Consulta el índice invertido de las normas de este servidor, que devuelve las que coinciden ordenadas por relevancia.
+        configuracion = await configuracion_de(ctx)
+        resultados = configuracion.obtener_indice().buscar(terminos)
+        # Si no hay coincidencias, se avisa al usuario y se termina el comando con `return`.
+        if not resultados:
+            await ctx.send(f'No encontré normas que coincidan con tu búsqueda. Para ver todas las normas, escribe `{configuracion.prefijo}normas`')
+            return
+        # Crea un embed con una línea por norma encontrada, indicando su categoría y número (por ejemplo "Normas Graves #6").
+        # Discord rechaza los embeds con un título de más de 256 caracteres o una descripción de más de 4096, así que
+        # una búsqueda muy larga se recorta en el título y la lista se corta si las normas son muy largas.
+        consulta = terminos if len(terminos) <= LARGO_CONSULTA else terminos[:LARGO_CONSULTA] + '…'
+        embed = discord.Embed(
+            title=f'Resultados para "{consulta}"',
+            description='\n'.join(f'**{categoria} #{numero}:** {texto}' for categoria, numero, texto in resultados)[:LARGO_DESCRIPCION],
+            color=discord.Color.purple()  # Color morado para el borde del embed
+        )
+        embed.set_footer(text=PIE_AYUDA.format(prefijo=configuracion.prefijo))
+        await ctx.send(embed=embed)
+
+# discord.py llama a `setup` al cargar la extensión: registra las respuestas de las normas (que se construyen al
+# momento para la configuración por defecto), construye el índice de búsqueda de las normas por defecto, para que el
+# primer `+buscar` no tenga que esperar, y añade los comandos.
+async def setup(bot):
+    configuraciones.registrar_respuestas(__name__, registrar_respuestas)
+    configuraciones.por_defecto.obtener_indice()
+    await bot.add_cog(Normas())
+
+# Y a `teardown` al descargarla o antes de recargarla: quita sus respuestas de las cachés.
+async def teardown(bot):
+    configuraciones.registrar_respuestas(__name__, None)
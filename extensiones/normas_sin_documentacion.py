@@ -0,0 +1,79 @@
+import discord
+from discord.ext import commands
+
+from olympusbot import LARGO_CONSULTA, LARGO_DESCRIPCION, PIE_AYUDA, PIE_NORMAS, EmbedCacheado, agrupador, configuracion_de, configuraciones, registrar_comando, texto_normas
+
+def embed_normas(configuracion, categoria):
+    titulo, reglas = configuracion.normas[categoria]
+    embed = EmbedCacheado(
+        title=titulo,
+        description=texto_normas(reglas),
+        color=discord.Color.purple()
+    )
+    embed.set_footer(text=PIE_NORMAS.format(prefijo=configuracion.prefijo))
+    return embed
+
+def registrar_respuestas(configuracion, respuestas):
+    for categoria in configuracion.normas:
+        respuestas.registrar(categoria, lambda categoria=categoria: embed_normas(configuracion, categoria))
+
+class Normas(commands.Cog):
+    @registrar_comando(description='Explica cómo consultar las normas del servidor.')
+    @agrupador.agrupar
+    async def normas(self, ctx):
+        prefijo = (await configuracion_de(ctx)).prefijo
+        await ctx.send(f'Las normas están clasificadas en graves, leves, staff y juicio. Para verlas, escribe `{prefijo}graves` `{prefijo}leves` `{prefijo}staff` `{prefijo}juicio` `{prefijo}clanes`')
+
+    @registrar_comando(name='leves', description='Muestra las normas leves.')
+    @agrupador.agrupar
+    async def leves(self, ctx):
+        configuracion = await configuracion_de(ctx)
+        await ctx.send(embed=configuracion.obtener_respuestas().obtener('leves'))
+
+    @registrar_comando(name='graves', description='Muestra las normas graves.')
+    @agrupador.agrupar
+    async def graves(self, ctx):
+        configuracion = await configuracion_de(ctx)
+        await ctx.send(embed=configuracion.obtener_respuestas().obtener('graves'))
+
+    @registrar_comando(name='juicio', description='Muestra las normas aplicables en el juicio.')
+    @agrupador.agrupar
+    async def juicio(self, ctx):
+        configuracion = await configuracion_de(ctx)
+        await ctx.send(embed=configuracion.obtener_respuestas().obtener('juicio'))
+
+    @registrar_comando(name='clanes', description='Muestra las normas de los clanes.')
+    @agrupador.agrupar
+    async def clanes(self, ctx):
+        configuracion = await configuracion_de(ctx)
+        await ctx.send(embed=configuracion.obtener_respuestas().obtener('clanes'))
+
+    @registrar_comando(name='staff', description='Muestra las normas del staff de Minecraft.')
+    @agrupador.agrupar
+    async def staff(self, ctx):
+        configuracion = await configuracion_de(ctx)
+        await ctx.send(embed=configuracion.obtener_respuestas().obtener('staff'))
+
+    @registrar_comando(name='buscar', description='Busca normas y comandos por palabras clave.')
+    async def buscar(self, ctx, *, terminos=''):
+        configuracion = await configuracion_de(ctx)
+        resultados = configuracion.obtener_indice().buscar(terminos)
+        if not resultados:
+            await ctx.send(f'No encontré normas que coincidan con tu búsqueda. Para ver todas las normas, escribe `{configuracion.prefijo}normas`')
+            return
+        consulta = terminos if len(terminos) <= LARGO_CONSULTA else terminos[:LARGO_CONSULTA] + '…'
+        embed = discord.Embed(
+            title=f'Resultados para "{consulta}"',
+            description='\n'.join(f'**{categoria} #{numero}:** {texto}' for categoria, numero, texto in resultados)[:LARGO_DESCRIPCION],
+            color=discord.Color.purple()
+        )
+        embed.set_footer(text=PIE_AYUDA.format(prefijo=configuracion.prefijo))
+        await ctx.send(embed=embed)
+
+async def setup(bot):
+    configuraciones.registrar_respuestas(__name__, registrar_respuestas)
+    configuraciones.por_defecto.obtener_indice()
+    await bot.add_cog(Normas())
+
+async def teardown(bot):
+    configuraciones.registrar_respuestas(__name__, None)
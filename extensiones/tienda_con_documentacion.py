@@ -0,0 +1,49 @@
+# Extensión con el comando de la tienda del servidor.
+# El bot la carga en cuanto se conecta a Discord, y `+recargar` la vuelve a cargar si se cambia este archivo.
+# Es la versión con documentación de `tienda_sin_documentacion.py`.
+# El catálogo de Tebex (la consulta, la caché y los embeds) está en el bot (ver `CatalogoTienda`), así que recargar
+# esta extensión no vacía la caché del catálogo.
+import discord
+from discord.ext import commands
+
+from olympusbot import agrupador, catalogo_de, configuracion_de, registrar_comando
+
+# Categoría de comandos de la tienda del servidor.
+class Tienda(commands.Cog):
+    # Comando para ver la tienda de donaciones
+    # `@registrar_comando()` es un decorador que convierte la función siguiente en un comando del bot.
+    # Aquí se define un comando sin nombre específico, por lo que el nombre del comando será el mismo que el de la función: `tienda`.
+    # Los usuarios pueden escribir `+tienda` para ver todos los rangos con sus precios, o `+tienda <rango>` para ver
+    # los detalles de uno. Si la tienda no tiene token de Tebex o su catálogo todavía no ha llegado, se envía el enlace.
+
+    @registrar_comando(description='Muestra los rangos y precios de la tienda del servidor.')
+    async def tienda(self, ctx, *, rango=None):
+        # `*, rango=None` recoge todo el texto tras el comando, así que los rangos con espacios funcionan sin comillas.
+        # Solo `+tienda` sin nada más se agrupa con `agrupador` (todos reciben el mismo catálogo); cada búsqueda de
+        # un rango se responde por separado, porque la respuesta depende del texto.
+        if rango is None:
+            await self._catalogo(ctx)
+        else:
+            await self._responder(ctx, rango)
+
+    @agrupador.agrupar
+    async def _catalogo(self, ctx):
+        await self._responder(ctx)
+
+    async def _responder(self, ctx, rango=None):
+        configuracion = await configuracion_de(ctx)
+        catalogo = catalogo_de(configuracion.tienda)
+        # `catalogo.obtener()` responde al momento con el catálogo guardado, o None si todavía no ha llegado, y lo
+        # descarga o actualiza en segundo plano si hace falta. Nunca espera a Tebex.
+        if catalogo is None or not await catalogo.obtener():
+            await ctx.send(f'Visita nuestra tienda para ver nuestros rangos y realizar donaciones ^.^ `{configuracion.tienda}`')
+            return
+        embed = catalogo.embed(configuracion.tienda, rango)
+        if embed is None:
+            await ctx.send(f'No hay ningún rango llamado `{discord.utils.escape_markdown(rango)}`. Para verlos todos, escribe `{ctx.prefix}tienda`')
+            return
+        await ctx.send(embed=embed)
+
+# discord.py llama a `setup` al cargar la extensión.
+async def setup(bot):
+    await bot.add_cog(Tienda())
@@ -0,0 +1,31 @@
+import discord
+from discord.ext import commands
+
+from olympusbot import agrupador, catalogo_de, configuracion_de, registrar_comando
+
+class Tienda(commands.Cog):
+    @registrar_comando(description='Muestra los rangos y precios de la tienda del servidor.')
+    async def tienda(self, ctx, *, rango=None):
+        if rango is None:
+            await self._catalogo(ctx)
+        else:
+            await self._responder(ctx, rango)
+
+    @agrupador.agrupar
+    async def _catalogo(self, ctx):
+        await self._responder(ctx)
+
+    async def _responder(self, ctx, rango=None):
+        configuracion = await configuracion_de(ctx)
+        catalogo = catalogo_de(configuracion.tienda)
+        if catalogo is None or not await catalogo.obtener():
+            await ctx.send(f'Visita nuestra tienda para ver nuestros rangos y realizar donaciones ^.^ `{configuracion.tienda}`')
+            return
+        embed = catalogo.embed(configuracion.tienda, rango)
+        if embed is None:
+            await ctx.send(f'No hay ningún rango llamado `{discord.utils.escape_markdown(rango)}`. Para verlos todos, escribe `{ctx.prefix}tienda`')
+            return
+        await ctx.send(embed=embed)
+
+async def setup(bot):
+    await bot.add_cog(Tienda())
@@ -0,0 +1,41 @@
+import asyncio
+import inspect
+import os
+import sys
+
+import pytest
+
+# Configuración común de las pruebas.
+# Cada prueba recibe en `modulo` una copia nueva del bot, cargada sin conectarse a Discord con `cargar_bot`
+# de `Benchmark_Comandos.py` (la misma que usan los benchmarks). Las pruebas `async def` se ejecutan en un bucle
+# de eventos nuevo con `asyncio.run`, y empiezan llamando a `preparar(modulo)` cuando necesitan un servidor y un
+# canal falsos.
+#
+# Uso:
+#   python -m pytest tests
+#   python -m pytest tests --documentado    # prueba los archivos con documentación
+
+DIRECTORIO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIRECTORIO)
+
+from Benchmark_Comandos import cargar_bot  # noqa: E402
+
+def pytest_addoption(parser):
+    parser.addoption('--documentado', action='store_true', help='prueba los archivos con documentación')
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_pyfunc_call(pyfuncitem):
+    if inspect.iscoroutinefunction(pyfuncitem.obj):
+        argumentos = {nombre: pyfuncitem.funcargs[nombre] for nombre in pyfuncitem._fixtureinfo.argnames}
+        asyncio.run(pyfuncitem.obj(**argumentos))
+        return True
+
+@pytest.fixture(scope='session')
+def rutas(request):
+    if request.config.getoption('documentado'):
+        return os.path.join(DIRECTORIO, 'Código_con_documentación.py'), os.path.join(DIRECTORIO, 'Servidor_Web_con_Documentación.py')
+    return os.path.join(DIRECTORIO, 'Código_sin_documentación.py'), os.path.join(DIRECTORIO, 'Servidor_Web_sin_Documentación.py')
+
+@pytest.fixture
+def modulo(rutas):
+    return cargar_bot(*rutas)
@@ -0,0 +1,147 @@
+import os
+import types
+
+import pytest
+
+from Benchmark_Anuncios import Envios, RelojFalso, avanzar, esperar_a, marca, medir, procesar
+from Benchmark_Comandos import preparar
+
+# Programador de anuncios (`Cron`, `interpretar_cuando` y `ProgramadorAnuncios`) con el reloj falso de
+# `Benchmark_Anuncios.py`, que solo avanza cuando se le pide: así se recorren horas de anuncios en milisegundos.
+# Las expresiones cron calculan bien la siguiente ejecución, los anuncios únicos se envían una vez a su hora y los
+# periódicos en cada ejecución, cancelar un anuncio evita que se envíe, y los anuncios sobreviven a un reinicio: los
+# que se perdieron con el bot apagado se envían una vez (política `recuperar`) o se saltan (política `saltar`).
+# Los comandos del staff solo ven y cancelan los anuncios de su propio servidor de Discord.
+
+@pytest.mark.parametrize('expresion, desde, esperado', [
+    ('0 18 * * 5', '2024-05-29 10:00', '2024-05-31 18:00'),
+    ('*/15 * * * *', '2024-05-29 10:07', '2024-05-29 10:15'),
+    ('0 0 29 2 *', '2023-03-01 00:00', '2024-02-29 00:00'),
+    ('30 9 1 * 1', '2024-05-29 10:00', '2024-06-01 09:30'),
+    ('30 9 1 * 1', '2024-06-01 10:00', '2024-06-03 09:30'),
+    ('0 12 * * 7', '2024-05-29 10:00', '2024-06-02 12:00'),
+    ('5 4 * 1-3,12 *', '2024-05-29 10:00', '2024-12-01 04:05'),
+    ('0 */6 * * *', '2024-05-29 18:00', '2024-05-30 00:00'),
+])
+def test_cron_siguiente(modulo, expresion, desde, esperado):
+    assert modulo.Cron(expresion).siguiente(marca(desde)) == marca(esperado)
+
+@pytest.mark.parametrize('expresion', ['* * *', '60 * * * *', '* * 0 * *', 'a * * * *', '0 0 31 2 *'])
+def test_cron_no_valido(modulo, expresion):
+    with pytest.raises(ValueError):
+        modulo.Cron(expresion).siguiente(marca('2024-01-01 00:00'))
+
+def test_interpretar_cuando(modulo):
+    ahora = marca('2024-05-29 10:00')
+    assert modulo.interpretar_cuando('1d2h30m', ahora) == (ahora + 95400, None)
+    assert modulo.interpretar_cuando('2024-06-01T18:00', ahora) == (marca('2024-06-01 18:00'), None)
+    assert modulo.interpretar_cuando('0 18 * * 5', ahora)[0] == marca('2024-05-31 18:00')
+
+async def test_unicos_periodicos_y_cancelados(modulo, tmp_path):
+    inicio = marca('2024-05-29 10:00')
+    reloj = RelojFalso(inicio)
+    envios = Envios(reloj)
+    programador = modulo.ProgramadorAnuncios(str(tmp_path / 'anuncios.db'), 60, reloj=reloj, esperar=reloj.esperar)
+    await programador.cargar()
+    programador.iniciar(envios.enviar)
+    try:
+        unico = await programador.agregar(1, 10, 'único', inicio + 3600, None, 'recuperar', 5)
+        cada_cuarto = modulo.Cron('*/15 * * * *')
+        periodico = await programador.agregar(1, 10, 'periódico', cada_cuarto.siguiente(inicio), cada_cuarto, 'recuperar', 5)
+        cancelado = await programador.agregar(1, 10, 'cancelado', inicio + 1800, None, 'recuperar', 5)
+        await programador.cancelar(cancelado.id)
+
+        await avanzar(programador, reloj, inicio + 3599)
+        assert unico.id not in {identificador for identificador, _ in envios.lista}
+        await avanzar(programador, reloj, inicio + 2 * 3600)
+        assert [momento for identificador, momento in envios.lista if identificador == unico.id] == [inicio + 3600]
+        assert [momento for identificador, momento in envios.lista if identificador == periodico.id] == [inicio + 900 * numero for numero in range(1, 9)]
+        assert cancelado.id not in {identificador for identificador, _ in envios.lista}
+        assert unico.id not in programador.anuncios
+    finally:
+        programador.detener()
+
+async def test_reinicio_con_anuncios_perdidos(modulo, tmp_path):
+    archivo = str(tmp_path / 'anuncios.db')
+    inicio = marca('2024-05-29 10:00')
+    reloj = RelojFalso(inicio)
+    envios = Envios(reloj)
+    programador = modulo.ProgramadorAnuncios(archivo, 60, reloj=reloj, esperar=reloj.esperar)
+    await programador.cargar()
+    programador.iniciar(envios.enviar)
+    cada_cuarto = modulo.Cron('*/15 * * * *')
+    periodico = await programador.agregar(1, 10, 'periódico', cada_cuarto.siguiente(inicio), cada_cuarto, 'recuperar', 5)
+    await avanzar(programador, reloj, inicio + 3600)
+    # Anuncios que vencerán con el bot apagado, con cada política.
+    perdidos = {
+        'unico_recuperar': await programador.agregar(1, 10, 'a', reloj.ahora + 600, None, 'recuperar', 5),
+        'unico_saltar': await programador.agregar(1, 10, 'b', reloj.ahora + 600, None, 'saltar', 5),
+        'periodico_recuperar': await programador.agregar(1, 10, 'c', cada_cuarto.siguiente(reloj.ahora), cada_cuarto, 'recuperar', 5),
+        'periodico_saltar': await programador.agregar(1, 10, 'd', cada_cuarto.siguiente(reloj.ahora), cada_cuarto, 'saltar', 5),
+    }
+    programador.detener()
+    envios.lista.clear()
+
+    # Reinicio: el bot vuelve tres horas después.
+    reloj.ahora += 3 * 3600
+    reiniciado = modulo.ProgramadorAnuncios(archivo, 60, reloj=reloj, esperar=reloj.esperar)
+    await reiniciado.cargar()
+    assert set(reiniciado.anuncios) == {periodico.id} | {anuncio.id for anuncio in perdidos.values()}
+    assert reiniciado.anuncios[periodico.id].siguiente == programador.anuncios[periodico.id].siguiente
+    reiniciado.iniciar(envios.enviar)
+    try:
+        await procesar(reiniciado, reloj)
+        assert await esperar_a(lambda: len(envios.lista) >= 3)
+        enviados = [identificador for identificador, _ in envios.lista]
+        assert enviados.count(perdidos['unico_recuperar'].id) == 1
+        assert perdidos['unico_saltar'].id not in enviados
+        assert enviados.count(perdidos['periodico_recuperar'].id) == 1
+        assert perdidos['periodico_saltar'].id not in enviados
+        assert enviados.count(periodico.id) == 1
+        for nombre in ('periodico_recuperar', 'periodico_saltar'):
+            assert reiniciado.anuncios[perdidos[nombre].id].siguiente > reloj.ahora, nombre
+        assert reiniciado.saltados == 2
+    finally:
+        reiniciado.detener()
+
+async def test_muchos_anuncios_a_la_vez(modulo, tmp_path):
+    # La medida del benchmark con pocos anuncios: se envían todos y los periódicos siguen programados.
+    medidas = await medir(modulo, str(tmp_path), 300)
+    assert medidas['enviados'] == 300
+    assert medidas['pendientes'] == 150
+    assert os.path.exists(tmp_path / 'medida.db')
+
+async def test_comandos_solo_del_propio_servidor(modulo, tmp_path):
+    await preparar(modulo)
+    reloj = RelojFalso(marca('2024-05-29 10:00'))
+    modulo.anuncios = modulo.ProgramadorAnuncios(str(tmp_path / 'anuncios.db'), 60, reloj=reloj, esperar=reloj.esperar)
+    await modulo.anuncios.cargar()
+    enviados = []
+
+    async def send(contenido=None, embed=None, **kwargs):
+        enviados.append(contenido if embed is None else embed)
+
+    def comando(nombre, servidor):
+        comando = modulo.bot.get_command(nombre)
+        ctx = types.SimpleNamespace(guild=types.SimpleNamespace(id=servidor), author=types.SimpleNamespace(id=2), prefix='+', send=send)
+        return lambda *argumentos, **opciones: comando.callback(comando.cog, ctx, *argumentos, **opciones)
+
+    canal = types.SimpleNamespace(id=10, mention='<#10>')
+    await comando('anunciar', 5)(canal, '0 18 * * 5', mensaje='--saltar Evento en el spawn')
+    assert enviados[-1] == f"Anuncio #1 programado en <#10> para <t:{int(marca('2024-05-31 18:00'))}:f> y se repetirá según `0 18 * * 5`."
+    assert modulo.anuncios.anuncios[1].politica == 'saltar'
+    assert modulo.anuncios.anuncios[1].mensaje == 'Evento en el spawn'
+    await comando('anunciar', 5)(canal, 'mañana', mensaje='hola')
+    assert 'Uso:' in enviados[-1]
+
+    await comando('anuncios', 6)()
+    assert enviados[-1].startswith('No hay anuncios programados.')
+    await comando('cancelar', 6)(1)
+    assert enviados[-1] == 'No existe el anuncio #1 en este servidor.'
+    assert 1 in modulo.anuncios.anuncios
+
+    await comando('anuncios', 5)()
+    assert enviados[-1].description.startswith('**#1**')
+    await comando('cancelar', 5)(1)
+    assert enviados[-1] == 'Anuncio #1 cancelado.'
+    assert modulo.anuncios.anuncios == {}
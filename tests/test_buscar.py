@@ -0,0 +1,79 @@
+import random
+
+import pytest
+
+from Benchmark_Buscar import VOCABULARIO, busqueda_lineal, generar_normas
+from Benchmark_Comandos import preparar
+
+# Buscador de normas de `+buscar` (`IndiceNormas`): orden de los resultados, tildes, mayúsculas y plurales, y límites
+# del embed con búsquedas muy largas. Usa normas sintéticas de `Benchmark_Buscar.py` y unas pocas normas conocidas
+# al principio, para saber su posición.
+
+CONOCIDAS = [
+    'No usar xray.',
+    'No usar xray ni otros hacks en el servidor.',
+    'Usar xray o hacks lleva a la cárcel: xray, hacks, xray, hacks, xray y más hacks.',
+    'Prohibido el griefing de CONSTRUCCIONES ajenas.',
+    'No usar xray.',
+]
+
+@pytest.fixture
+def normas():
+    return {'conocidas': ('Normas conocidas', CONOCIDAS), **generar_normas(1000, random.Random(1))}
+
+@pytest.fixture
+def indice(modulo, normas):
+    indice = modulo.IndiceNormas()
+    indice.construir(normas, [])
+    return indice
+
+def conocidas(resultados):
+    return [numero for categoria, numero, _ in resultados if categoria == 'Normas conocidas']
+
+def test_mas_terminos_y_repeticiones_primero(modulo, indice):
+    # Primero la que repite más las dos palabras (3), después la otra que tiene las dos (2), y después las que solo
+    # tienen una, por orden de aparición (1 y 5).
+    resultados = indice.buscar('xray hacks', limite=len(indice._entradas))
+    assert resultados[0][:2] == ('Normas conocidas', 3)
+    assert conocidas(resultados) == [3, 2, 1, 5]
+    terminos = set(modulo.tokenizar('xray hacks'))
+    coincidencias = [len(terminos & set(modulo.tokenizar(texto))) for _, _, texto in resultados]
+    assert coincidencias == sorted(coincidencias, reverse=True)
+
+def test_empate_por_orden_de_aparicion(indice):
+    assert conocidas(indice.buscar('xray', limite=len(indice._entradas))) == [3, 1, 2, 5]
+
+def test_tildes_mayusculas_y_plurales(indice):
+    assert indice.buscar('construcción') == indice.buscar('CONSTRUCCION') == indice.buscar('construcciones')
+    assert indice.buscar('cárcel') == indice.buscar('carceles')
+    assert indice.buscar('jugador') == indice.buscar('Jugadores')
+    assert 4 in conocidas(indice.buscar('construcción', limite=len(indice._entradas)))
+
+def test_palabras_vacias_y_limite(indice):
+    assert indice.buscar('de la') == []
+    assert len(indice.buscar('jugador servidor chat', limite=25)) == 25
+
+def test_indice_igual_que_busqueda_lineal(modulo, normas, indice):
+    azar = random.Random(3)
+    for _ in range(50):
+        consulta = ' '.join(azar.choices(VOCABULARIO, k=azar.randint(1, 3)))
+        assert indice.buscar(consulta) == busqueda_lineal(modulo, normas, consulta), consulta
+
+async def test_busqueda_larga_dentro_de_los_limites_del_embed(modulo, normas):
+    mensaje, http = await preparar(modulo)
+    enviados = []
+
+    async def peticion(route, **kwargs):
+        enviados.append(kwargs.get('json') or {})
+        return await http.request(route, **kwargs)
+
+    modulo._peticion_rest = peticion
+    configuracion = modulo.configuraciones.por_defecto
+    configuracion.normas = normas
+    configuracion.indice = None
+    await modulo.bot.on_message(mensaje(1, f'{modulo.PREFIJO}buscar xray hacks'))
+    await modulo.bot.on_message(mensaje(2, f'{modulo.PREFIJO}buscar ' + 'xray ' * 200))
+    assert len(enviados) == 2
+    embed = enviados[1]['embeds'][0]
+    assert 0 < len(embed['title']) <= 256
+    assert len(embed['description']) <= 4096
@@ -0,0 +1,79 @@
+import asyncio
+
+import aiohttp
+
+from Benchmark_Carga import aprueba, conectar, desconectar, discord_falso, elegir_mezcla, preparar_bot
+
+# El bot contra el Discord falso de `Benchmark_Carga.py`: carga todos los servidores al arrancar, responde a todos los
+# comandos de una tormenta aunque algunos envíos reciban un 429, reparte una ráfaga en un solo canal según las
+# cabeceras del límite de uso sin perder ninguno, y recibe una oleada de servidores nuevos con el bot ya conectado.
+# También la regla con la que la prueba de carga aprueba cada ritmo.
+
+SERVIDORES = 50
+NUEVOS = 20
+LIMITE_CANAL = 5
+VENTANA = 1
+OPCIONES = {
+    'servidores': SERVIDORES, 'shards': 1, 'limite_canal': LIMITE_CANAL, 'ventana_limite': VENTANA,
+    'proporcion_429': 0.05, 'latido': 41250,
+}
+
+def paso(comandos_por_segundo=100, respuestas_por_segundo=100, sin_respuesta=0, latencia_p99_ms=50):
+    return {
+        'comandos_por_segundo': comandos_por_segundo, 'respuestas_por_segundo': respuestas_por_segundo,
+        'sin_respuesta': sin_respuesta, 'latencia_p99_ms': latencia_p99_ms,
+    }
+
+def test_regla_de_aprobado():
+    assert aprueba(paso(), 0.95, 250)
+    # Respuestas al ritmo de los comandos, aunque la cola haga subir el p99.
+    assert aprueba(paso(respuestas_por_segundo=96, latencia_p99_ms=900), 0.95, 250)
+    # Respuestas más lentas que los comandos, pero todas y con el p99 dentro del límite.
+    assert aprueba(paso(respuestas_por_segundo=80, latencia_p99_ms=200), 0.95, 250)
+    assert not aprueba(paso(respuestas_por_segundo=80, latencia_p99_ms=300), 0.95, 250)
+    # Comandos perdidos: el p99 de los que sí se respondieron no basta.
+    assert not aprueba(paso(respuestas_por_segundo=50, sin_respuesta=10, latencia_p99_ms=20), 0.95, 250)
+    assert not aprueba(paso(comandos_por_segundo=0, respuestas_por_segundo=0, latencia_p99_ms=None), 0.95, 250)
+
+async def test_tormenta_rafaga_y_oleada(modulo, monkeypatch, tmp_path):
+    # El bot guarda sanciones, anuncios y volcados en el directorio actual.
+    monkeypatch.chdir(tmp_path)
+    preparar_bot(modulo)
+    bot = modulo.bot
+    with discord_falso(OPCIONES) as puerto:
+        conexion = await conectar(modulo, puerto, 60)
+        assert conexion is not None, 'el bot no llegó a estar listo'
+        try:
+            assert len(bot.guilds) == SERVIDORES
+            mezcla = elegir_mezcla(modulo, None)
+            comun = {'mezcla': mezcla, 'prefijo': modulo.PREFIJO, 'espera': 10}
+            control = f'http://127.0.0.1:{puerto}/_control'
+            async with aiohttp.ClientSession() as sesion:
+                async def pedir(ruta, datos):
+                    async with sesion.post(control + ruta, json=datos) as respuesta:
+                        return await respuesta.json()
+
+                # Cuatro mensajes por canal y segundo, dentro del límite: solo los 429 sin aviso obligan a reintentar.
+                tormenta = await pedir('/tormenta', {**comun, 'mensajes_por_segundo': 200, 'segundos': 2})
+                assert tormenta['comandos'] > 0
+                assert tormenta['sin_respuesta'] == 0
+                assert tormenta['respuestas_429'] > 0
+
+                # Tres veces el límite de golpe en un canal: discord.py reparte los envíos en tres ventanas.
+                comandos = [[contenido, peso] for contenido, peso in mezcla if contenido.startswith(modulo.PREFIJO)]
+                rafaga = await pedir('/tormenta', {
+                    **comun, 'mezcla': comandos, 'canales': 1, 'mensajes_por_segundo': 1000,
+                    'segundos': LIMITE_CANAL * 3 / 1000, 'espera': VENTANA * 4 + 5,
+                })
+                assert rafaga['comandos'] == LIMITE_CANAL * 3
+                assert rafaga['sin_respuesta'] == 0
+                assert rafaga['latencia_max_ms'] >= VENTANA * 2 * 900
+
+                await pedir('/inundacion', {'cantidad': NUEVOS})
+                for _ in range(500):
+                    if len(bot.guilds) == SERVIDORES + NUEVOS:
+                        break
+                    await asyncio.sleep(0.01)
+                assert len(bot.guilds) == SERVIDORES + NUEVOS
+        finally:
+            await desconectar(bot, conexion)
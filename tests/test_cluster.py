@@ -0,0 +1,60 @@
+# Modo cluster (`MODO_CLUSTER`): el bot arranca como en producción contra el Discord falso de `Benchmark_Carga.py`,
+# cada shard se identifica una vez y responde, y al matar un proceso el supervisor lo vuelve a lanzar sin tocar los
+# shards de los demás. Tarda unos 20 segundos y solo funciona en Linux.
+import os
+import signal
+import sys
+
+import aiohttp
+import pytest
+
+from Benchmark_Cluster import arrancar, grupos, shard_de, trabajadores
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith('linux'), reason='busca los procesos del cluster en /proc')
+
+SHARDS = 4
+PROCESOS = 2
+SERVIDORES = 200
+
+async def responden(cluster, sesion, ronda):
+    # Un mensaje en un servidor distinto de cada shard en cada ronda.
+    for shard in cluster.shards:
+        numero = [numero for numero in range(SERVIDORES) if shard_de(numero, SHARDS) == shard][ronda]
+        async with sesion.post(cluster.control + '/mensaje', json={'contenido': '+normas', 'servidor': numero, 'espera': 10}) as respuesta:
+            mensaje = (await respuesta.json())['respuesta']
+        assert mensaje is not None and 'normas' in (mensaje.get('content') or ''), f'el shard {shard} no respondió: {mensaje}'
+
+async def comprobar(cluster):
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30)) as sesion:
+        assert await cluster.hasta(lambda: cluster.listo(sesion), 120), cluster.registros()
+        datos = await cluster.estado(sesion)
+        assert datos['identificaciones_shard'] == {str(shard): 1 for shard in cluster.shards}
+        pids = trabajadores(cluster.director.pid)
+        assert len(pids) == PROCESOS
+        await responden(cluster, sesion, 0)
+
+        # Se mata un proceso sin avisar, como un fallo de memoria o un error grave: se desconectan justo sus shards.
+        os.kill(pids[0], signal.SIGKILL)
+
+        async def caido():
+            return (await cluster.estado(sesion))['shards_conectados'] != cluster.shards
+
+        assert await cluster.hasta(caido, 30), 'los shards del proceso muerto siguen conectados'
+        caidos = sorted(set(cluster.shards) - set((await cluster.estado(sesion))['shards_conectados']))
+        assert caidos in grupos(SHARDS, PROCESOS)
+
+        # El supervisor lo vuelve a lanzar: solo sus shards se identifican de nuevo.
+        async def recuperado():
+            datos = await cluster.estado(sesion)
+            return all(datos['identificaciones_shard'].get(str(shard)) == 2 for shard in caidos) and await cluster.listo(sesion)
+
+        assert await cluster.hasta(recuperado, 120), cluster.registros()
+        datos = await cluster.estado(sesion)
+        assert datos['identificaciones_shard'] == {str(shard): 2 if shard in caidos else 1 for shard in cluster.shards}
+        nuevos = trabajadores(cluster.director.pid)
+        assert len(nuevos) == PROCESOS and pids[0] not in nuevos
+        await responden(cluster, sesion, 1)
+
+async def test_arranca_y_se_recupera_al_matar_un_proceso(rutas):
+    with arrancar(*rutas, SHARDS, PROCESOS, SERVIDORES) as cluster:
+        await comprobar(cluster)
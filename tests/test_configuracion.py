@@ -0,0 +1,49 @@
+import json
+import types
+
+import pytest
+
+from Benchmark_Comandos import preparar
+
+# Normas personalizadas de `+config normas` y de `ARCHIVO_NORMAS`: se aceptan mientras el texto que se muestra en el
+# embed de la categoría (con la numeración) quepa en la descripción de un embed, y se rechazan sin guardar nada si no.
+
+def contexto():
+    enviados = []
+
+    async def send(contenido=None, **kwargs):
+        enviados.append(contenido)
+
+    return types.SimpleNamespace(guild=types.SimpleNamespace(id=5), prefix='+', send=send), enviados
+
+async def configurar_normas(modulo, reglas):
+    ctx, enviados = contexto()
+    config = modulo.bot.get_command('config')
+    await config.callback(config.cog, ctx, 'normas', valor='leves ' + '|'.join(reglas))
+    return enviados[-1], await modulo.configuraciones.obtener(5)
+
+async def test_config_normas_en_el_limite(modulo):
+    await preparar(modulo)
+    reglas = ['a' * 2000, 'b' * (modulo.LARGO_DESCRIPCION - len('1) ') - 2000 - len(' \n2) '))]
+    assert len(modulo.texto_normas(reglas)) == modulo.LARGO_DESCRIPCION
+    respuesta, configuracion = await configurar_normas(modulo, reglas)
+    assert respuesta == 'Normas leves: 2 reglas personalizadas.'
+    assert configuracion.normas['leves'][1] == reglas
+    assert len(configuracion.obtener_respuestas().obtener('leves').description) == modulo.LARGO_DESCRIPCION
+
+async def test_config_normas_demasiado_largas(modulo):
+    await preparar(modulo)
+    reglas = [f'Norma {numero}' for numero in range(400)]
+    assert len(modulo.texto_normas(reglas)) > modulo.LARGO_DESCRIPCION
+    respuesta, configuracion = await configurar_normas(modulo, reglas)
+    assert str(modulo.LARGO_DESCRIPCION) in respuesta
+    assert 'leves' not in configuracion.personalizadas
+    assert configuracion.normas['leves'] == modulo.NORMAS['leves']
+
+def test_archivo_normas_demasiado_largas(modulo, tmp_path):
+    archivo = tmp_path / 'normas.json'
+    archivo.write_text(json.dumps({'leves': ['a' * (modulo.LARGO_DESCRIPCION - len('1) '))]}), encoding='utf-8')
+    assert len(modulo.leer_normas(str(archivo))['leves'][1][0]) == modulo.LARGO_DESCRIPCION - len('1) ')
+    archivo.write_text(json.dumps({'leves': ['a' * (modulo.LARGO_DESCRIPCION - len('1) ') + 1)]}), encoding='utf-8')
+    with pytest.raises(ValueError):
+        modulo.leer_normas(str(archivo))
@@ -0,0 +1,61 @@
+import json
+
+from Benchmark_Comandos import preparar
+
+# Caché de respuestas (`CacheRespuestas` y `EmbedCacheado`): cada respuesta fija guardada coincide con una construida
+# de nuevo, y se reconstruye cuando cambia algo que muestra (el prefijo del pie o el estado del servidor).
+
+def serializar(embed):
+    return json.dumps(embed.to_dict(), sort_keys=True, ensure_ascii=False)
+
+async def test_cache_coincide_con_construir(modulo):
+    await preparar(modulo)
+    respuestas = modulo.configuraciones.por_defecto.obtener_respuestas()
+    for nombre, constructor in respuestas._constructores.items():
+        assert serializar(respuestas.obtener(nombre)) == serializar(constructor()), nombre
+        assert respuestas.obtener(nombre) is respuestas.obtener(nombre), nombre
+
+async def test_prefijo_cambia_pie_de_comandos(modulo):
+    await preparar(modulo)
+    configuracion = modulo.configuraciones.por_defecto
+    respuestas = configuracion.obtener_respuestas()
+    prefijo = configuracion.prefijo
+    anterior = serializar(respuestas.obtener('comandos'))
+    configuracion.prefijo = '?'
+    respuestas.invalidar()
+    assert '?help' in serializar(respuestas.obtener('comandos'))
+    configuracion.prefijo = prefijo
+    respuestas.invalidar()
+    assert serializar(respuestas.obtener('comandos')) == anterior
+
+async def test_estado_nuevo_invalida_solo_ip(modulo):
+    await preparar(modulo)
+    configuracion = modulo.configuraciones.por_defecto
+    respuestas = configuracion.obtener_respuestas()
+    ip, ayuda = respuestas.obtener('ip'), respuestas.obtener('help')
+    modulo.configuraciones.invalidar_ip(configuracion.ip)
+    assert respuestas.obtener('ip') is not ip
+    assert respuestas.obtener('help') is ayuda
+
+async def test_comandos_envian_lo_mismo_con_y_sin_cache(modulo):
+    mensaje, http = await preparar(modulo)
+    enviados = []
+
+    async def peticion(route, **kwargs):
+        # El `nonce` es distinto en cada envío; el resto debe ser igual.
+        enviados.append({clave: valor for clave, valor in (kwargs.get('json') or {}).items() if clave != 'nonce'})
+        return await http.request(route, **kwargs)
+
+    modulo._peticion_rest = peticion
+    clase = modulo.CacheRespuestas
+    obtener = clase.obtener
+    nombres = ['help', 'ip', 'comandos', *modulo.configuraciones.por_defecto.normas]
+    for identificador, nombre in enumerate(nombres):
+        await modulo.bot.on_message(mensaje(2 * identificador, f'{modulo.PREFIJO}{nombre}'))
+        clase.obtener = lambda cache, nombre: cache._construir(nombre)
+        try:
+            await modulo.bot.on_message(mensaje(2 * identificador + 1, f'{modulo.PREFIJO}{nombre}'))
+        finally:
+            clase.obtener = obtener
+        assert len(enviados) == 2 * identificador + 2, f'+{nombre} sin respuesta'
+        assert enviados[-1] == enviados[-2], f'+{nombre} no envía lo mismo con la caché'
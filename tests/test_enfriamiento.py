@@ -0,0 +1,59 @@
+import asyncio
+
+import discord
+from discord.ext import commands
+
+from Benchmark_Comandos import datos_mensaje, preparar
+
+# Límites de uso (`ENFRIAMIENTO_USUARIO` y `ENFRIAMIENTO_CANAL`): solo gastan usos las respuestas fijas que se agrupan,
+# el primer uso bloqueado recibe un aviso y los siguientes no hasta que pasa el límite, y los comandos del staff y los
+# que dependen del texto escrito no se bloquean.
+
+AUTOR = {'id': '1000', 'username': 'usuario', 'discriminator': '0', 'avatar': None}
+MIEMBRO = {'roles': [], 'joined_at': '2024-01-01T00:00:00+00:00', 'deaf': False, 'mute': False, 'flags': 0}
+
+async def preparar_limite(modulo, usos, segundos):
+    await preparar(modulo)
+    bot = modulo.bot
+    canal = bot.get_channel(10)
+    # El autor es el dueño del servidor, así que también puede usar los comandos del staff.
+    canal.guild.owner_id = int(AUTOR['id'])
+    modulo.agrupador.enfriamientos[:] = [commands.CooldownMapping.from_cooldown(usos, segundos, commands.BucketType.user)]
+    contenidos = []
+
+    async def peticion(route, **kwargs):
+        datos = kwargs.get('json') or {}
+        if route.method == 'POST':
+            contenidos.append(datos.get('content') or (datos.get('embeds') or [{}])[0].get('title'))
+        return datos_mensaje(1, '', AUTOR)
+
+    modulo._peticion_rest = peticion
+    identificadores = iter(range(100, 1000))
+
+    async def enviar(contenido):
+        datos = {**datos_mensaje(next(identificadores), modulo.PREFIJO + contenido, AUTOR), 'member': MIEMBRO}
+        await bot.on_message(discord.Message(state=bot._connection, channel=canal, data=datos))
+        return contenidos.pop() if contenidos else None
+
+    return enviar
+
+def bloqueados(modulo):
+    return sum(cantidad for (_, error), cantidad in modulo.metricas.errores.items() if error == 'CommandOnCooldown')
+
+async def test_solo_limita_las_respuestas_fijas_y_avisa_una_vez(modulo):
+    enviar = await preparar_limite(modulo, 1, 60)
+    assert 'Espera' not in await enviar('normas')
+    assert (await enviar('leves')).startswith('Espera 60 segundos')
+    assert await enviar('graves') is None
+    # Ni los comandos del staff ni los que dependen del texto tienen límite.
+    assert await enviar('vigilante') == 'Vigilante del bucle de eventos'
+    assert 'Espera' not in await enviar('buscar spam')
+    assert bloqueados(modulo) == 2
+
+async def test_vuelve_a_responder_y_avisar_al_pasar_el_limite(modulo):
+    enviar = await preparar_limite(modulo, 1, 0.2)
+    assert 'Espera' not in await enviar('normas')
+    assert (await enviar('normas')).startswith('Espera')
+    await asyncio.sleep(0.25)
+    assert 'Espera' not in await enviar('normas')
+    assert (await enviar('normas')).startswith('Espera')
@@ -0,0 +1,94 @@
+import os
+import random
+import uuid
+
+import pytest
+
+from Benchmark_Comandos import preparar
+from Benchmark_Estadisticas import escribir_jugador, generar, generar_jugador
+
+# Índice de estadísticas de `+top` y `+stats` (`IndiceEstadisticas`) con un `world/stats` generado por
+# `Benchmark_Estadisticas.py`: el top de cada estadística coincide con ordenar a todos los jugadores, una actualización
+# sin cambios no lee ningún archivo, solo se leen los archivos modificados, y los jugadores nuevos y borrados se
+# reflejan en `+top` y `+stats`.
+
+JUGADORES = 400
+
+@pytest.fixture
+def mundo(modulo, tmp_path):
+    estadisticas, usercache, datos, nombres = generar(str(tmp_path), JUGADORES, 1)
+    return modulo.IndiceEstadisticas(estadisticas, usercache), estadisticas, datos, nombres
+
+def esperado(modulo, datos, nombres, estadistica, cantidad):
+    # Cálculo directo: ordena a todos los jugadores.
+    _, claves, _, _ = modulo.ESTADISTICAS[estadistica]
+    valores = [
+        (sum(jugador['stats'].get(categoria, {}).get(clave, 0) for categoria, clave in claves), identificador)
+        for identificador, jugador in datos.items()
+    ]
+    valores.sort(key=lambda par: par[0], reverse=True)
+    return [(nombres.get(identificador) or identificador[:8], valor) for valor, identificador in valores[:cantidad] if valor > 0]
+
+def comparar_tops(modulo, indice, datos, nombres):
+    for estadistica in modulo.ESTADISTICAS:
+        obtenido = [valor for _, valor in indice.top(estadistica, 10)]
+        assert obtenido == [valor for _, valor in esperado(modulo, datos, nombres, estadistica, 10)], estadistica
+
+async def test_carga_completa(modulo, mundo):
+    indice, _, datos, nombres = mundo
+    assert await indice.actualizar() == JUGADORES
+    comparar_tops(modulo, indice, datos, nombres)
+    assert await indice.actualizar() == 0
+
+async def test_actualizacion_incremental(modulo, mundo):
+    indice, estadisticas, datos, nombres = mundo
+    await indice.actualizar()
+    azar = random.Random(2)
+    for identificador in azar.sample(list(datos), 25):
+        datos[identificador] = generar_jugador(azar)
+        escribir_jugador(estadisticas, identificador, datos[identificador], 2 * 10 ** 18)
+    assert await indice.actualizar() == 25
+    comparar_tops(modulo, indice, datos, nombres)
+
+async def test_jugador_nuevo_y_borrado(modulo, mundo):
+    indice, estadisticas, datos, nombres = mundo
+    await indice.actualizar()
+    azar = random.Random(3)
+    nuevo = str(uuid.UUID(int=azar.getrandbits(128), version=4))
+    datos[nuevo] = generar_jugador(azar)
+    datos[nuevo]['stats']['minecraft:custom']['minecraft:play_time'] = 72000 * 10000
+    escribir_jugador(estadisticas, nuevo, datos[nuevo], 3 * 10 ** 18)
+    borrado = next(iter(datos))
+    del datos[borrado]
+    os.remove(os.path.join(estadisticas, borrado + '.json'))
+    await indice.actualizar()
+    assert indice.top('tiempo', 1)[0][0] == nuevo[:8]
+    assert indice.jugador(borrado) is None
+    comparar_tops(modulo, indice, datos, nombres)
+
+async def test_stats_por_nombre(modulo, mundo):
+    indice, _, datos, nombres = mundo
+    await indice.actualizar()
+    identificador, nombre = next(iter(nombres.items()))
+    encontrado = indice.jugador(nombre.upper())
+    assert encontrado is not None and encontrado[0] == nombre
+    mio = datos[identificador]['stats']['minecraft:custom']['minecraft:play_time']
+    puesto = 1 + sum(jugador['stats']['minecraft:custom']['minecraft:play_time'] > mio for jugador in datos.values())
+    assert encontrado[1]['tiempo'] == (mio, puesto)
+
+async def test_comando_top(modulo, mundo):
+    mensaje, http = await preparar(modulo)
+    modulo.indice_estadisticas = indice = mundo[0]
+    enviados = []
+
+    async def peticion(route, **kwargs):
+        enviados.append(kwargs.get('json') or {})
+        return await http.request(route, **kwargs)
+
+    modulo._peticion_rest = peticion
+    await modulo.bot.on_message(mensaje(1, f'{modulo.PREFIJO}top muertes 3'))
+    embed = enviados[-1]['embeds'][0]
+    assert embed['title'].startswith('Top 3')
+    assert embed['description'].count('\n') == 2
+    assert f'{JUGADORES} jugadores' in embed['footer']['text']
+    assert indice.actualizado is not None
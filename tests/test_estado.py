@@ -0,0 +1,99 @@
+import asyncio
+import contextlib
+
+from Benchmark_Comandos import preparar
+from Benchmark_Estado import ServidorContado
+from Benchmark_Red import puerto_cerrado
+
+# Estado del servidor de Minecraft de `+ip` (`EstadoServidor`): muchas peticiones a la vez comparten una sola consulta
+# al servidor falso de `Benchmark_Red.py`, y el resultado se guarda hasta que caduca.
+
+LLAMADAS = 50
+RETRASO = 0.05
+TTL = RETRASO * 5
+
+@contextlib.asynccontextmanager
+async def servidor(modulo, **opciones):
+    falso = ServidorContado(modulo, 'falso', RETRASO, {'abiertas': 0, 'maximo': 0}, **opciones)
+    await falso.iniciar()
+    try:
+        yield falso
+    finally:
+        falso.cerrar()
+
+async def simultaneas(estado, cantidad=LLAMADAS):
+    return await asyncio.gather(*(estado.obtener() for _ in range(cantidad)))
+
+async def test_peticiones_simultaneas_comparten_una_consulta(modulo):
+    async with servidor(modulo) as falso:
+        falso.jugadores = 7
+        estado = modulo.EstadoServidor('127.0.0.1', falso.puerto, TTL)
+        resultados = await simultaneas(estado)
+        assert falso.conexiones == 1
+        assert estado.consultas == 1
+        assert all(resultado is resultados[0] for resultado in resultados)
+        assert resultados[0]['en_linea'] and resultados[0]['jugadores'] == 7
+
+async def test_cache_vigente_y_caducada(modulo):
+    async with servidor(modulo) as falso:
+        estado = modulo.EstadoServidor('127.0.0.1', falso.puerto, TTL)
+        await estado.obtener()
+        for _ in range(LLAMADAS):
+            await estado.obtener()
+        assert falso.conexiones == 1
+        # Al caducar, otra ronda simultánea hace otra sola consulta y recibe el número de jugadores nuevo.
+        falso.jugadores = 8
+        await asyncio.sleep(TTL)
+        resultados = await simultaneas(estado)
+        assert falso.conexiones == 2
+        assert all(resultado['jugadores'] == 8 for resultado in resultados)
+
+async def test_cancelar_una_peticion_no_cancela_la_consulta(modulo):
+    async with servidor(modulo) as falso:
+        estado = modulo.EstadoServidor('127.0.0.1', falso.puerto, TTL)
+        cancelada = asyncio.ensure_future(estado.obtener())
+        resto = asyncio.ensure_future(simultaneas(estado, LLAMADAS - 1))
+        await asyncio.sleep(RETRASO / 2)
+        cancelada.cancel()
+        resultados = await resto
+        assert cancelada.cancelled()
+        assert all(resultado['en_linea'] for resultado in resultados)
+        assert falso.conexiones == 1
+
+async def test_servidor_caido_fuera_de_linea_con_una_consulta(modulo):
+    caido = modulo.EstadoServidor('127.0.0.1', await puerto_cerrado(), TTL)
+    resultados = await simultaneas(caido)
+    await caido.obtener()
+    assert caido.consultas == 1
+    assert not any(resultado['en_linea'] for resultado in resultados)
+
+async def test_servidor_que_no_responde_fuera_de_linea_con_una_consulta(modulo):
+    async with servidor(modulo, responder=False) as colgado:
+        sin_respuesta = modulo.EstadoServidor('127.0.0.1', colgado.puerto, TTL, timeout=RETRASO)
+        inicio = asyncio.get_running_loop().time()
+        resultados = await simultaneas(sin_respuesta)
+        # Una consulta por petición tardaría `LLAMADAS * RETRASO`; el margen cubre una pasada del recolector de basura.
+        assert asyncio.get_running_loop().time() - inicio < RETRASO * 10
+        await sin_respuesta.obtener()
+        assert colgado.conexiones == 1
+        assert not any(resultado['en_linea'] for resultado in resultados)
+
+async def test_ip_simultaneos_comparten_una_consulta(modulo):
+    mensaje, http = await preparar(modulo)
+    enviados = []
+
+    async def peticion(route, **kwargs):
+        enviados.append(kwargs.get('json') or {})
+        return await http.request(route, **kwargs)
+
+    modulo._peticion_rest = peticion
+    async with servidor(modulo) as falso:
+        falso.jugadores = 8
+        configuracion = modulo.configuraciones.por_defecto
+        configuracion.ip = f'127.0.0.1:{falso.puerto}'
+        configuracion.obtener_respuestas().invalidar('ip')
+        await asyncio.gather(*(modulo.bot.on_message(mensaje(numero, f'{modulo.PREFIJO}ip')) for numero in range(LLAMADAS)))
+        assert falso.conexiones == 1
+    assert len(enviados) == LLAMADAS
+    campos = {campo['name']: campo['value'] for campo in enviados[-1]['embeds'][0]['fields']}
+    assert campos['Jugadores'] == '8/100'
@@ -0,0 +1,68 @@
+import ast
+import glob
+import os
+
+import pytest
+
+from Benchmark_Comandos import preparar
+from conftest import DIRECTORIO
+
+# Extensiones integradas de `extensiones/` (información, normas y tienda): cada una viene en dos versiones, con y sin
+# documentación, que deben ser el mismo código; el bot carga solo las de su versión, y al cargarlas sus comandos y
+# respuestas quedan disponibles, y al descargarlas desaparecen.
+
+EXTENSIONES = os.path.join(DIRECTORIO, 'extensiones')
+INTEGRADAS = ['informacion', 'normas', 'tienda']
+
+def arbol(ruta):
+    with open(ruta, encoding='utf-8') as archivo:
+        return ast.dump(ast.parse(archivo.read()))
+
+def test_versiones_integradas_completas():
+    archivos = {os.path.basename(ruta) for ruta in glob.glob(os.path.join(EXTENSIONES, '*.py'))}
+    for nombre in INTEGRADAS:
+        assert {f'{nombre}_sin_documentacion.py', f'{nombre}_con_documentacion.py'} <= archivos, nombre
+
+@pytest.mark.parametrize('nombre', INTEGRADAS)
+def test_versiones_son_el_mismo_codigo(nombre):
+    sin = arbol(os.path.join(EXTENSIONES, f'{nombre}_sin_documentacion.py'))
+    con = arbol(os.path.join(EXTENSIONES, f'{nombre}_con_documentacion.py'))
+    assert sin == con
+
+def test_carga_solo_su_version(modulo, rutas):
+    version = '_con_documentacion' if 'con_documentaci' in os.path.basename(rutas[0]) else '_sin_documentacion'
+    assert modulo.DOCUMENTADO == (version == '_con_documentacion')
+    nombres = modulo.extensiones.nombres()
+    assert [f'extensiones.{nombre}{version}' for nombre in INTEGRADAS] == [
+        nombre for nombre in nombres if nombre.endswith(version)
+    ]
+    assert not any(nombre.endswith(('_con_documentacion', '_sin_documentacion')) and not nombre.endswith(version) for nombre in nombres)
+
+async def test_comandos_de_las_extensiones(modulo):
+    mensaje, http = await preparar(modulo)
+    bot = modulo.bot
+    for comando in ['help', 'ip', 'comandos', 'normas', 'leves', 'buscar', 'tienda']:
+        assert bot.get_command(comando) is not None, comando
+    respuestas = modulo.configuraciones.por_defecto.obtener_respuestas()
+    assert {'help', 'ip', 'comandos', 'leves'} <= set(respuestas._constructores)
+
+    enviados = []
+
+    async def peticion(route, **kwargs):
+        enviados.append(kwargs.get('json') or {})
+        return await http.request(route, **kwargs)
+
+    modulo._peticion_rest = peticion
+    await bot.on_message(mensaje(1, f'{modulo.PREFIJO}leves'))
+    assert len(enviados) == 1
+    assert modulo.configuraciones.por_defecto.normas['leves'][1][0] in enviados[0]['embeds'][0]['description']
+
+async def test_descargar_quita_comandos_y_respuestas(modulo):
+    await preparar(modulo)
+    bot = modulo.bot
+    nombre = next(nombre for nombre in modulo.extensiones.cargadas(bot) if '.normas_' in nombre)
+    await bot.unload_extension(nombre)
+    assert bot.get_command('leves') is None
+    respuestas = modulo.configuraciones.por_defecto.obtener_respuestas()
+    assert 'leves' not in respuestas._constructores
+    assert 'help' in respuestas._constructores
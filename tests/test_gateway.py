@@ -0,0 +1,20 @@
+import os
+
+from Benchmark_Gateway import comparar
+
+# Tráfico del gateway según `MODO_COMANDOS`: el Discord falso de `Benchmark_Carga.py` envía actividad normal de los
+# servidores solo a quien tiene el intent que la necesita. En modo `'prefijo'` el bot la recibe y cuenta toda; en modo
+# `'barra'` no le llega nada. En los dos modos sigue respondiendo a sus comandos. Tarda unos segundos por modo.
+
+ACTIVIDAD = {'mensajes': 300, 'escrituras': 100, 'reacciones': 50}
+
+def test_solo_recibe_la_actividad_en_modo_prefijo(rutas):
+    modos = comparar(os.path.abspath(rutas[0]), os.path.abspath(rutas[1]), 20, {'espera_listo': 60, 'actividad': ACTIVIDAD, 'comando': True})
+    prefijo, barra = modos['prefijo'], modos['barra']
+    assert prefijo['actividad_enviados'] == {'MESSAGE_CREATE': 300, 'TYPING_START': 100, 'MESSAGE_REACTION_ADD': 50}
+    assert prefijo['actividad_recibidos'] == prefijo['actividad_enviados']
+    assert prefijo['actividad_bytes'] > prefijo['actividad_bytes_red'] > 0
+    assert barra['actividad_enviados'] == barra['actividad_recibidos'] == {}
+    assert barra['actividad_bytes_red'] == 0
+    assert barra['intents'] < prefijo['intents']
+    assert 'normas' in prefijo['comando'] and 'normas' in barra['comando']
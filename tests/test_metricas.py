@@ -0,0 +1,52 @@
+import re
+
+from Benchmark_Comandos import casos, preparar
+
+# Métricas de Prometheus (`Metricas` e `Histograma`): `/metrics` cuenta exactamente los comandos y las peticiones
+# enviadas, cada histograma es acumulativo y termina en el total, y todas las líneas siguen el formato de texto de
+# Prometheus.
+
+# `nombre{etiquetas} valor` o `nombre valor`; el valor puede ser NaN o infinito (la latencia antes de conectarse).
+LINEA_METRICA = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{[a-zA-Z_][a-zA-Z0-9_]*="[^"]*"(,[a-zA-Z_][a-zA-Z0-9_]*="[^"]*")*\})? \S+$')
+
+def leer(texto):
+    # Devuelve {línea sin valor: valor} de las líneas que no son comentarios.
+    valores = {}
+    for linea in texto.splitlines():
+        if linea and not linea.startswith('#'):
+            nombre, _, valor = linea.rpartition(' ')
+            valores[nombre] = float(valor)
+    return valores
+
+def comprobar_formato(metricas):
+    texto = metricas.exponer()
+    assert [linea for linea in texto.splitlines() if not linea.startswith('#') and not LINEA_METRICA.match(linea)] == []
+    valores = leer(texto)
+    for nombre, histograma in metricas.comandos.items():
+        cubetas = [valores[f'bot_comando_duracion_segundos_bucket{{comando="{nombre}",le="{limite}"}}'] for limite in histograma.limites]
+        total = valores[f'bot_comando_duracion_segundos_bucket{{comando="{nombre}",le="+Inf"}}']
+        assert cubetas == sorted(cubetas) and cubetas[-1] <= total, nombre
+        assert total == valores[f'bot_comando_duracion_segundos_count{{comando="{nombre}"}}'], nombre
+
+async def test_cuenta_cada_comando_y_cada_peticion(modulo):
+    mensaje, http = await preparar(modulo)
+    comandos = {nombre: contenido for nombre, contenido in casos(modulo.bot, modulo.PREFIJO).items() if not nombre.startswith('charla_')}
+    identificador = 0
+    for contenido in comandos.values():
+        for _ in range(3):
+            identificador += 1
+            await modulo.bot.on_message(mensaje(identificador, contenido))
+    valores = leer(modulo.metricas.exponer())
+    for nombre in comandos:
+        assert valores.get(f'bot_comandos_total{{comando="{nombre}"}}') == 3, nombre
+    assert valores['bot_rest_duracion_segundos_count'] == len(http.enviados)
+    comprobar_formato(modulo.metricas)
+
+def test_formato_con_muchos_comandos_y_errores(modulo):
+    metricas = modulo.Metricas(modulo.bot)
+    for numero in range(100):
+        metricas.observar_comando(f'comando_{numero}', 0.001 * (numero % 50))
+        metricas.contar_error(f'comando_{numero}', 'CommandInvokeError')
+    comprobar_formato(metricas)
+    valores = leer(metricas.exponer())
+    assert valores['bot_comando_errores_total{comando="comando_7",error="CommandInvokeError"}'] == 1
@@ -0,0 +1,40 @@
+# Estado del bot en Discord (`ProgramadorPresencia`): solo se envía cuando el texto cambia, sin pasar del límite de
+# la cubeta de tokens, y un token gastado en un texto que al final no cambia se devuelve.
+
+class Discord:
+    # Sustituye a `bot.change_presence` y guarda los textos enviados.
+    def __init__(self):
+        self.textos = []
+
+    async def change_presence(self, activity):
+        self.textos.append(activity.name)
+
+def programador(modulo, textos, capacidad=1, periodo=60):
+    discord = Discord()
+    modulo.bot.change_presence = discord.change_presence
+    presencia = modulo.ProgramadorPresencia(['{servidores}'], 60, 0, modulo.CubetaTokens(capacidad, periodo))
+    textos = iter(textos)
+    presencia.renderizar = lambda: next(textos)
+    return presencia, discord
+
+async def test_solo_envia_si_el_texto_cambia(modulo):
+    presencia, discord = programador(modulo, ['A', 'A', 'B'], capacidad=5)
+    for _ in range(3):
+        await presencia.actualizar()
+    assert discord.textos == ['A', 'B']
+    assert (presencia.enviadas, presencia.suprimidas) == (2, 1)
+
+async def test_espera_a_la_cubeta_y_envia_el_texto_actual(modulo):
+    presencia, discord = programador(modulo, ['A', 'B', 'C'], periodo=0.05)
+    await presencia.actualizar()
+    await presencia.actualizar()
+    assert discord.textos == ['A', 'C']
+
+async def test_devuelve_el_token_si_el_texto_vuelve_a_ser_el_mismo(modulo):
+    # Durante la espera a la cubeta el texto vuelve a ser el que ya se muestra: no se envía y el token se devuelve.
+    presencia, discord = programador(modulo, ['A', 'B', 'A'], periodo=0.05)
+    await presencia.actualizar()
+    await presencia.actualizar()
+    assert discord.textos == ['A']
+    assert presencia.suprimidas == 1
+    assert presencia.cubeta.tokens >= 1
@@ -0,0 +1,81 @@
+import asyncio
+import types
+
+import aiohttp
+import pytest
+
+from Benchmark_Puente import generar_log, reproducir
+
+# Puente del chat de Minecraft a Discord (`SeguidorLog`, `interpretar_linea_log` y `PuenteChat`): qué líneas del log
+# llegan a Discord y cómo, y la reproducción de `Benchmark_Puente.py` con un log corto, una rotación y un truncado:
+# llegan todas las líneas, en orden, en lotes de como mucho 2000 caracteres y sin pasar del tamaño de la cola.
+
+@pytest.mark.parametrize('linea, esperado', [
+    ('[12:00:00] [Async Chat Thread - #0/INFO]: <Steve> hola', '**Steve**: hola'),
+    ('[12:00:00] [Server thread/INFO]: [Not Secure] <Alex> *todos* al spawn', '**Alex**: \\*todos\\* al spawn'),
+    ('[12:00:00] [Server thread/INFO]: jeb_ joined the game', '**jeb\\_** entró al servidor'),
+    ('[12:00:00] [Server thread/INFO]: Notch left the game', '**Notch** salió del servidor'),
+    ('[12:00:00] [Server thread/INFO]: Steve was slain by Zombie', '*Steve was slain by Zombie*'),
+    ("[12:00:00] [Server thread/INFO]: Saving chunks for level 'ServerLevel[world]'/minecraft:overworld", None),
+    ('[12:00:00] [Server thread/WARN]: Steve fell from a high place', None),
+    ('<Steve> hola', None),
+])
+def test_interpretar_linea_log(modulo, linea, esperado):
+    assert modulo.interpretar_linea_log(linea) == esperado
+
+def opciones(modulo, **cambios):
+    return types.SimpleNamespace(**{
+        'rafaga': 300, 'pausa': 0.01, 'intervalo': 0.02, 'ventana': 0.05,
+        'cola': modulo.MAXIMO_COLA_CHAT, 'envios_por_segundo': 100, **cambios,
+    })
+
+def comprobar(reproduccion, cola):
+    webhook = reproduccion['webhook']
+    assert [linea for linea, _ in webhook.entregas] == reproduccion['esperados']
+    assert max(map(len, webhook.mensajes)) <= 2000
+    assert reproduccion['cola_maxima'] <= cola
+    assert reproduccion['seguidor'].rotaciones == 2
+
+async def test_reproduccion_con_rotacion_y_truncado(modulo):
+    argumentos = opciones(modulo)
+    reproduccion = await reproducir(modulo, generar_log(3000), argumentos)
+    comprobar(reproduccion, argumentos.cola)
+    assert len(reproduccion['webhook'].mensajes) < len(reproduccion['esperados']) / 5
+
+async def test_lineas_largas_en_varios_mensajes(modulo):
+    lineas = [f'[12:00:{numero % 60:02d}] [Async Chat Thread - #0/INFO]: <Steve> {numero} ' + 'x' * 700 for numero in range(300)]
+    argumentos = opciones(modulo, rafaga=50, cola=20)
+    reproduccion = await reproducir(modulo, lineas, argumentos)
+    comprobar(reproduccion, argumentos.cola)
+    assert all(mensaje.count('\n') <= 1 for mensaje in reproduccion['webhook'].mensajes)
+
+class SeguidorFalso:
+    def __init__(self, lineas):
+        self._lineas = lineas
+
+    async def lineas(self, desde_inicio=False):
+        for linea in self._lineas:
+            yield linea
+        await asyncio.Event().wait()
+
+async def test_envio_fallido_descarta_el_lote(modulo):
+    lineas = [f'[12:00:00] [Async Chat Thread - #0/INFO]: <Steve> mensaje {numero}' for numero in range(10)]
+    puente = modulo.PuenteChat(SeguidorFalso(lineas), 0.05, 100)
+    enviados = []
+
+    async def enviar(texto):
+        if not enviados:
+            enviados.append(None)
+            raise aiohttp.ClientError('sin conexión')
+        enviados.append(texto)
+
+    puente.iniciar(enviar)
+    # Las diez líneas del log van en el primer lote, que falla; las siguientes llegan cuando ya se intentó enviar.
+    await asyncio.sleep(0.1)
+    for numero in range(10, 15):
+        await puente.cola.put(f'**Steve**: mensaje {numero}')
+    await asyncio.sleep(0.2)
+    puente.detener()
+    assert puente.descartadas == 10
+    assert enviados[1:] == ['\n'.join(f'**Steve**: mensaje {numero}' for numero in range(10, 15))]
+    assert (puente.lineas, puente.mensajes) == (5, 1)
@@ -0,0 +1,102 @@
+import asyncio
+import contextlib
+import time
+
+import pytest
+
+from Benchmark_Rcon import CONTRASENA, RESPUESTAS_LARGAS, ServidorRconFalso
+
+# Cliente RCON del bot (`ConexionRcon` y `PoolRcon`) contra el servidor RCON falso de `Benchmark_Rcon.py`: respuestas
+# en varios fragmentos de 4096 bytes (también con caracteres partidos entre dos y de justo un múltiplo de 4096 bytes),
+# pipelining, tiempo agotado, reconexión y contraseña incorrecta. Los comandos que agotan su tiempo o se cancelan no
+# dejan nada guardado en la conexión aunque su respuesta llegue más tarde.
+
+@contextlib.asynccontextmanager
+async def servidor_rcon(latencia=0.001):
+    servidor = ServidorRconFalso(CONTRASENA, 0, latencia)
+    puerto = await servidor.iniciar()
+    try:
+        yield servidor, puerto
+    finally:
+        await servidor.detener()
+
+def vacia(conexion):
+    return not conexion._pendientes and not conexion._partes and not conexion._centinelas
+
+@pytest.mark.parametrize('comando', list(RESPUESTAS_LARGAS))
+async def test_respuestas_largas(modulo, comando):
+    async with servidor_rcon() as (servidor, puerto):
+        pool = modulo.PoolRcon('127.0.0.1', puerto, CONTRASENA, 1, 1)
+        try:
+            assert await pool.ejecutar(comando) == RESPUESTAS_LARGAS[comando]
+            assert 'There are 0' in await pool.ejecutar('list')
+        finally:
+            pool.cerrar()
+
+async def test_pipelining_en_orden(modulo):
+    async with servidor_rcon() as (servidor, puerto):
+        pool = modulo.PoolRcon('127.0.0.1', puerto, CONTRASENA, 2, 1)
+        try:
+            respuestas = await pool.ejecutar_varios([f'whitelist add jugador_{numero}' for numero in range(50)])
+            assert respuestas == [f'Added jugador_{numero} to the whitelist' for numero in range(50)]
+            assert len(servidor.whitelist) == 50
+        finally:
+            pool.cerrar()
+
+async def test_tiempo_agotado_y_reconexion(modulo):
+    async with servidor_rcon() as (servidor, puerto):
+        pool = modulo.PoolRcon('127.0.0.1', puerto, CONTRASENA, 2, 1)
+        try:
+            inicio = time.perf_counter()
+            with pytest.raises(modulo.ErrorRcon):
+                await pool.ejecutar('colgar')
+            assert time.perf_counter() - inicio < 1.5
+            assert await pool.ejecutar('list') != ''
+
+            servidor.cortar()
+            await asyncio.sleep(0.05)
+            assert 'There are 0' in await pool.ejecutar('list')
+            assert pool.reconexiones >= 1
+        finally:
+            pool.cerrar()
+
+async def test_contrasena_incorrecta(modulo):
+    async with servidor_rcon() as (servidor, puerto):
+        pool = modulo.PoolRcon('127.0.0.1', puerto, 'otra', 1, 1)
+        with pytest.raises(modulo.ErrorRcon, match='contraseña'):
+            await pool.ejecutar('list')
+        # El segundo intento no llega a conectarse: se está esperando antes de reintentar.
+        with pytest.raises(modulo.ErrorRcon, match='reintentará'):
+            await pool.ejecutar('list')
+        pool.cerrar()
+
+@pytest.mark.parametrize('comando', ['exacto', 'largo', 'list'])
+async def test_respuesta_tardia_tras_tiempo_agotado(modulo, comando):
+    # Las respuestas tardan 0.3 s y la conexión espera 0.1 s: llegan cuando el comando ya agotó su tiempo.
+    async with servidor_rcon(latencia=0.3) as (servidor, puerto):
+        conexion = await modulo.ConexionRcon.abrir('127.0.0.1', puerto, CONTRASENA, 0.1)
+        try:
+            with pytest.raises(modulo.ErrorRcon):
+                await conexion.ejecutar(comando)
+            await asyncio.sleep(0.5)
+            assert vacia(conexion)
+            conexion.timeout = 1
+            assert 'There are 0' in await conexion.ejecutar('list')
+            assert vacia(conexion)
+        finally:
+            conexion.cerrar()
+
+async def test_respuesta_tardia_tras_cancelar(modulo):
+    async with servidor_rcon(latencia=0.2) as (servidor, puerto):
+        conexion = await modulo.ConexionRcon.abrir('127.0.0.1', puerto, CONTRASENA, 1)
+        try:
+            tarea = asyncio.create_task(conexion.ejecutar('exacto_multibyte'))
+            await asyncio.sleep(0.05)
+            tarea.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await tarea
+            await asyncio.sleep(0.4)
+            assert vacia(conexion)
+            assert await conexion.ejecutar('exacto') == RESPUESTAS_LARGAS['exacto']
+        finally:
+            conexion.cerrar()
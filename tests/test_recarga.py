@@ -0,0 +1,200 @@
+import asyncio
+import json
+import os
+import sys
+import threading
+
+import pytest
+
+from Benchmark_Comandos import preparar
+from Benchmark_Recarga import PAQUETE, CarpetaExtensiones, ContextoFalso
+
+# Recarga en caliente de `+recargar` (`GestorExtensiones`) con la carpeta de extensiones de `Benchmark_Recarga.py`:
+# los comandos usan el código nuevo tras recargar sin que falte ninguno mientras tanto y los que estaban en curso
+# terminan con el antiguo; las normas nuevas del archivo llegan a los comandos y al buscador; un error al comprobar
+# una extensión o las normas cancela la recarga, y un `setup` que falla al cargar deshace todo lo aplicado. Las
+# extensiones se comprueban fuera del bucle de eventos, y los archivos nuevos se cargan y los borrados se descargan.
+
+EXTENSIONES = 3
+NORMAS = {'leves': ['Norma recargada.', 'Otra norma.']}
+LEVES = '1) Norma recargada. \n2) Otra norma.'
+
+@pytest.fixture
+def carpeta(modulo, monkeypatch, tmp_path):
+    # Las normas se leen de una ruta relativa; se trabaja en la carpeta temporal.
+    monkeypatch.chdir(tmp_path)
+    carpeta = CarpetaExtensiones(str(tmp_path))
+    monkeypatch.setitem(sys.modules, 'control_recarga', carpeta.control)
+    modulo.extensiones = carpeta.gestor(modulo)
+    for numero in range(EXTENSIONES):
+        carpeta.extension(numero, 1)
+    return carpeta
+
+async def preparar_bot(modulo):
+    mensaje, http = await preparar(modulo)
+    respuestas = []
+
+    async def peticion(route, **kwargs):
+        datos = kwargs.get('json') or {}
+        respuestas.append(datos.get('content') or (datos.get('embeds') or [{}])[0].get('description'))
+        return await http.request(route, **kwargs)
+
+    modulo._peticion_rest = peticion
+    identificador = 0
+
+    async def enviar(contenido):
+        nonlocal identificador
+        identificador += 1
+        antes = len(respuestas)
+        await modulo.bot.on_message(mensaje(identificador, contenido))
+        return respuestas[antes] if len(respuestas) > antes else None
+
+    return enviar, respuestas
+
+def escribir_normas(carpeta, modulo, normas):
+    carpeta.escribir(modulo.ARCHIVO_NORMAS, json.dumps(normas))
+
+def informacion(modulo):
+    return f"{PAQUETE}.informacion_{'con' if modulo.DOCUMENTADO else 'sin'}_documentacion"
+
+async def test_codigo_nuevo_sin_perder_comandos(modulo, carpeta):
+    enviar, respuestas = await preparar_bot(modulo)
+    bot = modulo.bot
+    assert len(modulo.extensiones.cargadas(bot)) == len(modulo.extensiones.nombres())
+    assert await enviar('+cmd_0') == 'cmd_0 v1'
+
+    # Un comando lento que empieza antes de la recarga y termina después.
+    en_curso = asyncio.ensure_future(enviar('+lento_0'))
+    await asyncio.sleep(0.01)
+    nombres = [f'cmd_{numero}' for numero in range(EXTENSIONES)] + ['leves', 'recargar']
+    ausencias = 0
+    activo = True
+
+    async def vigilar():
+        nonlocal ausencias
+        while activo:
+            ausencias += sum(bot.get_command(nombre) is None for nombre in nombres)
+            await asyncio.sleep(0)
+
+    vigilante = asyncio.ensure_future(vigilar())
+    for version in (2, 3):
+        for numero in range(EXTENSIONES):
+            carpeta.extension(numero, version)
+        assert await modulo.extensiones.recargar(bot) == (True, {})
+    activo = False
+    await vigilante
+    assert ausencias == 0
+    assert await enviar('+cmd_0') == 'cmd_0 v3'
+    carpeta.control.puerta.set()
+    # Entre tanto se enviaron otras respuestas, así que se busca entre todas.
+    await en_curso
+    assert 'lento_0 v1' in respuestas and 'lento_0 v3' not in respuestas
+    assert await enviar('+lento_0') == 'lento_0 v3'
+
+async def test_normas_nuevas(modulo, carpeta):
+    enviar, _ = await preparar_bot(modulo)
+    escribir_normas(carpeta, modulo, NORMAS)
+    assert await modulo.extensiones.recargar(modulo.bot) == (True, {})
+    assert await enviar('+leves') == LEVES
+    assert modulo.configuraciones.por_defecto.obtener_indice().buscar('recargada')
+
+async def test_errores_al_comprobar_cancelan(modulo, carpeta):
+    enviar, _ = await preparar_bot(modulo)
+    bot = modulo.bot
+    escribir_normas(carpeta, modulo, NORMAS)
+    await modulo.extensiones.recargar(bot)
+
+    # Un error de sintaxis en una extensión cancela todo, también las normas y las otras extensiones.
+    carpeta.extension(0, 'nueva')
+    carpeta.escribir(os.path.join(carpeta.ruta, 'ext_1.py'), 'def setup(bot:\n')
+    escribir_normas(carpeta, modulo, {'leves': ['Norma que no debe aplicarse.']})
+    aplicada, errores = await modulo.extensiones.recargar(bot)
+    assert not aplicada and list(errores) == [f'{PAQUETE}.ext_1']
+    assert await enviar('+cmd_0') == 'cmd_0 v1'
+    assert await enviar('+leves') == LEVES
+
+    # Normas mal escritas.
+    carpeta.extension(1, 1)
+    escribir_normas(carpeta, modulo, {'inventada': ['No existe.']})
+    aplicada, errores = await modulo.extensiones.recargar(bot)
+    assert not aplicada and list(errores) == [modulo.ARCHIVO_NORMAS]
+
+    # Un import que falla.
+    os.remove(modulo.ARCHIVO_NORMAS)
+    carpeta.extension(1, 1, cabecera='import modulo_que_no_existe')
+    aplicada, errores = await modulo.extensiones.recargar(bot)
+    assert not aplicada and isinstance(errores[f'{PAQUETE}.ext_1'], ModuleNotFoundError)
+    assert await enviar('+cmd_0') == 'cmd_0 v1'
+    assert modulo.extensiones.fallidas == 3 and modulo.extensiones.recargas == 1
+
+@pytest.mark.parametrize('codigo', ['def setup(bot):\n    pass\n', 'SETUP = None\n'])
+async def test_sin_setup_asincrono(modulo, carpeta, codigo):
+    await preparar_bot(modulo)
+    carpeta.escribir(os.path.join(carpeta.ruta, 'ext_1.py'), codigo)
+    aplicada, errores = await modulo.extensiones.recargar(modulo.bot)
+    assert not aplicada and type(errores[f'{PAQUETE}.ext_1']).__name__ == 'NoEntryPointError'
+    assert modulo.bot.get_command('cmd_1') is not None
+
+async def test_setup_que_falla_deshace_todo(modulo, carpeta):
+    enviar, _ = await preparar_bot(modulo)
+    bot = modulo.bot
+    normas = dict(modulo.NORMAS)
+    cargadas = modulo.extensiones.cargadas(bot)
+    # Una extensión borrada (que se descargaría), otra actualizada y otra cuyo `setup` falla al cargarla.
+    os.remove(os.path.join(carpeta.ruta, 'ext_2.py'))
+    carpeta.extension(0, 'nueva')
+    carpeta.extension(1, 'rota', setup="raise RuntimeError('fallo en setup')")
+    escribir_normas(carpeta, modulo, NORMAS)
+    aplicada, errores = await modulo.extensiones.recargar(bot)
+    assert not aplicada and list(errores) == [f'{PAQUETE}.ext_1']
+    assert sorted(modulo.extensiones.cargadas(bot)) == sorted(cargadas)
+    assert await enviar('+cmd_0') == 'cmd_0 v1'
+    assert await enviar('+cmd_1') == 'cmd_1 v1'
+    assert await enviar('+cmd_2') == 'cmd_2 v1'
+    assert modulo.NORMAS == normas
+
+async def test_comprobacion_fuera_del_bucle(modulo, carpeta):
+    await preparar_bot(modulo)
+    carpeta.control.hilos.clear()
+    await modulo.extensiones.recargar(modulo.bot)
+    comprobaciones = [hilo for hilo in carpeta.control.hilos if hilo is not threading.main_thread()]
+    assert len(comprobaciones) == EXTENSIONES
+
+async def test_archivos_nuevos_y_borrados(modulo, carpeta):
+    enviar, _ = await preparar_bot(modulo)
+    bot = modulo.bot
+    carpeta.extension('nueva', 1)
+    assert await modulo.extensiones.recargar(bot) == (True, {})
+    assert await enviar('+cmd_nueva') == 'cmd_nueva v1'
+    os.remove(os.path.join(carpeta.ruta, 'ext_nueva.py'))
+    assert await modulo.extensiones.recargar(bot) == (True, {})
+    assert bot.get_command('cmd_nueva') is None
+    assert f'{PAQUETE}.ext_nueva' not in bot.extensions
+
+async def test_extension_de_informacion(modulo, carpeta):
+    # La extensión que trae el bot, en su versión con o sin documentación según el archivo del bot.
+    enviar, _ = await preparar_bot(modulo)
+    bot = modulo.bot
+    nombre = informacion(modulo)
+    assert nombre in bot.extensions
+    ruta = os.path.join(carpeta.ruta, nombre.rpartition('.')[2] + '.py')
+    with open(ruta, encoding='utf-8') as archivo:
+        original = archivo.read()
+    assert 'Versión 1.16.5 - 1.17.1' in original
+
+    carpeta.escribir(ruta, original.replace('Versión 1.16.5 - 1.17.1', 'Versión 1.20'))
+    assert await modulo.extensiones.recargar(bot) == (True, {})
+    assert bot.extensions[nombre].__file__ == ruta
+    assert 'Versión 1.20' in await enviar('+ip')
+
+    carpeta.escribir(ruta, original.replace('async def setup(bot):', "async def setup(bot):\n    raise RuntimeError('fallo en setup')"))
+    aplicada, errores = await modulo.extensiones.recargar(bot)
+    assert not aplicada and list(errores) == [nombre]
+    assert 'Versión 1.20' in await enviar('+ip')
+
+async def test_respuesta_de_recargar(modulo, carpeta):
+    await preparar_bot(modulo)
+    contexto = ContextoFalso()
+    comando = modulo.bot.get_command('recargar')
+    await comando.callback(comando.cog, contexto)
+    assert [embed.title for embed in contexto.embeds] == ['Recarga completada']
@@ -0,0 +1,98 @@
+import contextlib
+import json
+import math
+import sys
+
+import aiohttp
+
+from Benchmark_Red import BotFalso, levantar
+
+# Monitor de la red (`HistorialServidor` y `MonitorRed`) contra los servidores de Minecraft falsos de `Benchmark_Red.py`,
+# y la ruta `/status` del servidor web asíncrono: nunca hay más conexiones abiertas a la vez que el límite, los
+# servidores caídos cuentan como caídos sin bloquear al resto, el historial circular da la vuelta bien, y `/status`
+# responde en JSON o HTML con una ETag que solo cambia tras una nueva consulta.
+
+SERVIDORES = 12
+SIMULTANEAS = 4
+RETRASO = 0.02
+CAPACIDAD = 5
+
+@contextlib.asynccontextmanager
+async def red_falsa(modulo):
+    contador = {'abiertas': 0, 'maximo': 0}
+    falsos, servidores = await levantar(modulo, SERVIDORES, RETRASO, contador)
+    try:
+        yield modulo.MonitorRed(servidores, 60, SIMULTANEAS, CAPACIDAD, timeout=0.5), falsos, contador
+    finally:
+        for falso in falsos:
+            falso.cerrar()
+
+def test_historial_circular(modulo):
+    historial = modulo.HistorialServidor(3)
+    assert historial.disponibilidad() is None and historial.latencia_media() is None
+    for latencia, jugadores in [(10, 1), (-1, 0), (30, 3), (50, 5)]:
+        historial.agregar(latencia, jugadores)
+    assert historial.serie(historial.latencias) == [-1, 30, 50]
+    assert historial.serie(historial.jugadores) == [0, 3, 5]
+    assert historial.disponibilidad() == 2 / 3
+    assert historial.latencia_media() == 40
+    assert historial.suma_latencias == 80
+
+async def test_ronda_con_limite_de_conexiones(modulo):
+    async with red_falsa(modulo) as (red, falsos, contador):
+        await red.ronda()
+        assert contador['maximo'] <= SIMULTANEAS
+        assert red.duracion_ronda >= math.ceil(SERVIDORES / SIMULTANEAS) * RETRASO
+        # El servidor colgado agota su tiempo a la vez que se consulta al resto.
+        assert red.duracion_ronda < SERVIDORES * RETRASO + red.timeout
+        assert not red.ultimos['caido']['en_linea'] and not red.ultimos['colgado']['en_linea']
+        assert all(red.ultimos[falso.nombre]['en_linea'] for falso in falsos[:-1])
+        assert red.fallos == 2
+
+async def test_historial_publicado(modulo):
+    async with red_falsa(modulo) as (red, falsos, contador):
+        vigilado = falsos[0]
+        esperados = []
+        # Más rondas que la capacidad del historial, con cambios de jugadores y el servidor caído en las últimas.
+        for numero in range(CAPACIDAD + 3):
+            vigilado.jugadores = numero
+            vigilado.responder = numero < 4
+            await red.ronda()
+            esperados.append(numero if numero < 4 else None)
+        esperados = esperados[-CAPACIDAD:]
+        serie = red.publicado['servidores'][0]
+        assert serie['historial']['jugadores'] == [valor or 0 for valor in esperados]
+        assert [valor is not None for valor in serie['historial']['latencia_ms']] == [valor is not None for valor in esperados]
+        assert serie['disponibilidad'] == round(sum(valor is not None for valor in esperados) / CAPACIDAD, 4)
+        historial = red.historiales[vigilado.nombre]
+        assert historial.suma_latencias == sum(latencia for latencia in historial.latencias if latencia >= 0)
+
+async def test_status(modulo):
+    async with red_falsa(modulo) as (red, falsos, contador):
+        await red.ronda()
+        runner = await sys.modules['webserver'].keep_alive_async(BotFalso(), red=red, host='127.0.0.1', port=0)
+        try:
+            url = f'http://127.0.0.1:{runner.addresses[0][1]}/status'
+            async with aiohttp.ClientSession() as sesion:
+                async with sesion.get(url + '?formato=json') as respuesta:
+                    assert respuesta.status == 200 and respuesta.content_type == 'application/json'
+                    datos = json.loads(await respuesta.read())
+                    etiqueta = respuesta.headers['ETag']
+                assert datos['en_linea'] == SERVIDORES
+                assert len(datos['servidores']) == SERVIDORES + 2
+                async with sesion.get(url, headers={'Accept': 'application/json'}) as respuesta:
+                    assert respuesta.headers['ETag'] == etiqueta
+                async with sesion.get(url + '?formato=json', headers={'If-None-Match': etiqueta}) as respuesta:
+                    assert respuesta.status == 304 and not await respuesta.read()
+                async with sesion.get(url + '?formato=json', headers={'If-None-Match': f'"otra", W/{etiqueta}'}) as respuesta:
+                    assert respuesta.status == 304
+                async with sesion.get(url, headers={'Accept': 'text/html', 'If-None-Match': etiqueta}) as respuesta:
+                    assert respuesta.status == 200 and respuesta.content_type == 'text/html'
+                    pagina = await respuesta.text()
+                    assert 'falso-0' in pagina and 'Sin conexión' in pagina
+
+                await red.ronda()
+                async with sesion.get(url + '?formato=json', headers={'If-None-Match': etiqueta}) as respuesta:
+                    assert respuesta.status == 200 and respuesta.headers['ETag'] != etiqueta
+        finally:
+            await runner.cleanup()
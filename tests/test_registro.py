@@ -0,0 +1,149 @@
+import asyncio
+import contextlib
+import glob
+import json
+import logging
+import os
+import time
+
+import discord
+from aiohttp import web
+
+from Benchmark_Carga import USUARIO_BOT, respuesta_json
+from Benchmark_Comandos import preparar
+from Benchmark_Registro import Recolector, registrar_con_disco_parado
+
+# Registro y trazas de comandos: registrar no espera al disco aunque el hilo que escribe esté parado, los eventos se
+# guardan en JSON válido y el archivo rota al tamaño indicado, y las trazas tienen todos sus tramos. Las esperas y las
+# respuestas 429 por los límites de frecuencia se miden con la sesión HTTP del bot contra una API de Discord falsa,
+# sin cambiar nada de discord.py.
+
+EVENTOS = 5000
+TAMANO = 20000
+REINICIO = 0.05
+
+@contextlib.asynccontextmanager
+async def api_falsa(modulo, monkeypatch):
+    # La API REST de Discord justo para enviar mensajes: en el canal 10 cada envío agota el límite de su ruta durante
+    # `REINICIO` segundos; `limites` son las respuestas 429 (cabeceras) que recibirán los próximos envíos.
+    limites = []
+
+    async def usuario(peticion):
+        return respuesta_json(USUARIO_BOT)
+
+    async def enviar(peticion):
+        if limites:
+            cabeceras = limites.pop(0)
+            return respuesta_json({'message': 'You are being rate limited.', 'retry_after': REINICIO, 'global': cabeceras.get('X-RateLimit-Global') == 'true'}, 429, {'Via': '1.1 google', **cabeceras})
+        return respuesta_json({'id': '1'}, 200, {
+            'X-RateLimit-Bucket': 'mensajes', 'X-RateLimit-Limit': '1', 'X-RateLimit-Remaining': '0',
+            'X-RateLimit-Reset-After': str(REINICIO),
+        })
+
+    aplicacion = web.Application()
+    aplicacion.router.add_get('/api/v10/users/@me', usuario)
+    aplicacion.router.add_post('/api/v10/channels/{canal}/messages', enviar)
+    runner = web.AppRunner(aplicacion)
+    await runner.setup()
+    await web.TCPSite(runner, '127.0.0.1', 0).start()
+    monkeypatch.setattr(discord.http.Route, 'BASE', f'http://127.0.0.1:{runner.addresses[0][1]}/api/v10')
+    try:
+        await modulo.bot.http.static_login('token.falso')
+        yield limites
+    finally:
+        await modulo.bot.http.close()
+        await runner.cleanup()
+
+def enviar(modulo, contenido):
+    ruta = discord.http.Route('POST', '/channels/{channel_id}/messages', channel_id=10)
+    return modulo.bot.http.request(ruta, json={'content': contenido})
+
+async def trazado(modulo, corrutina):
+    # Ejecuta `corrutina` en su propia tarea con una traza nueva, como un comando muestreado.
+    traza = modulo.Traza(0, time.perf_counter())
+
+    async def ejecutar():
+        modulo.traza_actual.set(traza)
+        await corrutina
+
+    await asyncio.ensure_future(ejecutar())
+    return traza
+
+def test_registro_sin_esperar_al_disco(modulo, tmp_path):
+    ruta = str(tmp_path / 'bot.log')
+    duraciones = registrar_con_disco_parado(modulo, ruta, EVENTOS, TAMANO)
+    assert duraciones[len(duraciones) * 99 // 100] < 0.001
+    archivos = glob.glob(ruta + '*')
+    assert len(archivos) == modulo.COPIAS_REGISTRO + 1
+    assert all(os.path.getsize(archivo) <= TAMANO for archivo in archivos)
+    numeros = set()
+    for archivo in archivos:
+        with open(archivo, encoding='utf-8') as entrada:
+            for linea in entrada:
+                datos = json.loads(linea)
+                assert datos['nivel'] == 'INFO' and datos['origen'] == 'olympusbot'
+                numeros.add(int(datos['mensaje'].split()[1]))
+    # Al rotar solo se conservan las últimas copias: los eventos guardados tienen que ser los últimos, sin huecos.
+    assert numeros == set(range(EVENTOS - len(numeros), EVENTOS))
+
+async def test_tramos_de_las_trazas(modulo):
+    mensaje, _ = await preparar(modulo)
+    recolector = Recolector()
+    modulo.bitacora.addHandler(recolector)
+    modulo.bitacora.setLevel(logging.INFO)
+    modulo.MUESTREO_TRAZAS = 1
+    try:
+        for numero, contenido in enumerate(('+ip', '+help', 'hola a todos'), 1):
+            await modulo.bot.on_message(mensaje(numero, contenido))
+    finally:
+        modulo.bitacora.removeHandler(recolector)
+    assert len(recolector.trazas) == 2
+    for traza, comando, numero in zip(recolector.trazas, ('ip', 'help'), (1, 2)):
+        assert traza['id'] == str(numero) and traza['comando'] == comando
+        assert [tramo['tramo'] for tramo in traza['tramos']] == ['recepcion', 'analisis', 'comprobaciones', 'rest', 'comando']
+        comando_tramo = traza['tramos'][-1]
+        rest = traza['tramos'][3]
+        assert comando_tramo['inicio_ms'] <= rest['inicio_ms'] <= comando_tramo['inicio_ms'] + comando_tramo['duracion_ms']
+        assert rest['ruta'].startswith('POST /channels/')
+    json.dumps(recolector.trazas)
+
+async def test_respuestas_429(modulo, monkeypatch):
+    async with api_falsa(modulo, monkeypatch) as limites:
+        limites.append({'Retry-After': '1', 'X-RateLimit-Scope': 'user'})
+        traza = await trazado(modulo, enviar(modulo, 'hola'))
+        assert modulo.metricas.limites_rest == 1
+        tramos = {tramo['tramo']: tramo for tramo in traza.tramos}
+        assert tramos['limite_429']['reintento_s'] == 1.0 and tramos['limite_429']['alcance'] == 'user'
+        # La espera de discord.py antes de reintentar.
+        assert tramos['espera_limite']['duracion_ms'] >= REINICIO * 800
+        assert tramos['espera_limite']['inicio_ms'] == tramos['limite_429']['inicio_ms']
+
+        # Los 429 del límite global cuentan igual; los de peticiones sin traza, también.
+        await asyncio.sleep(REINICIO)
+        limites.append({'Retry-After': '1', 'X-RateLimit-Global': 'true', 'X-RateLimit-Scope': 'global'})
+        traza = await trazado(modulo, enviar(modulo, 'hola'))
+        assert modulo.metricas.limites_rest == 2
+        assert [tramo['alcance'] for tramo in traza.tramos if tramo['tramo'] == 'limite_429'] == ['global']
+        await asyncio.sleep(REINICIO)
+        limites.append({'Retry-After': '1', 'X-RateLimit-Scope': 'user'})
+        await enviar(modulo, 'hola')
+        assert modulo.metricas.limites_rest == 3
+        assert 'bot_rest_limites_total 3' in modulo.metricas.exponer()
+
+async def test_espera_por_el_limite(modulo, monkeypatch):
+    async with api_falsa(modulo, monkeypatch):
+        # Dos envíos a la vez en la misma ruta: el segundo espera a que el primero deje libre el límite.
+        primera, segunda = await asyncio.gather(
+            trazado(modulo, enviar(modulo, 'uno')),
+            trazado(modulo, enviar(modulo, 'dos')),
+        )
+        esperas = [tramo for traza in (primera, segunda) for tramo in traza.tramos if tramo['tramo'] == 'espera_limite']
+        assert len(esperas) == 1 and esperas[0]['duracion_ms'] >= REINICIO * 800
+        assert modulo.metricas.limites_rest == 0
+
+def test_discord_sin_cambios(modulo):
+    # Las mediciones no reemplazan nada de discord.py: otros clientes del mismo proceso no se ven afectados.
+    assert discord.http.Ratelimit.acquire.__module__ == 'discord.http'
+    assert discord.http.HTTPClient.request.__module__ == 'discord.http'
+    assert logging.getLogger('discord.http').handlers == []
+    assert modulo.bot.http.http_trace is modulo.traza_http
@@ -0,0 +1,98 @@
+import os
+import types
+
+import pytest
+
+from Benchmark_Comandos import preparar
+from Benchmark_Sanciones import generar
+
+# Registro de sanciones (`RegistroSanciones`) con un archivo generado por `Benchmark_Sanciones.py`: el registro cargado
+# de nuevo desde el archivo coincide con el de memoria tras registrar y anular sanciones y tras compactar, y los
+# comandos del staff (`+sancionar`, `+anular` e `+historial`) lo usan como se espera.
+
+def resumen(registro):
+    return (
+        {identificador: sancion.a_json() for identificador, sancion in registro.sanciones.items()},
+        dict(registro.por_norma),
+        {jugador: list(ids) for jugador, ids in registro.por_jugador.items()},
+    )
+
+@pytest.fixture
+def ruta(tmp_path):
+    ruta = str(tmp_path / 'sanciones.jsonl')
+    generar(ruta, 3000, 200, 1)
+    return ruta
+
+async def recargar(modulo, ruta):
+    registro = modulo.RegistroSanciones(ruta)
+    await registro.cargar()
+    return registro
+
+async def test_recargar_coincide_con_memoria(modulo, ruta):
+    registro = await recargar(modulo, ruta)
+    assert registro.lineas_muertas > 0
+    nuevas = [await registro.registrar(f'Jugador_{numero % 7}', 'graves', 2, 'motivo', 2) for numero in range(50)]
+    for sancion in nuevas[::5]:
+        assert await registro.anular(sancion.id, 2) is sancion
+    assert await registro.anular(10 ** 9, 2) is None
+    recargado = await recargar(modulo, ruta)
+    assert resumen(recargado) == resumen(registro)
+    assert recargado.lineas_muertas == registro.lineas_muertas
+
+async def test_compactar(modulo, ruta):
+    registro = await recargar(modulo, ruta)
+    antes = os.path.getsize(ruta)
+    await registro.compactar()
+    assert os.path.getsize(ruta) < antes
+    siguiente = await registro.registrar('Tras_Compactar', 'leves', 1, '', 2)
+    compactado = await recargar(modulo, ruta)
+    assert resumen(compactado) == resumen(registro)
+    assert compactado.lineas_muertas == registro.lineas_muertas == 0
+    assert siguiente.id in compactado.sanciones
+
+async def test_historial_y_mas_incumplidas(modulo, ruta):
+    registro = await recargar(modulo, ruta)
+    jugador = next(iter(registro.por_jugador))
+    historial = registro.historial(jugador.upper())
+    assert historial and all(sancion.jugador.lower() == jugador for sancion in historial)
+    assert [sancion.id for sancion in historial] == sorted((sancion.id for sancion in historial), reverse=True)
+    calculado = {}
+    for sancion in registro.sanciones.values():
+        clave = (sancion.categoria, sancion.numero)
+        calculado[clave] = calculado.get(clave, 0) + 1
+    assert [veces for _, veces in registro.mas_incumplidas(5)] == sorted(calculado.values(), reverse=True)[:5]
+
+async def test_comandos_del_staff(modulo, tmp_path):
+    await preparar(modulo)
+    modulo.sanciones = await recargar(modulo, str(tmp_path / 'sanciones.jsonl'))
+    enviados = []
+
+    async def send(contenido=None, embed=None, **kwargs):
+        enviados.append(contenido if embed is None else embed)
+
+    ctx = types.SimpleNamespace(guild=types.SimpleNamespace(id=5), author=types.SimpleNamespace(id=2), prefix='+', send=send)
+
+    def comando(nombre):
+        comando = modulo.bot.get_command(nombre)
+        return lambda *argumentos, **opciones: comando.callback(comando.cog, ctx, *argumentos, **opciones)
+
+    await comando('sancionar')('Steve', 'graves', 2, motivo='  xray   en el spawn ')
+    assert enviados[-1].startswith('Sanción #1 registrada a **Steve** por Graves #2')
+    assert modulo.sanciones.sanciones[1].motivo == 'xray en el spawn'
+    await comando('sancionar')('Steve', 'graves', 99)
+    assert enviados[-1].startswith('No existe la norma graves #99')
+    await comando('sancionar')('no valido!', 'graves', 2)
+    assert 'no es un nombre de jugador válido' in enviados[-1]
+    await comando('sancionar')('steve', 'leves', 1)
+
+    await comando('historial')('STEVE')
+    embed = enviados[-1]
+    assert embed.description.startswith('2 sanciones: 1 leves, 1 graves')
+    assert embed.description.index('**#2**') < embed.description.index('**#1**')
+
+    await comando('anular')(1)
+    assert enviados[-1] == 'Sanción #1 a **Steve** anulada.'
+    await comando('anular')(1)
+    assert enviados[-1] == 'No existe la sanción #1.'
+    await comando('historial')('Alex')
+    assert enviados[-1] == '**Alex** no tiene sanciones.'
@@ -0,0 +1,47 @@
+import asyncio
+
+import aiohttp
+
+from Benchmark_Carga import conectar, desconectar, discord_falso, preparar_bot
+
+# Sesión del gateway (`SesionGateway`): cuando Discord pide una reconexión (op 7), el bot reanuda la sesión en vez de
+# identificarse de nuevo, tarda menos en estar listo y conserva su caché: los permisos por rol y los canales siguen ahí.
+
+SERVIDORES = 50
+OPCIONES = {'servidores': SERVIDORES, 'shards': 1, 'limite_canal': 0, 'ventana_limite': 5, 'proporcion_429': 0, 'latido': 41250}
+
+async def test_reanuda_la_sesion_con_la_cache_completa(modulo, monkeypatch, tmp_path):
+    # El bot guarda sanciones, anuncios y volcados en el directorio actual.
+    monkeypatch.chdir(tmp_path)
+    preparar_bot(modulo)
+    bot = modulo.bot
+    with discord_falso(OPCIONES) as puerto:
+        conexion = await conectar(modulo, puerto, 60)
+        assert conexion is not None, 'el bot no llegó a estar listo'
+        try:
+            control = f'http://127.0.0.1:{puerto}/_control'
+            async with aiohttp.ClientSession() as sesion:
+                async def pedir(ruta, datos):
+                    async with sesion.post(control + ruta, json=datos) as respuesta:
+                        return await respuesta.json()
+
+                async def comando(contenido, staff, espera=5):
+                    datos = {'contenido': modulo.PREFIJO + contenido, 'staff': staff, 'servidor': 1, 'espera': espera}
+                    return (await pedir('/mensaje', datos))['respuesta']
+
+                reanudado = asyncio.ensure_future(bot.wait_for('resumed', timeout=30))
+                await pedir('/reconectar', {})
+                await reanudado
+                tiempos = modulo.sesion_gateway.tiempos
+                assert tiempos['reanudacion'] < tiempos['identificacion']
+                assert len(bot.guilds) == SERVIDORES
+
+                respuesta = await comando('vigilante', True)
+                assert respuesta['embeds'][0]['title'] == 'Vigilante del bucle de eventos'
+                # Sin el rol de administración, el comando del staff se rechaza sin responder.
+                assert await comando('vigilante', False, espera=1) is None
+                assert modulo.metricas.errores[('vigilante', 'CheckAnyFailure')] == 1
+                respuesta = await comando('anunciar <#{canal}> 2h Anuncio de prueba', True)
+                assert 'programado en <#' in respuesta['content']
+        finally:
+            await desconectar(bot, conexion)
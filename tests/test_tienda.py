@@ -0,0 +1,147 @@
+import asyncio
+import contextlib
+import time
+
+from Benchmark_Comandos import preparar
+from Benchmark_Tienda import TebexFalso, longitud_embed, servir, url_catalogo
+
+# Catálogo de la tienda de `+tienda` (`CatalogoTienda`) contra la API de Tebex falsa de `Benchmark_Tienda.py`, con un
+# reloj falso para avanzar el tiempo sin esperar: ninguna petición espera a la tienda, ni sin catálogo guardado ni con el
+# catálogo desfasado; muchas peticiones a la vez lanzan una sola consulta, condicional (304 si nada cambió); los cambios
+# de precios llegan a los embeds; si la tienda no responde se deja de consultarla hasta que pasa el enfriamiento; los
+# embeds respetan los límites de Discord; `+tienda` responde con el enlace mientras llega el catálogo, y cerrar el bot
+# cancela la consulta en curso y cierra la sesión HTTP de cada catálogo.
+
+CATEGORIAS = 30
+PAQUETES = 20
+RETRASO = 0.1
+TIMEOUT = 0.2
+FRESCURA = 300
+ENFRIAMIENTO = 60
+TIENDA = 'https://tienda.example'
+
+@contextlib.asynccontextmanager
+async def tienda_falsa(modulo):
+    tebex = TebexFalso(CATEGORIAS, PAQUETES)
+    ahora = [1000.0]
+    async with servir(tebex) as puerto:
+        catalogo = modulo.CatalogoTienda(url_catalogo(puerto, 'prueba'), FRESCURA, TIMEOUT, 3, ENFRIAMIENTO, reloj=lambda: ahora[0])
+        try:
+            yield tebex, catalogo, ahora
+        finally:
+            await catalogo.cerrar()
+
+async def descargado(catalogo):
+    await catalogo.obtener()
+    await asyncio.sleep(RETRASO + 0.1)
+    return await catalogo.obtener()
+
+async def test_sin_catalogo_no_espera_a_la_tienda(modulo):
+    async with tienda_falsa(modulo) as (tebex, catalogo, ahora):
+        tebex.retraso = RETRASO
+        inicio = time.perf_counter()
+        assert await catalogo.obtener() is None
+        assert time.perf_counter() - inicio < RETRASO
+        await asyncio.sleep(RETRASO + 0.1)
+        categorias = await catalogo.obtener()
+        assert len(categorias) == CATEGORIAS
+        assert categorias[0][1][0]['descripcion'] == 'Ventajas del rango 0-0 & kit diario.'
+        for _ in range(100):
+            await catalogo.obtener()
+        assert tebex.consultas == 1
+
+async def test_desfasado_una_consulta_condicional(modulo):
+    async with tienda_falsa(modulo) as (tebex, catalogo, ahora):
+        categorias = await descargado(catalogo)
+        tebex.retraso = RETRASO
+        ahora[0] += FRESCURA + 1
+        inicio = time.perf_counter()
+        resultados = await asyncio.gather(*(catalogo.obtener() for _ in range(200)))
+        assert time.perf_counter() - inicio < RETRASO
+        assert all(resultado is categorias for resultado in resultados)
+        await asyncio.sleep(RETRASO + 0.1)
+        assert tebex.consultas == 2
+        assert tebex.no_modificados == catalogo.no_modificados == 1
+        assert catalogo.categorias is categorias
+
+async def test_cambio_de_precios(modulo):
+    async with tienda_falsa(modulo) as (tebex, catalogo, ahora):
+        categorias = await descargado(catalogo)
+        anterior = catalogo.embed(TIENDA)
+        tebex.version += 1
+        ahora[0] += FRESCURA + 1
+        await descargado(catalogo)
+        assert catalogo.categorias is not categorias
+        assert abs(catalogo.categorias[0][1][0]['precio'] - (4.99 + tebex.version)) < 1e-6
+        assert catalogo.embed(TIENDA) is not anterior
+
+async def test_cortocircuito_y_recuperacion(modulo):
+    async with tienda_falsa(modulo) as (tebex, catalogo, ahora):
+        bueno = await descargado(catalogo)
+        tebex.retraso = TIMEOUT + 0.2
+        for _ in range(3):
+            ahora[0] += FRESCURA + 1
+            assert await catalogo.obtener() is bueno
+            await asyncio.sleep(TIMEOUT + 0.05)
+        assert (catalogo.errores, catalogo.cortes) == (3, 1) and catalogo.abierto
+        assert 'no responde' in catalogo.embed(TIENDA).footer.text
+        consultas = tebex.consultas
+        for _ in range(100):
+            ahora[0] += 1
+            assert await catalogo.obtener() is bueno
+        assert tebex.consultas == consultas
+
+        # Pasado el enfriamiento, una consulta de prueba; la tienda responde y todo vuelve a la normalidad.
+        tebex.retraso = 0
+        ahora[0] += ENFRIAMIENTO
+        await catalogo.obtener()
+        await asyncio.sleep(0.3)
+        assert tebex.consultas == consultas + 1
+        assert not catalogo.abierto and catalogo.fallos_seguidos == 0
+        assert 'no responde' not in catalogo.embed(TIENDA).footer.text
+
+async def test_embeds_y_busqueda(modulo):
+    async with tienda_falsa(modulo) as (tebex, catalogo, ahora):
+        await descargado(catalogo)
+        embed = catalogo.embed(TIENDA)
+        assert longitud_embed(embed) <= 6000 and len(embed.fields) <= 25
+        assert all(len(campo.value) <= 1024 and len(campo.name) <= 256 for campo in embed.fields)
+        assert catalogo.embed(TIENDA) is embed
+        assert catalogo.embed(TIENDA, 'vip').title == 'VIP'
+        assert catalogo.embed(TIENDA, 'rango 1-2').title == 'Rango 1-2'
+        assert catalogo.embed(TIENDA, 'no existe') is None
+
+async def test_comando_tienda_y_cierre_del_bot(modulo):
+    mensaje, http = await preparar(modulo)
+    enviados = []
+
+    async def peticion(route, **kwargs):
+        enviados.append(kwargs.get('json') or {})
+        return await http.request(route, **kwargs)
+
+    modulo._peticion_rest = peticion
+    tebex = TebexFalso(CATEGORIAS, PAQUETES)
+    async with servir(tebex) as puerto:
+        # Una tienda con token propio, con su catálogo registrado como los que crea el bot.
+        modulo.TOKENS_TEBEX[TIENDA] = 'comando'
+        catalogo = modulo.catalogos_tienda['comando'] = modulo.CatalogoTienda(url_catalogo(puerto, 'comando'), FRESCURA, TIMEOUT, 3, ENFRIAMIENTO)
+        modulo.configuraciones.por_defecto.tienda = TIENDA
+
+        # Sin catálogo: el enlace al momento, mientras se descarga.
+        tebex.retraso = RETRASO
+        inicio = time.perf_counter()
+        await modulo.bot.on_message(mensaje(1, f'{modulo.PREFIJO}tienda'))
+        assert time.perf_counter() - inicio < RETRASO
+        assert TIENDA in enviados[-1]['content']
+        await asyncio.sleep(RETRASO + 0.1)
+        await modulo.bot.on_message(mensaje(2, f'{modulo.PREFIJO}tienda'))
+        assert len(enviados) == 2
+        assert enviados[-1]['embeds'][0]['title'] == 'Tienda'
+
+        # Cerrar el bot con una consulta en curso: se cancela y se cierra la sesión.
+        catalogo._actualizado = -FRESCURA
+        await catalogo.obtener()
+        consulta = catalogo._consulta
+        await modulo.bot.close()
+        assert consulta is not None and consulta.cancelled()
+        assert catalogo._sesion is None and catalogo._consulta is None
@@ -0,0 +1,64 @@
+# Vigilante del bucle (`VigilanteBucle`): detecta un bloqueo del bucle de eventos, lo atribuye al comando que lo
+# causa, y al detenerlo y volver a iniciarlo queda un solo hilo vigilante.
+import asyncio
+import os
+import threading
+import time
+
+def vigilantes():
+    return [hilo for hilo in threading.enumerate() if hilo.name == 'vigilante-bucle']
+
+async def test_registra_el_bloqueo_del_comando(modulo, tmp_path):
+    vigilante = modulo.VigilanteBucle(0.1, str(tmp_path), 2, intervalo=0.01)
+    vigilante.iniciar()
+    try:
+        async def comando():
+            vigilante.comandos[asyncio.current_task()] = 'lento'
+            time.sleep(0.4)  # Bloquea el bucle
+        await asyncio.create_task(comando())
+        await asyncio.sleep(0.1)  # Deja que el vigilante termine de medir el bloqueo
+    finally:
+        vigilante.detener()
+    (nombre, (veces, maximo, total)), = vigilante.peores()
+    assert (nombre, veces) == ('lento', 1)
+    assert 0.2 < maximo == total < 0.5
+    volcado, = os.listdir(tmp_path)
+    with open(tmp_path / volcado, encoding='utf-8') as archivo:
+        assert archivo.readline() == 'Comando: lento\n'
+
+async def test_detener_e_iniciar_deja_un_solo_hilo(modulo, tmp_path):
+    antes = len(vigilantes())
+    vigilante = modulo.VigilanteBucle(0.1, str(tmp_path), 2, intervalo=0.01)
+    for _ in range(5):
+        vigilante.iniciar()
+        vigilante.detener()
+        assert len(vigilantes()) == antes
+    vigilante.iniciar()
+    assert len(vigilantes()) == antes + 1
+    vigilante.detener()
+    assert len(vigilantes()) == antes
+
+def test_cuenta_todos_los_bloqueos_con_varios_hilos(modulo, tmp_path):
+    # Varios hilos registran bloqueos a la vez mientras otro consulta `peores`: no se pierde ninguno y la consulta
+    # nunca ve el diccionario a medio cambiar.
+    vigilante = modulo.VigilanteBucle(0.1, str(tmp_path), 2)
+    vigilante._volcar = lambda *argumentos: None
+    vigilante._parar = threading.Event()
+    vigilante._bucle = asyncio.new_event_loop()  # Sin tarea en curso: los bloqueos se anotan como 'callback'
+    vigilante._hilo_bucle = threading.get_ident()
+    vigilante._latido = 1.0
+    try:
+        def registrar():
+            for _ in range(2000):
+                vigilante._capturar(0.0)  # Un latido distinto del actual: el bloqueo ya terminó
+        hilos = [threading.Thread(target=registrar) for _ in range(4)]
+        for hilo in hilos:
+            hilo.start()
+        while any(hilo.is_alive() for hilo in hilos):
+            vigilante.peores()
+        for hilo in hilos:
+            hilo.join()
+    finally:
+        vigilante._bucle.close()
+    (nombre, (veces, _, _)), = vigilante.peores()
+    assert (nombre, veces) == ('callback', 8000)
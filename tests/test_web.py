@@ -0,0 +1,63 @@
+import subprocess
+import sys
+
+import aiohttp
+import flask
+
+from conftest import DIRECTORIO
+
+# Los dos modos del servidor web (`MODO_SERVIDOR_WEB`): el servidor Flask en su hilo (`keep_alive`) y el de aiohttp en
+# el bucle de eventos del bot (`keep_alive_async`) responden lo mismo, y el modo `'async'` no carga Flask ni abre hilos.
+
+def metricas_de_prueba(modulo):
+    for numero in range(20):
+        modulo.metricas.observar_comando(f'comando_{numero % 4}', 0.001 * numero)
+    return modulo.metricas
+
+def app_flask(monkeypatch, webserver, metricas):
+    # `run` termina con `app.run`, que no vuelve nunca: se sustituye para quedarse con la aplicación y probarla sin red.
+    aplicaciones = []
+    monkeypatch.setattr(flask.Flask, 'run', lambda app, **opciones: aplicaciones.append(app))
+    webserver.run(metricas)
+    return aplicaciones[0].test_client()
+
+async def test_async_responde_lo_mismo_que_flask(modulo, monkeypatch):
+    webserver = sys.modules['webserver']
+    metricas = metricas_de_prueba(modulo)
+    cliente = app_flask(monkeypatch, webserver, metricas)
+    runner = await webserver.keep_alive_async(modulo.bot, metricas, host='127.0.0.1', port=0)
+    try:
+        host, puerto = runner.addresses[0][:2]
+        async with aiohttp.ClientSession() as sesion:
+            async with sesion.get(f'http://{host}:{puerto}/') as respuesta:
+                assert respuesta.status == 200
+                assert await respuesta.read() == cliente.get('/').data
+            async with sesion.get(f'http://{host}:{puerto}/metrics') as respuesta:
+                assert respuesta.status == 200
+                assert respuesta.headers['Content-Type'] == cliente.get('/metrics').headers['Content-Type']
+                assert 'bot_comandos_total' in await respuesta.text()
+            # El bot no está conectado: `/healthz` responde 503 y `/livez` sigue respondiendo.
+            async with sesion.get(f'http://{host}:{puerto}/healthz') as respuesta:
+                assert respuesta.status == 503
+                assert (await respuesta.json())['listo'] is False
+            async with sesion.get(f'http://{host}:{puerto}/livez') as respuesta:
+                assert respuesta.status == 200
+    finally:
+        await runner.cleanup()
+
+def test_modo_async_no_carga_flask_ni_abre_hilos(rutas):
+    # En un proceso nuevo, para que Flask no esté ya importado por otra prueba.
+    codigo = f'''
+import asyncio, sys, threading
+sys.path.insert(0, {DIRECTORIO!r})
+from Benchmark_Comandos import cargar_bot
+modulo = cargar_bot(*{rutas!r})
+hilos = threading.active_count()
+async def principal():
+    runner = await sys.modules['webserver'].keep_alive_async(modulo.bot, modulo.metricas, host='127.0.0.1', port=0)
+    await runner.cleanup()
+asyncio.run(principal())
+print('flask' in sys.modules, threading.active_count() - hilos)
+'''
+    salida = subprocess.run([sys.executable, '-c', codigo], capture_output=True, text=True, timeout=60, check=True).stdout
+    assert salida.split() == ['False', '0']